@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+
+from app.core.responses import DataclassJSONResponse
+from app.schemas.stats import UserStatsRead
+from app.services.async_user_service import AsyncUserService
+from app.dependencies.user_dependencies import get_async_user_service
+
+
+router = APIRouter()
+
+
+@router.get(
+	"",
+	response_model=UserStatsRead,
+	response_class=DataclassJSONResponse,
+	summary="Агрегаты по пользователям и переводам",
+)
+async def get_stats(service: AsyncUserService = Depends(get_async_user_service)) -> DataclassJSONResponse:
+	"""
+	Возвращает агрегаты, которые репозиторий поддерживает при каждом изменении.
+	
+	Args:
+		service: Асинхронный сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Агрегаты в формате UserStatsRead
+	"""
+	return DataclassJSONResponse(await service.get_stats())
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Body, Depends, Header
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.core.etag import ETAG_HEADER, IF_MATCH_HEADER, IF_MATCH_PATTERN, format_etag, parse_if_match
+from app.core.idempotency import IDEMPOTENCY_HEADER, IdempotencyCache
+from app.core.responses import DataclassJSONResponse
+from app.schemas.transfer import TransferBatchResponse, TransferCreate, TransferResponse
+from app.services.async_user_service import AsyncUserService
+from app.dependencies.idempotency_dependencies import get_idempotency_cache
+from app.dependencies.user_dependencies import get_async_user_service
+
+
+router = APIRouter()
+
+
+@router.post("", response_model=TransferResponse, status_code=200, summary="Перевести деньги")
+async def transfer_money(
+	payload: TransferCreate,
+	idempotency_key: str | None = Header(
+		default=None, alias=IDEMPOTENCY_HEADER, max_length=255,
+		description="Ключ идемпотентности: повтор запроса с тем же ключом вернет первый ответ",
+	),
+	if_match: str | None = Header(
+		default=None, alias=IF_MATCH_HEADER, pattern=IF_MATCH_PATTERN,
+		description="ETag отправителя: перевод выполнится, только если его версия не изменилась (иначе 409)",
+	),
+	service: AsyncUserService = Depends(get_async_user_service),
+	cache: IdempotencyCache = Depends(get_idempotency_cache)
+) -> Response:
+	"""
+	Переводит деньги между пользователями.
+	
+	Args:
+		payload: Данные для перевода
+		idempotency_key: Ключ идемпотентности (необязательный)
+		if_match: ETag отправителя (необязательный)
+		service: Асинхронный сервис пользователей
+		cache: Кеш ответов идемпотентных запросов
+		
+	Returns:
+		Response: Результат операции перевода в формате TransferResponse; ETag - новая версия отправителя
+	"""
+	expected_version = parse_if_match(if_match)
+	
+	async def run() -> Response:
+		from_user, to_user = await service.transfer(
+			from_user_id=payload.from_user_id,
+			to_user_id=payload.to_user_id,
+			amount=payload.amount,
+			expected_version=expected_version,
+		)
+		
+		return DataclassJSONResponse(TransferResponse(
+			from_user_id=from_user.id,
+			to_user_id=to_user.id,
+			amount=payload.amount,
+			from_user_balance=from_user.balance,
+			to_user_balance=to_user.balance,
+			from_user_version=from_user.version,
+			to_user_version=to_user.version,
+		).model_dump(), headers={ETAG_HEADER: format_etag(from_user.version)})
+	
+	if idempotency_key is None:
+		return await run()
+	return await cache.execute_async(("transfer", idempotency_key), (payload, expected_version), run)
+
+
+@router.post(
+	"/batch",
+	response_model=TransferBatchResponse,
+	status_code=200,
+	summary="Выполнить пакет переводов",
+)
+async def transfer_money_batch(
+	payload: list[TransferCreate] = Body(min_length=1, max_length=settings.TRANSFER_BATCH_MAX_SIZE),
+	idempotency_key: str | None = Header(
+		default=None, alias=IDEMPOTENCY_HEADER, max_length=255,
+		description="Ключ идемпотентности: повтор запроса с тем же ключом вернет первый ответ",
+	),
+	service: AsyncUserService = Depends(get_async_user_service),
+	cache: IdempotencyCache = Depends(get_idempotency_cache)
+) -> Response:
+	"""
+	Атомарно выполняет пакет переводов: либо все, либо ни одного.
+	
+	Args:
+		payload: Список переводов
+		idempotency_key: Ключ идемпотентности (необязательный)
+		service: Асинхронный сервис пользователей
+		cache: Кеш ответов идемпотентных запросов
+		
+	Returns:
+		Response: Балансы после каждого перевода в формате TransferBatchResponse
+	"""
+	async def run() -> Response:
+		balances = await service.transfer_batch(
+			[(item.from_user_id, item.to_user_id, item.amount) for item in payload]
+		)
+		
+		return DataclassJSONResponse(TransferBatchResponse(results=[
+			TransferResponse(
+				from_user_id=item.from_user_id,
+				to_user_id=item.to_user_id,
+				amount=item.amount,
+				from_user_balance=from_balance,
+				to_user_balance=to_balance,
+			)
+			for item, (from_balance, to_balance) in zip(payload, balances)
+		]).model_dump())
+	
+	if idempotency_key is None:
+		return await run()
+	return await cache.execute_async(("transfer_batch", idempotency_key), payload, run)
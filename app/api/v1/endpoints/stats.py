@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+
+from app.core.profiling import ProfilingRoute
+from app.core.responses import DataclassJSONResponse
+from app.schemas.stats import UserStatsRead
+from app.services.user_service import UserService
+from app.dependencies.user_dependencies import get_user_service
+
+
+# Синхронные эндпоинты выполняются в пуле потоков: там их профилирует ProfilingRoute
+router = APIRouter(route_class=ProfilingRoute)
+
+
+@router.get(
+	"",
+	response_model=UserStatsRead,
+	response_class=DataclassJSONResponse,
+	summary="Агрегаты по пользователям и переводам",
+)
+def get_stats(service: UserService = Depends(get_user_service)) -> DataclassJSONResponse:
+	"""
+	Возвращает агрегаты, которые репозиторий поддерживает при каждом изменении.
+	
+	Сумма балансов (total_balance) меняется только созданием пользователей,
+	поэтому проверка сохранения денег не требует выгрузки всех счетов.
+	
+	Args:
+		service: Сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Агрегаты в формате UserStatsRead
+	"""
+	return DataclassJSONResponse(service.get_stats())
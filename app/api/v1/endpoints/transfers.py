@@ -1,38 +1,116 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Header
+from fastapi.responses import Response
 
-from app.schemas.transfer import TransferCreate, TransferResponse
+from app.core.config import settings
+from app.core.etag import ETAG_HEADER, IF_MATCH_HEADER, IF_MATCH_PATTERN, format_etag, parse_if_match
+from app.core.idempotency import IDEMPOTENCY_HEADER, IdempotencyCache
+from app.core.profiling import ProfilingRoute
+from app.core.responses import DataclassJSONResponse
+from app.schemas.transfer import TransferBatchResponse, TransferCreate, TransferResponse
 from app.services.user_service import UserService
+from app.dependencies.idempotency_dependencies import get_idempotency_cache
 from app.dependencies.user_dependencies import get_user_service
 
 
-router = APIRouter()
+# Синхронные эндпоинты выполняются в пуле потоков: там их профилирует ProfilingRoute
+router = APIRouter(route_class=ProfilingRoute)
 
 
 @router.post("", response_model=TransferResponse, status_code=200, summary="Перевести деньги")
 def transfer_money(
 	payload: TransferCreate,
-	service: UserService = Depends(get_user_service)
-) -> TransferResponse:
+	idempotency_key: str | None = Header(
+		default=None, alias=IDEMPOTENCY_HEADER, max_length=255,
+		description="Ключ идемпотентности: повтор запроса с тем же ключом вернет первый ответ",
+	),
+	if_match: str | None = Header(
+		default=None, alias=IF_MATCH_HEADER, pattern=IF_MATCH_PATTERN,
+		description="ETag отправителя: перевод выполнится, только если его версия не изменилась (иначе 409)",
+	),
+	service: UserService = Depends(get_user_service),
+	cache: IdempotencyCache = Depends(get_idempotency_cache)
+) -> Response:
 	"""
 	Переводит деньги между пользователями.
 	
 	Args:
 		payload: Данные для перевода
+		idempotency_key: Ключ идемпотентности (необязательный)
+		if_match: ETag отправителя (необязательный)
 		service: Сервис пользователей
+		cache: Кеш ответов идемпотентных запросов
 		
 	Returns:
-		TransferResponse: Результат операции перевода
+		Response: Результат операции перевода в формате TransferResponse; ETag - новая версия отправителя
 	"""
-	from_user, to_user = service.transfer(
-		from_user_id=payload.from_user_id,
-		to_user_id=payload.to_user_id,
-		amount=payload.amount
-	)
+	expected_version = parse_if_match(if_match)
 	
-	return TransferResponse(
-		from_user_id=from_user.id,
-		to_user_id=to_user.id,
-		amount=payload.amount,
-		from_user_balance=from_user.balance,
-		to_user_balance=to_user.balance,
-	)
+	def run() -> Response:
+		from_user, to_user = service.transfer(
+			from_user_id=payload.from_user_id,
+			to_user_id=payload.to_user_id,
+			amount=payload.amount,
+			expected_version=expected_version,
+		)
+		
+		return DataclassJSONResponse(TransferResponse(
+			from_user_id=from_user.id,
+			to_user_id=to_user.id,
+			amount=payload.amount,
+			from_user_balance=from_user.balance,
+			to_user_balance=to_user.balance,
+			from_user_version=from_user.version,
+			to_user_version=to_user.version,
+		).model_dump(), headers={ETAG_HEADER: format_etag(from_user.version)})
+	
+	if idempotency_key is None:
+		return run()
+	return cache.execute(("transfer", idempotency_key), (payload, expected_version), run)
+
+
+@router.post(
+	"/batch",
+	response_model=TransferBatchResponse,
+	status_code=200,
+	summary="Выполнить пакет переводов",
+)
+def transfer_money_batch(
+	payload: list[TransferCreate] = Body(min_length=1, max_length=settings.TRANSFER_BATCH_MAX_SIZE),
+	idempotency_key: str | None = Header(
+		default=None, alias=IDEMPOTENCY_HEADER, max_length=255,
+		description="Ключ идемпотентности: повтор запроса с тем же ключом вернет первый ответ",
+	),
+	service: UserService = Depends(get_user_service),
+	cache: IdempotencyCache = Depends(get_idempotency_cache)
+) -> Response:
+	"""
+	Атомарно выполняет пакет переводов: либо все, либо ни одного.
+	
+	Args:
+		payload: Список переводов
+		idempotency_key: Ключ идемпотентности (необязательный)
+		service: Сервис пользователей
+		cache: Кеш ответов идемпотентных запросов
+		
+	Returns:
+		Response: Балансы после каждого перевода в формате TransferBatchResponse
+	"""
+	def run() -> Response:
+		balances = service.transfer_batch(
+			[(item.from_user_id, item.to_user_id, item.amount) for item in payload]
+		)
+		
+		return DataclassJSONResponse(TransferBatchResponse(results=[
+			TransferResponse(
+				from_user_id=item.from_user_id,
+				to_user_id=item.to_user_id,
+				amount=item.amount,
+				from_user_balance=from_balance,
+				to_user_balance=to_balance,
+			)
+			for item, (from_balance, to_balance) in zip(payload, balances)
+		]).model_dump())
+	
+	if idempotency_key is None:
+		return run()
+	return cache.execute(("transfer_batch", idempotency_key), payload, run)
@@ -1,41 +1,297 @@
-from fastapi import APIRouter, Depends
+from typing import Literal
 
-from app.schemas.user import UserCreate, UserRead
+from fastapi import APIRouter, Depends, Header, Path, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.etag import ETAG_HEADER, format_etag
+from app.core.idempotency import IDEMPOTENCY_HEADER, IdempotencyCache
+from app.core.ndjson import NDJSON_REQUEST_BODY
+from app.core.profiling import ProfilingRoute
+from app.core.responses import DataclassJSONResponse
+from app.schemas.transfer import TransferPage
+from app.schemas.user import UserBulkResult, UserCreate, UserPage, UserRead
+from app.services.bulk_import import import_users
+from app.services.user_export import EXPORT_FORMATS, encode_users
 from app.services.user_service import UserService
+from app.dependencies.idempotency_dependencies import get_idempotency_cache
 from app.dependencies.user_dependencies import get_user_service
 
 
-router = APIRouter()
+# Синхронные эндпоинты выполняются в пуле потоков: там их профилирует ProfilingRoute
+router = APIRouter(route_class=ProfilingRoute)
 
 
-@router.post("", response_model=UserRead, status_code=201, summary="Создать пользователя")
+@router.post(
+	"",
+	response_model=UserRead,
+	response_class=DataclassJSONResponse,
+	status_code=201,
+	summary="Создать пользователя",
+)
 def create_user(
-	payload: UserCreate, 
-	service: UserService = Depends(get_user_service)
-) -> UserRead:
+	payload: UserCreate,
+	idempotency_key: str | None = Header(
+		default=None, alias=IDEMPOTENCY_HEADER, max_length=255,
+		description="Ключ идемпотентности: повтор запроса с тем же ключом вернет первый ответ",
+	),
+	service: UserService = Depends(get_user_service),
+	cache: IdempotencyCache = Depends(get_idempotency_cache)
+) -> Response:
 	"""
 	Создает нового пользователя в системе.
 	
 	Args:
 		payload: Данные для создания пользователя
+		idempotency_key: Ключ идемпотентности (необязательный)
+		service: Сервис пользователей
+		cache: Кеш ответов идемпотентных запросов
+		
+	Returns:
+		Response: Созданный пользователь в формате UserRead
+	"""
+	def run() -> Response:
+		user = service.create_user(name=payload.name, email=payload.email, balance=payload.balance)
+		# Данные уже провалидированы на входе: сериализуем dataclass напрямую
+		return DataclassJSONResponse(user, status_code=201)
+	
+	if idempotency_key is None:
+		return run()
+	return cache.execute(("create_user", idempotency_key), payload, run)
+
+
+@router.post(
+	"/bulk",
+	response_model=UserBulkResult,
+	response_class=DataclassJSONResponse,
+	summary="Массовый импорт пользователей из NDJSON",
+	openapi_extra=NDJSON_REQUEST_BODY,
+)
+async def create_users_bulk(
+	request: Request,
+	service: UserService = Depends(get_user_service)
+) -> DataclassJSONResponse:
+	"""
+	Создает пользователей из тела NDJSON: по объекту UserCreate на строку.
+	
+	Тело читается потоком и создается пакетами; ошибки отдельных строк
+	попадают в ответ и не прерывают импорт. Эндпоинт асинхронный, чтобы
+	читать тело по мере поступления, а пакеты создаются в пуле потоков.
+	
+	Args:
+		request: Запрос с телом NDJSON
+		service: Сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Итог импорта в формате UserBulkResult
+	"""
+	report = await import_users(
+		request.stream(),
+		lambda users: run_in_threadpool(service.create_users, users),
+		batch_size=settings.USERS_BULK_BATCH_SIZE,
+		max_line_bytes=settings.USERS_BULK_MAX_LINE_BYTES,
+		max_errors=settings.USERS_BULK_MAX_ERRORS,
+	)
+	return DataclassJSONResponse({
+		"created": report.created,
+		"failed": report.failed,
+		"errors": report.errors,
+		"errors_truncated": report.errors_truncated,
+	})
+
+
+@router.get(
+	"",
+	response_model=UserPage,
+	response_class=DataclassJSONResponse,
+	summary="Список пользователей",
+)
+def list_users(
+	limit: int = Query(
+		default=settings.USERS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.USERS_PAGE_MAX_LIMIT,
+		description="Размер страницы",
+	),
+	after_id: int | None = Query(
+		default=None, ge=0, le=2**63 - 1, description="Курсор: id последнего пользователя предыдущей страницы",
+	),
+	service: UserService = Depends(get_user_service)
+) -> DataclassJSONResponse:
+	"""
+	Возвращает страницу пользователей в порядке возрастания id.
+	
+	Args:
+		limit: Размер страницы
+		after_id: Курсор предыдущей страницы (next_cursor)
+		service: Сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Страница в формате UserPage
+	"""
+	users, next_cursor = service.list_users_page(limit=limit, after_id=after_id)
+	# Объекты User сериализуются orjson напрямую, без UserRead и повторной валидации
+	return DataclassJSONResponse({"items": users, "next_cursor": next_cursor})
+
+
+@router.get(
+	"/export",
+	response_class=StreamingResponse,
+	summary="Выгрузка всех пользователей",
+	responses={200: {"content": {media_type: {} for media_type, _ in EXPORT_FORMATS.values()}}},
+)
+def export_users(
+	export_format: Literal["ndjson", "csv"] = Query(
+		default="ndjson", alias="format", description="Формат выгрузки",
+	),
+	service: UserService = Depends(get_user_service)
+) -> StreamingResponse:
+	"""
+	Выгружает всех пользователей с балансами на момент запроса потоком NDJSON или CSV.
+	
+	Срез фиксируется в пуле потоков при вызове эндпоинта, а куски
+	кодируются и отдаются по мере чтения клиентом: память не зависит от количества пользователей.
+	
+	Args:
+		export_format: Формат выгрузки (ndjson или csv)
 		service: Сервис пользователей
 		
 	Returns:
-		UserRead: Созданный пользователь
+		StreamingResponse: Пользователи по возрастанию id
 	"""
-	user = service.create_user(name=payload.name, email=payload.email, balance=payload.balance)
-	return UserRead.model_validate(user.__dict__)
+	media_type, extension = EXPORT_FORMATS[export_format]
+	users = service.export_users()
+	return StreamingResponse(
+		encode_users(users, export_format, settings.USERS_EXPORT_CHUNK_ROWS),
+		media_type=media_type,
+		headers={"Content-Disposition": f'attachment; filename="users.{extension}"'},
+	)
 
 
-@router.get("", response_model=list[UserRead], summary="Список пользователей")
-def list_users(service: UserService = Depends(get_user_service)) -> list[UserRead]:
+@router.get(
+	"/search",
+	response_model=UserPage,
+	response_class=DataclassJSONResponse,
+	summary="Поиск пользователей по началу имени или email",
+)
+def search_users(
+	q: str = Query(
+		min_length=1, max_length=settings.USERS_SEARCH_MAX_QUERY_LENGTH,
+		description="Начало имени или email (регистр не важен)",
+	),
+	limit: int = Query(
+		default=settings.USERS_SEARCH_DEFAULT_LIMIT, ge=1, le=settings.USERS_SEARCH_MAX_LIMIT,
+		description="Размер страницы",
+	),
+	after_id: int | None = Query(
+		default=None, ge=0, le=2**63 - 1, description="Курсор: id последнего пользователя предыдущей страницы",
+	),
+	service: UserService = Depends(get_user_service)
+) -> DataclassJSONResponse:
+	"""
+	Возвращает страницу пользователей, у которых имя или email начинается с запроса.
+	
+	Хранилища ищут по отсортированному индексу имен и email, поэтому
+	стоимость запроса зависит от размера страницы, а не от количества
+	пользователей. Пользователи упорядочены по совпавшему имени или email.
+	
+	Args:
+		q: Начало имени или email
+		limit: Размер страницы
+		after_id: Курсор предыдущей страницы (next_cursor)
+		service: Сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Страница в формате UserPage
+	"""
+	users, next_cursor = service.search_users(q, limit=limit, after_id=after_id)
+	return DataclassJSONResponse({"items": users, "next_cursor": next_cursor})
+
+
+@router.get(
+	"/top",
+	response_model=list[UserRead],
+	response_class=DataclassJSONResponse,
+	summary="Самые богатые пользователи",
+)
+def top_users(
+	n: int = Query(
+		default=settings.USERS_TOP_DEFAULT_N, ge=1, le=settings.USERS_TOP_MAX_N,
+		description="Количество пользователей",
+	),
+	service: UserService = Depends(get_user_service)
+) -> DataclassJSONResponse:
+	"""
+	Возвращает n пользователей с наибольшими балансами.
+	
+	Хранилища держат упорядоченный индекс балансов, поэтому стоимость
+	запроса зависит от n, а не от количества пользователей. Маршрут
+	объявлен раньше /{user_id}, чтобы "top" не разбирался как id.
+	
+	Args:
+		n: Количество пользователей
+		service: Сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Пользователи по убыванию баланса
+	"""
+	return DataclassJSONResponse(service.top_users(n))
+
+
+@router.get(
+	"/{user_id}",
+	response_model=UserRead,
+	response_class=DataclassJSONResponse,
+	summary="Получить пользователя",
+)
+def get_user(
+	user_id: int = Path(le=2**63 - 1, description="ID пользователя"),
+	service: UserService = Depends(get_user_service)
+) -> DataclassJSONResponse:
+	"""
+	Возвращает пользователя с текущей версией в заголовке ETag.
+	
+	ETag передается в If-Match перевода, чтобы он выполнился только
+	если баланс отправителя с момента чтения не менялся.
+	
+	Args:
+		user_id: ID пользователя
+		service: Сервис пользователей
+		
+	Returns:
+		DataclassJSONResponse: Пользователь в формате UserRead
+	"""
+	user = service.get_user(user_id)
+	return DataclassJSONResponse(user, headers={ETAG_HEADER: format_etag(user.version)})
+
+
+@router.get(
+	"/{user_id}/transfers",
+	response_model=TransferPage,
+	response_class=DataclassJSONResponse,
+	summary="История переводов пользователя",
+)
+def list_user_transfers(
+	user_id: int = Path(le=2**63 - 1, description="ID пользователя"),
+	limit: int = Query(
+		default=settings.TRANSFERS_PAGE_DEFAULT_LIMIT, ge=1, le=settings.TRANSFERS_PAGE_MAX_LIMIT,
+		description="Размер страницы",
+	),
+	before_id: int | None = Query(
+		default=None, ge=1, le=2**63 - 1, description="Курсор: id последнего перевода предыдущей страницы",
+	),
+	service: UserService = Depends(get_user_service)
+) -> DataclassJSONResponse:
 	"""
-	Возвращает список всех пользователей в системе.
+	Возвращает страницу истории переводов пользователя, от новых к старым.
 	
 	Args:
+		user_id: ID пользователя
+		limit: Размер страницы
+		before_id: Курсор предыдущей страницы (next_cursor)
 		service: Сервис пользователей
 		
 	Returns:
-		list[UserRead]: Список пользователей
+		DataclassJSONResponse: Страница в формате TransferPage
 	"""
-	return [UserRead.model_validate(u.__dict__) for u in service.list_users()]
+	transfers, next_cursor = service.list_user_transfers(user_id, limit=limit, before_id=before_id)
+	return DataclassJSONResponse({"items": transfers, "next_cursor": next_cursor})
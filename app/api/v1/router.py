@@ -1,7 +1,16 @@
 from fastapi import APIRouter
-from .endpoints import users, transfers
+
+from app.core.config import settings
+from .endpoints import async_stats, async_transfers, async_users, stats, users, transfers
 
 
 router = APIRouter()
-router.include_router(users.router, prefix="/users", tags=["users"])
-router.include_router(transfers.router, prefix="/transfer", tags=["transfers"])
+if settings.ASYNC_ENDPOINTS:
+	# Нативно асинхронные эндпоинты: выполняются в цикле событий без пула потоков
+	router.include_router(async_users.router, prefix="/users", tags=["users"])
+	router.include_router(async_transfers.router, prefix="/transfer", tags=["transfers"])
+	router.include_router(async_stats.router, prefix="/stats", tags=["stats"])
+else:
+	router.include_router(users.router, prefix="/users", tags=["users"])
+	router.include_router(transfers.router, prefix="/transfer", tags=["transfers"])
+	router.include_router(stats.router, prefix="/stats", tags=["stats"])
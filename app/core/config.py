@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +15,64 @@ class Settings(BaseSettings):
 	VERSION: str = "0.1.0"
 	API_V1_PREFIX: str = "/api/v1"
 	START_BALANCE: int = 0
+	# Хранилище пользователей: "memory" - объекты User, "columnar" - компактные колонки,
+	# "sqlite" - база SQLite в файле SQLITE_PATH, "shared_memory" - разделяемая память,
+	# общая для воркеров uvicorn
+	USER_REPOSITORY_BACKEND: Literal["memory", "columnar", "sqlite", "shared_memory"] = "memory"
+	LOCK_STRIPES: int = 64
+	SQLITE_PATH: str = "users.sqlite3"
+	# PRAGMA synchronous для SQLite: FULL - fsync на каждую транзакцию
+	SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "FULL"
+	# Сегмент разделяемой памяти: имя и фиксированные размеры (пользователи, переводы в журнале)
+	SHARED_MEMORY_NAME: str = "abistep-users"
+	SHARED_MEMORY_CAPACITY: int = 100_000
+	SHARED_MEMORY_LEDGER_CAPACITY: int = 250_000
+	# Журнал предзаписи (только для USER_REPOSITORY_BACKEND=memory); None - без сохранения на диск
+	WAL_PATH: str | None = None
+	# Групповая фиксация журнала: окно ожидания и размер пакета, после которого fsync идет сразу
+	WAL_GROUP_COMMIT_WINDOW_MS: float = 1.0
+	WAL_GROUP_COMMIT_MAX_BATCH: int = 256
+	# Файл контрольной точки (снимка): при старте отображается в память вместо тестовых данных
+	SNAPSHOT_PATH: str | None = None
+	# Период записи контрольных точек, в секундах (0 - не записывать автоматически)
+	CHECKPOINT_INTERVAL_SECONDS: float = 300.0
+	# Использовать async-версии эндпоинтов пользователей и переводов
+	ASYNC_ENDPOINTS: bool = False
+	TRANSFER_BATCH_MAX_SIZE: int = 10_000
+	# Одиночные переводы через очередь с потоком-писателем, выполняющим их пакетами:
+	# максимальный размер пакета и ожидание его пополнения после первого перевода
+	TRANSFER_ENGINE_ENABLED: bool = False
+	TRANSFER_ENGINE_MAX_BATCH: int = 256
+	TRANSFER_ENGINE_MAX_WAIT_MS: float = 0.0
+	USERS_PAGE_DEFAULT_LIMIT: int = 100
+	USERS_PAGE_MAX_LIMIT: int = 1000
+	# Самые богатые пользователи: размер выдачи по умолчанию и максимальный
+	USERS_TOP_DEFAULT_N: int = 10
+	USERS_TOP_MAX_N: int = 1000
+	# Префиксный поиск по имени и email: размер страницы и длина запроса
+	USERS_SEARCH_DEFAULT_LIMIT: int = 20
+	USERS_SEARCH_MAX_LIMIT: int = 100
+	USERS_SEARCH_MAX_QUERY_LENGTH: int = 255
+	# Массовый импорт NDJSON: строк в пакете создания, длина строки и число ошибок в ответе
+	USERS_BULK_BATCH_SIZE: int = 1000
+	USERS_BULK_MAX_LINE_BYTES: int = 64 * 1024
+	USERS_BULK_MAX_ERRORS: int = 1000
+	# Потоковая выгрузка: пользователей в одном куске ответа
+	USERS_EXPORT_CHUNK_ROWS: int = 1000
+	TRANSFERS_PAGE_DEFAULT_LIMIT: int = 50
+	TRANSFERS_PAGE_MAX_LIMIT: int = 1000
+	# Кеш ответов для Idempotency-Key: время хранения, количество и суммарный размер ответов
+	IDEMPOTENCY_TTL_SECONDS: float = 86_400.0
+	IDEMPOTENCY_MAX_ENTRIES: int = 100_000
+	IDEMPOTENCY_MAX_BYTES: int = 64 * 1024 * 1024
+	# Метрики Prometheus на /metrics: задержки запросов и операций репозитория
+	METRICS_ENABLED: bool = True
+	# Профилирование запросов: доля запросов по выборке и токен заголовка X-Debug-Profile,
+	# по которому профилируется запрос и открывается /debug/profiles (None - эндпоинты закрыты)
+	PROFILING_SAMPLE_RATE: float = 0.0
+	PROFILING_DEBUG_TOKEN: str | None = None
+	PROFILING_RING_SIZE: int = 100
+	PROFILING_REPORT_LIMIT: int = 40
 
 	model_config = SettingsConfigDict(
 		env_file=".env",
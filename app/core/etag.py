@@ -0,0 +1,39 @@
+"""
+Версии пользователей в заголовках ETag и If-Match.
+"""
+
+
+IF_MATCH_HEADER = "If-Match"
+ETAG_HEADER = "ETag"
+# Сильный ("3") или слабый (W/"3") ETag; число без кавычек тоже принимается
+IF_MATCH_PATTERN = r'^(W/)?"\d+"$|^\d+$'
+
+
+def format_etag(version: int) -> str:
+	"""
+	Форматирует версию пользователя как ETag.
+
+	Args:
+		version: Версия пользователя
+
+	Returns:
+		str: ETag в кавычках, например "3"
+	"""
+	return f'"{version}"'
+
+
+def parse_if_match(value: str | None) -> int | None:
+	"""
+	Извлекает ожидаемую версию из заголовка If-Match.
+
+	Значение уже проверено по IF_MATCH_PATTERN при разборе заголовка.
+
+	Args:
+		value: Значение заголовка или None, если он не передан
+
+	Returns:
+		int | None: Ожидаемая версия или None - перевод без проверки версии
+	"""
+	if value is None:
+		return None
+	return int(value.removeprefix("W/").strip('"'))
@@ -4,14 +4,17 @@ Exception handlers для FastAPI.
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from app.core.metrics import DOMAIN_ERRORS
 from app.core.exceptions import (
 	UserNotFoundError, SelfTransferError, 
-	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError
+	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError, VersionConflictError,
+	BalanceOverflowError, WriteAheadLogError, IdempotencyKeyReusedError, RepositoryFullError, DebugAccessDeniedError
 )
 
 
 async def user_not_found_handler(request: Request, exc: UserNotFoundError):
 	"""Обработчик для UserNotFoundError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
 	return JSONResponse(
 		status_code=404,
 		content={"detail": "Пользователь не найден"}
@@ -20,6 +23,7 @@ async def user_not_found_handler(request: Request, exc: UserNotFoundError):
 
 async def self_transfer_handler(request: Request, exc: SelfTransferError):
 	"""Обработчик для SelfTransferError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
 	return JSONResponse(
 		status_code=400,
 		content={"detail": "Нельзя переводить деньги самому себе"}
@@ -28,6 +32,7 @@ async def self_transfer_handler(request: Request, exc: SelfTransferError):
 
 async def insufficient_funds_handler(request: Request, exc: InsufficientFundsError):
 	"""Обработчик для InsufficientFundsError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
 	return JSONResponse(
 		status_code=400,
 		content={"detail": "Недостаточно средств для перевода"}
@@ -36,15 +41,71 @@ async def insufficient_funds_handler(request: Request, exc: InsufficientFundsErr
 
 async def invalid_amount_handler(request: Request, exc: InvalidAmountError):
 	"""Обработчик для InvalidAmountError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
 	return JSONResponse(
 		status_code=400,
 		content={"detail": "Некорректная сумма перевода"}
 	)
 
 
+async def balance_overflow_handler(request: Request, exc: BalanceOverflowError):
+	"""Обработчик для BalanceOverflowError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
+	return JSONResponse(
+		status_code=400,
+		content={"detail": "Баланс получателя превысит допустимый предел"}
+	)
+
+
+async def version_conflict_handler(request: Request, exc: VersionConflictError):
+	"""Обработчик для VersionConflictError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
+	return JSONResponse(
+		status_code=409,
+		content={"detail": "Версия пользователя изменилась"}
+	)
+
+
 async def email_already_exists_handler(request: Request, exc: EmailAlreadyExistsError):
 	"""Обработчик для EmailAlreadyExistsError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
 	return JSONResponse(
 		status_code=409,
 		content={"detail": "Email уже используется"}
 	)
+
+
+async def write_ahead_log_handler(request: Request, exc: WriteAheadLogError):
+	"""Обработчик для WriteAheadLogError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
+	return JSONResponse(
+		status_code=503,
+		content={"detail": "Хранилище временно недоступно"}
+	)
+
+
+async def idempotency_key_reused_handler(request: Request, exc: IdempotencyKeyReusedError):
+	"""Обработчик для IdempotencyKeyReusedError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
+	return JSONResponse(
+		status_code=422,
+		content={"detail": "Ключ идемпотентности уже использован с другими параметрами запроса"}
+	)
+
+
+async def repository_full_handler(request: Request, exc: RepositoryFullError):
+	"""Обработчик для RepositoryFullError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
+	return JSONResponse(
+		status_code=507,
+		content={"detail": "Хранилище пользователей заполнено"}
+	)
+
+
+async def debug_access_denied_handler(request: Request, exc: DebugAccessDeniedError):
+	"""Обработчик для DebugAccessDeniedError."""
+	DOMAIN_ERRORS.inc((type(exc).__name__,))
+	return JSONResponse(
+		status_code=403,
+		content={"detail": "Нет доступа к отладочным данным"}
+	)
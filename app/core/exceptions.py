@@ -23,6 +23,36 @@ class InvalidAmountError(Exception):
 	pass
 
 
+class BalanceOverflowError(Exception):
+	"""Баланс получателя превысил бы наибольший допустимый (MAX_BALANCE)."""
+	pass
+
+
+class VersionConflictError(Exception):
+	"""Версия пользователя не совпадает с ожидаемой: данные изменились."""
+	pass
+
+
 class EmailAlreadyExistsError(Exception):
 	"""Email уже используется."""
 	pass
+
+
+class WriteAheadLogError(Exception):
+	"""Журнал предзаписи недоступен: изменение не может быть сохранено."""
+	pass
+
+
+class IdempotencyKeyReusedError(Exception):
+	"""Ключ идемпотентности уже использован для запроса с другими параметрами."""
+	pass
+
+
+class RepositoryFullError(Exception):
+	"""Хранилище фиксированного размера заполнено."""
+	pass
+
+
+class DebugAccessDeniedError(Exception):
+	"""Нет доступа к отладочным эндпоинтам: неверный отладочный токен."""
+	pass
@@ -0,0 +1,252 @@
+"""
+Идемпотентность изменяющих запросов по заголовку Idempotency-Key.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable
+
+from fastapi.responses import Response
+
+from app.core.exceptions import IdempotencyKeyReusedError
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Заголовок повторно отданного сохраненного ответа
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Примерный размер записи кеша без тела ответа: ключ, объекты записи и ответа
+_ENTRY_OVERHEAD = 512
+# Заголовки, которые не сохраняются вместе с ответом: hop-by-hop (RFC 9110, 7.6.1)
+# и длина тела, которую повторный ответ вычисляет сам
+_UNSTORED_HEADERS = frozenset((
+	b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization",
+	b"proxy-connection", b"te", b"trailer", b"transfer-encoding", b"upgrade", b"content-length",
+))
+
+
+class _Entry:
+	"""Запись кеша: выполняющийся или завершенный запрос."""
+
+	__slots__ = ("fingerprint", "future", "expires_at", "size")
+
+	def __init__(self, fingerprint: object) -> None:
+		self.fingerprint = fingerprint
+		# Future разрешается ответом первого запроса; его ждут дубликаты
+		self.future: Future = Future()
+		self.expires_at: float = float("inf")
+		# 0 - запрос еще выполняется, такую запись нельзя вытеснить
+		self.size: int = 0
+
+
+class IdempotencyCache:
+	"""
+	Ограниченный LRU-кеш ответов с истечением по TTL.
+
+	Первый запрос с ключом выполняется, и его ответ сохраняется. Повтор
+	с тем же ключом получает сохраненный ответ без повторного выполнения,
+	а дубликат, пришедший, пока первый запрос еще выполняется, ждет его
+	результата. Если первый запрос завершился ошибкой, ожидающие дубликаты
+	получают ту же ошибку, а ключ освобождается: изменение не было
+	применено, и следующий повтор выполнится заново.
+
+	Размер кеша ограничен и числом записей, и суммарным размером ответов:
+	при превышении вытесняются давно не использованные записи.
+	"""
+
+	def __init__(self, max_entries: int = 100_000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 86_400.0) -> None:
+		"""
+		Инициализирует кеш.
+
+		Args:
+			max_entries: Максимальное количество сохраненных ответов
+			max_bytes: Максимальный суммарный размер сохраненных ответов, в байтах
+			ttl: Время хранения ответа, в секундах
+		"""
+		self._max_entries = max_entries
+		self._max_bytes = max_bytes
+		self._ttl = ttl
+		self._entries: OrderedDict = OrderedDict()
+		self._bytes: int = 0
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	@property
+	def size_bytes(self) -> int:
+		"""Суммарный учтенный размер сохраненных ответов."""
+		return self._bytes
+
+	def _begin(self, key: Hashable, fingerprint: object) -> tuple[_Entry, bool]:
+		"""
+		Находит запись ключа или создает запись выполняющегося запроса.
+
+		Args:
+			key: Ключ идемпотентности
+			fingerprint: Параметры запроса (сравниваются с параметрами первого запроса)
+
+		Returns:
+			tuple[_Entry, bool]: Запись и признак того, что запрос нужно выполнить
+
+		Raises:
+			IdempotencyKeyReusedError: Если ключ уже использован с другими параметрами
+		"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and entry.expires_at <= time.monotonic():
+				self._remove(key, entry)
+				entry = None
+			if entry is None:
+				entry = self._entries[key] = _Entry(fingerprint)
+				return entry, True
+			if entry.fingerprint != fingerprint:
+				raise IdempotencyKeyReusedError()
+			self._entries.move_to_end(key)
+			return entry, False
+
+	def _remove(self, key: Hashable, entry: _Entry) -> None:
+		"""
+		Удаляет запись (вызывается под блокировкой кеша).
+
+		Args:
+			key: Ключ идемпотентности
+			entry: Запись
+		"""
+		if self._entries.get(key) is entry:
+			del self._entries[key]
+			self._bytes -= entry.size
+
+	def _evict(self) -> None:
+		"""
+		Вытесняет записи с истекшим сроком и давно не использованные записи сверх лимитов
+		(вызывается под блокировкой кеша).
+		"""
+		now = time.monotonic()
+		count, size = len(self._entries), self._bytes
+		victims = []
+		# Записи идут от давно использованных к недавним
+		for key, entry in self._entries.items():
+			if count <= self._max_entries and size <= self._max_bytes and entry.expires_at > now:
+				break
+			# Выполняющиеся запросы не вытесняются: их ждут дубликаты
+			if entry.size:
+				victims.append((key, entry))
+				count -= 1
+				size -= entry.size
+		for key, entry in victims:
+			self._remove(key, entry)
+
+	def _finish(self, key: Hashable, entry: _Entry, response: Response) -> None:
+		"""
+		Сохраняет ответ первого запроса и будит ожидающие дубликаты.
+
+		Args:
+			key: Ключ идемпотентности
+			entry: Запись выполняющегося запроса
+			response: Ответ
+		"""
+		headers = [
+			(name, value) for name, value in response.raw_headers if name.lower() not in _UNSTORED_HEADERS
+		]
+		stored = (response.status_code, bytes(response.body), headers)
+		with self._lock:
+			entry.size = len(stored[1]) + sum(len(name) + len(value) for name, value in headers) + _ENTRY_OVERHEAD
+			entry.expires_at = time.monotonic() + self._ttl
+			self._bytes += entry.size
+			if entry.size > self._max_bytes:
+				# Ответ больше всего кеша: отдаем дубликатам, но не храним
+				self._remove(key, entry)
+			self._evict()
+		entry.future.set_result(stored)
+
+	def _abort(self, key: Hashable, entry: _Entry, exc: BaseException) -> None:
+		"""
+		Освобождает ключ после ошибки первого запроса и передает ошибку дубликатам.
+
+		Args:
+			key: Ключ идемпотентности
+			entry: Запись выполняющегося запроса
+			exc: Ошибка
+		"""
+		with self._lock:
+			self._remove(key, entry)
+		entry.future.set_exception(exc)
+
+	@staticmethod
+	def _replay(stored: tuple) -> Response:
+		"""
+		Создает ответ из сохраненного.
+
+		Заголовки сохраненного ответа (например, ETag) отдаются снова,
+		кроме hop-by-hop заголовков и длины тела.
+
+		Args:
+			stored: Код, тело и заголовки сохраненного ответа
+
+		Returns:
+			Response: Ответ с заголовком повтора
+		"""
+		status_code, body, headers = stored
+		response = Response(content=body, status_code=status_code)
+		response.raw_headers.extend(headers)
+		response.headers[REPLAYED_HEADER] = "true"
+		return response
+
+	def execute(self, key: Hashable, fingerprint: object, func: Callable[[], Response]) -> Response:
+		"""
+		Выполняет запрос не более одного раза для ключа.
+
+		Args:
+			key: Ключ идемпотентности
+			fingerprint: Параметры запроса (сравниваются с параметрами первого запроса)
+			func: Выполнение запроса
+
+		Returns:
+			Response: Ответ запроса или сохраненный ответ первого запроса
+
+		Raises:
+			IdempotencyKeyReusedError: Если ключ уже использован с другими параметрами
+		"""
+		entry, owner = self._begin(key, fingerprint)
+		if not owner:
+			return self._replay(entry.future.result())
+		try:
+			response = func()
+		except BaseException as exc:
+			self._abort(key, entry, exc)
+			raise
+		self._finish(key, entry, response)
+		return response
+
+	async def execute_async(
+		self, key: Hashable, fingerprint: object, func: Callable[[], Awaitable[Response]]
+	) -> Response:
+		"""
+		Выполняет асинхронный запрос не более одного раза для ключа.
+
+		Дубликат ждет первый запрос, не занимая поток.
+
+		Args:
+			key: Ключ идемпотентности
+			fingerprint: Параметры запроса (сравниваются с параметрами первого запроса)
+			func: Выполнение запроса
+
+		Returns:
+			Response: Ответ запроса или сохраненный ответ первого запроса
+
+		Raises:
+			IdempotencyKeyReusedError: Если ключ уже использован с другими параметрами
+		"""
+		entry, owner = self._begin(key, fingerprint)
+		if not owner:
+			return self._replay(await asyncio.wrap_future(entry.future))
+		try:
+			response = await func()
+		except BaseException as exc:
+			self._abort(key, entry, exc)
+			raise
+		self._finish(key, entry, response)
+		return response
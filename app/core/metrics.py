@@ -0,0 +1,258 @@
+"""
+Метрики приложения в текстовом формате Prometheus.
+
+Запись метрики не берет общих блокировок: у каждого потока свой шард
+значений (словарь в threading.local), и поток изменяет только его.
+Блокировка нужна лишь при первом обращении потока к метрике, чтобы
+зарегистрировать шард. При выдаче /metrics значения всех шардов
+суммируются; шарды завершившихся потоков сохраняются, поэтому счетчики
+не уменьшаются.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Границы корзин гистограмм задержки, в секундах
+LATENCY_BUCKETS = (
+	0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+	0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+	"""Экранирует значение метки для текстового формата."""
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+	"""
+	Форматирует набор меток.
+
+	Args:
+		names: Имена меток
+		values: Значения меток
+		extra: Дополнительная уже отформатированная метка (le для корзин)
+
+	Returns:
+		str: Метки в фигурных скобках или пустая строка
+	"""
+	pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+	if extra:
+		pairs.append(extra)
+	return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+	"""Форматирует число: целые - без дробной части."""
+	if value == int(value):
+		return str(int(value))
+	return repr(value)
+
+
+class _Metric:
+	"""Базовый класс метрики с шардами значений по потокам."""
+
+	type_name = ""
+
+	def __init__(self, name: str, documentation: str, labelnames: tuple = ()) -> None:
+		"""
+		Инициализирует метрику.
+
+		Args:
+			name: Имя метрики
+			documentation: Описание для строки HELP
+			labelnames: Имена меток
+		"""
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = labelnames
+		self._local = threading.local()
+		self._shards: list = []
+		self._lock = threading.Lock()
+
+	def _shard(self) -> dict:
+		"""
+		Возвращает шард значений текущего потока, регистрируя его при первом обращении.
+
+		Returns:
+			dict: Значения по наборам меток
+		"""
+		shard = getattr(self._local, "values", None)
+		if shard is None:
+			shard = self._local.values = {}
+			with self._lock:
+				self._shards.append(shard)
+		return shard
+
+	def _collect(self) -> dict:
+		"""
+		Суммирует значения всех шардов.
+
+		Returns:
+			dict: Значения по наборам меток
+		"""
+		with self._lock:
+			shards = list(self._shards)
+		total: dict = {}
+		for shard in shards:
+			# copy() атомарна под GIL, пока поток-владелец продолжает запись
+			for labels, value in shard.copy().items():
+				total[labels] = self._merge(total.get(labels), value)
+		return total
+
+	def _merge(self, total, value):
+		raise NotImplementedError
+
+	def render(self) -> list[str]:
+		raise NotImplementedError
+
+
+class Counter(_Metric):
+	"""Монотонно растущий счетчик."""
+
+	type_name = "counter"
+
+	def inc(self, labels: tuple = (), amount: float = 1) -> None:
+		"""
+		Увеличивает счетчик.
+
+		Args:
+			labels: Значения меток в порядке labelnames
+			amount: Величина увеличения
+		"""
+		shard = self._shard()
+		shard[labels] = shard.get(labels, 0) + amount
+
+	def value(self, labels: tuple = ()) -> float:
+		"""Возвращает текущее значение счетчика для набора меток."""
+		return self._collect().get(labels, 0)
+
+	def _merge(self, total, value):
+		return value if total is None else total + value
+
+	def render(self) -> list[str]:
+		"""Возвращает строки значений в текстовом формате."""
+		return [
+			f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+			for labels, value in sorted(self._collect().items())
+		]
+
+
+class Histogram(_Metric):
+	"""
+	Гистограмма с фиксированными корзинами.
+
+	Значения набора меток хранятся одним списком: счетчики корзин
+	(последняя - сверх всех границ), затем сумма наблюдений.
+	"""
+
+	type_name = "histogram"
+
+	def __init__(
+		self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS
+	) -> None:
+		"""
+		Инициализирует гистограмму.
+
+		Args:
+			name: Имя метрики
+			documentation: Описание для строки HELP
+			labelnames: Имена меток
+			buckets: Возрастающие верхние границы корзин
+		"""
+		super().__init__(name, documentation, labelnames)
+		self.buckets = tuple(buckets)
+
+	def observe(self, value: float, labels: tuple = ()) -> None:
+		"""
+		Учитывает наблюдение.
+
+		Args:
+			value: Наблюдаемое значение
+			labels: Значения меток в порядке labelnames
+		"""
+		shard = self._shard()
+		counts = shard.get(labels)
+		if counts is None:
+			counts = shard[labels] = [0] * (len(self.buckets) + 2)
+		counts[bisect_left(self.buckets, value)] += 1
+		counts[-1] += value
+
+	def count(self, labels: tuple = ()) -> int:
+		"""Возвращает количество наблюдений для набора меток."""
+		counts = self._collect().get(labels)
+		return sum(counts[:-1]) if counts else 0
+
+	def _merge(self, total, value):
+		value = list(value)
+		if total is None:
+			return value
+		return [a + b for a, b in zip(total, value)]
+
+	def render(self) -> list[str]:
+		"""Возвращает строки корзин, суммы и количества в текстовом формате."""
+		lines = []
+		bounds = [_format_number(bound) for bound in self.buckets] + ["+Inf"]
+		for labels, counts in sorted(self._collect().items()):
+			cumulative = 0
+			for bound, count in zip(bounds, counts):
+				cumulative += count
+				le = f'le="{bound}"'
+				lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+			formatted = _format_labels(self.labelnames, labels)
+			lines.append(f"{self.name}_sum{formatted} {_format_number(counts[-1])}")
+			lines.append(f"{self.name}_count{formatted} {cumulative}")
+		return lines
+
+
+class MetricsRegistry:
+	"""Набор метрик, выдаваемых эндпоинтом /metrics."""
+
+	def __init__(self) -> None:
+		self._metrics: list[_Metric] = []
+
+	def register(self, metric: _Metric) -> _Metric:
+		"""
+		Добавляет метрику в набор.
+
+		Args:
+			metric: Метрика
+
+		Returns:
+			_Metric: Та же метрика
+		"""
+		self._metrics.append(metric)
+		return metric
+
+	def render(self) -> str:
+		"""
+		Выдает все метрики в текстовом формате Prometheus.
+
+		Returns:
+			str: Текст для ответа /metrics
+		"""
+		lines = []
+		for metric in self._metrics:
+			lines.append(f"# HELP {metric.name} {metric.documentation}")
+			lines.append(f"# TYPE {metric.name} {metric.type_name}")
+			lines.extend(metric.render())
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+	"http_request_duration_seconds", "HTTP request latency by route and status code.",
+	("method", "route", "status"),
+))
+DOMAIN_ERRORS = REGISTRY.register(Counter(
+	"domain_errors_total", "Domain exceptions returned to clients.", ("error",),
+))
+REPOSITORY_LATENCY = REGISTRY.register(Histogram(
+	"repository_operation_duration_seconds", "User repository operation latency.", ("operation",),
+))
+LOCK_WAIT = REGISTRY.register(Histogram(
+	"account_lock_wait_seconds", "Time spent waiting for a contended account lock stripe.", ("kind",),
+))
@@ -0,0 +1,145 @@
+"""
+ASGI middleware приложения.
+"""
+
+import hmac
+import random
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REQUEST_LATENCY
+from app.core.profiling import (
+	PROFILE_HEADER, PROFILE_ID_HEADER, ProfileStore,
+	finish_profile, new_profile, start_profile, stop_profile
+)
+
+
+def route_template(scope: Scope) -> str:
+	"""
+	Восстанавливает шаблон маршрута запроса ("/api/v1/users/{user_id}/transfers").
+
+	Шаблон собирается из пути и параметров пути: сегменты со значениями
+	параметров заменяются их именами. Так он не зависит от того, хранит ли
+	маршрут вложенного роутера свой путь с префиксом или без.
+
+	Args:
+		scope: ASGI scope обработанного запроса
+
+	Returns:
+		str: Шаблон маршрута или "unmatched", если маршрут не найден
+	"""
+	if scope.get("route") is None:
+		return "unmatched"
+	segments = scope["path"].split("/")
+	position = 0
+	for name, value in scope.get("path_params", {}).items():
+		value = str(value)
+		for index in range(position, len(segments)):
+			if segments[index] == value:
+				segments[index] = "{" + name + "}"
+				position = index + 1
+				break
+	return "/".join(segments)
+
+
+class MetricsMiddleware:
+	"""
+	Записывает задержку HTTP-запросов в гистограмму по маршруту и коду ответа.
+
+	Маршрут берется шаблоном пути (route_template), а не самим путем,
+	чтобы число наборов меток не росло с количеством пользователей.
+	"""
+
+	def __init__(self, app: ASGIApp) -> None:
+		self.app = app
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
+		started = time.perf_counter()
+		status_code = 500
+
+		async def send_with_status(message: Message) -> None:
+			nonlocal status_code
+			if message["type"] == "http.response.start":
+				status_code = message["status"]
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_with_status)
+		finally:
+			# Роутер записывает найденный маршрут и параметры пути в тот же scope
+			REQUEST_LATENCY.observe(
+				time.perf_counter() - started, (scope["method"], route_template(scope), str(status_code))
+			)
+
+
+class ProfilingMiddleware:
+	"""
+	Профилирует выбранные запросы и складывает профили в ProfileStore.
+
+	Запрос профилируется с вероятностью sample_rate или если в заголовке
+	X-Debug-Profile передан отладочный токен. Одновременно профилируется
+	не больше одного запроса: остальные выполняются без профилировщика.
+	Id профиля возвращается клиенту в заголовке X-Profile-Id.
+
+	Пока cProfile включен в потоке цикла событий, в профиль попадают и
+	корутины других запросов, выполняющиеся в это время.
+	"""
+
+	def __init__(
+		self, app: ASGIApp, store: ProfileStore, sample_rate: float = 0.0,
+		token: str | None = None, report_limit: int = 40
+	) -> None:
+		"""
+		Инициализирует middleware.
+
+		Args:
+			app: ASGI-приложение
+			store: Буфер профилей
+			sample_rate: Доля профилируемых запросов (от 0 до 1)
+			token: Отладочный токен для заголовка X-Debug-Profile; None - только выборка
+			report_limit: Количество функций в текстовом отчете
+		"""
+		self.app = app
+		self.store = store
+		self.sample_rate = sample_rate
+		self.token = token
+		self.report_limit = report_limit
+
+	def _selected(self, scope: Scope) -> bool:
+		"""Решает, профилировать ли запрос."""
+		if self.token:
+			value = Headers(scope=scope).get(PROFILE_HEADER)
+			if value is not None and hmac.compare_digest(value.encode(), self.token.encode()):
+				return True
+		return self.sample_rate > 0 and random.random() < self.sample_rate
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http" or not self._selected(scope):
+			await self.app(scope, receive, send)
+			return
+		active = start_profile()
+		if active is None:
+			await self.app(scope, receive, send)
+			return
+
+		profile = new_profile(self.store, scope["method"], scope["path"])
+		started = time.perf_counter()
+
+		async def send_with_profile_id(message: Message) -> None:
+			if message["type"] == "http.response.start":
+				profile.status_code = message["status"]
+				MutableHeaders(scope=message).append(PROFILE_ID_HEADER, str(profile.id))
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_with_profile_id)
+		finally:
+			stop_profile(active)
+			finish_profile(profile, active, started, self.report_limit)
+			self.store.add(profile)
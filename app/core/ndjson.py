@@ -0,0 +1,57 @@
+"""
+Потоковое чтение NDJSON (JSON по одному объекту на строку).
+"""
+
+from typing import AsyncIterable, AsyncIterator
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Описание тела запроса NDJSON для OpenAPI: FastAPI читает его сам, без модели
+NDJSON_REQUEST_BODY = {
+	"requestBody": {
+		"required": True,
+		"content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+	},
+}
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[tuple[int, bytes | None]]:
+	"""
+	Разбивает поток байт на строки, не держа в памяти больше одной строки.
+
+	Строка длиннее max_line_bytes не накапливается: её байты пропускаются
+	до конца строки, а вместо содержимого возвращается None.
+
+	Args:
+		chunks: Куски тела запроса
+		max_line_bytes: Максимальная длина строки, в байтах
+
+	Yields:
+		tuple[int, bytes | None]: Номер строки (с 1) и её содержимое без перевода строки
+	"""
+	buffer = bytearray()
+	line_number = 0
+	# Текущая строка уже превысила лимит: её остаток отбрасывается
+	skipping = False
+	async for chunk in chunks:
+		start = 0
+		while (end := chunk.find(b"\n", start)) >= 0:
+			line_number += 1
+			if skipping or len(buffer) + end - start > max_line_bytes:
+				yield line_number, None
+			else:
+				buffer += chunk[start:end]
+				yield line_number, bytes(buffer)
+			buffer.clear()
+			skipping = False
+			start = end + 1
+		if not skipping:
+			if len(buffer) + len(chunk) - start > max_line_bytes:
+				skipping = True
+				buffer.clear()
+			else:
+				buffer += chunk[start:]
+	if skipping:
+		yield line_number + 1, None
+	elif buffer:
+		yield line_number + 1, bytes(buffer)
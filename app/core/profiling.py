@@ -0,0 +1,252 @@
+"""
+Профилирование отдельных запросов по выборке или по отладочному заголовку.
+
+Профиль запроса собирается cProfile из двух частей:
+- поток цикла событий: разбор и валидация запроса, внедрение зависимостей,
+  асинхронные эндпоинты и сериализация ответа;
+- поток пула, в котором выполняется синхронный эндпоинт (сервис и
+  репозиторий): такие эндпоинты оборачивает ProfilingRoute.
+
+Профили складываются в кольцевой буфер ограниченного размера, откуда их
+отдает отладочный эндпоинт.
+"""
+
+import asyncio
+import cProfile
+import io
+import itertools
+import pstats
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+
+PROFILE_HEADER = "X-Debug-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Слои приложения для сводки профиля: признак файла функции
+_LAYERS = (
+	("endpoint", "/app/api/"),
+	("service", "/app/services/"),
+	("repository", "/app/repositories/"),
+)
+# Функции FastAPI, по которым считается время разбора запроса и ответа
+_FRAMEWORK_PHASES = (
+	("dependencies_and_validation", "fastapi/dependencies/utils.py", "solve_dependencies"),
+	("serialization", "fastapi/routing.py", "serialize_response"),
+)
+
+
+@dataclass(slots=True)
+class RequestProfile:
+	"""Профиль одного запроса."""
+
+	id: int
+	method: str
+	path: str
+	created_at: datetime
+	status_code: int = 0
+	duration_ms: float = 0.0
+	# Время по слоям и фазам, в миллисекундах
+	phases: dict = field(default_factory=dict)
+	# Текстовый отчет pstats: функции по убыванию суммарного времени
+	report: str = ""
+
+
+class ProfileStore:
+	"""Кольцевой буфер последних профилей."""
+
+	def __init__(self, capacity: int = 100) -> None:
+		"""
+		Инициализирует буфер.
+
+		Args:
+			capacity: Максимальное количество хранимых профилей
+		"""
+		self._profiles: deque = deque(maxlen=capacity)
+		self._lock = threading.Lock()
+		self._ids = itertools.count(1)
+
+	def next_id(self) -> int:
+		"""Выдает id нового профиля."""
+		return next(self._ids)
+
+	def add(self, profile: RequestProfile) -> None:
+		"""Добавляет профиль, вытесняя самый старый при заполнении."""
+		with self._lock:
+			self._profiles.append(profile)
+
+	def list(self) -> list[RequestProfile]:
+		"""Возвращает профили от новых к старым."""
+		with self._lock:
+			return list(reversed(self._profiles))
+
+	def get(self, profile_id: int) -> RequestProfile | None:
+		"""Находит профиль по id."""
+		with self._lock:
+			for profile in self._profiles:
+				if profile.id == profile_id:
+					return profile
+		return None
+
+
+# Профилирование текущего запроса; копируется в поток пула вместе с контекстом
+_active_profile: ContextVar["ActiveProfile | None"] = ContextVar("active_profile", default=None)
+# Профилировщик cProfile в потоке цикла событий может быть только один
+_profiling_lock = threading.Lock()
+
+
+class ActiveProfile:
+	"""
+	Профилирование выполняющегося запроса.
+
+	Основной профилировщик работает в потоке цикла событий; профили
+	синхронных эндпоинтов из потоков пула добавляются к нему при сборке.
+	"""
+
+	def __init__(self) -> None:
+		self.thread_id = threading.get_ident()
+		self.profiler = cProfile.Profile()
+		self._thread_profilers: list = []
+		self.context_token = _active_profile.set(self)
+
+	def add_thread_profiler(self, profiler: cProfile.Profile) -> None:
+		"""Добавляет профиль части запроса, выполненной в другом потоке."""
+		self._thread_profilers.append(profiler)
+
+	def stats(self) -> pstats.Stats:
+		"""Объединяет профили всех потоков запроса."""
+		stats = pstats.Stats(self.profiler, stream=io.StringIO())
+		for profiler in self._thread_profilers:
+			stats.add(profiler)
+		return stats
+
+
+def start_profile() -> ActiveProfile | None:
+	"""
+	Начинает профилирование запроса в текущем потоке.
+
+	Returns:
+		ActiveProfile | None: Профилирование или None, если уже профилируется другой запрос
+	"""
+	if not _profiling_lock.acquire(False):
+		return None
+	active = ActiveProfile()
+	active.profiler.enable()
+	return active
+
+
+def stop_profile(active: ActiveProfile) -> None:
+	"""Останавливает профилирование запроса."""
+	active.profiler.disable()
+	_active_profile.reset(active.context_token)
+	_profiling_lock.release()
+
+
+def summarize(stats: pstats.Stats) -> dict:
+	"""
+	Считает время по слоям приложения и фазам обработки запроса.
+
+	Время слоя - суммарное время его функций, вызванных из других слоев,
+	поэтому вложенные вызовы внутри слоя не учитываются дважды.
+
+	Args:
+		stats: Объединенный профиль запроса
+
+	Returns:
+		dict: Время по слоям и фазам, в миллисекундах
+	"""
+	phases = {name: 0.0 for name, _, _ in _FRAMEWORK_PHASES}
+	phases.update({name: 0.0 for name, _ in _LAYERS})
+	for (filename, _, function), (_, _, _, cumulative, callers) in stats.stats.items():
+		for name, path, phase_function in _FRAMEWORK_PHASES:
+			if function == phase_function and filename.endswith(path):
+				# Рекурсивные вызовы solve_dependencies учтены в верхнем
+				phases[name] = max(phases[name], cumulative * 1000)
+		for name, marker in _LAYERS:
+			if marker in filename and not any(marker in caller[0] for caller in callers):
+				phases[name] += cumulative * 1000
+	return phases
+
+
+def format_report(stats: pstats.Stats, limit: int) -> str:
+	"""
+	Форматирует отчет pstats по убыванию суммарного времени.
+
+	Args:
+		stats: Объединенный профиль запроса
+		limit: Количество функций в отчете
+
+	Returns:
+		str: Текст отчета
+	"""
+	stream = io.StringIO()
+	stats.stream = stream
+	stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+	return stream.getvalue()
+
+
+def _profile_in_thread(endpoint: Callable) -> Callable:
+	"""
+	Оборачивает синхронный эндпоинт профилированием в потоке пула.
+
+	Args:
+		endpoint: Синхронная функция эндпоинта
+
+	Returns:
+		Callable: Обертка с той же сигнатурой
+	"""
+	@wraps(endpoint)
+	def profiled(*args, **kwargs):
+		active = _active_profile.get()
+		if active is None or threading.get_ident() == active.thread_id:
+			return endpoint(*args, **kwargs)
+		profiler = cProfile.Profile()
+		profiler.enable()
+		try:
+			return endpoint(*args, **kwargs)
+		finally:
+			profiler.disable()
+			active.add_thread_profiler(profiler)
+
+	return profiled
+
+
+class ProfilingRoute(APIRoute):
+	"""
+	Маршрут, синхронный эндпоинт которого профилируется в потоке пула,
+	если запрос выбран для профилирования.
+	"""
+
+	def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+		if not asyncio.iscoroutinefunction(endpoint):
+			endpoint = _profile_in_thread(endpoint)
+		super().__init__(path, endpoint, **kwargs)
+
+
+def new_profile(store: ProfileStore, method: str, path: str) -> RequestProfile:
+	"""Создает запись профиля запроса с новым id."""
+	return RequestProfile(id=store.next_id(), method=method, path=path, created_at=datetime.now(timezone.utc))
+
+
+def finish_profile(profile: RequestProfile, active: ActiveProfile, started: float, limit: int) -> None:
+	"""
+	Заполняет запись профиля по завершении запроса.
+
+	Args:
+		profile: Запись профиля
+		active: Профилирование запроса
+		started: Время начала запроса (time.perf_counter)
+		limit: Количество функций в отчете
+	"""
+	profile.duration_ms = (time.perf_counter() - started) * 1000
+	stats = active.stats()
+	profile.phases = summarize(stats)
+	profile.report = format_report(stats, limit)
@@ -0,0 +1,25 @@
+"""
+Классы ответов API.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+
+class DataclassJSONResponse(Response):
+	"""
+	JSON-ответ, сериализующий данные напрямую через orjson.
+
+	orjson нативно сериализует dataclass (в том числе со __slots__),
+	поэтому объекты User из репозитория попадают в байты ответа без
+	промежуточных словарей и без повторной валидации Pydantic.
+	Эндпоинт, возвращающий такой ответ, сам отвечает за соответствие
+	данных схеме из response_model.
+	"""
+
+	media_type = "application/json"
+
+	def render(self, content: Any) -> bytes:
+		return orjson.dumps(content)
@@ -0,0 +1,23 @@
+from app.core.config import settings
+from app.core.idempotency import IdempotencyCache
+
+
+# Один кеш ответов на все приложение: ключи разных эндпоинтов различаются префиксом
+_idempotency_cache = IdempotencyCache(
+	max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+	max_bytes=settings.IDEMPOTENCY_MAX_BYTES,
+	ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+)
+
+
+async def get_idempotency_cache() -> IdempotencyCache:
+	"""
+	Dependency для получения кеша ответов идемпотентных запросов.
+	
+	Объявлена через async def, чтобы не передаваться в пул потоков
+	ни для синхронных, ни для асинхронных эндпоинтов.
+	
+	Returns:
+		IdempotencyCache: Экземпляр кеша
+	"""
+	return _idempotency_cache
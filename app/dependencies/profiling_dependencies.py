@@ -0,0 +1,41 @@
+import hmac
+
+from fastapi import Header
+
+from app.core.config import settings
+from app.core.exceptions import DebugAccessDeniedError
+from app.core.profiling import PROFILE_HEADER, ProfileStore
+
+
+# Один буфер профилей на процесс: его заполняет ProfilingMiddleware
+_profile_store = ProfileStore(settings.PROFILING_RING_SIZE)
+
+
+def get_profile_store() -> ProfileStore:
+	"""
+	Возвращает буфер профилей запросов.
+	
+	Returns:
+		ProfileStore: Экземпляр буфера
+	"""
+	return _profile_store
+
+
+async def require_debug_token(
+	token: str | None = Header(default=None, alias=PROFILE_HEADER, description="Отладочный токен")
+) -> None:
+	"""
+	Dependency, пропускающая к отладочным эндпоинтам только с токеном.
+	
+	Если PROFILING_DEBUG_TOKEN не задан, доступ закрыт: профили содержат
+	пути запросов и отчеты о коде, и без токена их не отдают никому.
+	
+	Args:
+		token: Значение заголовка X-Debug-Profile
+		
+	Raises:
+		DebugAccessDeniedError: Если токен не задан в настройках или не совпадает
+	"""
+	expected = settings.PROFILING_DEBUG_TOKEN
+	if not expected or token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+		raise DebugAccessDeniedError()
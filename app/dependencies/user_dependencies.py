@@ -1,23 +1,88 @@
+import os
+
 from fastapi import Depends
 
+from app.core.config import settings
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.base import AsyncUserRepository, UserRepository
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.instrumented_user_repository import InstrumentedUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.snapshot import Checkpointer, MappedSnapshot
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
 from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+from app.services.async_user_service import AsyncUserService
+from app.services.transfer_engine import TransferEngine
 from app.services.user_service import UserService
 
+
+def _build_user_repository() -> UserRepository:
+	"""
+	Создает репозиторий пользователей, выбранный в настройках.
+	
+	Returns:
+		UserRepository: Экземпляр репозитория
+	"""
+	if settings.USER_REPOSITORY_BACKEND != "memory" and (settings.WAL_PATH or settings.SNAPSHOT_PATH):
+		raise ValueError("WAL_PATH и SNAPSHOT_PATH поддерживаются только для USER_REPOSITORY_BACKEND=memory")
+	if settings.USER_REPOSITORY_BACKEND == "columnar":
+		return ColumnarUserRepository(lock_stripes=settings.LOCK_STRIPES)
+	if settings.USER_REPOSITORY_BACKEND == "sqlite":
+		return SQLiteUserRepository(settings.SQLITE_PATH, synchronous=settings.SQLITE_SYNCHRONOUS)
+	if settings.USER_REPOSITORY_BACKEND == "shared_memory":
+		return SharedMemoryUserRepository(
+			name=settings.SHARED_MEMORY_NAME,
+			capacity=settings.SHARED_MEMORY_CAPACITY,
+			ledger_capacity=settings.SHARED_MEMORY_LEDGER_CAPACITY,
+			lock_stripes=settings.LOCK_STRIPES,
+		)
+
+	snapshot = None
+	if settings.SNAPSHOT_PATH and os.path.exists(settings.SNAPSHOT_PATH):
+		snapshot = MappedSnapshot(settings.SNAPSHOT_PATH)
+
+	wal = None
+	if settings.WAL_PATH:
+		wal = WriteAheadLog(
+			settings.WAL_PATH,
+			batch_window=settings.WAL_GROUP_COMMIT_WINDOW_MS / 1000,
+			max_batch=settings.WAL_GROUP_COMMIT_MAX_BATCH,
+		)
+	return InMemoryUserRepository(lock_stripes=settings.LOCK_STRIPES, wal=wal, snapshot=snapshot)
+
+
 # Создаем один экземпляр репозитория для всего приложения
-_user_repository = InMemoryUserRepository()
+_user_repository = _build_user_repository()
+if settings.SNAPSHOT_PATH and settings.CHECKPOINT_INTERVAL_SECONDS > 0:
+	_checkpointer = Checkpointer(_user_repository, settings.SNAPSHOT_PATH, settings.CHECKPOINT_INTERVAL_SECONDS)
+	_checkpointer.start()
+# Замер времени операций для /metrics (контрольные точки пишутся без обертки)
+if settings.METRICS_ENABLED:
+	_user_repository = InstrumentedUserRepository(_user_repository)
+# Одиночные переводы синхронных эндпоинтов - через общую очередь с потоком-писателем
+_transfer_engine = None
+if settings.TRANSFER_ENGINE_ENABLED:
+	_transfer_engine = TransferEngine(
+		_user_repository,
+		max_batch=settings.TRANSFER_ENGINE_MAX_BATCH,
+		max_wait=settings.TRANSFER_ENGINE_MAX_WAIT_MS / 1000,
+	)
+# Асинхронный доступ к тем же данным для нативно асинхронных эндпоинтов
+_async_user_repository = AsyncInMemoryUserRepository(_user_repository, lock_stripes=settings.LOCK_STRIPES)
 
 
-def get_user_repository() -> InMemoryUserRepository:
+def get_user_repository() -> UserRepository:
 	"""
 	Dependency для получения репозитория пользователей.
 	
 	Returns:
-		InMemoryUserRepository: Экземпляр репозитория
+		UserRepository: Экземпляр репозитория
 	"""
 	return _user_repository
 
 
-def get_user_service(repo: InMemoryUserRepository = Depends(get_user_repository)) -> UserService:
+def get_user_service(repo: UserRepository = Depends(get_user_repository)) -> UserService:
 	"""
 	Dependency для получения сервиса пользователей.
 	
@@ -27,4 +92,34 @@ def get_user_service(repo: InMemoryUserRepository = Depends(get_user_repository)
 	Returns:
 		UserService: Экземпляр сервиса
 	"""
-	return UserService(repo)
+	# Очередь привязана к общему репозиторию; подмененный (в тестах) работает напрямую
+	transfer_engine = _transfer_engine if repo is _user_repository else None
+	return UserService(repo, transfer_engine=transfer_engine)
+
+
+async def get_async_user_repository() -> AsyncUserRepository:
+	"""
+	Dependency для получения асинхронного репозитория пользователей.
+	
+	Объявлена через async def: синхронные зависимости FastAPI выполняет
+	в пуле потоков, а асинхронные эндпоинты должны обходиться без этого.
+	
+	Returns:
+		AsyncUserRepository: Экземпляр репозитория
+	"""
+	return _async_user_repository
+
+
+async def get_async_user_service(
+	repo: AsyncUserRepository = Depends(get_async_user_repository)
+) -> AsyncUserService:
+	"""
+	Dependency для получения асинхронного сервиса пользователей.
+	
+	Args:
+		repo: Асинхронный репозиторий пользователей
+		
+	Returns:
+		AsyncUserService: Экземпляр сервиса
+	"""
+	return AsyncUserService(repo)
@@ -1,15 +1,22 @@
-from fastapi import FastAPI
-from fastapi.responses import ORJSONResponse
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse, Response
 
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, REGISTRY
+from app.core.middleware import MetricsMiddleware, ProfilingMiddleware
+from app.core.profiling import ProfileStore
+from app.dependencies.profiling_dependencies import get_profile_store, require_debug_token
 from app.api.v1.router import router as api_v1_router
 from app.core.exception_handlers import (
 	user_not_found_handler, self_transfer_handler, insufficient_funds_handler,
-	invalid_amount_handler, email_already_exists_handler
+	invalid_amount_handler, email_already_exists_handler, write_ahead_log_handler,
+	idempotency_key_reused_handler, repository_full_handler, debug_access_denied_handler,
+	version_conflict_handler, balance_overflow_handler
 )
 from app.core.exceptions import (
 	UserNotFoundError, SelfTransferError, InsufficientFundsError,
-	InvalidAmountError, EmailAlreadyExistsError
+	InvalidAmountError, EmailAlreadyExistsError, WriteAheadLogError, IdempotencyKeyReusedError,
+	RepositoryFullError, DebugAccessDeniedError, VersionConflictError, BalanceOverflowError
 )
 
 
@@ -42,12 +49,87 @@ def health() -> dict:
 	return {"status": "ok"}
 
 
+if settings.METRICS_ENABLED:
+	app.add_middleware(MetricsMiddleware)
+
+	@app.get("/metrics", tags=["infra"], response_class=Response)
+	def metrics() -> Response:
+		"""
+		Эндпоинт метрик в текстовом формате Prometheus.
+		
+		Returns:
+			Response: Задержки запросов и операций репозитория, ошибки, ожидание блокировок
+		"""
+		return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+if settings.PROFILING_SAMPLE_RATE > 0 or settings.PROFILING_DEBUG_TOKEN:
+	# Добавляется последним, поэтому внешний: в профиль входят и остальные middleware
+	app.add_middleware(
+		ProfilingMiddleware,
+		store=get_profile_store(),
+		sample_rate=settings.PROFILING_SAMPLE_RATE,
+		token=settings.PROFILING_DEBUG_TOKEN,
+		report_limit=settings.PROFILING_REPORT_LIMIT,
+	)
+
+	# Отладочные эндпоинты открываются только с токеном: без него профили по
+	# выборке собираются, но наружу не отдаются
+	if settings.PROFILING_DEBUG_TOKEN:
+		@app.get("/debug/profiles", tags=["debug"], dependencies=[Depends(require_debug_token)])
+		def list_profiles(store: ProfileStore = Depends(get_profile_store)) -> list[dict]:
+			"""
+			Эндпоинт списка последних профилей запросов (без текстовых отчетов).
+			
+			Args:
+				store: Буфер профилей
+			
+			Returns:
+				list[dict]: Профили от новых к старым: запрос, код ответа, длительность, время по слоям
+			"""
+			return [
+				{
+					"id": profile.id,
+					"method": profile.method,
+					"path": profile.path,
+					"created_at": profile.created_at,
+					"status_code": profile.status_code,
+					"duration_ms": profile.duration_ms,
+					"phases": profile.phases,
+				}
+				for profile in store.list()
+			]
+
+		@app.get("/debug/profiles/{profile_id}", tags=["debug"], dependencies=[Depends(require_debug_token)])
+		def get_profile(profile_id: int, store: ProfileStore = Depends(get_profile_store)) -> Response:
+			"""
+			Эндпоинт профиля запроса с текстовым отчетом pstats.
+			
+			Args:
+				profile_id: ID профиля (из заголовка X-Profile-Id ответа)
+				store: Буфер профилей
+			
+			Returns:
+				Response: Профиль или 404, если он уже вытеснен из буфера
+			"""
+			profile = store.get(profile_id)
+			if profile is None:
+				return ORJSONResponse({"detail": "Профиль не найден"}, status_code=404)
+			return ORJSONResponse(profile)
+
+
 # Регистрируем exception handlers
 app.add_exception_handler(UserNotFoundError, user_not_found_handler)
 app.add_exception_handler(SelfTransferError, self_transfer_handler)
 app.add_exception_handler(InsufficientFundsError, insufficient_funds_handler)
 app.add_exception_handler(InvalidAmountError, invalid_amount_handler)
+app.add_exception_handler(BalanceOverflowError, balance_overflow_handler)
 app.add_exception_handler(EmailAlreadyExistsError, email_already_exists_handler)
+app.add_exception_handler(VersionConflictError, version_conflict_handler)
+app.add_exception_handler(WriteAheadLogError, write_ahead_log_handler)
+app.add_exception_handler(IdempotencyKeyReusedError, idempotency_key_reused_handler)
+app.add_exception_handler(RepositoryFullError, repository_full_handler)
+app.add_exception_handler(DebugAccessDeniedError, debug_access_denied_handler)
 
 
 app.include_router(api_v1_router, prefix=settings.API_V1_PREFIX)
@@ -0,0 +1,30 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class UserStats:
+	"""
+	Модель агрегатов по пользователям и переводам.
+	
+	Репозитории поддерживают агрегаты при каждом создании пользователя
+	и переводе, поэтому их чтение не требует обхода всех счетов:
+	- user_count: количество пользователей
+	- total_balance: сумма всех балансов (меняется только созданием пользователей)
+	- min_balance, max_balance: наименьший и наибольший баланс (None без пользователей)
+	- mean_balance: средний баланс (None без пользователей)
+	- transfer_count: количество выполненных переводов
+	- transfer_volume: сумма выполненных переводов
+	
+	Хранится со __slots__ (без __dict__) и сериализуется orjson напрямую.
+	"""
+	
+	user_count: int
+	total_balance: int
+	min_balance: int | None
+	max_balance: int | None
+	transfer_count: int
+	transfer_volume: int
+	mean_balance: float | None = field(init=False)
+	
+	def __post_init__(self) -> None:
+		self.mean_balance = self.total_balance / self.user_count if self.user_count else None
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(slots=True)
+class Transfer:
+	"""
+	Модель записи журнала переводов.
+	
+	Представляет выполненный перевод:
+	- id: номер записи, возрастает в порядке выполнения переводов
+	- from_user_id: ID отправителя
+	- to_user_id: ID получателя
+	- amount: сумма перевода
+	- created_at: время перевода (UTC)
+	
+	Хранится со __slots__ (без __dict__) и сериализуется orjson напрямую.
+	"""
+	
+	id: int
+	from_user_id: int
+	to_user_id: int
+	amount: int
+	created_at: datetime
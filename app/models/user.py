@@ -1,7 +1,11 @@
 from dataclasses import dataclass
 
 
-@dataclass
+# Наибольший баланс: хранилища держат балансы в int64
+MAX_BALANCE = 2**63 - 1
+
+
+@dataclass(slots=True)
 class User:
 	"""
 	Модель пользователя.
@@ -11,9 +15,14 @@ class User:
 	- name: имя пользователя
 	- email: электронная почта
 	- balance: текущий баланс
+	- version: номер версии, увеличивается каждым изменением баланса
+	  (для оптимистичных условных переводов)
+	
+	Хранится со __slots__ (без __dict__) и сериализуется orjson напрямую.
 	"""
 	
 	id: int
 	name: str
 	email: str
 	balance: int
+	version: int = 0
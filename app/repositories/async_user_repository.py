@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Iterator
+
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import User
+from app.repositories.base import UserRepository
+from app.repositories.locks import AsyncStripedLockManager
+
+
+class AsyncInMemoryUserRepository:
+	"""
+	Асинхронный репозиторий поверх in-memory хранилища.
+
+	Оборачивает синхронный репозиторий, хранящий данные в памяти
+	(InMemoryUserRepository или ColumnarUserRepository). Его операции не
+	выполняют ввода-вывода и занимают микросекунды, поэтому вызываются
+	прямо в цикле событий, без передачи в пул потоков.
+
+	Переводы дополнительно сериализуются асинхронными блокировками счетов:
+	конкурирующие корутины ждут, уступая цикл событий, и до синхронных
+	блокировок внутри репозитория доходит не более одной из них на счет.
+	
+	Если у репозитория включен журнал предзаписи или он хранит данные на
+	диске (persistent), изменяющие операции ждут fsync, поэтому выполняются
+	в пуле потоков, а не в цикле событий. У хранилища на диске в пуле
+	потоков выполняются и чтения: они тоже обращаются к файлу базы.
+	"""
+
+	def __init__(self, repo: UserRepository, lock_stripes: int = 64) -> None:
+		"""
+		Инициализирует асинхронный репозиторий.
+
+		Args:
+			repo: Синхронный in-memory репозиторий
+			lock_stripes: Количество полос в пуле асинхронных блокировок
+		"""
+		self._repo = repo
+		self._locks = AsyncStripedLockManager(lock_stripes)
+		# Изменения блокируют поток до fsync только при включенном журнале или хранении на диске
+		self._blocking_writes: bool = (
+			getattr(repo, "wal", None) is not None or getattr(repo, "persistent", False)
+		)
+		# Чтения выполняют ввод-вывод только у хранилища на диске
+		self._blocking_reads: bool = getattr(repo, "persistent", False)
+
+	async def _read(self, func, *args):
+		"""
+		Выполняет читающую операцию синхронного репозитория.
+		
+		Args:
+			func: Метод репозитория
+			*args: Аргументы метода
+			
+		Returns:
+			Результат метода
+		"""
+		if self._blocking_reads:
+			return await asyncio.to_thread(func, *args)
+		return func(*args)
+
+	async def _write(self, func, *args):
+		"""
+		Выполняет изменяющую операцию синхронного репозитория.
+		
+		Args:
+			func: Метод репозитория
+			*args: Аргументы метода
+			
+		Returns:
+			Результат метода
+		"""
+		if self._blocking_writes:
+			return await asyncio.to_thread(func, *args)
+		return func(*args)
+
+	async def list(self) -> list[User]:
+		"""
+		Возвращает список всех пользователей.
+
+		Returns:
+			list[User]: Пользователи в порядке возрастания id
+		"""
+		return await self._read(self._repo.list)
+
+	async def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Возвращает страницу пользователей по возрастанию id.
+
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+
+		Returns:
+			list[User]: Пользователи с id больше after_id
+		"""
+		return await self._read(self._repo.list_page, limit, after_id)
+
+	async def export(self) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+
+		Обход итератора синхронный: для больших выгрузок его ведут в пуле потоков.
+
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		# Хранилище на диске открывает транзакцию чтения - это ввод-вывод
+		return await self._read(self._repo.export)
+
+	async def get_by_id(self, user_id: int) -> User | None:
+		"""
+		Находит пользователя по ID.
+
+		Args:
+			user_id: ID пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		return await self._read(self._repo.get_by_id, user_id)
+
+	async def get_by_email(self, email: str) -> User | None:
+		"""
+		Находит пользователя по email (регистронезависимо).
+
+		Args:
+			email: Email пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		return await self._read(self._repo.get_by_email, email)
+
+	async def create(self, name: str, email: str, balance: int) -> User:
+		"""
+		Создает нового пользователя.
+
+		Args:
+			name: Имя пользователя
+			email: Email пользователя (должен быть уникальным)
+			balance: Начальный баланс пользователя
+
+		Returns:
+			User: Созданный пользователь
+
+		Raises:
+			EmailAlreadyExistsError: Если email уже используется
+		"""
+		return await self._write(self._repo.create, name, email, balance)
+
+	async def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей, пропуская занятые email.
+
+		Args:
+			users: Пользователи (имя, email, баланс)
+
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже используется
+		"""
+		return await self._write(self._repo.create_many, users)
+
+	async def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""
+		Переводит деньги между пользователями.
+
+		Args:
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя; None - без проверки
+
+		Returns:
+			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			VersionConflictError: Если версия отправителя не равна expected_version
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+		"""
+		async with self._locks.acquire(from_user_id, to_user_id):
+			return await self._write(self._repo.transfer, from_user_id, to_user_id, amount, expected_version)
+
+	async def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов: либо все, либо ни одного.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+		"""
+		user_ids = {user_id for from_user_id, to_user_id, _ in transfers for user_id in (from_user_id, to_user_id)}
+		async with self._locks.acquire(*user_ids):
+			return await self._write(self._repo.transfer_batch, transfers)
+
+	async def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""
+		Возвращает страницу истории переводов пользователя, от новых к старым.
+
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
+
+		Returns:
+			list[Transfer]: Переводы с id меньше before_id по убыванию id
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		return await self._read(self._repo.list_transfers, user_id, limit, before_id)
+
+	async def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Находит пользователей, у которых имя или email начинается с запроса.
+
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
+
+		Returns:
+			list[User]: Пользователи в порядке совпавшего имени или email, затем id
+		"""
+		return await self._read(self._repo.search, query, limit, after_id)
+
+	async def top(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+
+		Args:
+			n: Количество пользователей
+
+		Returns:
+			list[User]: Пользователи по убыванию баланса
+		"""
+		return await self._read(self._repo.top, n)
+
+	async def stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам.
+
+		Returns:
+			UserStats: Агрегаты
+		"""
+		return await self._read(self._repo.stats)
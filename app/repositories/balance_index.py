@@ -0,0 +1,103 @@
+"""
+Упорядоченный индекс балансов для in-memory хранилищ.
+"""
+
+from __future__ import annotations
+
+import threading
+from itertools import islice
+from typing import Iterable
+
+from app.repositories.sorted_list import SortedList
+
+
+# Ключ индекса - одно целое (баланс << _ID_BITS) + (_ID_MASK - id): сравнение
+# целых быстрее сравнения кортежей, а обратный id в младших битах дает при
+# обходе от больших балансов к меньшим равные балансы по возрастанию id
+_ID_BITS = 40
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+def _key(user_id: int, balance: int) -> int:
+	"""Возвращает ключ индекса для счета."""
+	return (balance << _ID_BITS) + (_ID_MASK - user_id)
+
+
+class BalanceIndex:
+	"""
+	Счета в порядке возрастания баланса.
+
+	Ключи хранятся в SortedList: изменение баланса обходится в O(log N),
+	наименьший и наибольший баланс читаются за O(1), n самых богатых
+	счетов - за O(n).
+
+	Переводы по несвязанным счетам меняют индекс параллельно, поэтому
+	изменения и чтения идут под собственной короткой блокировкой индекса.
+	"""
+
+	def __init__(self, entries: Iterable[tuple[int, int]] = ()) -> None:
+		"""
+		Строит индекс.
+
+		Args:
+			entries: Пары (баланс, id) в любом порядке
+		"""
+		self._keys = SortedList(_key(user_id, balance) for balance, user_id in entries)
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._keys)
+
+	def add(self, user_id: int, balance: int) -> None:
+		"""
+		Добавляет счет в индекс.
+
+		Args:
+			user_id: ID пользователя
+			balance: Баланс пользователя
+		"""
+		with self._lock:
+			self._keys.add(_key(user_id, balance))
+
+	def move(self, user_id: int, old_balance: int, new_balance: int) -> None:
+		"""
+		Переносит счет на новый баланс.
+
+		Args:
+			user_id: ID пользователя
+			old_balance: Баланс, с которым счет сейчас в индексе
+			new_balance: Новый баланс
+		"""
+		if old_balance == new_balance:
+			return
+		# Ключи считаются на месте, без вызова _key: move выполняется в каждом переводе
+		reversed_id = _ID_MASK - user_id
+		keys = self._keys
+		with self._lock:
+			keys.remove((old_balance << _ID_BITS) + reversed_id)
+			keys.add((new_balance << _ID_BITS) + reversed_id)
+
+	def min(self) -> int | None:
+		"""Возвращает наименьший баланс или None для пустого индекса."""
+		with self._lock:
+			key = self._keys.first()
+		return key >> _ID_BITS if key is not None else None
+
+	def max(self) -> int | None:
+		"""Возвращает наибольший баланс или None для пустого индекса."""
+		with self._lock:
+			key = self._keys.last()
+		return key >> _ID_BITS if key is not None else None
+
+	def top(self, n: int) -> list[int]:
+		"""
+		Возвращает n счетов с наибольшими балансами.
+
+		Args:
+			n: Количество счетов
+
+		Returns:
+			list[int]: ID пользователей по убыванию баланса, равные балансы - по возрастанию id
+		"""
+		with self._lock:
+			return [_ID_MASK - (key & _ID_MASK) for key in islice(reversed(self._keys), n)]
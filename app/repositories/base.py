@@ -0,0 +1,141 @@
+"""
+Общий интерфейс репозиториев пользователей.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator, Protocol
+
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import User
+
+
+class UserRepository(Protocol):
+	"""
+	Интерфейс репозитория пользователей.
+
+	Ему следуют все реализации хранилища, поэтому сервисы и зависимости
+	не привязаны к конкретному способу хранения данных.
+	"""
+
+	def list(self) -> list[User]:
+		"""Возвращает список всех пользователей по возрастанию id."""
+		...
+
+	def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""Возвращает страницу пользователей с id больше after_id."""
+		...
+
+	def export(self) -> Iterator[User]:
+		"""Возвращает итератор по всем пользователям в состоянии на момент вызова."""
+		...
+
+	def get_by_id(self, user_id: int) -> User | None:
+		"""Находит пользователя по ID."""
+		...
+
+	def get_by_email(self, email: str) -> User | None:
+		"""Находит пользователя по email (регистронезависимо)."""
+		...
+
+	def create(self, name: str, email: str, balance: int) -> User:
+		"""Создает нового пользователя."""
+		...
+
+	def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""Создает пакет пользователей; None - для строк с уже занятым email."""
+		...
+
+	def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""Переводит деньги между пользователями; с expected_version - только при совпадении версии отправителя."""
+		...
+
+	def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""Атомарно выполняет пакет переводов."""
+		...
+
+	def apply_transfers(self, transfers: list[tuple[int, int, int]]) -> list[tuple[User, User] | Exception]:
+		"""Выполняет независимые переводы одним пакетом; для отклоненных - исключение."""
+		...
+
+	def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""Возвращает страницу истории переводов пользователя с id меньше before_id, от новых к старым."""
+		...
+
+	def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""Возвращает страницу пользователей, у которых имя или email начинается с запроса."""
+		...
+
+	def top(self, n: int) -> list[User]:
+		"""Возвращает n пользователей с наибольшими балансами по убыванию баланса."""
+		...
+
+	def stats(self) -> UserStats:
+		"""Возвращает агрегаты по пользователям и переводам без обхода всех счетов."""
+		...
+
+
+class AsyncUserRepository(Protocol):
+	"""
+	Асинхронный интерфейс репозитория пользователей.
+
+	Повторяет UserRepository для бэкендов с асинхронным вводом-выводом
+	и для нативно асинхронных эндпоинтов.
+	"""
+
+	async def list(self) -> list[User]:
+		"""Возвращает список всех пользователей по возрастанию id."""
+		...
+
+	async def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""Возвращает страницу пользователей с id больше after_id."""
+		...
+
+	async def export(self) -> Iterator[User]:
+		"""Возвращает итератор по всем пользователям в состоянии на момент вызова."""
+		...
+
+	async def get_by_id(self, user_id: int) -> User | None:
+		"""Находит пользователя по ID."""
+		...
+
+	async def get_by_email(self, email: str) -> User | None:
+		"""Находит пользователя по email (регистронезависимо)."""
+		...
+
+	async def create(self, name: str, email: str, balance: int) -> User:
+		"""Создает нового пользователя."""
+		...
+
+	async def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""Создает пакет пользователей; None - для строк с уже занятым email."""
+		...
+
+	async def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""Переводит деньги между пользователями; с expected_version - только при совпадении версии отправителя."""
+		...
+
+	async def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""Атомарно выполняет пакет переводов."""
+		...
+
+	async def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""Возвращает страницу истории переводов пользователя с id меньше before_id, от новых к старым."""
+		...
+
+	async def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""Возвращает страницу пользователей, у которых имя или email начинается с запроса."""
+		...
+
+	async def top(self, n: int) -> list[User]:
+		"""Возвращает n пользователей с наибольшими балансами по убыванию баланса."""
+		...
+
+	async def stats(self) -> UserStats:
+		"""Возвращает агрегаты по пользователям и переводам без обхода всех счетов."""
+		...
@@ -0,0 +1,707 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from array import array
+from typing import Iterator
+
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import MAX_BALANCE, User
+from app.repositories.balance_index import BalanceIndex
+from app.repositories.journal import UndoJournal
+from app.repositories.ledger import TransferLedger
+from app.repositories.prefix_index import PrefixIndex
+from app.repositories.read_views import ReadViews
+from app.repositories.locks import StripedLockManager
+from app.repositories.snapshot import DEFAULT_USERS
+from app.core.exceptions import (
+	UserNotFoundError, SelfTransferError, BalanceOverflowError,
+	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError, VersionConflictError
+)
+
+
+class ColumnarUserRepository:
+	"""
+	Колоночный репозиторий пользователей для миллионов счетов.
+
+	Вместо объекта User на каждого пользователя хранит данные в компактных
+	колонках:
+	- балансы и версии - в массивах array('q') (по 8 байт на счет);
+	- id не хранятся: они выдаются подряд, и id = номер строки + 1;
+	- имена и email - упакованными UTF-8 байтами в bytearray с массивом
+	  смещений концов строк;
+	- индекс email - хеш-таблица с открытой адресацией в array('q'),
+	  хранящая номера строк, без отдельных строковых ключей.
+
+	Объекты User создаются только при обращении, как легковесные представления
+	строки. Интерфейс совпадает с InMemoryUserRepository.
+
+	Индекс балансов для stats() и top() и индекс поиска для search()
+	строятся при первом вызове: до него репозиторий не тратит память на
+	объекты индексов. Индекс поиска хранит строки имен и email в casefold
+	и занимает больше памяти, чем сами колонки.
+
+	Полный список и выгрузка читают согласованное представление (ReadViews):
+	переводы не ждут читателя, а сохраняют для него прежние баланс и версию
+	изменяемых строк.
+	"""
+
+	def __init__(self, lock_stripes: int = 64) -> None:
+		"""
+		Инициализирует репозиторий с тестовыми данными.
+
+		Args:
+			lock_stripes: Количество полос в пуле блокировок счетов
+		"""
+		self._balances = array("q")
+		self._versions = array("q")
+		self._names = bytearray()
+		self._name_ends = array("q")
+		self._emails = bytearray()
+		self._email_ends = array("q")
+		self._email_hashes = array("q")
+
+		# Хеш-таблица email и её маска размера: в ячейке номер строки + 1,
+		# 0 - пустая ячейка. Хранятся одной парой, чтобы читатели не увидели
+		# новую таблицу со старой маской
+		self._email_index: tuple = (array("q", bytes(8 * 8)), 7)
+
+		self._locks = StripedLockManager(lock_stripes)
+		self._create_lock = threading.Lock()
+		self._ledger = TransferLedger()
+		self._read_views = ReadViews()
+		self._total_balance: int = 0
+		# Упорядоченный индекс балансов; None - еще не построен
+		self._balance_index: BalanceIndex | None = None
+		# Индекс префиксного поиска по имени и email; None - еще не построен
+		self._prefix_index: PrefixIndex | None = None
+
+		# Имитируем базу данных с тестовыми данными
+		for name, email, balance in DEFAULT_USERS:
+			self.create(name=name, email=email, balance=balance)
+
+	@staticmethod
+	def _normalize_email(email: str) -> str:
+		"""
+		Приводит email к ключу индекса (регистронезависимое сравнение).
+
+		Args:
+			email: Исходный email
+
+		Returns:
+			str: Нормализованный email
+		"""
+		return email.casefold()
+
+	@staticmethod
+	def _read(buffer: bytearray, ends: array, row: int) -> str:
+		"""
+		Читает строку из упакованного хранилища.
+
+		Args:
+			buffer: Упакованные UTF-8 байты
+			ends: Смещения концов строк
+			row: Номер строки
+
+		Returns:
+			str: Декодированная строка
+		"""
+		start = ends[row - 1] if row else 0
+		return buffer[start:ends[row]].decode("utf-8")
+
+	def _view(self, row: int) -> User:
+		"""
+		Создает представление User для строки.
+
+		Args:
+			row: Номер строки
+
+		Returns:
+			User: Пользователь
+		"""
+		return User(
+			id=row + 1,
+			name=self._read(self._names, self._name_ends, row),
+			email=self._read(self._emails, self._email_ends, row),
+			balance=self._balances[row],
+			version=self._versions[row],
+		)
+
+	def _view_as_of(self, row: int, view: dict) -> User:
+		"""
+		Создает представление User для строки в состоянии закрепленного представления.
+
+		Args:
+			row: Номер строки
+			view: Закрепленное представление
+
+		Returns:
+			User: Пользователь с балансом и версией на момент закрепления
+		"""
+		# Сначала текущее состояние, затем сохраненное: оно сохраняется до изменения
+		user = self._view(row)
+		state = view.get(row)
+		if state is not None:
+			user.balance, user.version = state
+		return user
+
+	def _pin(self) -> tuple[dict, int]:
+		"""
+		Закрепляет представление для чтения, приостанавливая изменения только на захват блокировок.
+
+		Returns:
+			tuple[dict, int]: Представление и количество строк на момент закрепления
+		"""
+		with self._create_lock, self._locks.acquire_all():
+			return self._read_views.pin(), len(self._balances)
+
+	def _preserve(self, user_ids) -> None:
+		"""
+		Сохраняет балансы и версии строк для закрепленных представлений (под их блокировками).
+
+		Args:
+			user_ids: ID пользователей, которые будут изменены
+		"""
+		balances, versions = self._balances, self._versions
+		for user_id in user_ids:
+			row = user_id - 1
+			self._read_views.preserve(row, (balances[row], versions[row]))
+
+	def _row(self, user_id: int) -> int:
+		"""
+		Возвращает номер строки пользователя.
+
+		Args:
+			user_id: ID пользователя
+
+		Returns:
+			int: Номер строки или -1, если пользователя нет
+		"""
+		if 1 <= user_id <= len(self._balances):
+			return user_id - 1
+		return -1
+
+	def _find_email(self, email_key: str, email_hash: int) -> int:
+		"""
+		Ищет строку по нормализованному email в хеш-таблице.
+
+		Args:
+			email_key: Нормализованный email
+			email_hash: Хеш нормализованного email
+
+		Returns:
+			int: Номер строки или -1, если email не найден
+		"""
+		table, mask = self._email_index
+		slot = email_hash & mask
+		while True:
+			value = table[slot]
+			if value == 0:
+				return -1
+			row = value - 1
+			if (
+				self._email_hashes[row] == email_hash
+				and self._read(self._emails, self._email_ends, row).casefold() == email_key
+			):
+				return row
+			slot = (slot + 1) & mask
+
+	def _index_email(self, row: int) -> None:
+		"""
+		Добавляет строку в хеш-таблицу email, увеличивая её при заполнении наполовину.
+
+		Args:
+			row: Номер строки
+		"""
+		table, mask = self._email_index
+		if (row + 1) * 2 > len(table):
+			# Строим новую таблицу целиком и публикуем её одним присваиванием,
+			# чтобы читатели видели либо старую, либо новую таблицу
+			size = len(table) * 2
+			table = array("q", bytes(8 * size))
+			mask = size - 1
+			for existing in range(row):
+				self._place(table, mask, existing)
+			self._email_index = (table, mask)
+		self._place(table, mask, row)
+
+	def _place(self, table: array, mask: int, row: int) -> None:
+		"""
+		Записывает строку в первую свободную ячейку хеш-таблицы.
+
+		Args:
+			table: Хеш-таблица
+			mask: Маска размера таблицы
+			row: Номер строки
+		"""
+		slot = self._email_hashes[row] & mask
+		while table[slot]:
+			slot = (slot + 1) & mask
+		table[slot] = row + 1
+
+	def list(self) -> list[User]:
+		"""
+		Возвращает список всех пользователей из закрепленного представления.
+
+		Returns:
+			list[User]: Пользователи в порядке возрастания id
+		"""
+		view, count = self._pin()
+		try:
+			return [self._view_as_of(row, view) for row in range(count)]
+		finally:
+			self._read_views.release(view)
+
+	def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Возвращает страницу пользователей по возрастанию id.
+
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+
+		Returns:
+			list[User]: Пользователи с id больше after_id
+		"""
+		# id = номер строки + 1, поэтому страница начинается со строки after_id
+		start = 0 if after_id is None else max(after_id, 0)
+		end = min(start + limit, len(self._balances))
+		return [self._view(row) for row in range(start, end)]
+
+	def export(self) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+
+		Вызов закрепляет представление для чтения: изменения приостанавливаются
+		только на захват блокировок, без копирования колонок. Представление
+		освобождается в конце обхода или вместе с итератором.
+
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		view, count = self._pin()
+
+		def export_users() -> Iterator[User]:
+			try:
+				for row in range(count):
+					yield self._view_as_of(row, view)
+			finally:
+				self._read_views.release(view)
+
+		users = export_users()
+		# Итератор, который так и не начали обходить, освобождает представление при сборке мусора
+		weakref.finalize(users, self._read_views.release, view)
+		return users
+
+	def get_by_id(self, user_id: int) -> User | None:
+		"""
+		Находит пользователя по ID.
+
+		Args:
+			user_id: ID пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		row = self._row(user_id)
+		return self._view(row) if row >= 0 else None
+
+	def get_by_email(self, email: str) -> User | None:
+		"""
+		Находит пользователя по email (регистронезависимо).
+
+		Args:
+			email: Email пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		email_key = self._normalize_email(email)
+		row = self._find_email(email_key, hash(email_key))
+		return self._view(row) if row >= 0 else None
+
+	def create(self, name: str, email: str, balance: int) -> User:
+		"""
+		Создает нового пользователя.
+
+		Args:
+			name: Имя пользователя
+			email: Email пользователя (должен быть уникальным)
+			balance: Начальный баланс пользователя
+
+		Returns:
+			User: Созданный пользователь
+
+		Raises:
+			EmailAlreadyExistsError: Если email уже используется
+		"""
+		email_key = self._normalize_email(email)
+		email_hash = hash(email_key)
+		with self._create_lock:
+			# Проверяем уникальность email
+			if self._find_email(email_key, email_hash) >= 0:
+				raise EmailAlreadyExistsError()
+			return self._append(name, email, balance, email_hash)
+
+	def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей, пропуская занятые email.
+
+		Args:
+			users: Пользователи (имя, email, баланс)
+
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже
+			используется (в том числе более ранней строкой пакета), по строкам пакета
+		"""
+		results = []
+		with self._create_lock:
+			for name, email, balance in users:
+				email_key = self._normalize_email(email)
+				email_hash = hash(email_key)
+				if self._find_email(email_key, email_hash) >= 0:
+					results.append(None)
+				else:
+					results.append(self._append(name, email, balance, email_hash))
+		return results
+
+	def _append(self, name: str, email: str, balance: int, email_hash: int) -> User:
+		"""
+		Дописывает строку пользователя во все колонки (вызывается под блокировкой создания).
+
+		Args:
+			name: Имя пользователя
+			email: Email пользователя
+			balance: Начальный баланс пользователя
+			email_hash: Хеш нормализованного email
+
+		Returns:
+			User: Созданный пользователь
+		"""
+		row = len(self._balances)
+		self._names += name.encode("utf-8")
+		self._name_ends.append(len(self._names))
+		self._emails += email.encode("utf-8")
+		self._email_ends.append(len(self._emails))
+		self._email_hashes.append(email_hash)
+		self._versions.append(0)
+		# Баланс добавляется последним среди колонок: по длине этой колонки
+		# читатели определяют количество полностью записанных строк
+		self._balances.append(balance)
+		self._index_email(row)
+		self._total_balance += balance
+		if self._balance_index is not None:
+			self._balance_index.add(row + 1, balance)
+		if self._prefix_index is not None:
+			self._prefix_index.add(row + 1, name, email)
+		return User(id=row + 1, name=name, email=email, balance=balance)
+
+	def _balances_before(self, user_ids: set) -> dict | None:
+		"""
+		Запоминает балансы участников пакета для индекса балансов (вызывается под их блокировками).
+
+		Args:
+			user_ids: ID участников пакета
+
+		Returns:
+			dict | None: id -> баланс до пакета или None, если индекс еще не построен
+		"""
+		if self._balance_index is None:
+			return None
+		return {user_id: self._balances[user_id - 1] for user_id in user_ids}
+
+	def _reindex(self, before: dict | None) -> None:
+		"""
+		Переносит участников пакета в индексе балансов на их новые балансы.
+
+		Args:
+			before: Балансы до пакета из _balances_before
+		"""
+		if before is not None:
+			for user_id, balance in before.items():
+				self._balance_index.move(user_id, balance, self._balances[user_id - 1])
+
+	def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""
+		Переводит деньги между пользователями с поддержкой транзакций.
+
+		Перевод увеличивает версии обоих пользователей; с expected_version
+		устаревшая версия отправителя обнаруживается до захвата блокировок.
+
+		Args:
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя; None - без проверки
+
+		Returns:
+			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			VersionConflictError: Если версия отправителя не равна expected_version
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		from_row = self._row(from_user_id)
+		to_row = self._row(to_user_id)
+		if from_row < 0 or to_row < 0:
+			raise UserNotFoundError()
+		if from_user_id == to_user_id:
+			raise SelfTransferError()
+		versions = self._versions
+		if expected_version is not None and versions[from_row] != expected_version:
+			raise VersionConflictError()
+
+		balances = self._balances
+		with self._locks.acquire(from_user_id, to_user_id), UndoJournal() as journal:
+			if expected_version is not None and versions[from_row] != expected_version:
+				raise VersionConflictError()
+			if balances[from_row] < amount:
+				raise InsufficientFundsError()
+			if amount <= 0:
+				raise InvalidAmountError()
+			if balances[to_row] > MAX_BALANCE - amount:
+				raise BalanceOverflowError()
+
+			if self._read_views.pinned:
+				self._preserve((from_user_id, to_user_id))
+			journal.set_item(balances, from_row, balances[from_row] - amount)
+			journal.set_item(balances, to_row, balances[to_row] + amount)
+			journal.set_item(versions, from_row, versions[from_row] + 1)
+			journal.set_item(versions, to_row, versions[to_row] + 1)
+			self._ledger.append(from_user_id, to_user_id, amount)
+			if self._balance_index is not None:
+				self._balance_index.move(from_user_id, balances[from_row] + amount, balances[from_row])
+				self._balance_index.move(to_user_id, balances[to_row] - amount, balances[to_row])
+			return self._view(from_row), self._view(to_row)
+
+	def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов: либо все, либо ни одного.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		user_ids = set()
+		for from_user_id, to_user_id, amount in transfers:
+			if self._row(from_user_id) < 0 or self._row(to_user_id) < 0:
+				raise UserNotFoundError()
+			if from_user_id == to_user_id:
+				raise SelfTransferError()
+			if amount <= 0:
+				raise InvalidAmountError()
+			user_ids.add(from_user_id)
+			user_ids.add(to_user_id)
+
+		balances = self._balances
+		versions = self._versions
+		results = []
+		with self._locks.acquire(*user_ids), UndoJournal() as journal:
+			before = self._balances_before(user_ids)
+			if self._read_views.pinned:
+				self._preserve(user_ids)
+			for from_user_id, to_user_id, amount in transfers:
+				from_row = from_user_id - 1
+				to_row = to_user_id - 1
+				if balances[from_row] < amount:
+					raise InsufficientFundsError()
+				if balances[to_row] > MAX_BALANCE - amount:
+					raise BalanceOverflowError()
+				journal.set_item(balances, from_row, balances[from_row] - amount)
+				journal.set_item(balances, to_row, balances[to_row] + amount)
+				journal.set_item(versions, from_row, versions[from_row] + 1)
+				journal.set_item(versions, to_row, versions[to_row] + 1)
+				results.append((balances[from_row], balances[to_row]))
+			self._ledger.extend(transfers)
+			self._reindex(before)
+		return results
+
+	def apply_transfers(self, transfers: list[tuple[int, int, int]]) -> list[tuple[User, User] | Exception]:
+		"""
+		Выполняет независимые переводы по порядку в одной критической секции.
+
+		В отличие от transfer_batch, переводы не атомарны вместе: каждый
+		проверяется по балансам с учетом предыдущих и выполняется или
+		отклоняется сам по себе. Блокировки счетов берутся один раз на весь пакет.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[User, User] | Exception]: Для каждого перевода
+			(отправитель, получатель) после него или исключение отказа
+		"""
+		results: list = [None] * len(transfers)
+		user_ids = set()
+		valid = []
+		for index, (from_user_id, to_user_id, amount) in enumerate(transfers):
+			if self._row(from_user_id) < 0 or self._row(to_user_id) < 0:
+				results[index] = UserNotFoundError()
+			elif from_user_id == to_user_id:
+				results[index] = SelfTransferError()
+			else:
+				valid.append(index)
+				user_ids.add(from_user_id)
+				user_ids.add(to_user_id)
+
+		balances = self._balances
+		versions = self._versions
+		applied = []
+		# Журнал отмены возвращает балансы и версии, если пакет прервется исключением
+		with self._locks.acquire(*user_ids), UndoJournal() as journal:
+			before = self._balances_before(user_ids)
+			if self._read_views.pinned:
+				self._preserve(user_ids)
+			for index in valid:
+				from_user_id, to_user_id, amount = transfers[index]
+				from_row = from_user_id - 1
+				to_row = to_user_id - 1
+				# Тот же порядок проверок, что и в transfer
+				if balances[from_row] < amount:
+					results[index] = InsufficientFundsError()
+					continue
+				if amount <= 0:
+					results[index] = InvalidAmountError()
+					continue
+				if balances[to_row] > MAX_BALANCE - amount:
+					results[index] = BalanceOverflowError()
+					continue
+				journal.set_item(balances, from_row, balances[from_row] - amount)
+				journal.set_item(balances, to_row, balances[to_row] + amount)
+				journal.set_item(versions, from_row, versions[from_row] + 1)
+				journal.set_item(versions, to_row, versions[to_row] + 1)
+				applied.append(transfers[index])
+				results[index] = self._view(from_row), self._view(to_row)
+			if applied:
+				self._ledger.extend(applied)
+				self._reindex(before)
+		return results
+
+	def _build_balance_index(self) -> BalanceIndex:
+		"""
+		Строит индекс балансов по всем строкам, приостанавливая изменения.
+
+		Returns:
+			BalanceIndex: Индекс балансов
+		"""
+		with self._create_lock, self._locks.acquire_all():
+			if self._balance_index is None:
+				self._balance_index = BalanceIndex(
+					(balance, row + 1) for row, balance in enumerate(self._balances)
+				)
+			return self._balance_index
+
+	def stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам.
+
+		Returns:
+			UserStats: Агрегаты; первый вызов строит индекс балансов
+		"""
+		index = self._balance_index
+		if index is None:
+			index = self._build_balance_index()
+		with self._create_lock:
+			user_count = len(self._balances)
+			total_balance = self._total_balance
+		return UserStats(
+			user_count=user_count,
+			total_balance=total_balance,
+			min_balance=index.min(),
+			max_balance=index.max(),
+			transfer_count=len(self._ledger),
+			transfer_volume=self._ledger.volume,
+		)
+
+	def top(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+
+		Args:
+			n: Количество пользователей
+
+		Returns:
+			list[User]: Пользователи по убыванию баланса, равные балансы - по возрастанию id;
+				первый вызов строит индекс балансов
+		"""
+		index = self._balance_index
+		if index is None:
+			index = self._build_balance_index()
+		return [self._view(user_id - 1) for user_id in index.top(n)]
+
+	def _build_prefix_index(self) -> PrefixIndex:
+		"""
+		Строит индекс поиска по всем строкам, приостанавливая только создание.
+
+		Returns:
+			PrefixIndex: Индекс поиска
+		"""
+		with self._create_lock:
+			if self._prefix_index is None:
+				names, name_ends = self._names, self._name_ends
+				emails, email_ends = self._emails, self._email_ends
+				self._prefix_index = PrefixIndex(
+					(row + 1, self._read(names, name_ends, row), self._read(emails, email_ends, row))
+					for row in range(len(self._balances))
+				)
+			return self._prefix_index
+
+	def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Находит пользователей, у которых имя или email начинается с запроса.
+
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
+
+		Returns:
+			list[User]: Пользователи в порядке совпавшего имени или email, затем id;
+				первый вызов строит индекс поиска
+		"""
+		index = self._prefix_index
+		if index is None:
+			index = self._build_prefix_index()
+		after = None
+		if after_id is not None:
+			row = self._row(after_id)
+			if row < 0:
+				return []
+			cursor = self._view(row)
+			after = cursor.id, cursor.name, cursor.email
+		return [self._view(user_id - 1) for user_id in index.search(query, limit, after)]
+
+	def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""
+		Возвращает страницу истории переводов пользователя, от новых к старым.
+
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
+
+		Returns:
+			list[Transfer]: Переводы с id меньше before_id по убыванию id
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		if self._row(user_id) < 0:
+			raise UserNotFoundError()
+		return self._ledger.page(user_id, limit, before_id)
@@ -0,0 +1,67 @@
+"""
+Репозиторий с замером времени операций для метрик.
+"""
+
+import time
+from functools import wraps
+
+from app.core.metrics import REPOSITORY_LATENCY
+from app.repositories.base import UserRepository
+
+
+# Операции интерфейса UserRepository, время которых попадает в метрики
+OPERATIONS = (
+	"list", "list_page", "export", "get_by_id", "get_by_email",
+	"create", "create_many", "transfer", "transfer_batch", "apply_transfers", "list_transfers",
+	"search", "top", "stats",
+)
+
+
+def _timed(func, labels: tuple):
+	"""
+	Оборачивает метод репозитория замером времени.
+
+	Args:
+		func: Связанный метод репозитория
+		labels: Метки наблюдения в гистограмме
+
+	Returns:
+		Обертка с той же сигнатурой
+	"""
+	observe = REPOSITORY_LATENCY.observe
+	perf_counter = time.perf_counter
+
+	@wraps(func)
+	def timed(*args, **kwargs):
+		started = perf_counter()
+		try:
+			return func(*args, **kwargs)
+		finally:
+			observe(perf_counter() - started, labels)
+
+	return timed
+
+
+class InstrumentedUserRepository:
+	"""
+	Обертка репозитория, записывающая время каждой операции в гистограмму
+	repository_operation_duration_seconds.
+
+	Операции из OPERATIONS заменяются обертками один раз при создании,
+	остальные атрибуты (wal, persistent, checkpoint, close) берутся
+	у исходного репозитория.
+	"""
+
+	def __init__(self, repo: UserRepository) -> None:
+		"""
+		Инициализирует обертку.
+
+		Args:
+			repo: Исходный репозиторий
+		"""
+		self.repo = repo
+		for operation in OPERATIONS:
+			setattr(self, operation, _timed(getattr(repo, operation), (operation,)))
+
+	def __getattr__(self, name: str):
+		return getattr(self.repo, name)
@@ -0,0 +1,84 @@
+"""
+Журнал отмены (undo log) для многошаговых операций репозитория.
+"""
+
+
+class UndoJournal:
+	"""
+	Журнал отмены изменений.
+
+	Хранит записи только о тех полях и структурах, которые операция
+	действительно изменила. При ошибке записи применяются в обратном
+	порядке, поэтому стоимость отката зависит от размера операции,
+	а не от количества данных в репозитории.
+
+	Используется как контекстный менеджер: при исключении внутри блока
+	все изменения откатываются, при успешном выходе журнал очищается.
+	"""
+
+	__slots__ = ("_undo",)
+
+	def __init__(self) -> None:
+		"""
+		Инициализирует пустой журнал.
+		"""
+		self._undo: list = []
+
+	def set(self, obj: object, field: str, value: object) -> None:
+		"""
+		Изменяет атрибут объекта, запоминая прежнее значение.
+
+		Args:
+			obj: Изменяемый объект
+			field: Имя атрибута
+			value: Новое значение
+		"""
+		self._undo.append((setattr, (obj, field, getattr(obj, field))))
+		setattr(obj, field, value)
+
+	def set_item(self, container, key, value: object) -> None:
+		"""
+		Изменяет элемент контейнера (массива, словаря), запоминая прежнее значение.
+
+		Args:
+			container: Изменяемый контейнер
+			key: Индекс или ключ элемента
+			value: Новое значение
+		"""
+		self._undo.append((container.__setitem__, (key, container[key])))
+		container[key] = value
+
+	def on_rollback(self, func, *args) -> None:
+		"""
+		Регистрирует действие, которое отменяет уже выполненный шаг.
+
+		Args:
+			func: Функция отмены
+			*args: Аргументы функции отмены
+		"""
+		self._undo.append((func, args))
+
+	def rollback(self) -> None:
+		"""
+		Откатывает все записанные изменения в обратном порядке.
+		"""
+		undo = self._undo
+		while undo:
+			func, args = undo.pop()
+			func(*args)
+
+	def commit(self) -> None:
+		"""
+		Фиксирует изменения: записи отмены больше не нужны.
+		"""
+		self._undo.clear()
+
+	def __enter__(self) -> "UndoJournal":
+		return self
+
+	def __exit__(self, exc_type, exc, tb) -> bool:
+		if exc_type is None:
+			self.commit()
+		else:
+			self.rollback()
+		return False
@@ -0,0 +1,158 @@
+"""
+Журнал выполненных переводов (ledger) для in-memory хранилищ.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+from app.models.transfer import Transfer
+
+
+class TransferLedger:
+	"""
+	Журнал переводов только на добавление.
+
+	Записи хранятся в колонках array (отправитель, получатель, сумма,
+	время), номер записи = позиция в колонках + 1 (плюс переводы снимка). Для каждого
+	пользователя ведется вторичный индекс - возрастающий массив номеров
+	его записей, поэтому история одного пользователя читается с конца
+	бинарным поиском и срезом, за время, пропорциональное размеру
+	страницы, а не количеству всех переводов.
+
+	Добавление - несколько append под короткой блокировкой журнала:
+	она нужна только для выдачи номера и сохранения порядка в индексах.
+	Под той же блокировкой ведется сумма всех переводов (volume).
+
+	Журнал может продолжать переводы, учтенные в снимке: их записи не
+	хранятся, но нумерация, количество и сумма продолжаются после них.
+	"""
+
+	def __init__(self, count: int = 0, volume: int = 0) -> None:
+		"""
+		Инициализирует пустой журнал.
+
+		Args:
+			count: Количество переводов до первой записи журнала (из снимка)
+			volume: Сумма этих переводов
+		"""
+		self._base: int = count
+		self._from = array("q")
+		self._to = array("q")
+		self._amounts = array("q")
+		self._timestamps = array("d")
+		self._by_user: dict = {}
+		self._volume: int = volume
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return self._base + len(self._timestamps)
+
+	@property
+	def volume(self) -> int:
+		"""Сумма всех переводов журнала."""
+		return self._volume
+
+	def _index(self, user_id: int, transfer_id: int) -> None:
+		"""
+		Добавляет запись во вторичный индекс пользователя.
+
+		Args:
+			user_id: ID пользователя
+			transfer_id: Номер записи
+		"""
+		ids = self._by_user.get(user_id)
+		if ids is None:
+			ids = self._by_user[user_id] = array("q")
+		ids.append(transfer_id)
+
+	def append(self, from_user_id: int, to_user_id: int, amount: int) -> int:
+		"""
+		Добавляет перевод в журнал.
+
+		Args:
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+
+		Returns:
+			int: Номер записи
+		"""
+		now = time.time()
+		with self._lock:
+			self._from.append(from_user_id)
+			self._to.append(to_user_id)
+			self._amounts.append(amount)
+			# Время добавляется последним: по длине этой колонки читатели
+			# определяют количество полностью записанных записей
+			self._timestamps.append(now)
+			transfer_id = self._base + len(self._timestamps)
+			self._index(from_user_id, transfer_id)
+			self._index(to_user_id, transfer_id)
+			self._volume += amount
+			return transfer_id
+
+	def extend(self, transfers: list[tuple[int, int, int]]) -> int:
+		"""
+		Добавляет переводы в журнал подряд идущими номерами.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			int: Номер последней записи
+		"""
+		now = time.time()
+		with self._lock:
+			for from_user_id, to_user_id, amount in transfers:
+				self._from.append(from_user_id)
+				self._to.append(to_user_id)
+				self._amounts.append(amount)
+				self._timestamps.append(now)
+				transfer_id = self._base + len(self._timestamps)
+				self._index(from_user_id, transfer_id)
+				self._index(to_user_id, transfer_id)
+				self._volume += amount
+			return self._base + len(self._timestamps)
+
+	def get(self, transfer_id: int) -> Transfer:
+		"""
+		Создает объект Transfer для записи.
+
+		Args:
+			transfer_id: Номер записи
+
+		Returns:
+			Transfer: Перевод
+		"""
+		row = transfer_id - self._base - 1
+		return Transfer(
+			id=transfer_id,
+			from_user_id=self._from[row],
+			to_user_id=self._to[row],
+			amount=self._amounts[row],
+			created_at=datetime.fromtimestamp(self._timestamps[row], tz=timezone.utc),
+		)
+
+	def page(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""
+		Возвращает страницу истории пользователя от новых переводов к старым.
+
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - номер записи, до которой начинается страница
+
+		Returns:
+			list[Transfer]: Переводы с номером меньше before_id по убыванию номера
+		"""
+		ids = self._by_user.get(user_id)
+		if not ids:
+			return []
+		end = len(ids) if before_id is None else bisect_left(ids, before_id)
+		start = max(end - limit, 0)
+		return [self.get(transfer_id) for transfer_id in reversed(ids[start:end])]
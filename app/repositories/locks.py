@@ -0,0 +1,269 @@
+"""
+Блокировки счетов для конкурентного доступа к репозиторию.
+"""
+
+import asyncio
+import errno
+import fcntl
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from app.core.metrics import LOCK_WAIT
+
+
+class StripedLockManager:
+	"""
+	Менеджер блокировок с фиксированным пулом "полос" (lock striping).
+
+	Каждый счет отображается на одну из N блокировок по своему id.
+	Операция над несколькими счетами берет их блокировки в порядке
+	возрастания номера полосы, поэтому взаимная блокировка невозможна,
+	а операции над несвязанными счетами выполняются параллельно.
+	"""
+
+	def __init__(self, stripes: int = 64) -> None:
+		"""
+		Инициализирует пул блокировок.
+
+		Args:
+			stripes: Количество полос (блокировок в пуле)
+		"""
+		if stripes <= 0:
+			raise ValueError("stripes must be positive")
+		self._locks: tuple = tuple(threading.Lock() for _ in range(stripes))
+		self._stripes: int = stripes
+
+	@property
+	def stripes(self) -> int:
+		"""Количество полос в пуле."""
+		return self._stripes
+
+	def stripe_for(self, key: int) -> int:
+		"""
+		Возвращает номер полосы для счета.
+
+		Args:
+			key: id счета
+
+		Returns:
+			int: Номер полосы
+		"""
+		return key % self._stripes
+
+	def _ordered_stripes(self, keys) -> list:
+		"""
+		Возвращает уникальные номера полос для счетов в порядке захвата.
+
+		Args:
+			keys: id счетов
+
+		Returns:
+			list: Отсортированные номера полос без повторов
+		"""
+		return sorted({key % self._stripes for key in keys})
+
+	@contextmanager
+	def acquire(self, *keys: int):
+		"""
+		Захватывает блокировки счетов в фиксированном порядке.
+
+		Args:
+			*keys: id счетов, участвующих в операции
+		"""
+		locks = [self._locks[stripe] for stripe in self._ordered_stripes(keys)]
+		acquired = []
+		try:
+			for lock in locks:
+				# Время учитывается только для занятой полосы: свободная берется без замера
+				if not lock.acquire(False):
+					started = time.perf_counter()
+					lock.acquire()
+					LOCK_WAIT.observe(time.perf_counter() - started, ("thread",))
+				acquired.append(lock)
+			yield
+		finally:
+			for lock in reversed(acquired):
+				lock.release()
+
+	@contextmanager
+	def acquire_all(self):
+		"""
+		Захватывает все блокировки пула (остановка всех операций над счетами).
+		"""
+		with self.acquire(*range(self._stripes)):
+			yield
+
+
+class AsyncStripedLockManager:
+	"""
+	Асинхронный менеджер блокировок с полосами на asyncio.Lock.
+
+	Тот же порядок захвата, что и у StripedLockManager, но ожидание
+	блокировки не занимает поток: корутина уступает цикл событий.
+	Незанятая блокировка захватывается без переключения задач.
+	"""
+
+	def __init__(self, stripes: int = 64) -> None:
+		"""
+		Инициализирует пул блокировок.
+
+		Args:
+			stripes: Количество полос (блокировок в пуле)
+		"""
+		if stripes <= 0:
+			raise ValueError("stripes must be positive")
+		self._locks: tuple = tuple(asyncio.Lock() for _ in range(stripes))
+		self._stripes: int = stripes
+
+	@property
+	def stripes(self) -> int:
+		"""Количество полос в пуле."""
+		return self._stripes
+
+	@asynccontextmanager
+	async def acquire(self, *keys: int):
+		"""
+		Захватывает блокировки счетов в фиксированном порядке.
+
+		Args:
+			*keys: id счетов, участвующих в операции
+		"""
+		stripes = sorted({key % self._stripes for key in keys})
+		acquired = []
+		try:
+			for stripe in stripes:
+				lock = self._locks[stripe]
+				if lock.locked():
+					started = time.perf_counter()
+					await lock.acquire()
+					LOCK_WAIT.observe(time.perf_counter() - started, ("async",))
+				else:
+					await lock.acquire()
+				acquired.append(lock)
+			yield
+		finally:
+			for lock in reversed(acquired):
+				lock.release()
+
+
+class InterProcessLock:
+	"""
+	Блокировка, общая для нескольких процессов.
+
+	Захватывает байт файла блокировок через fcntl.lockf. Блокировки fcntl
+	принадлежат процессу, а не потоку, поэтому потоки одного процесса
+	дополнительно сериализуются обычной threading.Lock. При завершении
+	процесса ядро снимает его блокировки, поэтому упавший воркер не
+	оставляет захваченных блокировок.
+	"""
+
+	def __init__(self, fd: int, offset: int) -> None:
+		"""
+		Инициализирует блокировку.
+
+		Args:
+			fd: Дескриптор файла блокировок, открытого на чтение и запись
+			offset: Номер байта файла, соответствующего блокировке
+		"""
+		self._fd = fd
+		self._offset = offset
+		self._thread_lock = threading.Lock()
+
+	def acquire(self, blocking: bool = True) -> bool:
+		"""
+		Захватывает блокировку, ожидая её освобождения другими потоками и процессами.
+
+		Args:
+			blocking: Ждать освобождения; False - только попытка захвата
+
+		Returns:
+			bool: Захвачена ли блокировка
+		"""
+		if not self._thread_lock.acquire(blocking):
+			return False
+		try:
+			fcntl.lockf(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB, 1, self._offset)
+		except OSError as exc:
+			self._thread_lock.release()
+			if not blocking and exc.errno in (errno.EACCES, errno.EAGAIN):
+				return False
+			raise
+		except BaseException:
+			self._thread_lock.release()
+			raise
+		return True
+
+	def release(self) -> None:
+		"""Освобождает блокировку."""
+		try:
+			fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._offset)
+		finally:
+			self._thread_lock.release()
+
+	def __enter__(self) -> "InterProcessLock":
+		self.acquire()
+		return self
+
+	def __exit__(self, exc_type, exc, tb) -> bool:
+		self.release()
+		return False
+
+
+class InterProcessStripedLockManager:
+	"""
+	Менеджер блокировок с полосами, общими для нескольких процессов.
+
+	Повторяет StripedLockManager, но каждая полоса - InterProcessLock
+	на своем байте файла блокировок, поэтому воркеры, работающие с общей
+	памятью, блокируют одни и те же счета.
+	"""
+
+	def __init__(self, fd: int, stripes: int = 64, offset: int = 0) -> None:
+		"""
+		Инициализирует пул блокировок.
+
+		Args:
+			fd: Дескриптор файла блокировок, открытого на чтение и запись
+			stripes: Количество полос (блокировок в пуле)
+			offset: Номер байта файла, соответствующего первой полосе
+		"""
+		if stripes <= 0:
+			raise ValueError("stripes must be positive")
+		self._locks: tuple = tuple(InterProcessLock(fd, offset + stripe) for stripe in range(stripes))
+		self._stripes: int = stripes
+
+	@property
+	def stripes(self) -> int:
+		"""Количество полос в пуле."""
+		return self._stripes
+
+	@contextmanager
+	def acquire(self, *keys: int):
+		"""
+		Захватывает блокировки счетов в фиксированном порядке.
+
+		Args:
+			*keys: id счетов, участвующих в операции
+		"""
+		locks = [self._locks[stripe] for stripe in sorted({key % self._stripes for key in keys})]
+		acquired = []
+		try:
+			for lock in locks:
+				if not lock.acquire(False):
+					started = time.perf_counter()
+					lock.acquire()
+					LOCK_WAIT.observe(time.perf_counter() - started, ("process",))
+				acquired.append(lock)
+			yield
+		finally:
+			for lock in reversed(acquired):
+				lock.release()
+
+	@contextmanager
+	def acquire_all(self):
+		"""
+		Захватывает все блокировки пула (остановка всех операций над счетами).
+		"""
+		with self.acquire(*range(self._stripes)):
+			yield
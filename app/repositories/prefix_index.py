@@ -0,0 +1,89 @@
+"""
+Индекс префиксного поиска пользователей по имени и email для in-memory хранилищ.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterable
+
+from app.repositories.sorted_list import SortedList
+
+
+class PrefixIndex:
+	"""
+	Отсортированные ключи поиска: имена и email в casefold.
+
+	У каждого пользователя два ключа в одном SortedList: (имя, id, "") и
+	(email, id, имя). Пользователи, у которых имя или email начинается с
+	запроса, лежат подряд, поэтому страница находится бинарным поиском
+	начала диапазона и читается дальше по порядку: стоимость зависит от
+	размера страницы, а не от количества пользователей.
+
+	Результаты упорядочены по совпавшему ключу, затем по id. Пользователь,
+	у которого с запросом совпадают и имя, и email, выдается один раз - по
+	имени: для этого ключ email хранит имя.
+	"""
+
+	def __init__(self, entries: Iterable[tuple[int, str, str]] = ()) -> None:
+		"""
+		Строит индекс.
+
+		Args:
+			entries: Тройки (id, имя, email) в любом порядке
+		"""
+		self._keys = SortedList(key for entry in entries for key in self._entry_keys(*entry))
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._keys)
+
+	@staticmethod
+	def _entry_keys(user_id: int, name: str, email: str) -> tuple[tuple, tuple]:
+		"""Возвращает ключи имени и email пользователя."""
+		name_key = name.casefold()
+		return (name_key, user_id, ""), (email.casefold(), user_id, name_key)
+
+	def add(self, user_id: int, name: str, email: str) -> None:
+		"""
+		Добавляет пользователя в индекс.
+
+		Args:
+			user_id: ID пользователя
+			name: Имя
+			email: Email
+		"""
+		name_entry, email_entry = self._entry_keys(user_id, name, email)
+		with self._lock:
+			self._keys.add(name_entry)
+			self._keys.add(email_entry)
+
+	def search(self, query: str, limit: int, after: tuple[int, str, str] | None = None) -> list[int]:
+		"""
+		Находит пользователей, у которых имя или email начинается с запроса.
+
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей
+			after: Курсор - (id, имя, email) последнего пользователя предыдущей страницы
+
+		Returns:
+			list[int]: ID пользователей в порядке совпавшего ключа, затем id
+		"""
+		prefix = query.casefold()
+		if after is None:
+			start = (prefix,)
+		else:
+			# Страница продолжается после ключа, по которому выдан пользователь-курсор
+			user_id, name, email = after
+			name_key = name.casefold()
+			start = (name_key if name_key.startswith(prefix) else email.casefold(), user_id + 1)
+		ids = []
+		with self._lock:
+			for term, user_id, name_key in self._keys.irange(start):
+				if len(ids) >= limit or not term.startswith(prefix):
+					break
+				# Ключ email пропускается, если пользователь уже найден по имени
+				if not name_key or not name_key.startswith(prefix):
+					ids.append(user_id)
+		return ids
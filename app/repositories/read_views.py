@@ -0,0 +1,69 @@
+"""
+Согласованные представления для чтения (MVCC) в in-memory хранилищах.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Hashable
+
+
+class ReadViews:
+	"""
+	Представления состояния, закрепленные читателями.
+
+	Представление - словарь прежних состояний строк: читатель закрепляет его
+	в момент, когда изменения приостановлены, и дальше читает без блокировок.
+	Писатель перед первым изменением строки после закрепления сохраняет её
+	состояние в каждое закрепленное представление и меняет строку на месте,
+	не дожидаясь читателей. Читатель берет сохраненное состояние, а для
+	строк, которые не менялись, - текущее: неизмененные строки представление
+	делит с самим хранилищем.
+
+	Читатель сначала читает текущее состояние строки, а затем ищет
+	сохраненное: писатель сохраняет состояние до изменения, поэтому
+	измененное текущее состояние всегда перекрыто сохраненным.
+	"""
+
+	def __init__(self) -> None:
+		# Закрепленные представления; кортеж заменяется целиком, чтобы
+		# писатели обходили его без блокировки
+		self.pinned: tuple[dict, ...] = ()
+		self._lock = threading.Lock()
+
+	def pin(self) -> dict:
+		"""
+		Закрепляет новое представление.
+
+		Вызывается, пока изменения приостановлены: иначе представление
+		увидело бы одну половину перевода без другой.
+
+		Returns:
+			dict: Представление для чтения
+		"""
+		view: dict = {}
+		with self._lock:
+			self.pinned = (*self.pinned, view)
+		return view
+
+	def release(self, view: dict) -> None:
+		"""
+		Освобождает представление; повторный вызов ничего не делает.
+
+		Args:
+			view: Представление из pin()
+		"""
+		with self._lock:
+			self.pinned = tuple(pinned for pinned in self.pinned if pinned is not view)
+
+	def preserve(self, key: Hashable, state: tuple) -> None:
+		"""
+		Сохраняет состояние строки перед её изменением (вызывается под блокировкой строки).
+
+		Args:
+			key: Ключ строки
+			state: Состояние строки до изменения
+		"""
+		for view in self.pinned:
+			if key not in view:
+				view[key] = state
@@ -0,0 +1,912 @@
+from __future__ import annotations
+
+import heapq
+import os
+import tempfile
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator
+
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import MAX_BALANCE, User
+from app.repositories.journal import UndoJournal
+from app.repositories.locks import InterProcessLock, InterProcessStripedLockManager
+from app.repositories.snapshot import DEFAULT_USERS
+from app.core.exceptions import (
+	UserNotFoundError, SelfTransferError, InsufficientFundsError, BalanceOverflowError,
+	InvalidAmountError, EmailAlreadyExistsError, RepositoryFullError, VersionConflictError
+)
+
+
+_MAGIC = int.from_bytes(b"USHM0003", "little")
+
+# Заголовок сегмента - десять 8-байтовых полей
+_H_MAGIC = 0
+_H_CAPACITY = 1
+_H_STRINGS_SIZE = 2
+_H_LEDGER_CAPACITY = 3
+_H_LOCK_STRIPES = 4
+_H_COUNT = 5
+_H_STRINGS_USED = 6
+_H_LEDGER_LAST_ID = 7
+_H_TOTAL_BALANCE = 8
+_H_TRANSFER_VOLUME = 9
+_HEADER_FIELDS = 10
+
+# Запись журнала переводов: семь 8-байтовых полей
+_L_ID = 0
+_L_FROM = 1
+_L_TO = 2
+_L_AMOUNT = 3
+_L_CREATED_NS = 4
+_L_PREV_FROM = 5
+_L_PREV_TO = 6
+_LEDGER_FIELDS = 7
+
+# Байты файла блокировок: служебные блокировки, затем полосы счетов
+_INIT_LOCK = 0
+_CREATE_LOCK = 1
+_LEDGER_LOCK = 2
+_FIRST_STRIPE = 3
+
+
+def _email_hash(email_key: str) -> int:
+	"""
+	Хеш нормализованного email, одинаковый во всех процессах.
+
+	Встроенный hash() для строк рандомизируется в каждом процессе,
+	поэтому для общей хеш-таблицы не подходит.
+
+	Args:
+		email_key: Нормализованный email
+
+	Returns:
+		int: Хеш
+	"""
+	return zlib.crc32(email_key.encode("utf-8"))
+
+
+class SharedMemoryUserRepository:
+	"""
+	Репозиторий пользователей в разделяемой памяти для нескольких воркеров.
+
+	Все данные лежат в одном сегменте multiprocessing.shared_memory с
+	фиксированной разметкой, поэтому воркеры uvicorn (--workers N) видят
+	одно и то же состояние:
+	- заголовок: параметры разметки и счетчики (пользователи, байты строк,
+	  последний id перевода, сумма балансов, сумма переводов);
+	- колонки по строкам (id = номер строки + 1): баланс, версия, id последнего
+	  перевода пользователя, хеш email, границы имени и email в блоке строк;
+	- хеш-таблица email с открытой адресацией (номер строки + 1);
+	- кольцевой журнал переводов: у каждой записи ссылки на предыдущий
+	  перевод отправителя и получателя, поэтому история пользователя
+	  читается с конца по цепочке за время, пропорциональное странице;
+	- блок строк: имена и email в UTF-8.
+
+	Блокировки счетов - байты файла блокировок (fcntl), общие для всех
+	процессов, с тем же порядком захвата полос, что и в StripedLockManager.
+	Переводы по несвязанным счетам в разных процессах идут параллельно.
+
+	Размеры фиксируются при создании сегмента. Сегмент создает первый
+	запустившийся воркер, остальные подключаются к нему; сегмент живет до
+	явного вызова unlink(), а не до выхода процесса.
+	"""
+
+	def __init__(
+		self,
+		name: str = "abistep-users",
+		capacity: int = 100_000,
+		strings_size: int | None = None,
+		ledger_capacity: int = 250_000,
+		lock_stripes: int = 64,
+		lock_path: str | None = None,
+		seed: Iterable[tuple[str, str, int]] = DEFAULT_USERS,
+	) -> None:
+		"""
+		Создает сегмент или подключается к существующему.
+
+		Args:
+			name: Имя сегмента разделяемой памяти
+			capacity: Максимальное количество пользователей
+			strings_size: Размер блока строк (имена и email), в байтах; по умолчанию 64 байта на пользователя
+			ledger_capacity: Количество последних переводов, хранимых в журнале
+			lock_stripes: Количество полос в пуле блокировок счетов
+			lock_path: Путь к файлу блокировок; по умолчанию во временном каталоге
+			seed: Пользователи (имя, email, баланс), создаваемые в новом сегменте
+		"""
+		strings_size = strings_size if strings_size is not None else capacity * 64
+		table_size = 8
+		while table_size < 2 * capacity:
+			table_size *= 2
+		self._capacity = capacity
+		self._strings_size = strings_size
+		self._ledger_capacity = ledger_capacity
+		self._table_mask = table_size - 1
+
+		self._lock_fd = os.open(
+			lock_path or os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600
+		)
+		self._locks = InterProcessStripedLockManager(self._lock_fd, lock_stripes, offset=_FIRST_STRIPE)
+		self._create_lock = InterProcessLock(self._lock_fd, _CREATE_LOCK)
+		self._ledger_lock = InterProcessLock(self._lock_fd, _LEDGER_LOCK)
+
+		# Размечаем сегмент: (имя колонки, количество 8-байтовых элементов)
+		sections = [
+			("_header", _HEADER_FIELDS),
+			("_balances", capacity),
+			("_versions", capacity),
+			("_last_transfer", capacity),
+			("_email_hashes", capacity),
+			("_string_ends", 2 * capacity),
+			("_email_table", table_size),
+			("_ledger", _LEDGER_FIELDS * ledger_capacity),
+		]
+		size = 8 * sum(count for _, count in sections) + strings_size
+
+		try:
+			self._init_segment(name, size, sections, table_size, lock_stripes, seed)
+		except BaseException:
+			os.close(self._lock_fd)
+			raise
+
+	def _init_segment(
+		self, name: str, size: int, sections: list, table_size: int,
+		lock_stripes: int, seed: Iterable[tuple[str, str, int]],
+	) -> None:
+		"""
+		Открывает сегмент, размечает его и инициализирует новый сегмент.
+
+		Args:
+			name: Имя сегмента
+			size: Размер сегмента, в байтах
+			sections: Колонки сегмента (имя атрибута, количество 8-байтовых элементов)
+			table_size: Размер хеш-таблицы email
+			lock_stripes: Количество полос в пуле блокировок счетов
+			seed: Пользователи, создаваемые в новом сегменте
+
+		Raises:
+			ValueError: Если существующий сегмент создан с другими параметрами
+		"""
+		capacity, strings_size, ledger_capacity = self._capacity, self._strings_size, self._ledger_capacity
+		with InterProcessLock(self._lock_fd, _INIT_LOCK):
+			self._shm = self._open_segment(name, size)
+			buf = self._shm.buf
+			offset = 0
+			self._views = []
+			for attribute, count in sections:
+				view = buf[offset:offset + 8 * count].cast("q")
+				setattr(self, attribute, view)
+				self._views.append(view)
+				offset += 8 * count
+			self._strings = buf[offset:offset + strings_size]
+			self._views.append(self._strings)
+
+			header = self._header
+			actual = expected = (capacity, strings_size, ledger_capacity, lock_stripes)
+			if header[_H_MAGIC] == _MAGIC:
+				actual = (
+					header[_H_CAPACITY], header[_H_STRINGS_SIZE],
+					header[_H_LEDGER_CAPACITY], header[_H_LOCK_STRIPES],
+				)
+			else:
+				# Новый сегмент (или создатель упал до конца инициализации)
+				header[_H_CAPACITY], header[_H_STRINGS_SIZE] = capacity, strings_size
+				header[_H_LEDGER_CAPACITY], header[_H_LOCK_STRIPES] = ledger_capacity, lock_stripes
+				header[_H_COUNT] = header[_H_STRINGS_USED] = header[_H_LEDGER_LAST_ID] = 0
+				header[_H_TOTAL_BALANCE] = header[_H_TRANSFER_VOLUME] = 0
+				self._email_table[:] = memoryview(bytes(8 * table_size)).cast("q")
+				for user_name, email, balance in seed:
+					self.create(user_name, email, balance)
+				# Магическое число пишется последним: сегмент готов
+				header[_H_MAGIC] = _MAGIC
+
+		if actual != expected:
+			for view in self._views:
+				view.release()
+			self._shm.close()
+			raise ValueError(f"shared memory segment {name} was created with other parameters {actual}")
+
+	@staticmethod
+	def _open_segment(name: str, size: int) -> SharedMemory:
+		"""
+		Создает сегмент разделяемой памяти или подключается к существующему.
+
+		Args:
+			name: Имя сегмента
+			size: Размер сегмента, в байтах
+
+		Returns:
+			SharedMemory: Сегмент
+		"""
+		try:
+			shm = SharedMemory(name=name, create=True, size=size)
+		except FileExistsError:
+			shm = SharedMemory(name=name)
+		if shm.size < size:
+			shm.close()
+			raise ValueError(f"shared memory segment {name} is smaller than required")
+		# resource_tracker удаляет сегмент при выходе процесса, который его открыл;
+		# сегмент же общий для всех воркеров и должен их пережить
+		resource_tracker.unregister(shm._name, "shared_memory")
+		return shm
+
+	@staticmethod
+	def _normalize_email(email: str) -> str:
+		"""
+		Приводит email к ключу индекса (регистронезависимое сравнение).
+
+		Args:
+			email: Исходный email
+
+		Returns:
+			str: Нормализованный email
+		"""
+		return email.casefold()
+
+	def _string(self, start: int, end: int) -> str:
+		"""
+		Читает строку из блока строк.
+
+		Args:
+			start: Смещение начала
+			end: Смещение конца
+
+		Returns:
+			str: Декодированная строка
+		"""
+		return str(self._strings[start:end], "utf-8")
+
+	def _name(self, row: int) -> str:
+		"""
+		Читает имя строки.
+
+		Args:
+			row: Номер строки
+
+		Returns:
+			str: Имя
+		"""
+		start = self._string_ends[2 * row - 1] if row else 0
+		return self._string(start, self._string_ends[2 * row])
+
+	def _email(self, row: int) -> str:
+		"""
+		Читает email строки.
+
+		Args:
+			row: Номер строки
+
+		Returns:
+			str: Email
+		"""
+		return self._string(self._string_ends[2 * row], self._string_ends[2 * row + 1])
+
+	def _view(self, row: int) -> User:
+		"""
+		Создает представление User для строки.
+
+		Args:
+			row: Номер строки
+
+		Returns:
+			User: Пользователь
+		"""
+		return User(
+			id=row + 1,
+			name=self._name(row),
+			email=self._email(row),
+			balance=self._balances[row],
+			version=self._versions[row],
+		)
+
+	def _row(self, user_id: int) -> int:
+		"""
+		Возвращает номер строки пользователя.
+
+		Args:
+			user_id: ID пользователя
+
+		Returns:
+			int: Номер строки или -1, если пользователя нет
+		"""
+		if 1 <= user_id <= self._header[_H_COUNT]:
+			return user_id - 1
+		return -1
+
+	def _find_email(self, email_key: str, email_hash: int) -> int:
+		"""
+		Ищет строку по нормализованному email в хеш-таблице.
+
+		Args:
+			email_key: Нормализованный email
+			email_hash: Хеш нормализованного email
+
+		Returns:
+			int: Номер строки или -1, если email не найден
+		"""
+		table, mask = self._email_table, self._table_mask
+		slot = email_hash & mask
+		while True:
+			value = table[slot]
+			if value == 0:
+				return -1
+			row = value - 1
+			if self._email_hashes[row] == email_hash and self._email(row).casefold() == email_key:
+				return row
+			slot = (slot + 1) & mask
+
+	def _record(self, transfers: list[tuple[int, int, int]]) -> None:
+		"""
+		Добавляет переводы в кольцевой журнал.
+
+		Вызывается под блокировками счетов участников: ссылки на последний
+		перевод пользователя меняются только под его блокировкой.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+		"""
+		ledger, last_transfer, header = self._ledger, self._last_transfer, self._header
+		now = time.time_ns()
+		with self._ledger_lock:
+			for from_user_id, to_user_id, amount in transfers:
+				transfer_id = header[_H_LEDGER_LAST_ID] + 1
+				base = ((transfer_id - 1) % self._ledger_capacity) * _LEDGER_FIELDS
+				# Запись занимает ячейку самого старого перевода: сначала помечаем
+				# её недействительной, id пишем последним
+				ledger[base + _L_ID] = 0
+				ledger[base + _L_FROM] = from_user_id
+				ledger[base + _L_TO] = to_user_id
+				ledger[base + _L_AMOUNT] = amount
+				ledger[base + _L_CREATED_NS] = now
+				ledger[base + _L_PREV_FROM] = last_transfer[from_user_id - 1]
+				ledger[base + _L_PREV_TO] = last_transfer[to_user_id - 1]
+				ledger[base + _L_ID] = transfer_id
+				header[_H_LEDGER_LAST_ID] = transfer_id
+				# Объем хранится в int64 заголовка и не растет дальше MAX_BALANCE
+				header[_H_TRANSFER_VOLUME] = min(header[_H_TRANSFER_VOLUME] + amount, MAX_BALANCE)
+				last_transfer[from_user_id - 1] = transfer_id
+				last_transfer[to_user_id - 1] = transfer_id
+
+	def _read_transfer(self, transfer_id: int, user_id: int) -> tuple[Transfer, int] | None:
+		"""
+		Читает запись журнала и ссылку на предыдущий перевод пользователя.
+
+		Args:
+			transfer_id: id перевода
+			user_id: ID пользователя, по цепочке которого идет чтение
+
+		Returns:
+			tuple[Transfer, int] | None: Перевод и id предыдущего перевода пользователя
+			или None, если запись уже вытеснена из кольца или не относится к пользователю
+		"""
+		ledger = self._ledger
+		base = ((transfer_id - 1) % self._ledger_capacity) * _LEDGER_FIELDS
+		if ledger[base + _L_ID] != transfer_id:
+			return None
+		fields = ledger[base:base + _LEDGER_FIELDS].tolist()
+		# Запись могла быть перезаписана во время чтения
+		if ledger[base + _L_ID] != transfer_id:
+			return None
+		_, from_user_id, to_user_id, amount, created_ns, prev_from, prev_to = fields
+		if user_id not in (from_user_id, to_user_id):
+			return None
+		transfer = Transfer(
+			id=transfer_id, from_user_id=from_user_id, to_user_id=to_user_id, amount=amount,
+			created_at=datetime.fromtimestamp(created_ns / 1e9, tz=timezone.utc),
+		)
+		return transfer, prev_from if from_user_id == user_id else prev_to
+
+	def list(self) -> list[User]:
+		"""
+		Возвращает список всех пользователей.
+
+		Returns:
+			list[User]: Пользователи в порядке возрастания id
+		"""
+		return [self._view(row) for row in range(self._header[_H_COUNT])]
+
+	def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Возвращает страницу пользователей по возрастанию id.
+
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+
+		Returns:
+			list[User]: Пользователи с id больше after_id
+		"""
+		# id = номер строки + 1, поэтому страница начинается со строки after_id
+		start = 0 if after_id is None else max(after_id, 0)
+		end = min(start + limit, self._header[_H_COUNT])
+		return [self._view(row) for row in range(start, end)]
+
+	def export(self) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+
+		Изменения во всех процессах приостанавливаются только на копирование
+		балансов и версий (16 байт на счет); имена и email существующих строк не меняются
+		и читаются из сегмента при обходе.
+
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		with self._create_lock, self._locks.acquire_all():
+			count = self._header[_H_COUNT]
+			balances = array("q")
+			balances.frombytes(self._balances[:count].cast("B"))
+			versions = array("q")
+			versions.frombytes(self._versions[:count].cast("B"))
+
+		def export_users() -> Iterator[User]:
+			for row, balance in enumerate(balances):
+				user = self._view(row)
+				user.balance = balance
+				user.version = versions[row]
+				yield user
+
+		return export_users()
+
+	def get_by_id(self, user_id: int) -> User | None:
+		"""
+		Находит пользователя по ID.
+
+		Args:
+			user_id: ID пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		row = self._row(user_id)
+		return self._view(row) if row >= 0 else None
+
+	def get_by_email(self, email: str) -> User | None:
+		"""
+		Находит пользователя по email (регистронезависимо).
+
+		Args:
+			email: Email пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		email_key = self._normalize_email(email)
+		row = self._find_email(email_key, _email_hash(email_key))
+		return self._view(row) if row >= 0 else None
+
+	def create(self, name: str, email: str, balance: int) -> User:
+		"""
+		Создает нового пользователя.
+
+		Args:
+			name: Имя пользователя
+			email: Email пользователя (должен быть уникальным)
+			balance: Начальный баланс пользователя
+
+		Returns:
+			User: Созданный пользователь
+
+		Raises:
+			EmailAlreadyExistsError: Если email уже используется
+			RepositoryFullError: Если достигнуто максимальное количество пользователей или место для строк
+			BalanceOverflowError: Если сумма балансов в заголовке сегмента превысит MAX_BALANCE
+		"""
+		email_key = self._normalize_email(email)
+		email_hash = _email_hash(email_key)
+		name_bytes = name.encode("utf-8")
+		email_bytes = email.encode("utf-8")
+		header = self._header
+		with self._create_lock:
+			# Проверяем уникальность email
+			if self._find_email(email_key, email_hash) >= 0:
+				raise EmailAlreadyExistsError()
+			if header[_H_COUNT] >= self._capacity or (
+				header[_H_STRINGS_USED] + len(name_bytes) + len(email_bytes) > self._strings_size
+			):
+				raise RepositoryFullError()
+			if header[_H_TOTAL_BALANCE] > MAX_BALANCE - balance:
+				raise BalanceOverflowError()
+			return self._append(name, email, balance, name_bytes, email_bytes, email_hash)
+
+	def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей, пропуская занятые email.
+
+		Пакет либо помещается в сегмент целиком, либо не создается вовсе.
+
+		Args:
+			users: Пользователи (имя, email, баланс)
+
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже
+			используется (в том числе более ранней строкой пакета), по строкам пакета
+
+		Raises:
+			RepositoryFullError: Если новые пользователи пакета не помещаются в сегмент
+			BalanceOverflowError: Если сумма балансов в заголовке сегмента превысит MAX_BALANCE
+		"""
+		rows = []
+		for name, email, _ in users:
+			email_key = self._normalize_email(email)
+			rows.append((email_key, _email_hash(email_key), name.encode("utf-8"), email.encode("utf-8")))
+
+		header = self._header
+		with self._create_lock:
+			# Сначала отбираем новые email и проверяем, что они поместятся
+			new_rows = []
+			batch_keys = set()
+			count, strings_used = header[_H_COUNT], header[_H_STRINGS_USED]
+			total_balance = header[_H_TOTAL_BALANCE]
+			for index, (email_key, email_hash, name_bytes, email_bytes) in enumerate(rows):
+				if email_key in batch_keys or self._find_email(email_key, email_hash) >= 0:
+					continue
+				batch_keys.add(email_key)
+				new_rows.append(index)
+				count += 1
+				strings_used += len(name_bytes) + len(email_bytes)
+				total_balance += users[index][2]
+			if count > self._capacity or strings_used > self._strings_size:
+				raise RepositoryFullError()
+			if total_balance > MAX_BALANCE:
+				raise BalanceOverflowError()
+
+			results = [None] * len(users)
+			for index in new_rows:
+				name, email, balance = users[index]
+				_, email_hash, name_bytes, email_bytes = rows[index]
+				results[index] = self._append(name, email, balance, name_bytes, email_bytes, email_hash)
+			return results
+
+	def _append(
+		self, name: str, email: str, balance: int, name_bytes: bytes, email_bytes: bytes, email_hash: int
+	) -> User:
+		"""
+		Записывает строку пользователя и добавляет её в индекс email
+		(вызывается под блокировкой создания после проверки места).
+
+		Args:
+			name: Имя пользователя
+			email: Email пользователя
+			balance: Начальный баланс пользователя
+			name_bytes: Имя в UTF-8
+			email_bytes: Email в UTF-8
+			email_hash: Хеш нормализованного email
+
+		Returns:
+			User: Созданный пользователь
+		"""
+		header = self._header
+		row = header[_H_COUNT]
+		start = header[_H_STRINGS_USED]
+		end = start + len(name_bytes) + len(email_bytes)
+		self._strings[start:end] = name_bytes + email_bytes
+		self._string_ends[2 * row] = start + len(name_bytes)
+		self._string_ends[2 * row + 1] = end
+		self._email_hashes[row] = email_hash
+		self._balances[row] = balance
+		self._versions[row] = 0
+		self._last_transfer[row] = 0
+		header[_H_STRINGS_USED] = end
+		header[_H_TOTAL_BALANCE] += balance
+		# Строка публикуется увеличением счетчика после записи всех колонок,
+		# а в индекс email попадает уже опубликованной
+		header[_H_COUNT] = row + 1
+
+		slot = email_hash & self._table_mask
+		while self._email_table[slot]:
+			slot = (slot + 1) & self._table_mask
+		self._email_table[slot] = row + 1
+		return User(id=row + 1, name=name, email=email, balance=balance)
+
+	def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""
+		Переводит деньги между пользователями с поддержкой транзакций.
+
+		Перевод увеличивает версии обоих пользователей; с expected_version
+		устаревшая версия отправителя обнаруживается до захвата блокировок.
+
+		Args:
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя; None - без проверки
+
+		Returns:
+			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			VersionConflictError: Если версия отправителя не равна expected_version
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		from_row = self._row(from_user_id)
+		to_row = self._row(to_user_id)
+		if from_row < 0 or to_row < 0:
+			raise UserNotFoundError()
+		if from_user_id == to_user_id:
+			raise SelfTransferError()
+		versions = self._versions
+		if expected_version is not None and versions[from_row] != expected_version:
+			raise VersionConflictError()
+
+		balances = self._balances
+		with self._locks.acquire(from_user_id, to_user_id), UndoJournal() as journal:
+			if expected_version is not None and versions[from_row] != expected_version:
+				raise VersionConflictError()
+			if balances[from_row] < amount:
+				raise InsufficientFundsError()
+			if amount <= 0:
+				raise InvalidAmountError()
+			if balances[to_row] > MAX_BALANCE - amount:
+				raise BalanceOverflowError()
+
+			journal.set_item(balances, from_row, balances[from_row] - amount)
+			journal.set_item(balances, to_row, balances[to_row] + amount)
+			journal.set_item(versions, from_row, versions[from_row] + 1)
+			journal.set_item(versions, to_row, versions[to_row] + 1)
+			self._record([(from_user_id, to_user_id, amount)])
+			return self._view(from_row), self._view(to_row)
+
+	def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов: либо все, либо ни одного.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		user_ids = set()
+		for from_user_id, to_user_id, amount in transfers:
+			if self._row(from_user_id) < 0 or self._row(to_user_id) < 0:
+				raise UserNotFoundError()
+			if from_user_id == to_user_id:
+				raise SelfTransferError()
+			if amount <= 0:
+				raise InvalidAmountError()
+			user_ids.add(from_user_id)
+			user_ids.add(to_user_id)
+
+		balances = self._balances
+		versions = self._versions
+		results = []
+		with self._locks.acquire(*user_ids), UndoJournal() as journal:
+			for from_user_id, to_user_id, amount in transfers:
+				from_row = from_user_id - 1
+				to_row = to_user_id - 1
+				if balances[from_row] < amount:
+					raise InsufficientFundsError()
+				if balances[to_row] > MAX_BALANCE - amount:
+					raise BalanceOverflowError()
+				journal.set_item(balances, from_row, balances[from_row] - amount)
+				journal.set_item(balances, to_row, balances[to_row] + amount)
+				journal.set_item(versions, from_row, versions[from_row] + 1)
+				journal.set_item(versions, to_row, versions[to_row] + 1)
+				results.append((balances[from_row], balances[to_row]))
+			self._record(transfers)
+		return results
+
+	def apply_transfers(self, transfers: list[tuple[int, int, int]]) -> list[tuple[User, User] | Exception]:
+		"""
+		Выполняет независимые переводы по порядку в одной критической секции.
+
+		В отличие от transfer_batch, переводы не атомарны вместе: каждый
+		проверяется по балансам с учетом предыдущих и выполняется или
+		отклоняется сам по себе. Блокировки счетов берутся один раз на весь пакет.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[User, User] | Exception]: Для каждого перевода
+			(отправитель, получатель) после него или исключение отказа
+		"""
+		results: list = [None] * len(transfers)
+		user_ids = set()
+		valid = []
+		for index, (from_user_id, to_user_id, amount) in enumerate(transfers):
+			if self._row(from_user_id) < 0 or self._row(to_user_id) < 0:
+				results[index] = UserNotFoundError()
+			elif from_user_id == to_user_id:
+				results[index] = SelfTransferError()
+			else:
+				valid.append(index)
+				user_ids.add(from_user_id)
+				user_ids.add(to_user_id)
+
+		balances = self._balances
+		versions = self._versions
+		applied = []
+		# Журнал отмены возвращает балансы и версии, если пакет прервется исключением
+		with self._locks.acquire(*user_ids), UndoJournal() as journal:
+			for index in valid:
+				from_user_id, to_user_id, amount = transfers[index]
+				from_row = from_user_id - 1
+				to_row = to_user_id - 1
+				# Тот же порядок проверок, что и в transfer
+				if balances[from_row] < amount:
+					results[index] = InsufficientFundsError()
+					continue
+				if amount <= 0:
+					results[index] = InvalidAmountError()
+					continue
+				if balances[to_row] > MAX_BALANCE - amount:
+					results[index] = BalanceOverflowError()
+					continue
+				journal.set_item(balances, from_row, balances[from_row] - amount)
+				journal.set_item(balances, to_row, balances[to_row] + amount)
+				journal.set_item(versions, from_row, versions[from_row] + 1)
+				journal.set_item(versions, to_row, versions[to_row] + 1)
+				applied.append(transfers[index])
+				results[index] = self._view(from_row), self._view(to_row)
+			if applied:
+				self._record(applied)
+		return results
+
+	def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Находит пользователей, у которых имя или email начинается с запроса.
+
+		Порядок и курсор - как у индекса поиска in-memory хранилищ, но
+		пользователи выбираются проходом по строкам сегмента: индекс в
+		памяти одного процесса не видел бы пользователей, созданных другими
+		воркерами.
+
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
+
+		Returns:
+			list[User]: Пользователи в порядке совпавшего имени или email, затем id
+		"""
+		prefix = query.casefold()
+		start = (prefix, 0)
+		if after_id is not None:
+			row = self._row(after_id)
+			if row < 0:
+				return []
+			name_key = self._name(row).casefold()
+			start = (name_key if name_key.startswith(prefix) else self._email(row).casefold(), after_id + 1)
+		matches = []
+		for row in range(self._header[_H_COUNT]):
+			# Совпавший ключ пользователя: имя, а если оно не подходит - email
+			term = self._name(row).casefold()
+			if not term.startswith(prefix):
+				term = self._email(row).casefold()
+				if not term.startswith(prefix):
+					continue
+			if (term, row + 1) >= start:
+				matches.append((term, row))
+		return [self._view(row) for _, row in heapq.nsmallest(limit, matches)]
+
+	def top(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+
+		Как и крайние балансы в stats(), выбираются проходом по колонке
+		балансов (куча на n элементов, O(N log n)): индекс в памяти одного
+		процесса не видел бы переводов других воркеров.
+
+		Args:
+			n: Количество пользователей
+
+		Returns:
+			list[User]: Пользователи по убыванию баланса, равные балансы - по возрастанию id
+		"""
+		count = self._header[_H_COUNT]
+		with self._balances[:count] as balances:
+			rows = heapq.nlargest(n, range(count), key=balances.__getitem__)
+		return [self._view(row) for row in rows]
+
+	def stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам.
+
+		Количество пользователей, сумма балансов и переводов - счетчики
+		заголовка сегмента, общие для всех процессов. Наименьший и наибольший
+		баланс находятся проходом по колонке балансов: индекс в памяти
+		одного процесса не видел бы переводов других воркеров.
+
+		Returns:
+			UserStats: Агрегаты
+		"""
+		header = self._header
+		with self._create_lock:
+			count = header[_H_COUNT]
+			total_balance = header[_H_TOTAL_BALANCE]
+		with self._ledger_lock:
+			transfer_count = header[_H_LEDGER_LAST_ID]
+			transfer_volume = header[_H_TRANSFER_VOLUME]
+		# Срез освобождается сразу: неосвобожденные срезы не дают закрыть сегмент
+		with self._balances[:count] as balances:
+			min_balance = min(balances) if count else None
+			max_balance = max(balances) if count else None
+		return UserStats(
+			user_count=count,
+			total_balance=total_balance,
+			min_balance=min_balance,
+			max_balance=max_balance,
+			transfer_count=transfer_count,
+			transfer_volume=transfer_volume,
+		)
+
+	def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""
+		Возвращает страницу истории переводов пользователя, от новых к старым.
+
+		В журнале хранятся только последние ledger_capacity переводов:
+		более старая история обрывается.
+
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
+
+		Returns:
+			list[Transfer]: Переводы с id меньше before_id по убыванию id
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		row = self._row(user_id)
+		if row < 0:
+			raise UserNotFoundError()
+
+		transfer_id = self._last_transfer[row]
+		if before_id is not None and transfer_id >= before_id:
+			# Курсор - обычно последний перевод предыдущей страницы:
+			# тогда продолжаем сразу с его ссылки на предыдущий перевод
+			entry = self._read_transfer(before_id, user_id)
+			if entry is not None:
+				transfer_id = entry[1]
+			else:
+				while transfer_id >= before_id:
+					entry = self._read_transfer(transfer_id, user_id)
+					transfer_id = entry[1] if entry is not None else 0
+
+		page = []
+		while transfer_id and len(page) < limit:
+			entry = self._read_transfer(transfer_id, user_id)
+			if entry is None:
+				break
+			transfer, transfer_id = entry
+			page.append(transfer)
+		return page
+
+	def close(self) -> None:
+		"""
+		Отключается от сегмента в текущем процессе (данные остаются для других воркеров).
+		"""
+		for view in self._views:
+			view.release()
+		self._views = []
+		self._shm.close()
+		os.close(self._lock_fd)
+
+	def unlink(self) -> None:
+		"""
+		Удаляет сегмент разделяемой памяти; вызывается после close().
+		"""
+		# Регистрация нужна, чтобы unlink() корректно снял её с resource_tracker
+		resource_tracker.register(self._shm._name, "shared_memory")
+		self._shm.unlink()
@@ -0,0 +1,370 @@
+"""
+Снимки (checkpoint) состояния пользователей.
+
+Снимок - неизменяемое начальное состояние репозитория, поверх которого
+применяются журнал предзаписи и новые изменения. Бывает двух видов:
+SeedSnapshot - небольшой набор пользователей в памяти (тестовые данные),
+и MappedSnapshot - бинарный файл, отображаемый в память через mmap.
+
+Формат файла (little-endian):
+- заголовок: магическая строка, количество пользователей, следующий id,
+  LSN последней учтенной записи журнала, размер хеш-таблицы email,
+  количество и сумма выполненных переводов (в файлах прежних форматов
+  USNAP002 и USNAP001 их нет, они читаются как 0);
+- секция фиксированной ширины: (id, баланс, версия) по 8 байт, по возрастанию
+  id (в файлах прежнего формата USNAP001 - без версии, она читается как 0);
+- таблица смещений: 2 * N + 1 границ строк (имя, email) в блоке строк;
+- хеш-таблица email с открытой адресацией: номер строки + 1, 0 - пусто;
+- блок строк: имена и email в UTF-8.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from functools import cached_property
+from typing import Iterable, Iterator
+
+from app.models.user import MAX_BALANCE, User
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"USNAP003"
+_HEADER = struct.Struct("<8sQQQQQQ")
+_ROW = struct.Struct("<qqq")
+# Формат без счетчиков переводов: такие снимки по-прежнему открываются
+_MAGIC_V2 = b"USNAP002"
+_HEADER_V2 = struct.Struct("<8sQQQQ")
+# Формат без версий пользователей: такие снимки по-прежнему открываются
+_MAGIC_V1 = b"USNAP001"
+_ROW_V1 = struct.Struct("<qq")
+_U64 = struct.Struct("<Q")
+
+# Тестовые пользователи, с которых начинается репозиторий без файла снимка
+DEFAULT_USERS = (
+	("Алиса", "alice@example.com", 100),
+	("Боб", "bob@example.com", 250),
+)
+
+
+def _email_hash(email_key: str) -> int:
+	"""
+	Стабильный между запусками хеш нормализованного email.
+
+	Args:
+		email_key: Нормализованный email
+
+	Returns:
+		int: Хеш
+	"""
+	return zlib.crc32(email_key.encode("utf-8"))
+
+
+class SeedSnapshot:
+	"""
+	Снимок из небольшого набора пользователей в памяти.
+
+	Пользователи получают id подряд, начиная с 1.
+	"""
+
+	def __init__(self, users: Iterable[tuple[str, str, int]] = DEFAULT_USERS) -> None:
+		"""
+		Инициализирует снимок.
+
+		Args:
+			users: Пользователи (имя, email, баланс)
+		"""
+		self._users = [
+			User(id=row + 1, name=name, email=email, balance=balance)
+			for row, (name, email, balance) in enumerate(users)
+		]
+		self._rows_by_email = {user.email.casefold(): row for row, user in enumerate(self._users)}
+		self.lsn: int = 0
+		self.next_id: int = len(self._users) + 1
+		self.total_balance: int = sum(user.balance for user in self._users)
+		self.transfer_count: int = 0
+		self.transfer_volume: int = 0
+
+	def __len__(self) -> int:
+		return len(self._users)
+
+	def id_at(self, row: int) -> int:
+		"""Возвращает id пользователя в строке."""
+		return self._users[row].id
+
+	def row_of_id(self, user_id: int) -> int:
+		"""Возвращает строку пользователя по id или -1."""
+		return user_id - 1 if 1 <= user_id <= len(self._users) else -1
+
+	def bisect_id(self, user_id: int) -> int:
+		"""Возвращает первую строку с id больше user_id."""
+		return min(max(user_id, 0), len(self._users))
+
+	def find_email(self, email_key: str) -> int:
+		"""Возвращает строку пользователя по нормализованному email или -1."""
+		return self._rows_by_email.get(email_key, -1)
+
+	def balances(self) -> Iterator[tuple[int, int]]:
+		"""Возвращает пары (id, баланс) всех строк по возрастанию id."""
+		return ((user.id, user.balance) for user in self._users)
+
+	def user(self, row: int) -> User:
+		"""Создает объект User для строки."""
+		user = self._users[row]
+		return User(id=user.id, name=user.name, email=user.email, balance=user.balance, version=user.version)
+
+	def close(self) -> None:
+		"""Освобождает ресурсы снимка."""
+		pass
+
+
+class MappedSnapshot:
+	"""
+	Снимок из файла, отображенного в память.
+
+	Открытие читает только заголовок, поэтому занимает постоянное время
+	независимо от количества пользователей. Строки читаются из отображения
+	по запросу: поиск по id - бинарный поиск по секции фиксированной
+	ширины, поиск по email - хеш-таблица из файла.
+	"""
+
+	def __init__(self, path: str) -> None:
+		"""
+		Открывает файл снимка.
+
+		Args:
+			path: Путь к файлу снимка
+
+		Raises:
+			ValueError: Если файл не является снимком
+		"""
+		self._file = open(path, "rb")
+		self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic = self._map[:len(MAGIC)]
+		if magic not in (MAGIC, _MAGIC_V2, _MAGIC_V1):
+			self.close()
+			raise ValueError(f"{path} is not a user snapshot")
+		if magic == MAGIC:
+			_, count, next_id, lsn, table_size, transfer_count, transfer_volume = _HEADER.unpack_from(self._map, 0)
+			header_size = _HEADER.size
+		else:
+			_, count, next_id, lsn, table_size = _HEADER_V2.unpack_from(self._map, 0)
+			transfer_count = transfer_volume = 0
+			header_size = _HEADER_V2.size
+		self._row = _ROW_V1 if magic == _MAGIC_V1 else _ROW
+
+		self._count: int = count
+		self.next_id: int = next_id
+		self.lsn: int = lsn
+		self.transfer_count: int = transfer_count
+		self.transfer_volume: int = transfer_volume
+		self._table_mask: int = table_size - 1
+		self._rows_offset: int = header_size
+		self._offsets_offset: int = self._rows_offset + count * self._row.size
+		self._table_offset: int = self._offsets_offset + (2 * count + 1) * _U64.size
+		self._strings_offset: int = self._table_offset + table_size * _U64.size
+
+	def __len__(self) -> int:
+		return self._count
+
+	def id_at(self, row: int) -> int:
+		"""Возвращает id пользователя в строке."""
+		return self._row.unpack_from(self._map, self._rows_offset + row * self._row.size)[0]
+
+	def row_of_id(self, user_id: int) -> int:
+		"""Возвращает строку пользователя по id или -1 (бинарный поиск)."""
+		low, high = 0, self._count
+		while low < high:
+			middle = (low + high) // 2
+			if self.id_at(middle) < user_id:
+				low = middle + 1
+			else:
+				high = middle
+		if low < self._count and self.id_at(low) == user_id:
+			return low
+		return -1
+
+	def bisect_id(self, user_id: int) -> int:
+		"""Возвращает первую строку с id больше user_id."""
+		low, high = 0, self._count
+		while low < high:
+			middle = (low + high) // 2
+			if self.id_at(middle) <= user_id:
+				low = middle + 1
+			else:
+				high = middle
+		return low
+
+	def _string(self, index: int) -> str:
+		"""
+		Читает строку по номеру границы в таблице смещений.
+
+		Args:
+			index: 2 * строка для имени, 2 * строка + 1 для email
+
+		Returns:
+			str: Декодированная строка
+		"""
+		position = self._offsets_offset + index * _U64.size
+		start, end = struct.unpack_from("<QQ", self._map, position)
+		base = self._strings_offset
+		return self._map[base + start:base + end].decode("utf-8")
+
+	def find_email(self, email_key: str) -> int:
+		"""Возвращает строку пользователя по нормализованному email или -1."""
+		mask = self._table_mask
+		slot = _email_hash(email_key) & mask
+		while True:
+			(value,) = _U64.unpack_from(self._map, self._table_offset + slot * _U64.size)
+			if value == 0:
+				return -1
+			if self._string(2 * (value - 1) + 1).casefold() == email_key:
+				return value - 1
+			slot = (slot + 1) & mask
+
+	def _column(self, field: int) -> array:
+		"""
+		Копирует колонку секции фиксированной ширины в массив.
+
+		Args:
+			field: Номер поля строки (0 - id, 1 - баланс)
+
+		Returns:
+			array: Значения поля по строкам
+		"""
+		rows = array("q")
+		rows.frombytes(self._map[self._rows_offset:self._offsets_offset])
+		if sys.byteorder != "little":
+			rows.byteswap()
+		return rows[field::self._row.size // 8]
+
+	def balances(self) -> Iterator[tuple[int, int]]:
+		"""Возвращает пары (id, баланс) всех строк по возрастанию id."""
+		return zip(self._column(0), self._column(1))
+
+	@cached_property
+	def total_balance(self) -> int:
+		"""Сумма балансов снимка; считается одним проходом при первом обращении."""
+		return sum(self._column(1))
+
+	def user(self, row: int) -> User:
+		"""Создает объект User для строки."""
+		user_id, balance, *version = self._row.unpack_from(self._map, self._rows_offset + row * self._row.size)
+		return User(
+			id=user_id, name=self._string(2 * row), email=self._string(2 * row + 1),
+			balance=balance, version=version[0] if version else 0,
+		)
+
+	def close(self) -> None:
+		"""Закрывает отображение и файл."""
+		self._map.close()
+		self._file.close()
+
+
+def write_snapshot(
+	path: str,
+	users: Iterator[User],
+	count: int,
+	next_id: int,
+	lsn: int,
+	transfer_count: int = 0,
+	transfer_volume: int = 0,
+) -> None:
+	"""
+	Записывает снимок в файл атомарно (через временный файл и переименование).
+
+	Args:
+		path: Путь к файлу снимка
+		users: Пользователи по возрастанию id
+		count: Количество пользователей
+		next_id: Следующий id, который выдаст репозиторий
+		lsn: LSN последней записи журнала, учтенной в снимке
+		transfer_count: Количество выполненных переводов
+		transfer_volume: Сумма выполненных переводов (в файле не больше MAX_BALANCE)
+	"""
+	table_size = 8
+	while table_size < 2 * count:
+		table_size *= 2
+	mask = table_size - 1
+
+	rows = array("q")
+	offsets = array("Q", [0])
+	table = array("Q", bytes(8 * table_size))
+	strings = bytearray()
+	for row, user in enumerate(users):
+		rows.append(user.id)
+		rows.append(user.balance)
+		rows.append(user.version)
+		strings += user.name.encode("utf-8")
+		offsets.append(len(strings))
+		strings += user.email.encode("utf-8")
+		offsets.append(len(strings))
+
+		slot = _email_hash(user.email.casefold()) & mask
+		while table[slot]:
+			slot = (slot + 1) & mask
+		table[slot] = row + 1
+
+	if len(rows) != 3 * count:
+		raise ValueError("snapshot user count mismatch")
+
+	temporary = f"{path}.tmp"
+	with open(temporary, "wb") as file:
+		file.write(_HEADER.pack(
+			MAGIC, count, next_id, lsn, table_size, transfer_count, min(transfer_volume, MAX_BALANCE)
+		))
+		for section in (rows, offsets, table):
+			if sys.byteorder != "little":
+				section.byteswap()
+			file.write(section.tobytes())
+		file.write(strings)
+		file.flush()
+		os.fsync(file.fileno())
+	os.replace(temporary, path)
+
+
+class Checkpointer:
+	"""
+	Фоновый поток, периодически записывающий контрольную точку репозитория.
+	"""
+
+	def __init__(self, repo, path: str, interval: float) -> None:
+		"""
+		Инициализирует поток контрольных точек.
+
+		Args:
+			repo: Репозиторий с методом checkpoint(path)
+			path: Путь к файлу снимка
+			interval: Период между контрольными точками, в секундах
+		"""
+		self._repo = repo
+		self._path = path
+		self._interval = interval
+		self._stopped = threading.Event()
+		self._thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+
+	def start(self) -> None:
+		"""Запускает поток."""
+		self._thread.start()
+
+	def stop(self) -> None:
+		"""Останавливает поток и дожидается его завершения."""
+		self._stopped.set()
+		if self._thread.is_alive():
+			self._thread.join()
+
+	def _run(self) -> None:
+		"""Цикл потока: контрольная точка раз в interval секунд."""
+		while not self._stopped.wait(self._interval):
+			try:
+				self._repo.checkpoint(self._path)
+			except Exception:
+				# Неудачная контрольная точка не теряет данных: журнал не был сокращен
+				logger.exception("checkpoint to %s failed", self._path)
@@ -0,0 +1,116 @@
+"""
+Отсортированный список с вставкой и удалением за O(log N) для индексов in-memory хранилищ.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Any, Iterable, Iterator
+
+
+class SortedList:
+	"""
+	Сортированный список сравнимых ключей.
+
+	Разбит на подсписки длиной около LOAD, с массивом их максимумов: поиск -
+	бинарный поиск по максимумам и внутри подсписка, вставка и удаление
+	сдвигают только один короткий подсписок. Обход с любого ключа в любую
+	сторону стоит O(log N) на поиск начала и O(1) на каждый следующий ключ.
+
+	Блокировок нет: индексы поверх списка сами защищают его от параллельных
+	изменений.
+	"""
+
+	LOAD = 512
+
+	def __init__(self, keys: Iterable[Any] = ()) -> None:
+		"""
+		Строит список.
+
+		Args:
+			keys: Ключи в любом порядке
+		"""
+		keys = sorted(keys)
+		self._lists: list[list] = [keys[start:start + self.LOAD] for start in range(0, len(keys), self.LOAD)]
+		self._maxes: list = [keys[-1] for keys in self._lists]
+		self._len: int = len(keys)
+
+	def __len__(self) -> int:
+		return self._len
+
+	def __reversed__(self) -> Iterator[Any]:
+		"""Обходит ключи по убыванию."""
+		for keys in reversed(self._lists):
+			yield from reversed(keys)
+
+	def add(self, key: Any) -> None:
+		"""
+		Вставляет ключ.
+
+		Args:
+			key: Ключ
+		"""
+		lists, maxes = self._lists, self._maxes
+		self._len += 1
+		if not lists:
+			lists.append([key])
+			maxes.append(key)
+			return
+		position = bisect_left(maxes, key)
+		if position == len(maxes):
+			position -= 1
+			lists[position].append(key)
+			maxes[position] = key
+		else:
+			insort(lists[position], key)
+		if len(lists[position]) > 2 * self.LOAD:
+			# Делим переполненный подсписок пополам
+			keys = lists[position]
+			lists.insert(position + 1, keys[self.LOAD:])
+			del keys[self.LOAD:]
+			maxes.insert(position, keys[-1])
+
+	def remove(self, key: Any) -> None:
+		"""
+		Удаляет ключ, который есть в списке.
+
+		Args:
+			key: Ключ
+		"""
+		lists, maxes = self._lists, self._maxes
+		position = bisect_left(maxes, key)
+		keys = lists[position]
+		del keys[bisect_left(keys, key)]
+		self._len -= 1
+		if keys:
+			maxes[position] = keys[-1]
+		else:
+			del lists[position]
+			del maxes[position]
+
+	def first(self) -> Any:
+		"""Возвращает наименьший ключ или None для пустого списка."""
+		return self._lists[0][0] if self._lists else None
+
+	def last(self) -> Any:
+		"""Возвращает наибольший ключ или None для пустого списка."""
+		return self._lists[-1][-1] if self._lists else None
+
+	def irange(self, start: Any) -> Iterator[Any]:
+		"""
+		Обходит ключи не меньше start по возрастанию.
+
+		Args:
+			start: Нижняя граница
+
+		Returns:
+			Iterator[Any]: Ключи по возрастанию
+		"""
+		lists = self._lists
+		position = bisect_left(self._maxes, start)
+		if position == len(lists):
+			return
+		keys = lists[position]
+		yield from keys[bisect_left(keys, start):]
+		for index in range(position + 1, len(lists)):
+			yield from lists[index]
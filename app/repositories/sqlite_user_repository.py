@@ -0,0 +1,706 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import MAX_BALANCE, User
+from app.repositories.snapshot import DEFAULT_USERS
+from app.core.exceptions import (
+	UserNotFoundError, SelfTransferError, BalanceOverflowError,
+	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError, VersionConflictError
+)
+
+
+# Сообщение триггера, отклоняющего пользователя, с которым сумма балансов не поместится в int64
+_BALANCE_OVERFLOW = "balance overflow"
+
+# Тексты запросов - константы модуля: sqlite3 кеширует подготовленные
+# выражения по тексту запроса, и каждый запрос компилируется один раз на соединение
+_SCHEMA = (
+	"""
+	CREATE TABLE IF NOT EXISTS users (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		name TEXT NOT NULL,
+		email TEXT NOT NULL,
+		email_key TEXT NOT NULL,
+		name_key TEXT NOT NULL DEFAULT '',
+		balance INTEGER NOT NULL,
+		version INTEGER NOT NULL DEFAULT 0
+	)
+	""",
+	"CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email_key)",
+	"""
+	CREATE TABLE IF NOT EXISTS transfers (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		from_user_id INTEGER NOT NULL,
+		to_user_id INTEGER NOT NULL,
+		amount INTEGER NOT NULL,
+		created_at REAL NOT NULL
+	)
+	""",
+	"CREATE INDEX IF NOT EXISTS transfers_from_user ON transfers (from_user_id, id)",
+	"CREATE INDEX IF NOT EXISTS transfers_to_user ON transfers (to_user_id, id)",
+	# Наименьший и наибольший баланс - крайние записи индекса, самые богатые
+	# счета - его начало; равные балансы упорядочены по id, как в in-memory
+	# хранилищах. Прежний индекс только по balance заменяется этим
+	"DROP INDEX IF EXISTS users_balance",
+	"CREATE INDEX IF NOT EXISTS users_balance_rank ON users (balance DESC, id)",
+	# Агрегаты в единственной строке, которую поддерживают триггеры в той же транзакции
+	"""
+	CREATE TABLE IF NOT EXISTS stats (
+		id INTEGER PRIMARY KEY CHECK (id = 1),
+		user_count INTEGER NOT NULL,
+		total_balance INTEGER NOT NULL,
+		transfer_count INTEGER NOT NULL,
+		transfer_volume INTEGER NOT NULL
+	)
+	""",
+	# В базе, созданной до появления агрегатов, они считаются один раз
+	"""
+	INSERT OR IGNORE INTO stats
+	SELECT 1, (SELECT COUNT(*) FROM users), (SELECT COALESCE(SUM(balance), 0) FROM users),
+		(SELECT COUNT(*) FROM transfers), (SELECT COALESCE(SUM(amount), 0) FROM transfers)
+	""",
+	# Агрегаты - INTEGER, как и балансы: при переполнении SQLite молча перевел
+	# бы их в REAL. Сумма балансов ограничена отказом в создании пользователя,
+	# объем переводов не растет дальше MAX_BALANCE
+	f"""
+	CREATE TRIGGER IF NOT EXISTS users_total_balance BEFORE INSERT ON users
+	WHEN (SELECT total_balance FROM stats) > {MAX_BALANCE} - NEW.balance BEGIN
+		SELECT RAISE(ABORT, '{_BALANCE_OVERFLOW}');
+	END
+	""",
+	"""
+	CREATE TRIGGER IF NOT EXISTS users_stats AFTER INSERT ON users BEGIN
+		UPDATE stats SET user_count = user_count + 1, total_balance = total_balance + NEW.balance;
+	END
+	""",
+	"DROP TRIGGER IF EXISTS transfers_stats",
+	f"""
+	CREATE TRIGGER transfers_stats AFTER INSERT ON transfers BEGIN
+		UPDATE stats SET transfer_count = transfer_count + 1, transfer_volume = CASE
+			WHEN transfer_volume > {MAX_BALANCE} - NEW.amount THEN {MAX_BALANCE}
+			ELSE transfer_volume + NEW.amount
+		END;
+	END
+	""",
+)
+_SELECT_ALL = "SELECT id, name, email, balance, version FROM users ORDER BY id"
+_SELECT_PAGE = "SELECT id, name, email, balance, version FROM users WHERE id > ? ORDER BY id LIMIT ?"
+_SELECT_BY_ID = "SELECT id, name, email, balance, version FROM users WHERE id = ?"
+_SELECT_BY_EMAIL = "SELECT id, name, email, balance, version FROM users WHERE email_key = ?"
+_SELECT_EXISTS = "SELECT 1 FROM users WHERE id = ?"
+_SELECT_BALANCE = "SELECT balance, version FROM users WHERE id = ?"
+_INSERT = "INSERT INTO users (name, email, email_key, name_key, balance) VALUES (?, ?, ?, ?, ?)"
+# Каждое изменение баланса увеличивает версию пользователя
+_DEBIT = (
+	"UPDATE users SET balance = balance - ?, version = version + 1 WHERE id = ? AND balance >= ? "
+	"RETURNING id, name, email, balance, version"
+)
+# Условное списание: только при ожидаемой версии отправителя
+_DEBIT_IF_VERSION = (
+	"UPDATE users SET balance = balance - ?, version = version + 1 "
+	"WHERE id = ? AND balance >= ? AND version = ? "
+	"RETURNING id, name, email, balance, version"
+)
+# Зачисление - только если баланс останется в int64: при переполнении
+# SQLite молча перевел бы значение в REAL
+_CREDIT = (
+	"UPDATE users SET balance = balance + ?1, version = version + 1 "
+	f"WHERE id = ?2 AND balance <= {MAX_BALANCE} - ?1 "
+	"RETURNING id, name, email, balance, version"
+)
+_SELECT_TOP = "SELECT id, name, email, balance, version FROM users ORDER BY balance DESC, id LIMIT ?"
+# Префиксный поиск - слияние двух диапазонов индексов (имена и email), каждый
+# читается с курсора ?3/?4 не дальше размера страницы; ?1 и ?2 - границы
+# префикса. Пользователь, найденный по имени, по email не повторяется
+_SEARCH = """
+	SELECT id, name, email, balance, version FROM (
+		SELECT * FROM (
+			SELECT name_key AS term, id, name, email, balance, version FROM users
+			WHERE name_key >= ?3 AND name_key < ?2 AND (name_key > ?3 OR id >= ?4)
+			ORDER BY name_key, id LIMIT ?5
+		)
+		UNION ALL
+		SELECT * FROM (
+			SELECT email_key AS term, id, name, email, balance, version FROM users
+			WHERE email_key >= ?3 AND email_key < ?2 AND (email_key > ?3 OR id >= ?4)
+				AND NOT (name_key >= ?1 AND name_key < ?2)
+			ORDER BY email_key, id LIMIT ?5
+		)
+	)
+	ORDER BY term, id LIMIT ?5
+"""
+_SELECT_STATS = (
+	"SELECT user_count, total_balance, (SELECT MIN(balance) FROM users), (SELECT MAX(balance) FROM users), "
+	"transfer_count, transfer_volume FROM stats"
+)
+_INSERT_TRANSFER = "INSERT INTO transfers (from_user_id, to_user_id, amount, created_at) VALUES (?, ?, ?, ?)"
+# История пользователя - слияние двух диапазонов индексов (исходящие и входящие),
+# каждый читается с конца не дальше размера страницы
+_SELECT_USER_TRANSFERS = """
+	SELECT * FROM (
+		SELECT id, from_user_id, to_user_id, amount, created_at FROM transfers
+		WHERE from_user_id = ?1 AND id < ?2 ORDER BY id DESC LIMIT ?3
+	)
+	UNION ALL
+	SELECT * FROM (
+		SELECT id, from_user_id, to_user_id, amount, created_at FROM transfers
+		WHERE to_user_id = ?1 AND id < ?2 ORDER BY id DESC LIMIT ?3
+	)
+	ORDER BY id DESC LIMIT ?3
+"""
+
+
+class SQLiteUserRepository:
+	"""
+	Репозиторий пользователей в базе SQLite.
+
+	База работает в режиме WAL: читатели не блокируют писателя и друг
+	друга. Соединение sqlite3 нельзя делить между потоками, поэтому у
+	каждого потока свое соединение, открываемое при первом обращении и
+	переиспользуемое дальше (потоки пула FastAPI живут долго). Запросы
+	подготавливаются один раз на соединение и берутся из кеша sqlite3.
+
+	Перевод - пара условных UPDATE в транзакции BEGIN IMMEDIATE:
+	списание проходит только при достаточном балансе, поэтому проверка
+	и изменение баланса атомарны без блокировок в приложении, а
+	зачисление - только если баланс получателя останется в int64.
+
+	Уникальность email обеспечивает уникальный индекс по нормализованному
+	(casefold) email, как и в in-memory хранилищах.
+
+	Выполненные переводы записываются в таблицу transfers в той же
+	транзакции; индексы (отправитель, id) и (получатель, id) позволяют
+	читать историю пользователя с конца без просмотра всей таблицы.
+
+	Агрегаты для stats() хранит таблица stats из одной строки: её
+	обновляют триггеры на вставку пользователей и переводов в той же
+	транзакции, а крайние балансы читаются из индекса по balance. Тот
+	же индекс отдает самые богатые счета для top() без сортировки.
+	"""
+
+	# Операции ждут записи на диск: асинхронная обертка выполняет их в пуле потоков
+	persistent = True
+
+	def __init__(
+		self,
+		path: str,
+		synchronous: str = "FULL",
+		busy_timeout_ms: int = 5000,
+		seed: Iterable[tuple[str, str, int]] = DEFAULT_USERS,
+	) -> None:
+		"""
+		Открывает базу, создает схему и тестовых пользователей в новой базе.
+
+		Args:
+			path: Путь к файлу базы
+			synchronous: Режим PRAGMA synchronous (FULL - fsync на каждую транзакцию)
+			busy_timeout_ms: Сколько ждать освобождения блокировки записи, в миллисекундах
+			seed: Пользователи (имя, email, баланс), создаваемые в пустой базе
+		"""
+		self._path = path
+		self._synchronous = synchronous
+		self._busy_timeout_ms = busy_timeout_ms
+		self._local = threading.local()
+		self._connections: list = []
+		self._connections_lock = threading.Lock()
+
+		connection = self._connection()
+		connection.execute("PRAGMA journal_mode = WAL")
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			for statement in _SCHEMA:
+				connection.execute(statement)
+			# Базы, созданные до появления версий пользователей
+			columns = {row[1] for row in connection.execute("PRAGMA table_info(users)")}
+			if "version" not in columns:
+				connection.execute("ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+			# и ключей поиска по имени: lower() в SQLite не равен casefold, ключи считаются здесь
+			if "name_key" not in columns:
+				connection.execute("ALTER TABLE users ADD COLUMN name_key TEXT NOT NULL DEFAULT ''")
+				connection.executemany("UPDATE users SET name_key = ? WHERE id = ?", [
+					(name.casefold(), user_id) for user_id, name in connection.execute("SELECT id, name FROM users")
+				])
+			connection.execute("CREATE INDEX IF NOT EXISTS users_name_key ON users (name_key, id)")
+			if connection.execute("SELECT 1 FROM users LIMIT 1").fetchone() is None:
+				connection.executemany(_INSERT, [
+					(name, email, self._normalize_email(email), name.casefold(), balance)
+					for name, email, balance in seed
+				])
+		except BaseException:
+			connection.execute("ROLLBACK")
+			raise
+		connection.execute("COMMIT")
+
+	def _connection(self) -> sqlite3.Connection:
+		"""
+		Возвращает соединение текущего потока, открывая его при первом обращении.
+
+		Returns:
+			sqlite3.Connection: Соединение с базой
+		"""
+		connection = getattr(self._local, "connection", None)
+		if connection is None:
+			# isolation_level=None: транзакциями управляем явно через BEGIN IMMEDIATE.
+			# check_same_thread=False только ради close(): запросы соединение
+			# выполняет лишь в своем потоке
+			connection = sqlite3.connect(
+				self._path,
+				isolation_level=None,
+				check_same_thread=False,
+				timeout=self._busy_timeout_ms / 1000,
+				cached_statements=64,
+			)
+			connection.execute(f"PRAGMA synchronous = {self._synchronous}")
+			self._local.connection = connection
+			with self._connections_lock:
+				self._connections.append(connection)
+		return connection
+
+	@staticmethod
+	def _normalize_email(email: str) -> str:
+		"""
+		Приводит email к ключу индекса (регистронезависимое сравнение).
+
+		Args:
+			email: Исходный email
+
+		Returns:
+			str: Нормализованный email
+		"""
+		return email.casefold()
+
+	@staticmethod
+	def _transfer_error(
+		connection: sqlite3.Connection, from_user_id: int, to_user_id: int, amount: int,
+		expected_version: int | None = None,
+	) -> Exception | None:
+		"""
+		Определяет причину отказа в переводе в том же порядке проверок, что и in-memory хранилище.
+
+		Args:
+			connection: Соединение с базой
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя; None - без проверки
+
+		Returns:
+			Exception | None: Исключение для отказа или None, если перевод возможен
+		"""
+		row = connection.execute(_SELECT_BALANCE, (from_user_id,)).fetchone()
+		to_row = connection.execute(_SELECT_BALANCE, (to_user_id,)).fetchone()
+		if row is None or to_row is None:
+			return UserNotFoundError()
+		if from_user_id == to_user_id:
+			return SelfTransferError()
+		balance, version = row
+		if expected_version is not None and version != expected_version:
+			return VersionConflictError()
+		if balance < amount:
+			return InsufficientFundsError()
+		if amount <= 0:
+			return InvalidAmountError()
+		if to_row[0] > MAX_BALANCE - amount:
+			return BalanceOverflowError()
+		return None
+
+	def list(self) -> list[User]:
+		"""
+		Возвращает список всех пользователей.
+
+		Returns:
+			list[User]: Пользователи в порядке возрастания id
+		"""
+		return [User(*row) for row in self._connection().execute(_SELECT_ALL)]
+
+	def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Возвращает страницу пользователей по возрастанию id.
+
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+
+		Returns:
+			list[User]: Пользователи с id больше after_id
+		"""
+		rows = self._connection().execute(_SELECT_PAGE, (after_id if after_id is not None else 0, limit))
+		return [User(*row) for row in rows]
+
+	def export(self, fetch_size: int = 1000) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+
+		Выгрузка читается в отдельной транзакции чтения на своем соединении:
+		в режиме WAL она видит базу на момент первого чтения и не мешает
+		писателю. Строки выбираются порциями, поэтому память не зависит от
+		количества пользователей. Пока транзакция открыта, журнал WAL не
+		может быть перенесен в базу дальше её начала и растет.
+
+		Args:
+			fetch_size: Количество строк, выбираемых из курсора за раз
+
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		# Обход может продолжаться в разных потоках пула, но не одновременно
+		connection = sqlite3.connect(
+			self._path, isolation_level=None, check_same_thread=False, timeout=self._busy_timeout_ms / 1000,
+		)
+		try:
+			connection.execute("BEGIN")
+			# Первый шаг запроса начинает чтение: срез фиксируется уже при вызове
+			cursor = connection.execute(_SELECT_ALL)
+			rows = cursor.fetchmany(fetch_size)
+		except BaseException:
+			connection.close()
+			raise
+
+		def export_users() -> Iterator[User]:
+			nonlocal rows
+			try:
+				while rows:
+					for row in rows:
+						yield User(*row)
+					rows = cursor.fetchmany(fetch_size)
+			finally:
+				connection.close()
+
+		return export_users()
+
+	def get_by_id(self, user_id: int) -> User | None:
+		"""
+		Находит пользователя по ID.
+
+		Args:
+			user_id: ID пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		row = self._connection().execute(_SELECT_BY_ID, (user_id,)).fetchone()
+		return User(*row) if row is not None else None
+
+	def get_by_email(self, email: str) -> User | None:
+		"""
+		Находит пользователя по email (регистронезависимо).
+
+		Args:
+			email: Email пользователя для поиска
+
+		Returns:
+			User | None: Найденный пользователь или None
+		"""
+		row = self._connection().execute(_SELECT_BY_EMAIL, (self._normalize_email(email),)).fetchone()
+		return User(*row) if row is not None else None
+
+	def create(self, name: str, email: str, balance: int) -> User:
+		"""
+		Создает нового пользователя.
+
+		Args:
+			name: Имя пользователя
+			email: Email пользователя (должен быть уникальным)
+			balance: Начальный баланс пользователя
+
+		Returns:
+			User: Созданный пользователь
+
+		Raises:
+			EmailAlreadyExistsError: Если email уже используется
+			BalanceOverflowError: Если сумма балансов в таблице stats превысит MAX_BALANCE
+		"""
+		try:
+			cursor = self._connection().execute(_INSERT, (name, email, self._normalize_email(email), name.casefold(), balance))
+		except sqlite3.IntegrityError as exc:
+			if _BALANCE_OVERFLOW in str(exc):
+				raise BalanceOverflowError()
+			# Нарушение уникального индекса email
+			raise EmailAlreadyExistsError()
+		return User(id=cursor.lastrowid, name=name, email=email, balance=balance)
+
+	def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей в одной транзакции, пропуская занятые email.
+
+		Args:
+			users: Пользователи (имя, email, баланс)
+
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже
+			используется (в том числе более ранней строкой пакета), по строкам пакета
+
+		Raises:
+			BalanceOverflowError: Если сумма балансов в таблице stats превысит MAX_BALANCE
+		"""
+		connection = self._connection()
+		results = []
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			for name, email, balance in users:
+				try:
+					cursor = connection.execute(_INSERT, (name, email, self._normalize_email(email), name.casefold(), balance))
+				except sqlite3.IntegrityError as exc:
+					if _BALANCE_OVERFLOW in str(exc):
+						raise BalanceOverflowError()
+					# Откатывается только эта инструкция (вместе с выданным ей id), транзакция продолжается
+					results.append(None)
+					continue
+				results.append(User(id=cursor.lastrowid, name=name, email=email, balance=balance))
+		except BaseException:
+			connection.execute("ROLLBACK")
+			raise
+		# Один COMMIT (и один fsync) на весь пакет
+		connection.execute("COMMIT")
+		return results
+
+	def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""
+		Переводит деньги между пользователями в одной транзакции.
+
+		Перевод увеличивает версии обоих пользователей. С expected_version
+		списание условное (version = ?), а устаревшая версия обнаруживается
+		еще до ожидания блокировки записи: чтение в режиме WAL её не ждет.
+
+		Args:
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя; None - без проверки
+
+		Returns:
+			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			VersionConflictError: Если версия отправителя не равна expected_version
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		connection = self._connection()
+		if from_user_id == to_user_id or amount <= 0:
+			raise self._transfer_error(connection, from_user_id, to_user_id, amount, expected_version)
+		if expected_version is not None:
+			row = connection.execute(_SELECT_BALANCE, (from_user_id,)).fetchone()
+			if row is not None and row[1] != expected_version:
+				raise self._transfer_error(connection, from_user_id, to_user_id, amount, expected_version)
+
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			# fetchall доводит UPDATE ... RETURNING до конца, иначе COMMIT
+			# отказался бы фиксировать транзакцию с незавершенным выражением.
+			# Зачисление идет первым: причина его отказа определяется по
+			# балансам до перевода, а не после уже выполненного списания
+			to_rows = connection.execute(_CREDIT, (amount, to_user_id)).fetchall()
+			if to_rows:
+				if expected_version is None:
+					from_rows = connection.execute(_DEBIT, (amount, from_user_id, amount)).fetchall()
+				else:
+					from_rows = connection.execute(
+						_DEBIT_IF_VERSION, (amount, from_user_id, amount, expected_version)
+					).fetchall()
+			if not to_rows or not from_rows:
+				raise self._transfer_error(connection, from_user_id, to_user_id, amount, expected_version)
+			connection.execute(_INSERT_TRANSFER, (from_user_id, to_user_id, amount, time.time()))
+		except BaseException:
+			connection.execute("ROLLBACK")
+			raise
+		connection.execute("COMMIT")
+		return User(*from_rows[0]), User(*to_rows[0])
+
+	def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов: либо все, либо ни одного.
+
+		Весь пакет - одна транзакция, поэтому fsync выполняется один раз.
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		connection = self._connection()
+		results = []
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			# Проверки, не зависящие от балансов, выполняем до первого изменения
+			checked = set()
+			for from_user_id, to_user_id, amount in transfers:
+				for user_id in (from_user_id, to_user_id):
+					if user_id not in checked:
+						if connection.execute(_SELECT_EXISTS, (user_id,)).fetchone() is None:
+							raise UserNotFoundError()
+						checked.add(user_id)
+				if from_user_id == to_user_id:
+					raise SelfTransferError()
+				if amount <= 0:
+					raise InvalidAmountError()
+
+			for from_user_id, to_user_id, amount in transfers:
+				from_rows = connection.execute(_DEBIT, (amount, from_user_id, amount)).fetchall()
+				if not from_rows:
+					raise InsufficientFundsError()
+				to_rows = connection.execute(_CREDIT, (amount, to_user_id)).fetchall()
+				# Получатель проверен выше: зачисления нет только при переполнении
+				if not to_rows:
+					raise BalanceOverflowError()
+				results.append((from_rows[0][3], to_rows[0][3]))
+			now = time.time()
+			connection.executemany(_INSERT_TRANSFER, [transfer + (now,) for transfer in transfers])
+		except BaseException:
+			connection.execute("ROLLBACK")
+			raise
+		connection.execute("COMMIT")
+		return results
+
+	def apply_transfers(self, transfers: list[tuple[int, int, int]]) -> list[tuple[User, User] | Exception]:
+		"""
+		Выполняет независимые переводы по порядку в одной транзакции.
+
+		В отличие от transfer_batch, переводы не атомарны вместе: каждый
+		выполняется или отклоняется сам по себе, а отклоненный откатывается
+		до своей точки сохранения. Весь пакет фиксируется одним COMMIT
+		(и одним fsync).
+
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+		Returns:
+			list[tuple[User, User] | Exception]: Для каждого перевода
+			(отправитель, получатель) после него или исключение отказа
+		"""
+		connection = self._connection()
+		results: list = []
+		applied = []
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			for from_user_id, to_user_id, amount in transfers:
+				if from_user_id == to_user_id or amount <= 0:
+					results.append(self._transfer_error(connection, from_user_id, to_user_id, amount))
+					continue
+				connection.execute("SAVEPOINT apply_transfer")
+				from_rows = connection.execute(_DEBIT, (amount, from_user_id, amount)).fetchall()
+				to_rows = connection.execute(_CREDIT, (amount, to_user_id)).fetchall() if from_rows else []
+				if not to_rows:
+					# Списание без зачисления (получателя нет) откатывается
+					connection.execute("ROLLBACK TO apply_transfer")
+					results.append(self._transfer_error(connection, from_user_id, to_user_id, amount))
+				else:
+					applied.append((from_user_id, to_user_id, amount))
+					results.append((User(*from_rows[0]), User(*to_rows[0])))
+				connection.execute("RELEASE apply_transfer")
+			now = time.time()
+			connection.executemany(_INSERT_TRANSFER, [transfer + (now,) for transfer in applied])
+		except BaseException:
+			connection.execute("ROLLBACK")
+			raise
+		connection.execute("COMMIT")
+		return results
+
+	def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Находит пользователей, у которых имя или email начинается с запроса.
+
+		Диапазоны префикса читаются по индексам (name_key, id) и email_key,
+		поэтому стоимость зависит от размера страницы.
+
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
+
+		Returns:
+			list[User]: Пользователи в порядке совпавшего имени или email, затем id
+		"""
+		prefix = query.casefold()
+		# Верхняя граница диапазона: U+10FFFF - наибольший символ и в UTF-8 (порядок сравнения SQLite)
+		end = prefix + "\U0010ffff"
+		start, start_id = prefix, 0
+		if after_id is not None:
+			cursor = self.get_by_id(after_id)
+			if cursor is None:
+				return []
+			# Страница продолжается после ключа, по которому выдан пользователь-курсор
+			name_key = cursor.name.casefold()
+			start = name_key if name_key.startswith(prefix) else self._normalize_email(cursor.email)
+			start_id = after_id + 1
+		rows = self._connection().execute(_SEARCH, (prefix, end, start, start_id, limit))
+		return [User(*row) for row in rows]
+
+	def top(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+
+		Args:
+			n: Количество пользователей
+
+		Returns:
+			list[User]: Пользователи по убыванию баланса, равные балансы - по возрастанию id
+		"""
+		return [User(*row) for row in self._connection().execute(_SELECT_TOP, (n,))]
+
+	def stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам одним запросом.
+
+		Returns:
+			UserStats: Агрегаты
+		"""
+		return UserStats(*self._connection().execute(_SELECT_STATS).fetchone())
+
+	def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""
+		Возвращает страницу истории переводов пользователя, от новых к старым.
+
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
+
+		Returns:
+			list[Transfer]: Переводы с id меньше before_id по убыванию id
+
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		connection = self._connection()
+		if connection.execute(_SELECT_EXISTS, (user_id,)).fetchone() is None:
+			raise UserNotFoundError()
+		# SQLite хранит целые числа до 2^63 - 1: без курсора берем все записи
+		before = before_id if before_id is not None else (1 << 63) - 1
+		rows = connection.execute(_SELECT_USER_TRANSFERS, (user_id, before, limit))
+		return [
+			Transfer(
+				id=transfer_id, from_user_id=from_user_id, to_user_id=to_user_id, amount=amount,
+				created_at=datetime.fromtimestamp(created_at, tz=timezone.utc),
+			)
+			for transfer_id, from_user_id, to_user_id, amount, created_at in rows
+		]
+
+	def close(self) -> None:
+		"""
+		Закрывает соединения всех потоков.
+		"""
+		with self._connections_lock:
+			connections, self._connections = self._connections, []
+		for connection in connections:
+			connection.close()
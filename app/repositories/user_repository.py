@@ -1,7 +1,27 @@
-from app.models.user import User
+from __future__ import annotations
+
+import threading
+import weakref
+from bisect import bisect_right
+from typing import Iterator
+
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import MAX_BALANCE, User
+from app.repositories.balance_index import BalanceIndex
+from app.repositories.journal import UndoJournal
+from app.repositories.ledger import TransferLedger
+from app.repositories.prefix_index import PrefixIndex
+from app.repositories.read_views import ReadViews
+from app.repositories.locks import StripedLockManager
+from app.repositories.snapshot import MappedSnapshot, SeedSnapshot, write_snapshot
+from app.repositories.wal import (
+	RECORD_CREATE, RECORD_TRANSFER, WriteAheadLog,
+	encode_create, encode_transfer, encode_transfer_batch,
+)
 from app.core.exceptions import (
-	UserNotFoundError, SelfTransferError, 
-	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError
+	UserNotFoundError, SelfTransferError, WriteAheadLogError, BalanceOverflowError,
+	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError, VersionConflictError
 )
 
 
@@ -11,54 +31,345 @@ class InMemoryUserRepository:
 	
 	Имитирует базу данных, храня данные в памяти приложения.
 	Содержит тестовых пользователей и поддерживает базовые CRUD операции.
+	
+	Начальное состояние берется из неизменяемого снимка: по умолчанию это
+	тестовые пользователи (SeedSnapshot), а при быстром старте - файл
+	контрольной точки, отображенный в память (MappedSnapshot). Пользователи
+	снимка загружаются в индексы лениво, при первом обращении, поэтому
+	время старта не зависит от количества счетов.
+	
+	С журналом предзаписи (WAL) каждое создание пользователя и перевод
+	дописываются в журнал, а при запуске повторяются записи журнала,
+	сделанные после снимка. После отказа журнала репозиторий останавливается
+	(fail-stop): изменения в памяти могли не попасть на диск, поэтому любые
+	операции завершаются WriteAheadLogError до перезапуска, который
+	восстанавливает состояние из снимка и журнала.
+	
+	Выполненные переводы записываются в журнал переводов (TransferLedger)
+	для истории операций пользователя. Журнал переводов хранится в памяти
+	и при запуске восстанавливается повтором WAL, поэтому содержит переводы
+	после последней контрольной точки; время восстановленных переводов -
+	время повтора журнала. Количество и сумма переводов до контрольной
+	точки хранятся в снимке, поэтому номера переводов после перезапуска
+	продолжаются, а не начинаются с 1.
+	
+	Агрегаты для stats() ведутся по ходу изменений: сумма балансов меняется
+	только созданием пользователей, количество и сумма переводов - в журнале
+	переводов. Наименьший и наибольший баланс дает упорядоченный индекс
+	балансов (BalanceIndex); он же отдает самых богатых пользователей для
+	top(). Индекс строится при первом вызове stats() или top(), чтобы не
+	замедлять старт со снимка, и дальше обновляется каждым изменением.
+	
+	Так же лениво, при первом поиске, строится индекс префиксного поиска
+	по имени и email (PrefixIndex); его обновляет создание пользователей.
+	
+	Полный список, выгрузка и контрольная точка читают согласованное
+	представление (ReadViews): оно закрепляется за время захвата блокировок,
+	а дальше переводы не ждут читателя, сохраняя для него прежние балансы
+	и версии изменяемых пользователей. Читатель не видит половину перевода,
+	и сумма балансов в его выборке всегда сходится.
 	"""
 	
-	def __init__(self) -> None:
+	def __init__(
+		self,
+		lock_stripes: int = 64,
+		wal: WriteAheadLog | None = None,
+		snapshot: SeedSnapshot | MappedSnapshot | None = None,
+	) -> None:
 		"""
 		Инициализирует репозиторий с тестовыми данными.
+		
+		Args:
+			lock_stripes: Количество полос в пуле блокировок счетов
+			wal: Журнал предзаписи; если передан, состояние восстанавливается из него
+			snapshot: Начальное состояние; по умолчанию тестовые пользователи
+		"""
+		self._snapshot = snapshot if snapshot is not None else SeedSnapshot()
+
+		# Хеш-индексы: id -> пользователь и нормализованный email -> пользователь.
+		# Содержат пользователей, созданных после снимка, и уже загруженных из него.
+		self._users: dict = {}
+		self._users_by_email: dict = {}
+		# Отсортированный список id пользователей, созданных после снимка,
+		# для постраничной выборки (keyset pagination)
+		self._ids: list = []
+		self._next_id: int = self._snapshot.next_id
+		# Сумма балансов пользователей, созданных после снимка
+		self._created_balance: int = 0
+		# Упорядоченный индекс балансов; None - еще не построен
+		self._balance_index: BalanceIndex | None = None
+		# Индекс префиксного поиска по имени и email; None - еще не построен
+		self._prefix_index: PrefixIndex | None = None
+
+		# Переводы блокируют только свои счета, создание - индекс email и счетчик id
+		self._locks = StripedLockManager(lock_stripes)
+		self._create_lock = threading.Lock()
+		self._wal: WriteAheadLog | None = None
+		self._ledger = TransferLedger(self._snapshot.transfer_count, self._snapshot.transfer_volume)
+		self._read_views = ReadViews()
+
+		# Журнал хранит изменения поверх снимка; нумерация его записей
+		# продолжается после снимка, даже если журнал после него пуст
+		if wal is not None:
+			wal.continue_after(self._snapshot.lsn)
+			self._replay(wal)
+			self._wal = wal
+
+	@property
+	def wal(self) -> WriteAheadLog | None:
+		"""Журнал предзаписи или None, если репозиторий не сохраняет изменения."""
+		return self._wal
+
+	def _check_wal(self) -> None:
+		"""
+		Проверяет, что журнал предзаписи не в состоянии отказа.
+		
+		Изменение применяется в памяти до fsync, поэтому после ошибки
+		фиксации в памяти могут остаться изменения, которых нет на диске.
+		Такой репозиторий не отдает их читателям и не пишет в снимок.
+		
+		Raises:
+			WriteAheadLogError: Если журнал в состоянии отказа
+		"""
+		if self._wal is not None and self._wal.failed:
+			raise WriteAheadLogError("write-ahead log failed")
+
+	def _insert(self, user: User, email_key: str) -> None:
+		"""
+		Добавляет пользователя во все индексы.
+		
+		Args:
+			user: Пользователь
+			email_key: Нормализованный email
+		"""
+		self._users[user.id] = user
+		self._users_by_email[email_key] = user
+		self._ids.append(user.id)
+		self._next_id = user.id + 1
+		self._created_balance += user.balance
+		if self._balance_index is not None:
+			self._balance_index.add(user.id, user.balance)
+		if self._prefix_index is not None:
+			self._prefix_index.add(user.id, user.name, user.email)
+
+	def _load(self, row: int) -> User:
+		"""
+		Загружает пользователя из снимка в индексы.
+		
+		Args:
+			row: Строка снимка
+			
+		Returns:
+			User: Пользователь из индекса
+		"""
+		user = self._snapshot.user(row)
+		# setdefault атомарен: при гонке все потоки получат один и тот же объект
+		user = self._users.setdefault(user.id, user)
+		self._users_by_email.setdefault(self._normalize_email(user.email), user)
+		return user
+
+	def _current(self, row: int) -> User:
+		"""
+		Возвращает актуальное состояние пользователя из строки снимка без загрузки в индексы.
+		
+		Args:
+			row: Строка снимка
+			
+		Returns:
+			User: Пользователь
+		"""
+		user = self._users.get(self._snapshot.id_at(row))
+		return user if user is not None else self._snapshot.user(row)
+
+	def _replay(self, wal: WriteAheadLog) -> None:
+		"""
+		Восстанавливает состояние повтором записей журнала, сделанных после снимка.
+		
+		Записи попали в журнал только после успешных проверок,
+		поэтому применяются без повторной валидации. Переводы
+		добавляются и в журнал переводов - для истории и stats().
+		
+		Args:
+			wal: Журнал предзаписи
+		"""
+		for lsn, record_type, payload in wal.records():
+			if lsn <= self._snapshot.lsn:
+				continue
+			if record_type == RECORD_CREATE:
+				user_id, name, email, balance = payload
+				user = User(id=user_id, name=name, email=email, balance=balance)
+				self._insert(user, self._normalize_email(email))
+				continue
+			transfers = [payload] if record_type == RECORD_TRANSFER else payload
+			for from_user_id, to_user_id, amount in transfers:
+				from_user = self.get_by_id(from_user_id)
+				to_user = self.get_by_id(to_user_id)
+				from_user.balance -= amount
+				from_user.version += 1
+				to_user.balance += amount
+				to_user.version += 1
+			self._ledger.extend(transfers)
+
+	@staticmethod
+	def _normalize_email(email: str) -> str:
+		"""
+		Приводит email к ключу индекса (регистронезависимое сравнение).
+		
+		Args:
+			email: Исходный email
+			
+		Returns:
+			str: Нормализованный email
 		"""
-		# Имитируем базу данных с тестовыми данными
-		self._users: list = [
-			User(id=1, name="Алиса", email="alice@example.com", balance=100),
-			User(id=2, name="Боб", email="bob@example.com", balance=250),
-		]
-		self._next_id: int = 3
+		return email.casefold()
 
-	def _create_snapshot(self) -> dict:
+	@staticmethod
+	def _copy(user: User) -> User:
 		"""
-		Создает снимок текущего состояния пользователей.
+		Создает копию пользователя.
+		
+		Args:
+			user: Исходный пользователь
+			
+		Returns:
+			User: Копия пользователя
+		"""
+		return User(id=user.id, name=user.name, email=user.email, balance=user.balance, version=user.version)
+
+	def _pin(self) -> tuple[dict, int]:
+		"""
+		Закрепляет представление для чтения.
+		
+		Изменения приостанавливаются только на захват блокировок, без
+		копирования пользователей.
 		
 		Returns:
-			dict: Словарь с копиями пользователей
+			tuple[dict, int]: Представление и количество пользователей, созданных после снимка
 		"""
-		return {user.id: User(
-			id=user.id,
-			name=user.name,
-			email=user.email,
-			balance=user.balance
-		) for user in self._users}
+		with self._create_lock, self._locks.acquire_all():
+			self._check_wal()
+			return self._read_views.pin(), len(self._ids)
 
-	def _restore_snapshot(self, snapshot: dict) -> None:
+	def _preserve(self, users) -> None:
 		"""
-		Восстанавливает состояние из снимка.
+		Сохраняет балансы и версии пользователей для закрепленных представлений.
+		
+		Вызывается под блокировками пользователей до их изменения.
 		
 		Args:
-			snapshot: Снимок состояния для восстановления
+			users: Пользователи (None пропускаются)
 		"""
-		for user in self._users:
-			if user.id in snapshot:
-				user.name = snapshot[user.id].name
-				user.email = snapshot[user.id].email
-				user.balance = snapshot[user.id].balance
+		for user in users:
+			if user is not None:
+				self._read_views.preserve(user.id, (user.balance, user.version))
+
+	@staticmethod
+	def _as_of(user: User, view: dict) -> User:
+		"""
+		Создает копию пользователя в состоянии представления.
+		
+		Args:
+			user: Пользователь из индекса
+			view: Закрепленное представление
+			
+		Returns:
+			User: Копия с балансом и версией на момент закрепления
+		"""
+		# Сначала текущее состояние, затем сохраненное: оно сохраняется до изменения
+		balance, version = user.balance, user.version
+		state = view.get(user.id)
+		if state is not None:
+			balance, version = state
+		return User(id=user.id, name=user.name, email=user.email, balance=balance, version=version)
+
+	def _read_rows(self, view: dict, new_count: int) -> Iterator[User]:
+		"""
+		Обходит пользователей в состоянии закрепленного представления.
+		
+		Args:
+			view: Закрепленное представление
+			new_count: Количество пользователей, созданных после снимка, на момент закрепления
+			
+		Returns:
+			Iterator[User]: Копии пользователей в порядке возрастания id
+		"""
+		snapshot = self._snapshot
+		users = self._users
+		for row in range(len(snapshot)):
+			user = users.get(snapshot.id_at(row))
+			# Не загруженный в индексы пользователь не менялся и до закрепления: снимок и есть его состояние
+			yield self._as_of(user, view) if user is not None else snapshot.user(row)
+		new_ids = self._ids
+		for index in range(new_count):
+			yield self._as_of(users[new_ids[index]], view)
 
 	def list(self) -> list:
 		"""
 		Возвращает список всех пользователей.
 		
+		Список читается из закрепленного представления: переводы во время
+		обхода не ждут его и не попадают в список наполовину.
+		
+		Returns:
+			list: Копии пользователей в порядке возрастания id
+		"""
+		view, new_count = self._pin()
+		try:
+			return list(self._read_rows(view, new_count))
+		finally:
+			self._read_views.release(view)
+
+	def list_page(self, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Возвращает страницу пользователей по возрастанию id.
+		
+		Выборка делается срезом отсортированного индекса id, поэтому её стоимость
+		зависит от размера страницы, а не от количества пользователей.
+		
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+			
 		Returns:
-			list: Копия списка пользователей
+			list[User]: Пользователи с id больше after_id
 		"""
-		return self._users.copy()
+		self._check_wal()
+		# Сначала пользователи снимка, затем созданные после него: их id больше
+		snapshot = self._snapshot
+		first_row = 0 if after_id is None else snapshot.bisect_id(after_id)
+		end = min(first_row + limit, len(snapshot))
+		page = [self._current(row) for row in range(first_row, end)]
+		
+		if len(page) < limit:
+			start = 0 if after_id is None else bisect_right(self._ids, after_id)
+			users = self._users
+			page.extend(users[user_id] for user_id in self._ids[start:start + limit - len(page)])
+		return page
+
+	def export(self) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+		
+		Вызов закрепляет представление для чтения: изменения приостанавливаются
+		только на захват блокировок, а пользователи создаются при обходе.
+		Переводы во время выгрузки не ждут её и в выгрузку не попадают.
+		Представление освобождается в конце обхода или вместе с итератором.
+		
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		view, new_count = self._pin()
+		
+		def export_users() -> Iterator[User]:
+			try:
+				yield from self._read_rows(view, new_count)
+			finally:
+				self._read_views.release(view)
+		
+		users = export_users()
+		# Итератор, который так и не начали обходить, освобождает представление при сборке мусора
+		weakref.finalize(users, self._read_views.release, view)
+		return users
 
 	def get_by_id(self, user_id: int) -> User | None:
 		"""
@@ -70,10 +381,12 @@ class InMemoryUserRepository:
 		Returns:
 			User | None: Найденный пользователь или None
 		"""
-		for user in self._users:
-			if user.id == user_id:
-				return user
-		return None
+		self._check_wal()
+		user = self._users.get(user_id)
+		if user is not None:
+			return user
+		row = self._snapshot.row_of_id(user_id)
+		return self._load(row) if row >= 0 else None
 
 	def get_by_email(self, email: str) -> User | None:
 		"""
@@ -85,10 +398,13 @@ class InMemoryUserRepository:
 		Returns:
 			User | None: Найденный пользователь или None
 		"""
-		for user in self._users:
-			if user.email.lower() == email.lower():
-				return user
-		return None
+		self._check_wal()
+		email_key = self._normalize_email(email)
+		user = self._users_by_email.get(email_key)
+		if user is not None:
+			return user
+		row = self._snapshot.find_email(email_key)
+		return self._load(row) if row >= 0 else None
 
 	def create(self, name: str, email: str, balance: int) -> User:
 		"""
@@ -105,28 +421,104 @@ class InMemoryUserRepository:
 		Raises:
 			EmailAlreadyExistsError: Если email уже используется
 		"""
-		# Проверяем уникальность email
-		if self.get_by_email(email):
-			raise EmailAlreadyExistsError()
+		email_key = self._normalize_email(email)
+		lsn = None
+		with self._create_lock:
+			# Проверяем уникальность email
+			if email_key in self._users_by_email or self._snapshot.find_email(email_key) >= 0:
+				raise EmailAlreadyExistsError()
 
-		user = User(
-			id=self._next_id,
-			name=name,
-			email=email,
-			balance=balance,
-		)
-		self._users.append(user)
-		self._next_id += 1
+			user = User(
+				id=self._next_id,
+				name=name,
+				email=email,
+				balance=balance,
+			)
+			# Запись в журнал идет до публикации пользователя: переводы
+			# с его участием не могут оказаться в журнале раньше неё
+			if self._wal is not None:
+				lsn = self._wal.append(encode_create(user.id, name, email, balance))
+			self._insert(user, email_key)
+
+		if lsn is not None:
+			self._wal.wait_durable(lsn)
 		return user
 
-	def transfer(self, from_user_id: int, to_user_id: int, amount: int) -> tuple[User, User]:
+	def create_many(self, users: list[tuple[str, str, int]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей, пропуская занятые email.
+		
+		Уникальность email проверяется по индексу под одной блокировкой
+		создания на весь пакет; с журналом предзаписи пакет ждет одного fsync.
+		
+		Args:
+			users: Пользователи (имя, email, баланс)
+			
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже
+			используется (в том числе более ранней строкой пакета), по строкам пакета
+		"""
+		results = []
+		lsn = None
+		with self._create_lock:
+			for name, email, balance in users:
+				email_key = self._normalize_email(email)
+				if email_key in self._users_by_email or self._snapshot.find_email(email_key) >= 0:
+					results.append(None)
+					continue
+
+				user = User(id=self._next_id, name=name, email=email, balance=balance)
+				if self._wal is not None:
+					lsn = self._wal.append(encode_create(user.id, name, email, balance))
+				self._insert(user, email_key)
+				results.append(user)
+
+		if lsn is not None:
+			self._wal.wait_durable(lsn)
+		return results
+
+	def _balances_before(self, users: dict) -> dict | None:
+		"""
+		Запоминает балансы участников пакета для индекса балансов (вызывается под их блокировками).
+		
+		Args:
+			users: Участники пакета: id -> пользователь (None - не найден)
+			
+		Returns:
+			dict | None: id -> баланс до пакета или None, если индекс еще не построен
+		"""
+		if self._balance_index is None:
+			return None
+		return {user_id: user.balance for user_id, user in users.items() if user is not None}
+
+	def _reindex(self, balances: dict | None, users: dict) -> None:
+		"""
+		Переносит участников пакета в индексе балансов на их новые балансы.
+		
+		Args:
+			balances: Балансы до пакета из _balances_before
+			users: Участники пакета
+		"""
+		if balances is not None:
+			for user_id, balance in balances.items():
+				self._balance_index.move(user_id, balance, users[user_id].balance)
+
+	def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
 		"""
 		Переводит деньги между пользователями с поддержкой транзакций.
 		
+		Перевод увеличивает версии обоих пользователей. С expected_version
+		перевод условный (оптимистичный): устаревшая версия отправителя
+		обнаруживается еще до захвата блокировок, и запрос сразу получает
+		отказ, не дожидаясь конкурирующих переводов.
+		
 		Args:
 			from_user_id: ID отправителя
 			to_user_id: ID получателя
 			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя; None - без проверки
 			
 		Returns:
 			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
@@ -134,28 +526,38 @@ class InMemoryUserRepository:
 		Raises:
 			UserNotFoundError: Если пользователь не найден
 			SelfTransferError: Если попытка перевода самому себе
+			VersionConflictError: Если версия отправителя не равна expected_version
 			InsufficientFundsError: Если недостаточно средств
 			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
 		"""
-		# Создаем снимок состояния перед изменениями
-		snapshot = self._create_snapshot()
-
-		# Аналог атамарной транзакции
+		# Проверяем что пользователи существуют
+		from_user = self.get_by_id(from_user_id)
+		if not from_user:
+			raise UserNotFoundError()
+			
+		to_user = self.get_by_id(to_user_id)
+		if not to_user:
+			raise UserNotFoundError()
+		
+		# Проверяем что не переводим самому себе
+		if from_user_id == to_user_id:
+			raise SelfTransferError()
+		
+		# Устаревшая версия видна без блокировок: версия только растет
+		if expected_version is not None and from_user.version != expected_version:
+			raise VersionConflictError()
+		
+		# Аналог атомарной транзакции
 		# если алиса переводит Бобу 10р, с её счёта сняли 10 р, а бобу на счёт +10р,
-		# но, если при пополнении счёта Бобу возникнет ошибка, то Алисе нужно вернуть 10р
-		try:
-			# Проверяем что пользователи существуют
-			from_user = self.get_by_id(from_user_id)
-			if not from_user:
-				raise UserNotFoundError()
-				
-			to_user = self.get_by_id(to_user_id)
-			if not to_user:
-				raise UserNotFoundError()
-			
-			# Проверяем что не переводим самому себе
-			if from_user_id == to_user_id:
-				raise SelfTransferError()
+		# но, если при пополнении счёта Бобу возникнет ошибка, то Алисе нужно вернуть 10р.
+		# Журнал отмены хранит только изменённые балансы, а не копию всего репозитория.
+		# Блокируются только два счета, поэтому несвязанные переводы идут параллельно.
+		lsn = None
+		with self._locks.acquire(from_user_id, to_user_id), UndoJournal() as journal:
+			# Под блокировкой версия могла измениться после быстрой проверки
+			if expected_version is not None and from_user.version != expected_version:
+				raise VersionConflictError()
 			
 			# Проверяем что у отправителя хватает денег
 			if from_user.balance < amount:
@@ -165,13 +567,339 @@ class InMemoryUserRepository:
 			if amount <= 0:
 				raise InvalidAmountError()
 			
+			# Проверяем что баланс получателя не выйдет за int64 хранилищ и снимка
+			if to_user.balance > MAX_BALANCE - amount:
+				raise BalanceOverflowError()
+			
 			# Выполняем перевод
-			from_user.balance -= amount
-			to_user.balance += amount
+			if self._read_views.pinned:
+				self._preserve((from_user, to_user))
+			journal.set(from_user, "balance", from_user.balance - amount)
+			journal.set(to_user, "balance", to_user.balance + amount)
+			journal.set(from_user, "version", from_user.version + 1)
+			journal.set(to_user, "version", to_user.version + 1)
+			
+			# Запись в журнал под блокировками счетов: порядок записей совпадает
+			# с порядком применения переводов по одним и тем же счетам
+			if self._wal is not None:
+				lsn = self._wal.append(encode_transfer(from_user_id, to_user_id, amount))
+			self._ledger.append(from_user_id, to_user_id, amount)
+			if self._balance_index is not None:
+				self._balance_index.move(from_user_id, from_user.balance + amount, from_user.balance)
+				self._balance_index.move(to_user_id, to_user.balance - amount, to_user.balance)
+			
+			# Возвращаем копии, снятые под блокировкой: после её освобождения
+			# балансы могут изменить другие переводы
+			result = self._copy(from_user), self._copy(to_user)
+
+		# fsync ждем уже без блокировок, чтобы другие переводы попали в ту же группу
+		if lsn is not None:
+			self._wal.wait_durable(lsn)
+		return result
+
+	def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов: либо все, либо ни одного.
+		
+		Блокировки всех затронутых счетов берутся один раз на весь пакет.
+		Переводы применяются по порядку, поэтому перевод может использовать
+		деньги, полученные предыдущим переводом того же пакета.
+		
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+			
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+			
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+			SelfTransferError: Если попытка перевода самому себе
+			InsufficientFundsError: Если недостаточно средств
+			InvalidAmountError: Если некорректная сумма
+			BalanceOverflowError: Если баланс получателя превысит MAX_BALANCE
+		"""
+		# Проверки, не зависящие от балансов, выполняем до захвата блокировок
+		users: dict = {}
+		for from_user_id, to_user_id, amount in transfers:
+			for user_id in (from_user_id, to_user_id):
+				if user_id not in users:
+					user = self.get_by_id(user_id)
+					if not user:
+						raise UserNotFoundError()
+					users[user_id] = user
+			if from_user_id == to_user_id:
+				raise SelfTransferError()
+			if amount <= 0:
+				raise InvalidAmountError()
+
+		results = []
+		with self._locks.acquire(*users), UndoJournal() as journal:
+			balances = self._balances_before(users)
+			if self._read_views.pinned:
+				self._preserve(users.values())
+			for from_user_id, to_user_id, amount in transfers:
+				from_user = users[from_user_id]
+				to_user = users[to_user_id]
+				if from_user.balance < amount:
+					raise InsufficientFundsError()
+				if to_user.balance > MAX_BALANCE - amount:
+					raise BalanceOverflowError()
+				journal.set(from_user, "balance", from_user.balance - amount)
+				journal.set(to_user, "balance", to_user.balance + amount)
+				journal.set(from_user, "version", from_user.version + 1)
+				journal.set(to_user, "version", to_user.version + 1)
+				results.append((from_user.balance, to_user.balance))
+			if self._wal is not None:
+				lsn = self._wal.append(encode_transfer_batch(transfers))
+			self._ledger.extend(transfers)
+			self._reindex(balances, users)
+
+		if self._wal is not None:
+			self._wal.wait_durable(lsn)
+		return results
+
+	def apply_transfers(
+		self, transfers: list[tuple[int, int, int]], wait_durable: bool = True
+	) -> list[tuple[User, User] | Exception]:
+		"""
+		Выполняет независимые переводы по порядку в одной критической секции.
+		
+		В отличие от transfer_batch, переводы не атомарны вместе: каждый
+		проверяется по балансам с учетом предыдущих и выполняется или
+		отклоняется сам по себе. Блокировки счетов берутся один раз на
+		весь пакет, выполненные переводы пишутся в журнал предзаписи одной
+		записью и ждут одного fsync.
+		
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+			wait_durable: Ждать fsync журнала; False - вызывающий сам ждет
+				wal.wait_durable, а пока выполняет следующий пакет
+			
+		Returns:
+			list[tuple[User, User] | Exception]: Для каждого перевода копии
+			(отправитель, получатель) после него или исключение отказа
+			
+		Raises:
+			WriteAheadLogError: Если не удалась запись в журнал (не выполняется ни один перевод)
+		"""
+		results: list = [None] * len(transfers)
+		users: dict = {}
+		valid = []
+		# Проверки, не зависящие от балансов, выполняем до захвата блокировок
+		for index, (from_user_id, to_user_id, amount) in enumerate(transfers):
+			for user_id in (from_user_id, to_user_id):
+				if user_id not in users:
+					users[user_id] = self.get_by_id(user_id)
+			if users[from_user_id] is None or users[to_user_id] is None:
+				results[index] = UserNotFoundError()
+			elif from_user_id == to_user_id:
+				results[index] = SelfTransferError()
+			else:
+				valid.append(index)
+
+		applied = []
+		lsn = None
+		locked = [user_id for user_id, user in users.items() if user is not None]
+		# Журнал отмены возвращает балансы, если не удалась запись в журнал предзаписи
+		with self._locks.acquire(*locked), UndoJournal() as journal:
+			balances = self._balances_before(users)
+			if self._read_views.pinned:
+				self._preserve(users.values())
+			for index in valid:
+				from_user_id, to_user_id, amount = transfers[index]
+				from_user = users[from_user_id]
+				to_user = users[to_user_id]
+				# Тот же порядок проверок, что и в transfer
+				if from_user.balance < amount:
+					results[index] = InsufficientFundsError()
+					continue
+				if amount <= 0:
+					results[index] = InvalidAmountError()
+					continue
+				if to_user.balance > MAX_BALANCE - amount:
+					results[index] = BalanceOverflowError()
+					continue
+				journal.set(from_user, "balance", from_user.balance - amount)
+				journal.set(to_user, "balance", to_user.balance + amount)
+				journal.set(from_user, "version", from_user.version + 1)
+				journal.set(to_user, "version", to_user.version + 1)
+				applied.append(transfers[index])
+				results[index] = self._copy(from_user), self._copy(to_user)
+			if applied:
+				if self._wal is not None:
+					lsn = self._wal.append(encode_transfer_batch(applied))
+				self._ledger.extend(applied)
+				self._reindex(balances, users)
+
+		if lsn is not None and wait_durable:
+			self._wal.wait_durable(lsn)
+		return results
+
+	def _build_balance_index(self) -> BalanceIndex:
+		"""
+		Строит индекс балансов по всем пользователям.
+		
+		Изменения приостанавливаются на время построения, после него
+		индекс обновляют сами переводы и создание пользователей.
+		
+		Returns:
+			BalanceIndex: Индекс балансов
+		"""
+		with self._create_lock, self._locks.acquire_all():
+			if self._balance_index is None:
+				users = self._users
+				entries = []
+				for user_id, balance in self._snapshot.balances():
+					# Загруженные из снимка пользователи могли изменить баланс
+					user = users.get(user_id)
+					entries.append((user.balance if user is not None else balance, user_id))
+				entries.extend((users[user_id].balance, user_id) for user_id in self._ids)
+				self._balance_index = BalanceIndex(entries)
+			return self._balance_index
+
+	def stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам.
+		
+		Агрегаты не пересчитываются обходом счетов: первый вызов строит
+		индекс балансов, дальше стоимость вызова не зависит от количества
+		пользователей. Переводы считаются по журналу переводов вместе
+		с учтенными в снимке.
+		
+		Returns:
+			UserStats: Агрегаты
+		"""
+		self._check_wal()
+		index = self._balance_index
+		if index is None:
+			index = self._build_balance_index()
+		snapshot_balance = self._snapshot.total_balance
+		# Количество пользователей и сумма балансов меняются вместе под блокировкой создания
+		with self._create_lock:
+			user_count = len(self._snapshot) + len(self._ids)
+			total_balance = snapshot_balance + self._created_balance
+		return UserStats(
+			user_count=user_count,
+			total_balance=total_balance,
+			min_balance=index.min(),
+			max_balance=index.max(),
+			transfer_count=len(self._ledger),
+			transfer_volume=self._ledger.volume,
+		)
+
+	def top(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+		
+		Пользователи берутся из индекса балансов, поэтому стоимость зависит
+		от n, а не от количества счетов; первый вызов строит индекс.
+		
+		Args:
+			n: Количество пользователей
+			
+		Returns:
+			list[User]: Пользователи по убыванию баланса, равные балансы - по возрастанию id
+		"""
+		index = self._balance_index
+		if index is None:
+			index = self._build_balance_index()
+		return [self.get_by_id(user_id) for user_id in index.top(n)]
+
+	def _build_prefix_index(self) -> PrefixIndex:
+		"""
+		Строит индекс префиксного поиска по всем пользователям.
+		
+		Имена и email не меняются, поэтому переводы не приостанавливаются:
+		блокируется только создание пользователей.
+		
+		Returns:
+			PrefixIndex: Индекс поиска
+		"""
+		with self._create_lock:
+			if self._prefix_index is None:
+				snapshot = self._snapshot
+				users = (snapshot.user(row) for row in range(len(snapshot)))
+				created = (self._users[user_id] for user_id in self._ids)
+				self._prefix_index = PrefixIndex(
+					(user.id, user.name, user.email) for source in (users, created) for user in source
+				)
+			return self._prefix_index
+
+	def search(self, query: str, limit: int, after_id: int | None = None) -> list[User]:
+		"""
+		Находит пользователей, у которых имя или email начинается с запроса.
+		
+		Пользователи берутся из индекса поиска, поэтому стоимость зависит от
+		размера страницы, а не от количества пользователей; первый вызов
+		строит индекс.
+		
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
 			
-			return from_user, to_user
+		Returns:
+			list[User]: Пользователи в порядке совпавшего имени или email, затем id
+		"""
+		index = self._prefix_index
+		if index is None:
+			index = self._build_prefix_index()
+		after = None
+		if after_id is not None:
+			cursor = self.get_by_id(after_id)
+			if cursor is None:
+				return []
+			after = cursor.id, cursor.name, cursor.email
+		return [self.get_by_id(user_id) for user_id in index.search(query, limit, after)]
+
+	def list_transfers(self, user_id: int, limit: int, before_id: int | None = None) -> list[Transfer]:
+		"""
+		Возвращает страницу истории переводов пользователя, от новых к старым.
+		
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
 			
-		except Exception:
-			# При любой ошибке откатываем изменения
-			self._restore_snapshot(snapshot)
-			raise
+		Returns:
+			list[Transfer]: Переводы с id меньше before_id по убыванию id
+			
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		if self.get_by_id(user_id) is None:
+			raise UserNotFoundError()
+		return self._ledger.page(user_id, limit, before_id)
+
+	def checkpoint(self, path: str) -> None:
+		"""
+		Записывает снимок текущего состояния (контрольную точку) в файл.
+		
+		Снимок пишется из закрепленного представления: изменения
+		приостанавливаются только на захват блокировок, файл пишется уже
+		без них. После записи снимка из журнала удаляются учтенные в нем записи.
+		
+		Args:
+			path: Путь к файлу снимка
+		"""
+		with self._create_lock, self._locks.acquire_all():
+			self._check_wal()
+			lsn = self._wal.last_lsn if self._wal is not None else 0
+			next_id = self._next_id
+			new_count = len(self._ids)
+			transfer_count = len(self._ledger)
+			transfer_volume = self._ledger.volume
+			view = self._read_views.pin()
+		
+		try:
+			# В снимок попадают только изменения, уже записанные в журнал на диске
+			if self._wal is not None:
+				self._wal.wait_durable(lsn)
+			users = self._read_rows(view, new_count)
+			write_snapshot(
+				path, users, len(self._snapshot) + new_count, next_id, lsn, transfer_count, transfer_volume
+			)
+		finally:
+			self._read_views.release(view)
+		if self._wal is not None:
+			self._wal.discard_through(lsn)
@@ -0,0 +1,385 @@
+"""
+Журнал предзаписи (write-ahead log) для in-memory репозитория.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Iterator
+
+from app.core.exceptions import WriteAheadLogError
+
+# Заголовок кадра: длина тела, CRC32 тела, LSN (номер записи)
+_FRAME = struct.Struct("<IIQ")
+# Тела записей (после байта типа)
+_CREATE = struct.Struct("<qqII")
+_TRANSFER = struct.Struct("<qqq")
+_COUNT = struct.Struct("<I")
+
+RECORD_CREATE = 1
+RECORD_TRANSFER = 2
+RECORD_TRANSFER_BATCH = 3
+
+
+def encode_create(user_id: int, name: str, email: str, balance: int) -> bytes:
+	"""
+	Кодирует запись о создании пользователя.
+
+	Args:
+		user_id: ID пользователя
+		name: Имя пользователя
+		email: Email пользователя
+		balance: Начальный баланс
+
+	Returns:
+		bytes: Тело записи
+	"""
+	name_bytes = name.encode("utf-8")
+	email_bytes = email.encode("utf-8")
+	return (
+		bytes((RECORD_CREATE,))
+		+ _CREATE.pack(user_id, balance, len(name_bytes), len(email_bytes))
+		+ name_bytes + email_bytes
+	)
+
+
+def encode_transfer(from_user_id: int, to_user_id: int, amount: int) -> bytes:
+	"""
+	Кодирует запись о переводе.
+
+	Args:
+		from_user_id: ID отправителя
+		to_user_id: ID получателя
+		amount: Сумма перевода
+
+	Returns:
+		bytes: Тело записи
+	"""
+	return bytes((RECORD_TRANSFER,)) + _TRANSFER.pack(from_user_id, to_user_id, amount)
+
+
+def encode_transfer_batch(transfers: list) -> bytes:
+	"""
+	Кодирует пакет переводов одной записью (пакет атомарен и при восстановлении).
+
+	Args:
+		transfers: Список переводов (ID отправителя, ID получателя, сумма)
+
+	Returns:
+		bytes: Тело записи
+	"""
+	parts = [bytes((RECORD_TRANSFER_BATCH,)), _COUNT.pack(len(transfers))]
+	parts.extend(_TRANSFER.pack(*transfer) for transfer in transfers)
+	return b"".join(parts)
+
+
+def decode(body: bytes) -> tuple:
+	"""
+	Декодирует тело записи.
+
+	Args:
+		body: Тело записи
+
+	Returns:
+		tuple: (тип записи, данные записи)
+	"""
+	record_type = body[0]
+	if record_type == RECORD_CREATE:
+		user_id, balance, name_len, email_len = _CREATE.unpack_from(body, 1)
+		offset = 1 + _CREATE.size
+		name = body[offset:offset + name_len].decode("utf-8")
+		email = body[offset + name_len:offset + name_len + email_len].decode("utf-8")
+		return record_type, (user_id, name, email, balance)
+	if record_type == RECORD_TRANSFER:
+		return record_type, _TRANSFER.unpack_from(body, 1)
+	if record_type == RECORD_TRANSFER_BATCH:
+		(count,) = _COUNT.unpack_from(body, 1)
+		offset = 1 + _COUNT.size
+		return record_type, [
+			_TRANSFER.unpack_from(body, offset + i * _TRANSFER.size) for i in range(count)
+		]
+	raise WriteAheadLogError(f"unknown WAL record type {record_type}")
+
+
+class WriteAheadLog:
+	"""
+	Журнал предзаписи с групповой фиксацией (group commit).
+
+	Каждая операция добавляет запись в общий буфер и ждет, пока фоновый
+	поток запишет буфер на диск и выполнит fsync. Все записи, накопленные
+	за окно группировки (или до достижения максимального размера пакета),
+	фиксируются одним fsync, поэтому конкурентные писатели делят его
+	стоимость между собой.
+
+	Кадр записи: длина, CRC32 и LSN, затем тело. При открытии журнал
+	читается до первого поврежденного или недописанного кадра, а хвост
+	после него отрезается.
+
+	После ошибки ввода-вывода журнал переходит в состояние отказа:
+	незафиксированный пакет отрезается от файла, а все последующие
+	операции завершаются WriteAheadLogError.
+	"""
+
+	def __init__(self, path: str, batch_window: float = 0.001, max_batch: int = 256) -> None:
+		"""
+		Открывает журнал и запускает поток фиксации.
+
+		Args:
+			path: Путь к файлу журнала
+			batch_window: Окно группировки записей, в секундах
+			max_batch: Количество записей, после которого фиксация начинается без ожидания окна
+		"""
+		self._path = path
+		self._batch_window = batch_window
+		self._max_batch = max_batch
+
+		self._records, valid_size = self._scan(path)
+		self._file = open(path, "ab")
+		self._file.truncate(valid_size)
+		# Размер файла, записанного на диск; хвост после него отрезается при отказе
+		self._durable_size: int = valid_size
+
+		# Файл пишет поток фиксации; _file_lock исключает его одновременную
+		# работу с перезаписью файла в discard_through
+		self._file_lock = threading.Lock()
+		self._lock = threading.Lock()
+		self._flush_needed = threading.Condition(self._lock)
+		self._durable = threading.Condition(self._lock)
+		self._buffer = bytearray()
+		self._pending: int = 0
+		self._first_pending_at: float = 0.0
+		self._next_lsn: int = (self._records[-1][0] + 1) if self._records else 1
+		self._durable_lsn: int = self._next_lsn - 1
+		self._error: Exception | None = None
+		self._closed: bool = False
+
+		self._flusher = threading.Thread(target=self._flush_loop, name="wal-group-commit", daemon=True)
+		self._flusher.start()
+
+	@property
+	def path(self) -> str:
+		"""Путь к файлу журнала."""
+		return self._path
+
+	@property
+	def last_lsn(self) -> int:
+		"""LSN последней добавленной записи."""
+		with self._lock:
+			return self._next_lsn - 1
+
+	@property
+	def failed(self) -> bool:
+		"""True, если журнал в состоянии отказа после ошибки ввода-вывода."""
+		return self._error is not None
+
+	def continue_after(self, lsn: int) -> None:
+		"""
+		Продолжает нумерацию записей после заданного LSN.
+
+		После контрольной точки журнал может быть пуст, и без этого
+		нумерация началась бы с 1: новые записи получили бы LSN, уже
+		учтенные в снимке, и пропускались бы при восстановлении.
+
+		Args:
+			lsn: LSN последней записи, учтенной в снимке
+		"""
+		with self._lock:
+			if self._next_lsn <= lsn:
+				self._next_lsn = lsn + 1
+				self._durable_lsn = lsn
+
+	@staticmethod
+	def _frames(data: bytes) -> Iterator[tuple[int, int, bytes]]:
+		"""
+		Перебирает корректные кадры журнала до первого поврежденного.
+
+		Args:
+			data: Содержимое файла журнала
+
+		Returns:
+			Iterator[tuple[int, int, bytes]]: (LSN, смещение конца кадра, тело)
+		"""
+		offset = 0
+		while offset + _FRAME.size <= len(data):
+			length, crc, lsn = _FRAME.unpack_from(data, offset)
+			start = offset + _FRAME.size
+			body = data[start:start + length]
+			if len(body) < length or zlib.crc32(body) != crc:
+				return
+			offset = start + length
+			yield lsn, offset, body
+
+	@staticmethod
+	def _scan(path: str) -> tuple[list, int]:
+		"""
+		Читает корректные записи журнала.
+
+		Args:
+			path: Путь к файлу журнала
+
+		Returns:
+			tuple[list, int]: Записи (LSN, тип, данные) и размер корректной части файла
+		"""
+		if not os.path.exists(path):
+			return [], 0
+		with open(path, "rb") as file:
+			data = file.read()
+
+		records = []
+		offset = 0
+		for lsn, offset, body in WriteAheadLog._frames(data):
+			record_type, payload = decode(body)
+			records.append((lsn, record_type, payload))
+		return records, offset
+
+	def records(self) -> Iterator[tuple]:
+		"""
+		Возвращает записи, прочитанные при открытии журнала (однократно).
+
+		Returns:
+			Iterator[tuple]: Записи (LSN, тип, данные) в порядке добавления
+		"""
+		records, self._records = self._records, []
+		return iter(records)
+
+	def append(self, body: bytes) -> int:
+		"""
+		Добавляет запись в буфер журнала.
+
+		Вызывается под блокировками изменяемых данных, чтобы порядок записей
+		совпадал с порядком применения конфликтующих операций. Ожидание
+		fsync выполняется отдельно, через wait_durable, уже без блокировок.
+
+		Args:
+			body: Тело записи
+
+		Returns:
+			int: LSN записи
+
+		Raises:
+			WriteAheadLogError: Если журнал в состоянии отказа или закрыт
+		"""
+		with self._lock:
+			if self._error is not None:
+				raise WriteAheadLogError("write-ahead log failed") from self._error
+			if self._closed:
+				raise WriteAheadLogError("write-ahead log is closed")
+			lsn = self._next_lsn
+			self._next_lsn += 1
+			self._buffer += _FRAME.pack(len(body), zlib.crc32(body), lsn)
+			self._buffer += body
+			if not self._pending:
+				self._first_pending_at = time.monotonic()
+			self._pending += 1
+			self._flush_needed.notify()
+			return lsn
+
+	def wait_durable(self, lsn: int) -> None:
+		"""
+		Ждет, пока запись с указанным LSN будет записана на диск.
+
+		Args:
+			lsn: LSN записи
+
+		Raises:
+			WriteAheadLogError: Если фиксация завершилась ошибкой
+		"""
+		with self._lock:
+			while self._durable_lsn < lsn:
+				if self._error is not None:
+					raise WriteAheadLogError("write-ahead log failed") from self._error
+				self._durable.wait()
+
+	def _flush_loop(self) -> None:
+		"""
+		Цикл потока фиксации: собирает пакет записей и выполняет один fsync.
+		"""
+		while True:
+			with self._lock:
+				while not self._pending and not self._closed:
+					self._flush_needed.wait()
+				if not self._pending and self._closed:
+					return
+				# Ждем окно группировки, если пакет еще не набран
+				while self._pending < self._max_batch and not self._closed:
+					remaining = self._first_pending_at + self._batch_window - time.monotonic()
+					if remaining <= 0:
+						break
+					self._flush_needed.wait(remaining)
+				data = bytes(self._buffer)
+				last_lsn = self._next_lsn - 1
+				self._buffer.clear()
+				self._pending = 0
+
+			try:
+				with self._file_lock:
+					self._file.write(data)
+					self._file.flush()
+					os.fsync(self._file.fileno())
+					self._durable_size += len(data)
+			except OSError as exc:
+				self._discard_failed_tail()
+				with self._lock:
+					self._error = exc
+					self._durable.notify_all()
+				return
+
+			with self._lock:
+				self._durable_lsn = last_lsn
+				self._durable.notify_all()
+
+	def _discard_failed_tail(self) -> None:
+		"""
+		Отрезает от файла пакет, фиксация которого не удалась.
+
+		Записи пакета могли остаться в файле, хотя их писатели получили
+		ошибку: без этого они применились бы при следующем запуске.
+		Отрезание - лучшее, что можно сделать: ошибка при нем игнорируется.
+		"""
+		with self._file_lock:
+			try:
+				self._file.truncate(self._durable_size)
+				os.fsync(self._file.fileno())
+			except (OSError, ValueError):
+				pass
+
+	def discard_through(self, lsn: int) -> None:
+		"""
+		Удаляет из файла записи с LSN не больше заданного.
+
+		Вызывается после записи снимка, уже содержащего эти изменения.
+		Новые записи тем временем продолжают копиться в буфере.
+
+		Args:
+			lsn: LSN последней записи, учтенной в снимке
+		"""
+		with self._file_lock:
+			with open(self._path, "rb") as file:
+				data = file.read()
+			start = 0
+			for frame_lsn, end, _ in self._frames(data):
+				if frame_lsn > lsn:
+					break
+				start = end
+
+			temporary = f"{self._path}.tmp"
+			with open(temporary, "wb") as file:
+				file.write(data[start:])
+				file.flush()
+				os.fsync(file.fileno())
+			os.replace(temporary, self._path)
+			self._file.close()
+			self._file = open(self._path, "ab")
+			self._durable_size = len(data) - start
+
+	def close(self) -> None:
+		"""
+		Фиксирует оставшиеся записи, останавливает поток и закрывает файл.
+		"""
+		with self._lock:
+			self._closed = True
+			self._flush_needed.notify()
+		self._flusher.join()
+		self._file.close()
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class UserStatsRead(BaseModel):
+	"""
+	Схема агрегатов по пользователям и переводам.
+	
+	Используется для проверки сохранения денег без выгрузки всех пользователей.
+	"""
+	
+	user_count: int
+	total_balance: int  # меняется только созданием пользователей: переводы сохраняют сумму
+	min_balance: int | None = None
+	max_balance: int | None = None
+	mean_balance: float | None = None
+	transfer_count: int
+	transfer_volume: int
@@ -1,5 +1,9 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
+from app.models.user import MAX_BALANCE
+
 
 class TransferCreate(BaseModel):
 	"""
@@ -8,9 +12,10 @@ class TransferCreate(BaseModel):
 	Используется для валидации входящих данных при переводе.
 	"""
 	
-	from_user_id: int = Field(gt=0, description="ID отправителя")
-	to_user_id: int = Field(gt=0, description="ID получателя")
-	amount: int = Field(gt=0, description="Сумма перевода")
+	# Хранилища держат id и суммы в int64
+	from_user_id: int = Field(gt=0, le=2**63 - 1, description="ID отправителя")
+	to_user_id: int = Field(gt=0, le=2**63 - 1, description="ID получателя")
+	amount: int = Field(gt=0, le=MAX_BALANCE, description="Сумма перевода")
 
 
 class TransferResponse(BaseModel):
@@ -25,4 +30,42 @@ class TransferResponse(BaseModel):
 	amount: int
 	from_user_balance: int
 	to_user_balance: int
+	from_user_version: int | None = None  # версии после перевода; в пакетном ответе не передаются
+	to_user_version: int | None = None
 	message: str = "Перевод выполнен успешно"
+
+
+class TransferBatchResponse(BaseModel):
+	"""
+	Схема для ответа на пакет переводов.
+	
+	Содержит результат каждого перевода в порядке их передачи.
+	"""
+	
+	results: list[TransferResponse]
+	message: str = "Пакет переводов выполнен успешно"
+
+
+class TransferRead(BaseModel):
+	"""
+	Схема для чтения записи истории переводов.
+	
+	Используется для возврата выполненных переводов пользователя.
+	"""
+	
+	id: int
+	from_user_id: int
+	to_user_id: int
+	amount: int
+	created_at: datetime
+
+
+class TransferPage(BaseModel):
+	"""
+	Схема для страницы истории переводов.
+	
+	Переводы идут от новых к старым.
+	"""
+	
+	items: list[TransferRead]
+	next_cursor: int | None = None  # передается как before_id для следующей (более старой) страницы
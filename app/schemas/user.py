@@ -1,5 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
 
+from app.models.user import MAX_BALANCE
+
 
 class UserCreate(BaseModel):
 	"""
@@ -10,7 +12,8 @@ class UserCreate(BaseModel):
 	
 	name: str = Field(min_length=1, max_length=255)
 	email: EmailStr
-	balance: int | None = None  # если не передан — будет стартовое значение
+	# Если не передан — будет стартовое значение
+	balance: int | None = Field(default=None, ge=0, le=MAX_BALANCE)
 
 
 class UserRead(BaseModel):
@@ -24,3 +27,38 @@ class UserRead(BaseModel):
 	name: str
 	email: EmailStr
 	balance: int
+	version: int = 0  # увеличивается при каждом изменении баланса; передается в ETag
+
+
+class UserPage(BaseModel):
+	"""
+	Схема для страницы списка пользователей.
+	
+	Используется для постраничной выдачи пользователей по курсору.
+	"""
+	
+	items: list[UserRead]
+	next_cursor: int | None = None  # передается как after_id для следующей страницы
+
+
+class UserBulkError(BaseModel):
+	"""
+	Схема ошибки строки массового импорта.
+	"""
+	
+	line: int  # номер строки NDJSON, с 1
+	detail: str
+
+
+class UserBulkResult(BaseModel):
+	"""
+	Схема итога массового импорта пользователей.
+	
+	Ошибки возвращаются не больше чем для USERS_BULK_MAX_ERRORS строк;
+	errors_truncated сообщает, что ошибочных строк было больше.
+	"""
+	
+	created: int
+	failed: int
+	errors: list[UserBulkError]
+	errors_truncated: bool = False
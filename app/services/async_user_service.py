@@ -0,0 +1,215 @@
+from typing import Iterator
+
+from pydantic import EmailStr
+
+from app.core.config import settings
+from app.core.exceptions import UserNotFoundError
+from app.repositories.base import AsyncUserRepository
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
+from app.models.user import User
+
+
+class AsyncUserService:
+	"""
+	Асинхронный сервис для работы с пользователями.
+	
+	Повторяет UserService для асинхронных репозиториев и эндпоинтов.
+	"""
+	
+	def __init__(self, repo: AsyncUserRepository) -> None:
+		"""
+		Инициализирует сервис с асинхронным репозиторием пользователей.
+		
+		Args:
+			repo: Асинхронный репозиторий для работы с данными
+		"""
+		self.repo = repo
+
+	async def create_user(self, name: str, email: EmailStr, balance: int | None = None) -> User:
+		"""
+		Создает нового пользователя с валидацией данных.
+		
+		Args:
+			name: Имя пользователя
+			email: Email пользователя (валидируется Pydantic)
+			balance: Начальный баланс (если не указан, берется из настроек)
+			
+		Returns:
+			User: Созданный пользователь
+			
+		Raises:
+			ValueError: Если email уже используется
+		"""
+		bal = settings.START_BALANCE if balance is None else balance
+		return await self.repo.create(name=name, email=str(email), balance=bal)
+
+	async def create_users(self, users: list[tuple[str, str, int | None]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей, пропуская занятые email.
+		
+		Args:
+			users: Пользователи (имя, email, баланс); баланс None берется из настроек
+			
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже используется
+		"""
+		return await self.repo.create_many([
+			(name, email, settings.START_BALANCE if balance is None else balance)
+			for name, email, balance in users
+		])
+
+	async def list_users(self) -> list:
+		"""
+		Возвращает список всех пользователей.
+		
+		Returns:
+			list: Список пользователей
+		"""
+		return await self.repo.list()
+
+	async def export_users(self) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+		
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		return await self.repo.export()
+
+	async def get_user(self, user_id: int) -> User:
+		"""
+		Возвращает пользователя по ID.
+		
+		Args:
+			user_id: ID пользователя
+			
+		Returns:
+			User: Пользователь с текущей версией
+			
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		user = await self.repo.get_by_id(user_id)
+		if user is None:
+			raise UserNotFoundError()
+		return user
+
+	async def list_users_page(self, limit: int, after_id: int | None = None) -> tuple[list[User], int | None]:
+		"""
+		Возвращает страницу пользователей и курсор следующей страницы.
+		
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+			
+		Returns:
+			tuple[list[User], int | None]: Пользователи и курсор (None, если страница последняя)
+		"""
+		# Запрашиваем на одного больше, чтобы узнать, есть ли следующая страница
+		users = await self.repo.list_page(limit + 1, after_id)
+		if len(users) > limit:
+			users = users[:limit]
+			return users, users[-1].id
+		return users, None
+
+	async def search_users(
+		self, query: str, limit: int, after_id: int | None = None
+	) -> tuple[list[User], int | None]:
+		"""
+		Возвращает страницу пользователей, у которых имя или email начинается с запроса.
+		
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
+			
+		Returns:
+			tuple[list[User], int | None]: Пользователи и курсор (None, если страница последняя)
+		"""
+		# Запрашиваем на одного больше, чтобы узнать, есть ли следующая страница
+		users = await self.repo.search(query, limit + 1, after_id)
+		if len(users) > limit:
+			users = users[:limit]
+			return users, users[-1].id
+		return users, None
+
+	async def top_users(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+		
+		Args:
+			n: Количество пользователей
+			
+		Returns:
+			list[User]: Пользователи по убыванию баланса, равные балансы - по возрастанию id
+		"""
+		return await self.repo.top(n)
+
+	async def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
+		"""
+		Переводит деньги между пользователями.
+		
+		Args:
+			from_user_id: ID отправителя
+			to_user_id: ID получателя
+			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя (If-Match); None - без проверки
+			
+		Returns:
+			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
+			
+		Raises:
+			ValueError: Если перевод невозможен
+		"""
+		return await self.repo.transfer(from_user_id, to_user_id, amount, expected_version)
+
+	async def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов.
+		
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+			
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+			
+		Raises:
+			ValueError: Если хотя бы один перевод невозможен (пакет не применяется)
+		"""
+		return await self.repo.transfer_batch(transfers)
+
+	async def list_user_transfers(
+		self, user_id: int, limit: int, before_id: int | None = None
+	) -> tuple[list[Transfer], int | None]:
+		"""
+		Возвращает страницу истории переводов пользователя и курсор следующей страницы.
+		
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
+			
+		Returns:
+			tuple[list[Transfer], int | None]: Переводы от новых к старым и курсор (None, если страница последняя)
+			
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		# Запрашиваем на одного больше, чтобы узнать, есть ли следующая страница
+		transfers = await self.repo.list_transfers(user_id, limit + 1, before_id)
+		if len(transfers) > limit:
+			transfers = transfers[:limit]
+			return transfers, transfers[-1].id
+		return transfers, None
+
+	async def get_stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам.
+		
+		Returns:
+			UserStats: Количество пользователей, сумма и крайние балансы, количество и сумма переводов
+		"""
+		return await self.repo.stats()
@@ -0,0 +1,123 @@
+"""
+Потоковый импорт пользователей из NDJSON.
+"""
+
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Awaitable, Callable
+
+from pydantic import ValidationError
+
+from app.core.exceptions import RepositoryFullError
+from app.core.ndjson import iter_lines
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+
+@dataclass(slots=True)
+class BulkImportReport:
+	"""Итог импорта: количество созданных и ошибочных строк, ошибки по строкам."""
+
+	created: int = 0
+	failed: int = 0
+	# Ошибки {"line": номер строки, "detail": описание}, не больше max_errors
+	errors: list = field(default_factory=list)
+	errors_truncated: bool = False
+	max_errors: int = 1000
+
+	def fail(self, line: int, detail: str) -> None:
+		"""
+		Учитывает ошибочную строку.
+
+		Args:
+			line: Номер строки
+			detail: Описание ошибки
+		"""
+		self.failed += 1
+		if len(self.errors) < self.max_errors:
+			self.errors.append({"line": line, "detail": detail})
+		else:
+			self.errors_truncated = True
+
+
+def _describe(exc: ValidationError) -> str:
+	"""Описание ошибки валидации строки одной строкой текста."""
+	return "; ".join(
+		f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+		for error in exc.errors()
+	)
+
+
+async def _flush(
+	batch: list[tuple[int, tuple[str, str, int | None]]],
+	create_batch: Callable[[list], Awaitable[list[User | None]]],
+	report: BulkImportReport,
+) -> None:
+	"""
+	Создает пакет пользователей и учитывает результат по строкам.
+
+	Args:
+		batch: Номера строк и пользователи (имя, email, баланс)
+		create_batch: Создание пакета в хранилище
+		report: Итог импорта
+	"""
+	try:
+		results = await create_batch([row for _, row in batch])
+	except RepositoryFullError:
+		for line, _ in batch:
+			report.fail(line, "Хранилище пользователей заполнено")
+		return
+	for (line, _), user in zip(batch, results):
+		if user is None:
+			report.fail(line, "Email уже используется")
+		else:
+			report.created += 1
+
+
+async def import_users(
+	chunks: AsyncIterable[bytes],
+	create_batch: Callable[[list], Awaitable[list[User | None]]],
+	batch_size: int,
+	max_line_bytes: int,
+	max_errors: int,
+) -> BulkImportReport:
+	"""
+	Импортирует пользователей из потока NDJSON пакетами.
+
+	Строки читаются и валидируются по UserCreate по мере поступления тела;
+	в памяти одновременно не больше одного пакета и max_errors ошибок,
+	поэтому потребление памяти не зависит от размера загрузки. Ошибочные
+	строки (невалидные, с занятым email) учитываются в итоге и не прерывают
+	импорт. Пустые строки пропускаются.
+
+	Args:
+		chunks: Куски тела запроса
+		create_batch: Создание пакета пользователей (имя, email, баланс) в хранилище
+		batch_size: Количество строк в пакете
+		max_line_bytes: Максимальная длина строки, в байтах
+		max_errors: Максимальное количество ошибок в итоге
+
+	Returns:
+		BulkImportReport: Итог импорта
+	"""
+	report = BulkImportReport(max_errors=max_errors)
+	batch = []
+	async for line, content in iter_lines(chunks, max_line_bytes):
+		if content is None:
+			report.fail(line, f"Строка длиннее {max_line_bytes} байт")
+			continue
+		if not content.strip():
+			continue
+		try:
+			payload = UserCreate.model_validate_json(content)
+		except ValidationError as exc:
+			report.fail(line, _describe(exc))
+			continue
+		batch.append((line, (payload.name, str(payload.email), payload.balance)))
+		if len(batch) >= batch_size:
+			await _flush(batch, create_batch, report)
+			batch = []
+	if batch:
+		await _flush(batch, create_batch, report)
+	# Ошибки валидации учитываются сразу, а занятые email - при создании пакета
+	report.errors.sort(key=lambda error: error["line"])
+	return report
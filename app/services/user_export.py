@@ -0,0 +1,60 @@
+"""
+Потоковая выгрузка пользователей в NDJSON или CSV.
+"""
+
+import csv
+import io
+from itertools import islice
+from typing import Iterable, Iterator
+
+import orjson
+
+from app.core.ndjson import NDJSON_MEDIA_TYPE
+from app.models.user import User
+
+
+# Форматы выгрузки: медиатип и расширение файла
+EXPORT_FORMATS = {
+	"ndjson": (NDJSON_MEDIA_TYPE, "ndjson"),
+	"csv": ("text/csv; charset=utf-8", "csv"),
+}
+CSV_HEADER = ("id", "name", "email", "balance", "version")
+
+
+def _ndjson_chunk(users: list[User]) -> bytes:
+	"""Кодирует пользователей в строки NDJSON."""
+	# orjson сериализует dataclass User напрямую
+	return b"".join([orjson.dumps(user) + b"\n" for user in users])
+
+
+def _csv_chunk(users: list[User]) -> bytes:
+	"""Кодирует пользователей в строки CSV."""
+	buffer = io.StringIO()
+	csv.writer(buffer, lineterminator="\n").writerows(
+		(user.id, user.name, user.email, user.balance, user.version) for user in users
+	)
+	return buffer.getvalue().encode("utf-8")
+
+
+def encode_users(users: Iterable[User], export_format: str, chunk_rows: int) -> Iterator[bytes]:
+	"""
+	Кодирует пользователей в куски тела ответа.
+
+	В памяти одновременно не больше chunk_rows пользователей, поэтому
+	выгрузка любого размера занимает постоянную память.
+
+	Args:
+		users: Пользователи
+		export_format: Формат из EXPORT_FORMATS
+		chunk_rows: Количество пользователей в одном куске
+
+	Yields:
+		bytes: Кусок тела ответа; для CSV первым идет заголовок
+	"""
+	encode = _ndjson_chunk if export_format == "ndjson" else _csv_chunk
+	if export_format == "csv":
+		# Заголовок отдается сразу, до чтения первого куска
+		yield (",".join(CSV_HEADER) + "\n").encode("utf-8")
+	users = iter(users)
+	while chunk := list(islice(users, chunk_rows)):
+		yield encode(chunk)
@@ -1,8 +1,14 @@
+from typing import Iterator
+
 from pydantic import EmailStr
 
 from app.core.config import settings
-from app.repositories.user_repository import InMemoryUserRepository
+from app.core.exceptions import UserNotFoundError
+from app.repositories.base import UserRepository
+from app.models.stats import UserStats
+from app.models.transfer import Transfer
 from app.models.user import User
+from app.services.transfer_engine import TransferEngine
 
 
 class UserService:
@@ -13,14 +19,16 @@ class UserService:
 	используя репозиторий для доступа к данным.
 	"""
 	
-	def __init__(self, repo: InMemoryUserRepository) -> None:
+	def __init__(self, repo: UserRepository, transfer_engine: TransferEngine | None = None) -> None:
 		"""
 		Инициализирует сервис с репозиторием пользователей.
 		
 		Args:
 			repo: Репозиторий для работы с данными
+			transfer_engine: Очередь переводов с потоком-писателем; None - переводы напрямую через репозиторий
 		"""
 		self.repo = repo
+		self.transfer_engine = transfer_engine
 
 	def create_user(self, name: str, email: EmailStr, balance: int | None = None) -> User:
 		"""
@@ -40,6 +48,21 @@ class UserService:
 		bal = settings.START_BALANCE if balance is None else balance
 		return self.repo.create(name=name, email=str(email), balance=bal)
 
+	def create_users(self, users: list[tuple[str, str, int | None]]) -> list[User | None]:
+		"""
+		Создает пакет пользователей, пропуская занятые email.
+		
+		Args:
+			users: Пользователи (имя, email, баланс); баланс None берется из настроек
+			
+		Returns:
+			list[User | None]: Созданный пользователь или None, если email уже используется
+		"""
+		return self.repo.create_many([
+			(name, email, settings.START_BALANCE if balance is None else balance)
+			for name, email, balance in users
+		])
+
 	def list_users(self) -> list:
 		"""
 		Возвращает список всех пользователей.
@@ -49,7 +72,87 @@ class UserService:
 		"""
 		return self.repo.list()
 
-	def transfer(self, from_user_id: int, to_user_id: int, amount: int) -> tuple[User, User]:
+	def export_users(self) -> Iterator[User]:
+		"""
+		Возвращает итератор по всем пользователям в состоянии на момент вызова.
+		
+		Returns:
+			Iterator[User]: Пользователи в порядке возрастания id
+		"""
+		return self.repo.export()
+
+	def get_user(self, user_id: int) -> User:
+		"""
+		Возвращает пользователя по ID.
+		
+		Args:
+			user_id: ID пользователя
+			
+		Returns:
+			User: Пользователь с текущей версией
+			
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		user = self.repo.get_by_id(user_id)
+		if user is None:
+			raise UserNotFoundError()
+		return user
+
+	def list_users_page(self, limit: int, after_id: int | None = None) -> tuple[list[User], int | None]:
+		"""
+		Возвращает страницу пользователей и курсор следующей страницы.
+		
+		Args:
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id, после которого начинается страница
+			
+		Returns:
+			tuple[list[User], int | None]: Пользователи и курсор (None, если страница последняя)
+		"""
+		# Запрашиваем на одного больше, чтобы узнать, есть ли следующая страница
+		users = self.repo.list_page(limit + 1, after_id)
+		if len(users) > limit:
+			users = users[:limit]
+			return users, users[-1].id
+		return users, None
+
+	def search_users(
+		self, query: str, limit: int, after_id: int | None = None
+	) -> tuple[list[User], int | None]:
+		"""
+		Возвращает страницу пользователей, у которых имя или email начинается с запроса.
+		
+		Args:
+			query: Начало имени или email (регистр не важен)
+			limit: Максимальное количество пользователей на странице
+			after_id: Курсор - id последнего пользователя предыдущей страницы
+			
+		Returns:
+			tuple[list[User], int | None]: Пользователи и курсор (None, если страница последняя)
+		"""
+		# Запрашиваем на одного больше, чтобы узнать, есть ли следующая страница
+		users = self.repo.search(query, limit + 1, after_id)
+		if len(users) > limit:
+			users = users[:limit]
+			return users, users[-1].id
+		return users, None
+
+	def top_users(self, n: int) -> list[User]:
+		"""
+		Возвращает n пользователей с наибольшими балансами.
+		
+		Args:
+			n: Количество пользователей
+			
+		Returns:
+			list[User]: Пользователи по убыванию баланса, равные балансы - по возрастанию id
+		"""
+		return self.repo.top(n)
+
+	def transfer(
+		self, from_user_id: int, to_user_id: int, amount: int, expected_version: int | None = None
+	) -> tuple[User, User]:
 		"""
 		Переводит деньги между пользователями.
 		
@@ -57,6 +160,7 @@ class UserService:
 			from_user_id: ID отправителя
 			to_user_id: ID получателя
 			amount: Сумма перевода
+			expected_version: Ожидаемая версия отправителя (If-Match); None - без проверки
 			
 		Returns:
 			tuple[User, User]: Кортеж (отправитель, получатель) с обновленными балансами
@@ -64,4 +168,55 @@ class UserService:
 		Raises:
 			ValueError: Если перевод невозможен
 		"""
-		return self.repo.transfer(from_user_id, to_user_id, amount)
+		# Условный перевод выполняется напрямую: очередь проверяет только балансы
+		if self.transfer_engine is not None and expected_version is None:
+			return self.transfer_engine.transfer(from_user_id, to_user_id, amount)
+		return self.repo.transfer(from_user_id, to_user_id, amount, expected_version)
+
+	def transfer_batch(self, transfers: list[tuple[int, int, int]]) -> list[tuple[int, int]]:
+		"""
+		Атомарно выполняет пакет переводов.
+		
+		Args:
+			transfers: Список переводов (ID отправителя, ID получателя, сумма)
+			
+		Returns:
+			list[tuple[int, int]]: Балансы (отправителя, получателя) после каждого перевода
+			
+		Raises:
+			ValueError: Если хотя бы один перевод невозможен (пакет не применяется)
+		"""
+		return self.repo.transfer_batch(transfers)
+
+	def list_user_transfers(
+		self, user_id: int, limit: int, before_id: int | None = None
+	) -> tuple[list[Transfer], int | None]:
+		"""
+		Возвращает страницу истории переводов пользователя и курсор следующей страницы.
+		
+		Args:
+			user_id: ID пользователя
+			limit: Максимальное количество переводов на странице
+			before_id: Курсор - id перевода, до которого начинается страница
+			
+		Returns:
+			tuple[list[Transfer], int | None]: Переводы от новых к старым и курсор (None, если страница последняя)
+			
+		Raises:
+			UserNotFoundError: Если пользователь не найден
+		"""
+		# Запрашиваем на одного больше, чтобы узнать, есть ли следующая страница
+		transfers = self.repo.list_transfers(user_id, limit + 1, before_id)
+		if len(transfers) > limit:
+			transfers = transfers[:limit]
+			return transfers, transfers[-1].id
+		return transfers, None
+
+	def get_stats(self) -> UserStats:
+		"""
+		Возвращает агрегаты по пользователям и переводам.
+		
+		Returns:
+			UserStats: Количество пользователей, сумма и крайние балансы, количество и сумма переводов
+		"""
+		return self.repo.stats()
@@ -0,0 +1,83 @@
+"""
+Стресс-бенчмарк параллельных переводов с блокировками по полосам.
+
+Каждый поток переводит деньги между счетами своей группы, поэтому
+потоки не конкурируют за одни и те же блокировки. Печатает пропускную
+способность в зависимости от числа потоков для пула из 1024 полос и,
+для сравнения, для одной глобальной блокировки. Проверяет, что общая
+сумма денег сохранилась.
+
+На сборках CPython с GIL потоки все равно исполняют Python-код по очереди,
+поэтому рост пропускной способности с числом потоков виден только на
+free-threaded сборках (3.13t+); с GIL бенчмарк показывает, что полосы
+не добавляют конкуренции за блокировки.
+
+Запуск:
+	python -m benchmarks.bench_concurrent_transfers
+"""
+
+import random
+import threading
+import time
+
+from app.core.exceptions import InsufficientFundsError
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+THREADS = (1, 2, 4, 8, 16)
+ACCOUNTS_PER_THREAD = 64
+TRANSFERS_PER_THREAD = 50_000
+
+
+def _run(threads: int, stripes: int) -> float:
+	"""
+	Выполняет переводы в заданном количестве потоков.
+
+	Args:
+		threads: Количество потоков
+		stripes: Количество полос в пуле блокировок
+
+	Returns:
+		float: Пропускная способность, переводов в секунду
+	"""
+	repo = InMemoryUserRepository(lock_stripes=stripes)
+	groups = []
+	for t in range(threads):
+		group = [
+			repo.create(f"user{t}-{i}", f"user{t}-{i}@example.com", 10_000).id
+			for i in range(ACCOUNTS_PER_THREAD)
+		]
+		groups.append(group)
+	total_before = sum(user.balance for user in repo.list())
+
+	def worker(group: list, seed: int) -> None:
+		rng = random.Random(seed)
+		pairs = [rng.sample(group, 2) for _ in range(TRANSFERS_PER_THREAD)]
+		for from_id, to_id in pairs:
+			try:
+				repo.transfer(from_id, to_id, 1)
+			except InsufficientFundsError:
+				pass
+
+	workers = [threading.Thread(target=worker, args=(group, i)) for i, group in enumerate(groups)]
+	start = time.perf_counter()
+	for thread in workers:
+		thread.start()
+	for thread in workers:
+		thread.join()
+	elapsed = time.perf_counter() - start
+
+	total_after = sum(user.balance for user in repo.list())
+	assert total_before == total_after, "Общая сумма изменилась"
+	return threads * TRANSFERS_PER_THREAD / elapsed
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	print(f"{'threads':>8} {'striped, tr/s':>14} {'global lock, tr/s':>18}")
+	for threads in THREADS:
+		print(f"{threads:>8} {_run(threads, 1024):>14.0f} {_run(threads, 1):>18.0f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,52 @@
+"""
+Бенчмарк журнала переводов.
+
+Показывает долю записи в журнал в задержке перевода и время чтения
+страницы истории пользователя при росте журнала: страница читается
+за время, не зависящее от общего количества переводов.
+
+Запуск:
+	python -m benchmarks.bench_ledger
+"""
+
+import time
+
+from app.repositories.ledger import TransferLedger
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+SIZES = (10_000, 100_000, 1_000_000)
+USERS = 1_000
+PAGE_SIZE = 50
+PAGES = 1_000
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	repo = InMemoryUserRepository()
+	accounts = [repo.create(f"user{i}", f"user{i}@example.com", 10**12).id for i in range(USERS)]
+	count = 100_000
+	start = time.perf_counter()
+	for i in range(count):
+		repo.transfer(accounts[i % USERS], accounts[(i * 7 + 1) % USERS], 1)
+	transfer = (time.perf_counter() - start) / count
+
+	ledger = TransferLedger()
+	start = time.perf_counter()
+	for i in range(count):
+		ledger.append(accounts[i % USERS], accounts[(i * 7 + 1) % USERS], 1)
+	append = (time.perf_counter() - start) / count
+	print(f"transfer: {transfer * 1e6:.2f} us, ledger append: {append * 1e6:.2f} us ({append / transfer:.0%})")
+
+	print(f"{'transfers':>10} {'page, us':>9}")
+	for size in SIZES:
+		ledger = TransferLedger()
+		ledger.extend([(i % USERS + 1, (i * 7 + 1) % USERS + 1, 1) for i in range(size)])
+		start = time.perf_counter()
+		for i in range(PAGES):
+			ledger.page(i % USERS + 1, PAGE_SIZE)
+		print(f"{size:>10} {(time.perf_counter() - start) / PAGES * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+	main()
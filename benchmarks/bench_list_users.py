@@ -0,0 +1,96 @@
+"""
+Бенчмарк сериализации списка пользователей.
+
+Сравнивает прежний путь ответа (UserRead.model_validate для каждого
+пользователя, повторная валидация по response_model, затем сериализация)
+с прямой сериализацией dataclass User через orjson
+(DataclassJSONResponse).
+
+Запуск:
+	python -m benchmarks.bench_list_users
+"""
+
+import time
+
+from pydantic import TypeAdapter
+
+from app.core.responses import DataclassJSONResponse
+from app.repositories.user_repository import InMemoryUserRepository
+from app.schemas.user import UserRead
+
+
+SIZES = (10_000, 100_000)
+ROUNDS = 5
+
+_adapter = TypeAdapter(list[UserRead])
+
+
+def _validated_path(users: list) -> bytes:
+	"""
+	Прежний путь: модель на каждого пользователя и повторная валидация ответа.
+
+	Args:
+		users: Пользователи из репозитория
+
+	Returns:
+		bytes: Тело ответа
+	"""
+	models = [
+		UserRead.model_validate({"id": u.id, "name": u.name, "email": u.email, "balance": u.balance})
+		for u in users
+	]
+	validated = _adapter.validate_python(models)
+	return _adapter.dump_json(validated)
+
+
+def _direct_path(users: list) -> bytes:
+	"""
+	Новый путь: dataclass напрямую в orjson.
+
+	Args:
+		users: Пользователи из репозитория
+
+	Returns:
+		bytes: Тело ответа
+	"""
+	return DataclassJSONResponse(users).body
+
+
+def _throughput(func, users: list) -> float:
+	"""
+	Измеряет пропускную способность сериализации.
+
+	Args:
+		func: Функция сериализации
+		users: Пользователи
+
+	Returns:
+		float: Пользователей в секунду (лучший из ROUNDS прогонов)
+	"""
+	best = float("inf")
+	for _ in range(ROUNDS):
+		start = time.perf_counter()
+		func(users)
+		best = min(best, time.perf_counter() - start)
+	return len(users) / best
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	print(f"{'users':>8} {'before, users/s':>16} {'after, users/s':>15} {'speedup':>8}")
+	for size in SIZES:
+		repo = InMemoryUserRepository()
+		for i in range(size - len(repo.list())):
+			repo.create(f"user{i}", f"user{i}@example.com", i)
+		users = repo.list()
+
+		# Оба пути должны давать одинаковый JSON
+		assert _validated_path(users[:10]).replace(b" ", b"") == _direct_path(users[:10])
+
+		before = _throughput(_validated_path, users)
+		after = _throughput(_direct_path, users)
+		print(f"{size:>8} {before:>16.0f} {after:>15.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,91 @@
+"""
+Бенчмарк потребления памяти репозиториями пользователей.
+
+Сравнивает количество байт на пользователя у InMemoryUserRepository
+и ColumnarUserRepository. Каждое измерение выполняется в отдельном
+процессе по приросту RSS после заполнения репозитория.
+
+Запуск:
+	python -m benchmarks.bench_memory
+	python -m benchmarks.bench_memory --sizes 1000000 10000000 --backends columnar
+
+InMemoryUserRepository на 10^7 пользователей требует нескольких гигабайт
+памяти, поэтому на небольших машинах его стоит запускать только на 10^6.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+BACKENDS = {
+	"memory": InMemoryUserRepository,
+	"columnar": ColumnarUserRepository,
+}
+
+
+def _rss_bytes() -> int:
+	"""
+	Возвращает текущий RSS процесса.
+
+	Returns:
+		int: RSS в байтах (на системах без /proc - пиковый RSS)
+	"""
+	try:
+		with open("/proc/self/statm") as statm:
+			return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except OSError:
+		# ru_maxrss в Linux в килобайтах, в macOS - в байтах
+		rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _measure(backend: str, size: int) -> float:
+	"""
+	Заполняет репозиторий и измеряет прирост памяти.
+
+	Args:
+		backend: Название репозитория
+		size: Количество пользователей
+
+	Returns:
+		float: Байт на пользователя
+	"""
+	before = _rss_bytes()
+	repo = BACKENDS[backend]()
+	for i in range(size):
+		repo.create(f"user{i}", f"user{i}@example.com", 100)
+	return (_rss_bytes() - before) / size
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+	parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+	parser.add_argument("--child", nargs=2, metavar=("BACKEND", "SIZE"), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.child:
+		print(_measure(args.child[0], int(args.child[1])))
+		return
+
+	print(f"{'users':>10} " + " ".join(f"{name + ', B/user':>18}" for name in args.backends))
+	for size in args.sizes:
+		row = []
+		for backend in args.backends:
+			result = subprocess.run(
+				[sys.executable, "-m", "benchmarks.bench_memory", "--child", backend, str(size)],
+				capture_output=True, text=True,
+			)
+			row.append(f"{float(result.stdout):>18.1f}" if result.returncode == 0 else f"{'failed':>18}")
+		print(f"{size:>10} " + " ".join(row))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,156 @@
+"""
+Бенчмарк условных (оптимистичных) переводов против обычных под конкуренцией.
+
+Потоки переводят деньги с немногих горячих счетов. Обычный перевод
+(пессимистичный путь) проверяет баланс под блокировками счетов. Условный
+перевод повторяет цикл клиента с If-Match: читает отправителя без
+блокировок, переводит с expected_version его версией и при конфликте
+версий (409) перечитывает и повторяет. Печатается пропускная способность
+и доля конфликтов; проверяется, что общая сумма денег сохранилась.
+
+Запись и в условном переводе идет под блокировками счетов: в CPython нет
+атомарного сравнения с обменом, и версия сверяется под той же блокировкой.
+Оптимистичный путь экономит не блокировку записи, а чтение: оно не ждет
+писателей, а устаревшая версия отклоняется до ожидания блокировок. На
+CPython с GIL конфликтов немного (около процента попыток даже для четырех
+горячих счетов), но лишнее чтение перед каждым переводом обычно делает
+условный путь на 5-30% медленнее обычного: его выгода - в проверке, что
+клиент видел актуальное состояние, а не в пропускной способности.
+
+Запуск:
+	python -m benchmarks.bench_optimistic_transfers
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+
+from app.core.exceptions import InsufficientFundsError, VersionConflictError
+from app.repositories.snapshot import SeedSnapshot
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+THREADS = (1, 4, 16)
+ACCOUNTS = 1_000
+# Количество горячих счетов-отправителей: чем меньше, тем больше конфликтов
+HOT_ACCOUNTS = (4, 64)
+TRANSFERS_PER_THREAD = {"memory": 20_000, "sqlite": 1_000}
+
+
+def _build(backend: str, directory: str):
+	"""
+	Создает хранилище с ACCOUNTS счетами.
+
+	Args:
+		backend: memory или sqlite
+		directory: Каталог для файла базы
+
+	Returns:
+		Репозиторий
+	"""
+	users = [(f"user{i}", f"user{i}@example.com", 1_000_000) for i in range(ACCOUNTS)]
+	if backend == "sqlite":
+		return SQLiteUserRepository(os.path.join(directory, "users.sqlite3"), synchronous="OFF", seed=users)
+	return InMemoryUserRepository(snapshot=SeedSnapshot(users))
+
+
+def _pairs(count: int, hot: int, seed: int) -> list[tuple[int, int]]:
+	"""
+	Выбирает пары (горячий отправитель, любой получатель).
+
+	Args:
+		count: Количество пар
+		hot: Количество горячих счетов-отправителей
+		seed: Зерно генератора
+
+	Returns:
+		list[tuple[int, int]]: Пары разных id счетов
+	"""
+	rng = random.Random(seed)
+	pairs = []
+	while len(pairs) < count:
+		from_id, to_id = rng.randint(1, hot), rng.randint(1, ACCOUNTS)
+		if from_id != to_id:
+			pairs.append((from_id, to_id))
+	return pairs
+
+
+def _run(backend: str, threads: int, hot: int, optimistic: bool) -> tuple[float, float]:
+	"""
+	Выполняет переводы в заданном количестве потоков.
+
+	Args:
+		backend: memory или sqlite
+		threads: Количество потоков
+		hot: Количество горячих счетов-отправителей
+		optimistic: Переводить с expected_version и повторять при конфликте
+
+	Returns:
+		tuple[float, float]: Переводов в секунду и доля попыток, отклоненных конфликтом версий
+	"""
+	per_thread = TRANSFERS_PER_THREAD[backend]
+	conflicts = [0] * threads
+	with tempfile.TemporaryDirectory() as directory:
+		repo = _build(backend, directory)
+		total_before = sum(user.balance for user in repo.list())
+		workloads = [_pairs(per_thread, hot, seed) for seed in range(threads)]
+
+		def pessimistic_worker(index: int) -> None:
+			for from_id, to_id in workloads[index]:
+				try:
+					repo.transfer(from_id, to_id, 1)
+				except InsufficientFundsError:
+					pass
+
+		def optimistic_worker(index: int) -> None:
+			for from_id, to_id in workloads[index]:
+				while True:
+					# Чтение без блокировок, как GET /users/{id} перед переводом с If-Match
+					sender = repo.get_by_id(from_id)
+					if sender.balance < 1:
+						break
+					try:
+						repo.transfer(from_id, to_id, 1, expected_version=sender.version)
+						break
+					except VersionConflictError:
+						conflicts[index] += 1
+
+		worker = optimistic_worker if optimistic else pessimistic_worker
+		workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+		start = time.perf_counter()
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+		elapsed = time.perf_counter() - start
+
+		total_after = sum(user.balance for user in repo.list())
+		assert total_before == total_after, "Общая сумма изменилась"
+		if backend == "sqlite":
+			repo.close()
+	attempts = threads * per_thread + sum(conflicts)
+	return threads * per_thread / elapsed, sum(conflicts) / attempts
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	print(
+		f"{'backend':>8} {'hot':>5} {'threads':>8} {'locked, tr/s':>14} "
+		f"{'optimistic, tr/s':>17} {'conflicts':>10} {'ratio':>7}"
+	)
+	for backend in TRANSFERS_PER_THREAD:
+		for hot in HOT_ACCOUNTS:
+			for threads in THREADS:
+				locked, _ = _run(backend, threads, hot, optimistic=False)
+				optimistic, conflict_rate = _run(backend, threads, hot, optimistic=True)
+				print(
+					f"{backend:>8} {hot:>5} {threads:>8} {locked:>14.0f} "
+					f"{optimistic:>17.0f} {conflict_rate:>9.1%} {optimistic / locked:>6.2f}x"
+				)
+
+
+if __name__ == "__main__":
+	main()
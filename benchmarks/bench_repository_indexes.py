@@ -0,0 +1,82 @@
+"""
+Бенчмарк хеш-индексов InMemoryUserRepository.
+
+Показывает, что задержка get_by_id, get_by_email и create не зависит
+от количества пользователей в репозитории (от 10^3 до 10^6).
+
+Запуск:
+	python -m benchmarks.bench_repository_indexes
+"""
+
+import random
+import time
+
+from app.repositories.snapshot import SeedSnapshot
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SAMPLES = 20_000
+
+
+def _fill(count: int) -> InMemoryUserRepository:
+	"""
+	Создает репозиторий без тестовых пользователей и заполняет его.
+
+	Пользователь user{i}@example.com получает id i + 1, поэтому выборки
+	по id из [1, count] и по email из user0..user{count - 1} всегда находят
+	пользователя.
+
+	Args:
+		count: Количество пользователей
+
+	Returns:
+		InMemoryUserRepository: Заполненный репозиторий
+	"""
+	repo = InMemoryUserRepository(snapshot=SeedSnapshot(()))
+	for i in range(count):
+		repo.create(name=f"user{i}", email=f"user{i}@example.com", balance=100)
+	return repo
+
+
+def _measure_ns(func, args: list) -> float:
+	"""
+	Измеряет среднее время вызова функции.
+
+	Args:
+		func: Измеряемая функция
+		args: Аргументы для каждого вызова
+
+	Returns:
+		float: Среднее время одного вызова в наносекундах
+	"""
+	start = time.perf_counter_ns()
+	for arg in args:
+		func(arg)
+	return (time.perf_counter_ns() - start) / len(args)
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	rng = random.Random(42)
+
+	print(f"{'users':>10} {'get_by_id, ns':>15} {'get_by_email, ns':>17} {'create, ns':>12}")
+	for size in SIZES:
+		# Новый репозиторий на каждый размер: пользователи, созданные
+		# при замере create, не попадают в следующий размер
+		repo = _fill(size)
+
+		ids = [rng.randint(1, size) for _ in range(SAMPLES)]
+		emails = [f"USER{rng.randrange(size)}@example.com" for _ in range(SAMPLES)]
+		by_id = _measure_ns(repo.get_by_id, ids)
+		by_email = _measure_ns(repo.get_by_email, emails)
+
+		# create измеряем на отдельной порции уникальных email
+		new_emails = [f"bench{size}-{i}@example.com" for i in range(SAMPLES)]
+		create = _measure_ns(lambda email: repo.create("bench", email, 0), new_emails)
+
+		print(f"{size:>10} {by_id:>15.0f} {by_email:>17.0f} {create:>12.0f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,102 @@
+"""
+Бенчмарк репозитория в разделяемой памяти при нескольких процессах.
+
+Измеряет суммарную пропускную способность переводов, когда переводы
+выполняют несколько процессов, подключенных к одному сегменту (как
+воркеры uvicorn --workers N). Для сравнения приведен in-memory
+репозиторий в одном процессе.
+
+Запуск:
+	python -m benchmarks.bench_shared_memory
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+PROCESSES = (1, 2, 4, 8)
+ACCOUNTS = 1_000
+TRANSFERS_PER_PROCESS = 20_000
+
+
+def _transfers(repo, index: int) -> None:
+	"""
+	Выполняет переводы по кругу между счетами, начиная со смещения процесса.
+
+	Args:
+		repo: Репозиторий
+		index: Номер процесса
+	"""
+	for iteration in range(TRANSFERS_PER_PROCESS):
+		from_user_id = (index * 97 + iteration) % ACCOUNTS + 1
+		to_user_id = from_user_id % ACCOUNTS + 1
+		repo.transfer(from_user_id, to_user_id, 1)
+
+
+def _worker(segment: dict, index: int, start) -> None:
+	"""Подключается к сегменту и выполняет переводы после общего старта."""
+	repo = SharedMemoryUserRepository(**segment)
+	start.wait()
+	_transfers(repo, index)
+	repo.close()
+
+
+def _shared_memory_throughput(processes: int, lock_path: str) -> float:
+	"""
+	Измеряет пропускную способность переводов в нескольких процессах.
+
+	Args:
+		processes: Количество процессов
+		lock_path: Путь к файлу блокировок
+
+	Returns:
+		float: Переводов в секунду по всем процессам
+	"""
+	segment = {
+		"name": f"bench-{uuid.uuid4().hex[:12]}",
+		"capacity": ACCOUNTS,
+		"lock_path": lock_path,
+		"seed": [(f"user{i}", f"user{i}@example.com", 1_000_000) for i in range(ACCOUNTS)],
+	}
+	repo = SharedMemoryUserRepository(**segment)
+	context = multiprocessing.get_context("fork")
+	start = context.Event()
+	workers = [context.Process(target=_worker, args=(segment, i, start)) for i in range(processes)]
+	for process in workers:
+		process.start()
+	began = time.perf_counter()
+	start.set()
+	for process in workers:
+		process.join()
+	elapsed = time.perf_counter() - began
+	repo.close()
+	repo.unlink()
+	return processes * TRANSFERS_PER_PROCESS / elapsed
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	repo = InMemoryUserRepository()
+	for i in range(ACCOUNTS):
+		repo.create(f"user{i}", f"user{i}@example.com", 1_000_000)
+	began = time.perf_counter()
+	_transfers(repo, 0)
+	memory = TRANSFERS_PER_PROCESS / (time.perf_counter() - began)
+
+	print(f"{'backend':>14} {'processes':>10} {'transfer/s':>11}")
+	print(f"{'memory':>14} {1:>10} {memory:>11.0f}")
+	with tempfile.TemporaryDirectory() as directory:
+		for processes in PROCESSES:
+			lock_path = os.path.join(directory, f"bench-{processes}.lock")
+			throughput = _shared_memory_throughput(processes, lock_path)
+			print(f"{'shared_memory':>14} {processes:>10} {throughput:>11.0f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,61 @@
+"""
+Бенчмарк времени старта репозитория из снимка.
+
+Сравнивает восстановление состояния повтором журнала предзаписи
+с открытием снимка, отображенного в память. Открытие снимка читает
+только заголовок, поэтому время старта не зависит от количества
+пользователей; первые обращения подгружают строки по требованию.
+
+Запуск:
+	python -m benchmarks.bench_snapshot_startup
+"""
+
+import os
+import tempfile
+import time
+
+from app.repositories.snapshot import MappedSnapshot
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog, encode_create
+
+
+SIZES = (10_000, 100_000, 1_000_000)
+LOOKUPS = 1_000
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	print(f"{'users':>10} {'wal replay, s':>14} {'snapshot open, s':>17} {'first lookup, us':>17}")
+	with tempfile.TemporaryDirectory() as directory:
+		for size in SIZES:
+			wal_path = os.path.join(directory, f"bench-{size}.wal")
+			snapshot_path = os.path.join(directory, f"bench-{size}.snapshot")
+
+			# Журнал заполняется напрямую, без ожидания fsync на каждую запись
+			wal = WriteAheadLog(wal_path, batch_window=0.01, max_batch=4096)
+			for user_id in range(3, size + 3):
+				wal.append(encode_create(user_id, f"user{user_id}", f"user{user_id}@example.com", 100))
+			wal.close()
+
+			start = time.perf_counter()
+			replay_wal = WriteAheadLog(wal_path)
+			restored = InMemoryUserRepository(wal=replay_wal)
+			replay = time.perf_counter() - start
+			restored.checkpoint(snapshot_path)
+			replay_wal.close()
+
+			start = time.perf_counter()
+			mapped = InMemoryUserRepository(snapshot=MappedSnapshot(snapshot_path))
+			opened = time.perf_counter() - start
+
+			step = max(size // LOOKUPS, 1)
+			start = time.perf_counter()
+			for user_id in range(1, size + 1, step):
+				mapped.get_by_id(user_id)
+			lookup = (time.perf_counter() - start) / len(range(1, size + 1, step))
+
+			print(f"{size:>10} {replay:>14.3f} {opened:>17.5f} {lookup * 1e6:>17.1f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,98 @@
+"""
+Бенчмарк репозитория в SQLite против in-memory хранилища.
+
+Измеряет пропускную способность создания пользователей, переводов и
+постраничного чтения списка при конкурентной нагрузке из нескольких
+потоков. Для SQLite сравниваются режимы synchronous=FULL (fsync на
+каждую транзакцию) и NORMAL (fsync только при контрольной точке WAL).
+
+Запуск:
+	python -m benchmarks.bench_sqlite
+"""
+
+import os
+import tempfile
+import threading
+import time
+from typing import Callable
+
+from app.repositories.base import UserRepository
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+THREADS = (1, 4, 16)
+OPERATIONS_PER_THREAD = 500
+PAGE_SIZE = 100
+
+
+def _throughput(threads: int, operation: Callable[[int, int], None]) -> float:
+	"""
+	Выполняет операцию в заданном количестве потоков.
+
+	Args:
+		threads: Количество потоков
+		operation: Операция, принимающая номер потока и номер итерации
+
+	Returns:
+		float: Пропускная способность, операций в секунду
+	"""
+	def worker(index: int) -> None:
+		for iteration in range(OPERATIONS_PER_THREAD):
+			operation(index, iteration)
+
+	workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+	start = time.perf_counter()
+	for thread in workers:
+		thread.start()
+	for thread in workers:
+		thread.join()
+	return threads * OPERATIONS_PER_THREAD / (time.perf_counter() - start)
+
+
+def _run(repo: UserRepository, threads: int) -> tuple[float, float, float]:
+	"""
+	Измеряет создание, переводы и чтение страниц на одном репозитории.
+
+	Args:
+		repo: Репозиторий
+		threads: Количество потоков
+
+	Returns:
+		tuple[float, float, float]: Операций в секунду для создания, переводов и чтения
+	"""
+	created: list = [[] for _ in range(threads)]
+
+	def create(index: int, iteration: int) -> None:
+		user = repo.create(f"user{index}-{iteration}", f"user{index}-{iteration}@example.com", 1_000_000)
+		created[index].append(user.id)
+
+	def transfer(index: int, iteration: int) -> None:
+		accounts = created[index]
+		repo.transfer(accounts[iteration % len(accounts)], accounts[(iteration + 1) % len(accounts)], 1)
+
+	def list_page(index: int, iteration: int) -> None:
+		repo.list_page(PAGE_SIZE, after_id=(index * OPERATIONS_PER_THREAD + iteration) % 1000)
+
+	return _throughput(threads, create), _throughput(threads, transfer), _throughput(threads, list_page)
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	print(f"{'backend':>14} {'threads':>8} {'create/s':>10} {'transfer/s':>11} {'page/s':>9}")
+	with tempfile.TemporaryDirectory() as directory:
+		for threads in THREADS:
+			backends = [("memory", InMemoryUserRepository())]
+			for synchronous in ("FULL", "NORMAL"):
+				path = os.path.join(directory, f"bench-{threads}-{synchronous}.sqlite3")
+				backends.append((f"sqlite {synchronous}", SQLiteUserRepository(path, synchronous=synchronous)))
+
+			for name, repo in backends:
+				create, transfer, page = _run(repo, threads)
+				print(f"{name:>14} {threads:>8} {create:>10.0f} {transfer:>11.0f} {page:>9.0f}")
+				if isinstance(repo, SQLiteUserRepository):
+					repo.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,142 @@
+"""
+Бенчмарк очереди переводов с потоком-писателем против прямых переводов.
+
+Потоки переводят деньги между счетами, выбранными по закону Ципфа: немногие
+горячие счета участвуют в большинстве переводов и блокировки их полос
+постоянно передаются между потоками. Сравнивается пропускная способность
+прямого пути (repo.transfer под блокировками счетов) и TransferEngine,
+выполняющего переводы пакетами в одном потоке, для in-memory хранилища,
+in-memory с журналом предзаписи и SQLite. Проверяет, что общая сумма
+денег сохранилась.
+
+В SQLite пакет фиксируется одной транзакцией и одним fsync, поэтому очередь
+выигрывает уже с нескольких потоков. С журналом предзаписи групповую
+фиксацию дает и прямой путь, и очередь с ним примерно наравне. Для чистой
+памяти очередь экономит на передаче блокировок, но добавляет передачу
+перевода писателю и результата обратно: на CPython с GIL (особенно на одном
+ядре) блокировки горячих счетов редко заставляют ждать, и прямой путь быстрее.
+
+Запуск:
+	python -m benchmarks.bench_transfer_engine
+"""
+
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+
+from app.core.exceptions import InsufficientFundsError
+from app.repositories.snapshot import SeedSnapshot
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+from app.services.transfer_engine import TransferEngine
+
+
+THREADS = (1, 4, 16)
+ACCOUNTS = 10_000
+# Показатель распределения Ципфа: чем больше, тем сильнее перевес горячих счетов
+ZIPF_EXPONENT = 1.1
+TRANSFERS_PER_THREAD = {"memory": 20_000, "wal": 2_000, "sqlite": 1_000}
+
+
+def _zipf_pairs(count: int, seed: int) -> list[tuple[int, int]]:
+	"""
+	Выбирает пары (отправитель, получатель) по закону Ципфа.
+
+	Args:
+		count: Количество пар
+		seed: Зерно генератора
+
+	Returns:
+		list[tuple[int, int]]: Пары разных id счетов
+	"""
+	rng = random.Random(seed)
+	weights = list(itertools.accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, ACCOUNTS + 1)))
+	ids = range(1, ACCOUNTS + 1)
+	pairs = []
+	while len(pairs) < count:
+		from_id, to_id = rng.choices(ids, cum_weights=weights, k=2)
+		if from_id != to_id:
+			pairs.append((from_id, to_id))
+	return pairs
+
+
+def _build(backend: str, directory: str):
+	"""
+	Создает хранилище с ACCOUNTS счетами.
+
+	Args:
+		backend: memory, wal или sqlite
+		directory: Каталог для файлов журнала и базы
+
+	Returns:
+		Репозиторий
+	"""
+	users = [(f"user{i}", f"user{i}@example.com", 1_000_000) for i in range(ACCOUNTS)]
+	if backend == "sqlite":
+		return SQLiteUserRepository(os.path.join(directory, "users.sqlite3"), synchronous="NORMAL", seed=users)
+	wal = WriteAheadLog(os.path.join(directory, "users.wal")) if backend == "wal" else None
+	return InMemoryUserRepository(wal=wal, snapshot=SeedSnapshot(users))
+
+
+def _run(backend: str, threads: int, use_engine: bool) -> float:
+	"""
+	Выполняет переводы в заданном количестве потоков.
+
+	Args:
+		backend: memory, wal или sqlite
+		threads: Количество потоков
+		use_engine: Переводить через TransferEngine, а не напрямую
+
+	Returns:
+		float: Пропускная способность, переводов в секунду
+	"""
+	per_thread = TRANSFERS_PER_THREAD[backend]
+	with tempfile.TemporaryDirectory() as directory:
+		repo = _build(backend, directory)
+		engine = TransferEngine(repo) if use_engine else None
+		transfer = engine.transfer if use_engine else repo.transfer
+		total_before = sum(user.balance for user in repo.list())
+		workloads = [_zipf_pairs(per_thread, seed) for seed in range(threads)]
+
+		def worker(pairs: list) -> None:
+			for from_id, to_id in pairs:
+				try:
+					transfer(from_id, to_id, 1)
+				except InsufficientFundsError:
+					pass
+
+		workers = [threading.Thread(target=worker, args=(pairs,)) for pairs in workloads]
+		start = time.perf_counter()
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+		elapsed = time.perf_counter() - start
+
+		if engine is not None:
+			engine.close()
+		total_after = sum(user.balance for user in repo.list())
+		assert total_before == total_after, "Общая сумма изменилась"
+		if backend == "wal":
+			repo.wal.close()
+		elif backend == "sqlite":
+			repo.close()
+	return threads * per_thread / elapsed
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	print(f"{'backend':>8} {'threads':>8} {'direct, tr/s':>14} {'engine, tr/s':>14} {'speedup':>8}")
+	for backend in TRANSFERS_PER_THREAD:
+		for threads in THREADS:
+			direct = _run(backend, threads, use_engine=False)
+			batched = _run(backend, threads, use_engine=True)
+			print(f"{backend:>8} {threads:>8} {direct:>14.0f} {batched:>14.0f} {batched / direct:>7.2f}x")
+
+
+if __name__ == "__main__":
+	main()
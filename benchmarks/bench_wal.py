@@ -0,0 +1,88 @@
+"""
+Бенчмарк журнала предзаписи с групповой фиксацией.
+
+Сравнивает пропускную способность переводов без журнала и с журналом
+при разном числе потоков. Каждый перевод с журналом ждет fsync, но
+конкурентные переводы делят один fsync, поэтому с ростом числа
+потоков пропускная способность приближается к in-memory.
+
+Запуск:
+	python -m benchmarks.bench_wal
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from app.repositories import wal as wal_module
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+
+
+THREADS = (1, 4, 16, 64)
+TRANSFERS_PER_THREAD = 300
+
+
+def _run(threads: int, wal: WriteAheadLog | None) -> float:
+	"""
+	Выполняет переводы в заданном количестве потоков.
+
+	Args:
+		threads: Количество потоков
+		wal: Журнал предзаписи или None
+
+	Returns:
+		float: Пропускная способность, переводов в секунду
+	"""
+	repo = InMemoryUserRepository(lock_stripes=1024, wal=wal)
+	accounts = [
+		repo.create(f"user{i}", f"user{i}@example.com", 1_000_000).id
+		for i in range(threads * 2)
+	]
+
+	def worker(index: int) -> None:
+		from_id, to_id = accounts[2 * index], accounts[2 * index + 1]
+		for _ in range(TRANSFERS_PER_THREAD):
+			repo.transfer(from_id, to_id, 1)
+
+	workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+	start = time.perf_counter()
+	for thread in workers:
+		thread.start()
+	for thread in workers:
+		thread.join()
+	return threads * TRANSFERS_PER_THREAD / (time.perf_counter() - start)
+
+
+def main() -> None:
+	"""Запускает бенчмарк и печатает таблицу результатов."""
+	fsyncs = [0]
+	real_fsync = wal_module.os.fsync
+
+	def counting_fsync(fd: int) -> None:
+		fsyncs[0] += 1
+		real_fsync(fd)
+
+	wal_module.os.fsync = counting_fsync
+
+	print(f"{'threads':>8} {'memory, tr/s':>13} {'wal, tr/s':>10} {'transfers/fsync':>16}")
+	with tempfile.TemporaryDirectory() as directory:
+		for threads in THREADS:
+			memory = _run(threads, None)
+
+			path = os.path.join(directory, f"bench-{threads}.wal")
+			wal = WriteAheadLog(path, batch_window=0.001, max_batch=256)
+			fsyncs[0] = 0
+			durable = _run(threads, wal)
+			wal.close()
+
+			# В fsync входят и записи о создании счетов
+			records = threads * (TRANSFERS_PER_THREAD + 2)
+			print(f"{threads:>8} {memory:>13.0f} {durable:>10.0f} {records / max(fsyncs[0], 1):>16.1f}")
+
+	wal_module.os.fsync = real_fsync
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,369 @@
+"""
+Набор бенчмарков репозитория, сервиса и HTTP-слоя с сохранением в JSON.
+
+Каждый случай измеряется на нескольких размерах набора данных: время одной
+операции в наносекундах (медиана и минимум по повторам). Уровни:
+- repository - методы InMemoryUserRepository;
+- service - те же операции через UserService (накладные расходы сервиса
+  видны как разница с repository);
+- http - запросы к приложению в том же процессе через ASGI, без сети.
+
+Результаты записываются в JSON. Режим сравнения сопоставляет результаты
+с сохраненной базовой линией и завершается с кодом 1, если какой-либо
+случай стал медленнее больше чем на порог.
+
+Запуск:
+	python -m benchmarks.suite run --output benchmarks/results/latest.json
+	python -m benchmarks.suite run --baseline benchmarks/results/baseline.json
+	python -m benchmarks.suite compare baseline.json latest.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import httpx
+
+from app.dependencies.user_dependencies import get_async_user_repository, get_user_repository
+from app.main import app
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.snapshot import SeedSnapshot
+from app.repositories.user_repository import InMemoryUserRepository
+from app.services.user_service import UserService
+
+
+SIZES = (1_000, 10_000, 100_000)
+QUICK_SIZES = (1_000,)
+REPEATS = 5
+OPERATIONS = 2_000
+# Чтение всего списка - O(N), поэтому операций меньше
+LIST_OPERATIONS = 5
+HTTP_OPERATIONS = 300
+PAGE_SIZE = 100
+THRESHOLD = 0.2
+BALANCE = 10 ** 12
+
+
+def _measure(func: Callable, batches: list[list]) -> dict:
+	"""
+	Измеряет время вызова функции: по одному повтору на порцию аргументов.
+
+	Args:
+		func: Измеряемая функция одного аргумента
+		batches: Порции аргументов, по одной на повтор
+
+	Returns:
+		dict: Медиана и минимум времени операции в наносекундах, число операций
+	"""
+	samples = []
+	for args in batches:
+		start = time.perf_counter_ns()
+		for arg in args:
+			func(arg)
+		samples.append((time.perf_counter_ns() - start) / len(args))
+	return _result(samples, batches)
+
+
+async def _measure_async(func: Callable[..., Awaitable], batches: list[list]) -> dict:
+	"""
+	Измеряет время вызова корутинной функции: по одному повтору на порцию аргументов.
+
+	Args:
+		func: Измеряемая корутинная функция одного аргумента
+		batches: Порции аргументов, по одной на повтор
+
+	Returns:
+		dict: Медиана и минимум времени операции в наносекундах, число операций
+	"""
+	samples = []
+	for args in batches:
+		start = time.perf_counter_ns()
+		for arg in args:
+			await func(arg)
+		samples.append((time.perf_counter_ns() - start) / len(args))
+	return _result(samples, batches)
+
+
+def _result(samples: list[float], batches: list[list]) -> dict:
+	"""Собирает результат случая из времен повторов."""
+	return {
+		"ns_per_op": statistics.median(samples),
+		"min_ns_per_op": min(samples),
+		"ops": sum(len(args) for args in batches),
+	}
+
+
+def _filled_repository(size: int) -> InMemoryUserRepository:
+	"""
+	Создает репозиторий с size пользователями (id от 1 до size).
+
+	Args:
+		size: Количество пользователей
+
+	Returns:
+		InMemoryUserRepository: Заполненный репозиторий
+	"""
+	repo = InMemoryUserRepository(snapshot=SeedSnapshot(()))
+	for i in range(size):
+		repo.create(f"user{i}", f"user{i}@example.com", BALANCE)
+	return repo
+
+
+def _pairs(rng: random.Random, size: int, count: int) -> list[tuple[int, int]]:
+	"""Случайные пары различных id (отправитель, получатель)."""
+	pairs = []
+	while len(pairs) < count:
+		from_user_id, to_user_id = rng.randint(1, size), rng.randint(1, size)
+		if from_user_id != to_user_id:
+			pairs.append((from_user_id, to_user_id))
+	return pairs
+
+
+def _emails(prefix: str, repeats: int, count: int) -> list[list[str]]:
+	"""Порции новых уникальных email, по одной на повтор."""
+	return [[f"{prefix}-{r}-{i}@example.com" for i in range(count)] for r in range(repeats)]
+
+
+def bench_repository(size: int, repeats: int) -> dict[str, dict]:
+	"""
+	Микробенчмарки методов InMemoryUserRepository.
+
+	Args:
+		size: Количество пользователей в репозитории
+		repeats: Количество повторов каждого случая
+
+	Returns:
+		dict[str, dict]: Результаты по названиям случаев
+	"""
+	rng = random.Random(size)
+	repo = _filled_repository(size)
+	emails = [[f"USER{rng.randrange(size)}@example.com" for _ in range(OPERATIONS)] for _ in range(repeats)]
+	pairs = [_pairs(rng, size, OPERATIONS) for _ in range(repeats)]
+	return {
+		"get_by_email": _measure(repo.get_by_email, emails),
+		"transfer": _measure(lambda pair: repo.transfer(pair[0], pair[1], 1), pairs),
+		"list": _measure(lambda _: repo.list(), [[None] * LIST_OPERATIONS] * repeats),
+		"list_page": _measure(
+			lambda after_id: repo.list_page(PAGE_SIZE, after_id),
+			[[rng.randrange(size) for _ in range(OPERATIONS)] for _ in range(repeats)],
+		),
+		# create последним: новые пользователи меняют размер репозитория
+		"create": _measure(
+			lambda email: repo.create("bench", email, 0), _emails("repository", repeats, OPERATIONS)
+		),
+	}
+
+
+def bench_service(size: int, repeats: int) -> dict[str, dict]:
+	"""
+	Те же операции через UserService.
+
+	Args:
+		size: Количество пользователей в репозитории
+		repeats: Количество повторов каждого случая
+
+	Returns:
+		dict[str, dict]: Результаты по названиям случаев
+	"""
+	rng = random.Random(size)
+	service = UserService(_filled_repository(size))
+	pairs = [_pairs(rng, size, OPERATIONS) for _ in range(repeats)]
+	return {
+		"transfer": _measure(lambda pair: service.transfer(pair[0], pair[1], 1), pairs),
+		"list_users_page": _measure(
+			lambda after_id: service.list_users_page(PAGE_SIZE, after_id),
+			[[rng.randrange(size) for _ in range(OPERATIONS)] for _ in range(repeats)],
+		),
+		"create_user": _measure(
+			lambda email: service.create_user("bench", email, 0), _emails("service", repeats, OPERATIONS)
+		),
+	}
+
+
+async def _bench_http(size: int, repeats: int) -> dict[str, dict]:
+	"""Запросы к приложению через ASGI поверх заполненного репозитория."""
+	rng = random.Random(size)
+	repo = _filled_repository(size)
+	async_repo = AsyncInMemoryUserRepository(repo)
+
+	async def get_async_repo():
+		return async_repo
+
+	# Подменяем оба репозитория: роутер выбирает эндпоинты по ASYNC_ENDPOINTS
+	app.dependency_overrides[get_user_repository] = lambda: repo
+	app.dependency_overrides[get_async_user_repository] = get_async_repo
+	try:
+		transport = httpx.ASGITransport(app=app)
+		async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+			async def request(method: str, url: str, **kwargs) -> None:
+				response = await client.request(method, url, **kwargs)
+				if response.is_error:
+					raise RuntimeError(f"{method} {url}: {response.status_code} {response.text}")
+
+			pairs = [_pairs(rng, size, HTTP_OPERATIONS) for _ in range(repeats)]
+			return {
+				"transfer": await _measure_async(
+					lambda pair: request(
+						"POST", "/api/v1/transfer",
+						json={"from_user_id": pair[0], "to_user_id": pair[1], "amount": 1},
+					),
+					pairs,
+				),
+				"list_users": await _measure_async(
+					lambda after_id: request("GET", "/api/v1/users", params={"limit": PAGE_SIZE, "after_id": after_id}),
+					[[rng.randrange(size) for _ in range(HTTP_OPERATIONS)] for _ in range(repeats)],
+				),
+				"create_user": await _measure_async(
+					lambda email: request("POST", "/api/v1/users", json={"name": "bench", "email": email}),
+					_emails("http", repeats, HTTP_OPERATIONS),
+				),
+			}
+	finally:
+		app.dependency_overrides.pop(get_user_repository, None)
+		app.dependency_overrides.pop(get_async_user_repository, None)
+
+
+def bench_http(size: int, repeats: int) -> dict[str, dict]:
+	"""
+	Пропускная способность эндпоинтов /api/v1/users и /api/v1/transfer в процессе.
+
+	Args:
+		size: Количество пользователей в репозитории
+		repeats: Количество повторов каждого случая
+
+	Returns:
+		dict[str, dict]: Результаты по названиям случаев
+	"""
+	return asyncio.run(_bench_http(size, repeats))
+
+
+LAYERS = {
+	"repository": bench_repository,
+	"service": bench_service,
+	"http": bench_http,
+}
+
+
+def run(sizes: tuple[int, ...], repeats: int, layers: list[str]) -> dict:
+	"""
+	Запускает бенчмарки и печатает результаты по мере получения.
+
+	Args:
+		sizes: Размеры набора данных
+		repeats: Количество повторов каждого случая
+		layers: Уровни для запуска
+
+	Returns:
+		dict: Отчет с окружением и результатами по ключам "уровень.случай[размер]"
+	"""
+	results = {}
+	print(f"{'case':<36} {'ns/op':>12} {'min ns/op':>12} {'ops/s':>10}")
+	for layer in layers:
+		for size in sizes:
+			for case, result in LAYERS[layer](size, repeats).items():
+				name = f"{layer}.{case}[{size}]"
+				results[name] = result
+				print(
+					f"{name:<36} {result['ns_per_op']:>12.0f} {result['min_ns_per_op']:>12.0f}"
+					f" {1e9 / result['ns_per_op']:>10.0f}"
+				)
+	return {
+		"created_at": datetime.now(timezone.utc).isoformat(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"repeats": repeats,
+		"results": results,
+	}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+	"""
+	Сравнивает результаты с базовой линией и печатает таблицу изменений.
+
+	Args:
+		baseline: Отчет базовой линии
+		current: Текущий отчет
+		threshold: Допустимое относительное замедление (0.2 - на 20%)
+
+	Returns:
+		list[str]: Случаи, замедлившиеся больше чем на порог
+	"""
+	regressions = []
+	print(f"{'case':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+	for name, result in current["results"].items():
+		previous = baseline["results"].get(name)
+		if previous is None:
+			print(f"{name:<36} {'-':>12} {result['ns_per_op']:>12.0f} {'new':>8}")
+			continue
+		change = result["ns_per_op"] / previous["ns_per_op"] - 1
+		mark = ""
+		if change > threshold:
+			regressions.append(name)
+			mark = "  REGRESSION"
+		print(f"{name:<36} {previous['ns_per_op']:>12.0f} {result['ns_per_op']:>12.0f} {change:>+8.1%}{mark}")
+	return regressions
+
+
+def _load(path: str) -> dict:
+	"""Читает отчет из JSON-файла."""
+	with open(path, encoding="utf-8") as file:
+		return json.load(file)
+
+
+def main(argv: list[str] | None = None) -> int:
+	"""
+	Точка входа командной строки.
+
+	Args:
+		argv: Аргументы командной строки (по умолчанию sys.argv)
+
+	Returns:
+		int: Код завершения: 1, если найдена регрессия
+	"""
+	parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.splitlines()[1])
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	run_parser = commands.add_parser("run", help="запустить бенчмарки")
+	run_parser.add_argument("--output", help="файл для результатов в JSON")
+	run_parser.add_argument("--baseline", help="сравнить с базовой линией из JSON")
+	run_parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="размеры набора данных")
+	run_parser.add_argument("--quick", action="store_true", help=f"только размер {QUICK_SIZES[0]}")
+	run_parser.add_argument("--repeats", type=int, default=REPEATS, help="повторов каждого случая")
+	run_parser.add_argument("--layer", choices=list(LAYERS), nargs="+", default=list(LAYERS), help="уровни")
+	run_parser.add_argument("--threshold", type=float, default=THRESHOLD, help="порог регрессии")
+
+	compare_parser = commands.add_parser("compare", help="сравнить два файла результатов")
+	compare_parser.add_argument("baseline", help="базовая линия в JSON")
+	compare_parser.add_argument("current", help="текущие результаты в JSON")
+	compare_parser.add_argument("--threshold", type=float, default=THRESHOLD, help="порог регрессии")
+
+	args = parser.parse_args(argv)
+	if args.command == "run":
+		report = run(QUICK_SIZES if args.quick else tuple(args.sizes), args.repeats, args.layer)
+		if args.output:
+			os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+			with open(args.output, "w", encoding="utf-8") as file:
+				json.dump(report, file, indent=2)
+		if not args.baseline:
+			return 0
+		baseline = _load(args.baseline)
+	else:
+		baseline, report = _load(args.baseline), _load(args.current)
+
+	regressions = compare(baseline, report, args.threshold)
+	if regressions:
+		print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
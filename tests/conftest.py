@@ -5,6 +5,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.repositories.snapshot import SeedSnapshot
 from app.repositories.user_repository import InMemoryUserRepository
 from app.services.user_service import UserService
 
@@ -48,11 +49,8 @@ def empty_user_repository():
 	Фикстура для пустого репозитория пользователей.
 	Используется для тестов, где нужен чистый репозиторий.
 	"""
-	repo = InMemoryUserRepository()
-	# Очищаем тестовых пользователей
-	repo._users.clear()
-	repo._next_id = 1
-	return repo
+	# Начинаем с пустого снимка вместо тестовых пользователей
+	return InMemoryUserRepository(snapshot=SeedSnapshot(()))
 
 
 @pytest.fixture
@@ -0,0 +1,247 @@
+"""
+Тесты для асинхронных репозитория, сервиса и эндпоинтов.
+"""
+
+import asyncio
+import threading
+import uuid
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import async_transfers, async_users
+from app.core.exceptions import InsufficientFundsError
+from app.dependencies.user_dependencies import get_async_user_repository
+from app.main import app
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.locks import AsyncStripedLockManager
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.services.async_user_service import AsyncUserService
+
+
+@pytest.fixture
+def async_user_service(user_repository):
+	"""
+	Фикстура для асинхронного сервиса поверх in-memory репозитория.
+	"""
+	return AsyncUserService(AsyncInMemoryUserRepository(user_repository))
+
+
+@pytest.fixture
+def async_client(user_repository):
+	"""
+	Фикстура для тестового клиента приложения с асинхронными эндпоинтами.
+	Использует отдельный репозиторий с Алисой и Бобом.
+	"""
+	async_app = FastAPI()
+	async_app.include_router(async_users.router, prefix="/api/v1/users")
+	async_app.include_router(async_transfers.router, prefix="/api/v1/transfer")
+	for exc_class, handler in app.exception_handlers.items():
+		async_app.add_exception_handler(exc_class, handler)
+
+	repo = AsyncInMemoryUserRepository(user_repository)
+
+	async def override():
+		return repo
+
+	async_app.dependency_overrides[get_async_user_repository] = override
+	return TestClient(async_app)
+
+
+class TestAsyncUserService:
+	"""Тесты для асинхронного сервиса пользователей."""
+
+	@pytest.mark.asyncio
+	async def test_create_and_list(self, async_user_service):
+		"""Тест создания пользователя и постраничного списка."""
+		user = await async_user_service.create_user("Тест", "async@example.com")
+		
+		assert user.balance == 0
+		users, next_cursor = await async_user_service.list_users_page(limit=2)
+		assert [u.id for u in users] == [1, 2]
+		assert next_cursor == 2
+
+	@pytest.mark.asyncio
+	async def test_concurrent_transfers_conserve_money(self, async_user_service, user_repository):
+		"""Тест что параллельные корутины не теряют деньги."""
+		async def worker():
+			for _ in range(50):
+				try:
+					await async_user_service.transfer(1, 2, 1)
+					await async_user_service.transfer(2, 1, 1)
+				except InsufficientFundsError:
+					pass
+
+		await asyncio.gather(*(worker() for _ in range(10)))
+		
+		assert user_repository.get_by_id(1).balance + user_repository.get_by_id(2).balance == 350
+
+	@pytest.mark.asyncio
+	async def test_transfer_batch(self, async_user_service):
+		"""Тест пакета переводов через асинхронный сервис."""
+		balances = await async_user_service.transfer_batch([(1, 2, 10), (2, 1, 20)])
+		
+		assert balances == [(90, 260), (240, 110)]
+
+
+_READS = ("list", "list_page", "export", "get_by_id", "get_by_email", "list_transfers", "search", "top", "stats")
+
+
+class TestAsyncReads:
+	"""Тесты для выполнения чтений асинхронного репозитория."""
+
+	async def _read_threads(self, repo) -> set[int]:
+		"""Выполняет все чтения и возвращает потоки, в которых их выполнил синхронный репозиторий."""
+		threads = set()
+		for name in _READS:
+			method = getattr(repo, name)
+
+			def record(*args, method=method):
+				threads.add(threading.get_ident())
+				return method(*args)
+
+			setattr(repo, name, record)
+
+		async_repo = AsyncInMemoryUserRepository(repo)
+		await async_repo.list()
+		await async_repo.list_page(10)
+		await async_repo.export()
+		await async_repo.get_by_id(1)
+		await async_repo.get_by_email("alice@example.com")
+		await async_repo.list_transfers(1, 10)
+		await async_repo.search("ал", 10)
+		await async_repo.top(1)
+		await async_repo.stats()
+		return threads
+
+	@pytest.mark.asyncio
+	async def test_persistent_reads_in_thread_pool(self, tmp_path):
+		"""Тест что чтения хранилища на диске не выполняются в цикле событий."""
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		try:
+			threads = await self._read_threads(repo)
+		finally:
+			repo.close()
+		
+		assert threads and threading.get_ident() not in threads
+
+	@pytest.mark.asyncio
+	async def test_memory_reads_in_event_loop(self):
+		"""Тест что чтения из памяти выполняются прямо в цикле событий."""
+		assert await self._read_threads(InMemoryUserRepository()) == {threading.get_ident()}
+
+
+class TestAsyncStripedLockManager:
+	"""Тесты для асинхронного менеджера блокировок."""
+
+	@pytest.mark.asyncio
+	async def test_waits_for_same_stripe(self):
+		"""Тест что операция над тем же счетом ждет освобождения блокировки."""
+		locks = AsyncStripedLockManager(4)
+		order = []
+
+		async def first():
+			async with locks.acquire(1, 2):
+				order.append("first")
+				await asyncio.sleep(0.01)
+				order.append("first done")
+
+		async def second():
+			async with locks.acquire(2):
+				order.append("second")
+
+		await asyncio.gather(first(), second())
+		
+		assert order == ["first", "first done", "second"]
+
+
+class TestAsyncEndpoints:
+	"""Тесты для асинхронных эндпоинтов."""
+
+	def test_create_and_list_users(self, async_client):
+		"""Тест создания пользователя и списка через асинхронные эндпоинты."""
+		response = async_client.post("/api/v1/users", json={"name": "Тест", "email": "test@example.com"})
+		assert response.status_code == status.HTTP_201_CREATED
+		
+		response = async_client.get("/api/v1/users")
+		assert response.status_code == status.HTTP_200_OK
+		assert [user["id"] for user in response.json()["items"]] == [1, 2, 3]
+
+	def test_export(self, async_client):
+		"""Тест потоковой выгрузки пользователей."""
+		response = async_client.get("/api/v1/users/export", params={"format": "csv"})
+		
+		assert response.status_code == 200
+		assert response.text.splitlines() == [
+			"id,name,email,balance,version", "1,Алиса,alice@example.com,100,0", "2,Боб,bob@example.com,250,0",
+		]
+
+	def test_transfer(self, async_client):
+		"""Тест перевода через асинхронный эндпоинт."""
+		response = async_client.post("/api/v1/transfer", json={
+			"from_user_id": 1,
+			"to_user_id": 2,
+			"amount": 50
+		})
+		
+		assert response.status_code == status.HTTP_200_OK
+		assert response.json()["from_user_balance"] == 50
+		assert response.json()["to_user_balance"] == 300
+
+	def test_transfer_errors(self, async_client):
+		"""Тест обработки доменных ошибок в асинхронных эндпоинтах."""
+		response = async_client.post("/api/v1/transfer", json={
+			"from_user_id": 1,
+			"to_user_id": 2,
+			"amount": 1000
+		})
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+		
+		response = async_client.post("/api/v1/users", json={"name": "Тест", "email": "alice@example.com"})
+		assert response.status_code == status.HTTP_409_CONFLICT
+
+	def test_transfer_batch(self, async_client):
+		"""Тест пакета переводов через асинхронный эндпоинт."""
+		response = async_client.post("/api/v1/transfer/batch", json=[
+			{"from_user_id": 1, "to_user_id": 2, "amount": 10},
+			{"from_user_id": 2, "to_user_id": 1, "amount": 20},
+		])
+		
+		assert response.status_code == status.HTTP_200_OK
+		assert [r["from_user_balance"] for r in response.json()["results"]] == [90, 240]
+
+	def test_transfer_history(self, async_client):
+		"""Тест истории переводов через асинхронный эндпоинт."""
+		async_client.post("/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 2, "amount": 10})
+		
+		response = async_client.get("/api/v1/users/2/transfers")
+		
+		assert response.status_code == status.HTTP_200_OK
+		assert [(t["from_user_id"], t["amount"]) for t in response.json()["items"]] == [(1, 10)]
+		assert async_client.get("/api/v1/users/999/transfers").status_code == status.HTTP_404_NOT_FOUND
+
+	def test_ids_out_of_range(self, async_client):
+		"""Тест что id и курсоры, не помещающиеся в int64, отклоняются с 422."""
+		too_big = 2**63
+		for url, params in (
+			(f"/api/v1/users/{too_big}", {}),
+			("/api/v1/users/1/transfers", {"before_id": too_big}),
+			("/api/v1/users", {"after_id": too_big}),
+			("/api/v1/users/search", {"q": "тест", "after_id": too_big}),
+		):
+			assert async_client.get(url, params=params).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+	def test_transfer_idempotency_key(self, async_client):
+		"""Тест повтора перевода с ключом идемпотентности через асинхронный эндпоинт."""
+		headers = {"Idempotency-Key": uuid.uuid4().hex}
+		transfer = {"from_user_id": 1, "to_user_id": 2, "amount": 10}
+		
+		response = async_client.post("/api/v1/transfer", json=transfer, headers=headers)
+		retry = async_client.post("/api/v1/transfer", json=transfer, headers=headers)
+		
+		assert retry.json() == response.json()
+		assert retry.json()["from_user_balance"] == 90
+		assert retry.headers["Idempotent-Replayed"] == "true"
+		assert retry.headers["ETag"] == response.headers["ETag"]
@@ -0,0 +1,160 @@
+"""
+Тесты для переполнения балансов: хранилища держат балансы в int64.
+"""
+
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import transfers
+from app.core.exceptions import BalanceOverflowError
+from app.dependencies.user_dependencies import get_user_repository
+from app.main import app
+from app.models.user import MAX_BALANCE
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+@pytest.fixture(params=["memory", "columnar"])
+def repository(request):
+	"""
+	Фикстура для репозиториев с Алисой, Бобом и почти полным счетом Кэрол.
+	"""
+	repo = InMemoryUserRepository() if request.param == "memory" else ColumnarUserRepository()
+	repo.create("Кэрол", "carol@example.com", MAX_BALANCE - 50)
+	return repo
+
+
+def _balances(repo) -> list[int]:
+	"""Возвращает балансы пользователей по возрастанию id."""
+	return [user.balance for user in repo.list()]
+
+
+class TestBalanceOverflow:
+	"""Тесты для отказа переводов, после которых баланс получателя не помещается в int64."""
+
+	def test_transfer(self, repository):
+		"""Тест что перевод отклоняется до изменения балансов."""
+		before = _balances(repository)
+		with pytest.raises(BalanceOverflowError):
+			repository.transfer(1, 3, 51)
+
+		assert _balances(repository) == before
+		assert repository.stats().total_balance == sum(before)
+		repository.transfer(1, 3, 50)
+		assert repository.get_by_id(3).balance == MAX_BALANCE
+
+	def test_transfer_batch_rollback(self, repository):
+		"""Тест что пакет с переполнением откатывается целиком."""
+		before = _balances(repository)
+		with pytest.raises(BalanceOverflowError):
+			repository.transfer_batch([(2, 1, 10), (1, 3, 60)])
+
+		assert _balances(repository) == before
+
+	def test_apply_transfers(self, repository):
+		"""Тест что в пакете независимых переводов отклоняется только переполняющий перевод."""
+		results = repository.apply_transfers([(1, 3, 60), (1, 2, 10), (2, 3, 50)])
+
+		assert isinstance(results[0], BalanceOverflowError)
+		assert results[2][1].balance == MAX_BALANCE
+		assert _balances(repository) == [90, 210, MAX_BALANCE]
+		assert repository.stats().total_balance == sum(_balances(repository))
+
+	def test_checkpoint(self, tmp_path):
+		"""Тест что контрольная точка пишется, когда баланс дошел до предела."""
+		repo = InMemoryUserRepository()
+		repo.create("Кэрол", "carol@example.com", MAX_BALANCE - 50)
+		repo.transfer(1, 3, 50)
+		with pytest.raises(BalanceOverflowError):
+			repo.transfer(2, 3, 1)
+
+		repo.checkpoint(str(tmp_path / "users.snapshot"))
+
+	def test_endpoint(self, repository):
+		"""Тест что переполнение возвращает 400, а не 500."""
+		overflow_app = FastAPI()
+		overflow_app.include_router(transfers.router, prefix="/api/v1/transfer")
+		overflow_app.dependency_overrides[get_user_repository] = lambda: repository
+		for exc_class, handler in app.exception_handlers.items():
+			overflow_app.add_exception_handler(exc_class, handler)
+
+		response = TestClient(overflow_app).post(
+			"/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 3, "amount": 100}
+		)
+
+		assert response.status_code == 400
+		assert response.json() == {"detail": "Баланс получателя превысит допустимый предел"}
+
+
+class TestSharedMemoryTotalBalance:
+	"""Тесты для суммы балансов в int64 заголовка сегмента."""
+
+	def test_create_rejected(self, tmp_path):
+		"""Тест что создание, после которого сумма балансов не помещается в int64, отклоняется."""
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		try:
+			with pytest.raises(BalanceOverflowError):
+				repo.create("Кэрол", "carol@example.com", MAX_BALANCE)
+			with pytest.raises(BalanceOverflowError):
+				repo.create_many([
+					("Кэрол", "carol@example.com", MAX_BALANCE - 350), ("Дэйв", "dave@example.com", 1)
+				])
+
+			assert repo.stats().total_balance == 350
+			assert repo.create("Кэрол", "carol@example.com", MAX_BALANCE - 350).id == 3
+			assert repo.transfer(2, 3, 250)[1].balance == MAX_BALANCE - 100
+		finally:
+			repo.close()
+			repo.unlink()
+
+
+class TestSQLiteOverflow:
+	"""Тесты для балансов и агрегатов SQLite, которые при переполнении стали бы REAL."""
+
+	@pytest.fixture
+	def sqlite_repository(self, tmp_path):
+		"""
+		Фикстура для базы, где баланс Боба уже у предела (например, записан в обход приложения).
+		"""
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		repo._connection().execute("UPDATE users SET balance = ? WHERE id = 2", (MAX_BALANCE - 50,))
+		yield repo
+		repo.close()
+
+	def test_transfer(self, sqlite_repository):
+		"""Тест что зачисление сверх int64 отклоняется, а баланс остается целым."""
+		with pytest.raises(BalanceOverflowError):
+			sqlite_repository.transfer(1, 2, 51)
+		with pytest.raises(BalanceOverflowError):
+			sqlite_repository.transfer(1, 2, 51, expected_version=0)
+		with pytest.raises(BalanceOverflowError):
+			sqlite_repository.transfer_batch([(1, 2, 10), (1, 2, 50)])
+		results = sqlite_repository.apply_transfers([(1, 2, 60), (1, 2, 50)])
+
+		assert isinstance(results[0], BalanceOverflowError)
+		assert [(user.balance, user.version) for user in sqlite_repository.list()] == [
+			(50, 1), (MAX_BALANCE, 1),
+		]
+		column_type = sqlite_repository._connection().execute("SELECT typeof(balance) FROM users WHERE id = 2")
+		assert column_type.fetchone() == ("integer",)
+
+	def test_create_total_balance(self, tmp_path):
+		"""Тест что пользователь, с которым сумма балансов не поместится в int64, не создается."""
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		with pytest.raises(BalanceOverflowError):
+			repo.create("Кэрол", "carol@example.com", MAX_BALANCE)
+		with pytest.raises(BalanceOverflowError):
+			repo.create_many([
+				("Кэрол", "carol@example.com", MAX_BALANCE - 350), ("Дэйв", "dave@example.com", 1)
+			])
+
+		assert repo.stats().total_balance == 350
+		assert repo.create("Кэрол", "carol@example.com", MAX_BALANCE - 350).id == 3
+		repo.close()
@@ -0,0 +1,34 @@
+"""
+Тесты для сравнения результатов набора бенчмарков с базовой линией.
+"""
+
+import json
+
+from benchmarks.suite import compare, main
+
+
+def _report(**results: float) -> dict:
+	"""Создает отчет с заданным временем операции для случаев."""
+	return {"results": {name: {"ns_per_op": value, "min_ns_per_op": value, "ops": 1} for name, value in results.items()}}
+
+
+class TestBenchmarkCompare:
+	"""Тесты для сравнения результатов бенчмарков."""
+
+	def test_regression_above_threshold(self):
+		"""Тест что замедление больше порога считается регрессией."""
+		baseline = _report(create=1000, transfer=1000, list=1000)
+		current = _report(create=1300, transfer=1100, list=500, search=10)
+		
+		assert compare(baseline, current, threshold=0.2) == ["create"]
+		assert compare(baseline, current, threshold=0.05) == ["create", "transfer"]
+
+	def test_compare_command_exit_code(self, tmp_path):
+		"""Тест кода завершения команды compare."""
+		baseline = tmp_path / "baseline.json"
+		current = tmp_path / "current.json"
+		baseline.write_text(json.dumps(_report(create=1000)))
+		current.write_text(json.dumps(_report(create=1500)))
+		
+		assert main(["compare", str(baseline), str(current)]) == 1
+		assert main(["compare", str(baseline), str(current), "--threshold", "0.6"]) == 0
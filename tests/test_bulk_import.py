@@ -0,0 +1,160 @@
+"""
+Тесты для массового импорта пользователей из NDJSON.
+"""
+
+import uuid
+
+import pytest
+from app.core.exceptions import RepositoryFullError
+from app.core.ndjson import iter_lines
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+from app.services.bulk_import import import_users
+from app.services.user_service import UserService
+
+
+async def _chunks(*chunks: bytes):
+	"""Отдает куски тела запроса."""
+	for chunk in chunks:
+		yield chunk
+
+
+async def _lines(chunks: tuple, max_line_bytes: int = 100) -> list:
+	"""Собирает строки потока в список."""
+	return [line async for line in iter_lines(_chunks(*chunks), max_line_bytes)]
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+class TestNDJSONLines:
+	"""Тесты для разбиения потока NDJSON на строки."""
+
+	@pytest.mark.asyncio
+	async def test_lines_across_chunks(self):
+		"""Тест строк, разорванных между кусками, и строки без перевода в конце."""
+		assert await _lines((b'{"a"', b':1}\n{"b":2}\n\n{', b'"c":3}')) == [
+			(1, b'{"a":1}'), (2, b'{"b":2}'), (3, b""), (4, b'{"c":3}'),
+		]
+
+	@pytest.mark.asyncio
+	async def test_long_line_skipped(self):
+		"""Тест что слишком длинная строка не накапливается, а следующие читаются."""
+		assert await _lines((b"x" * 6, b"x" * 6, b"\nok\n", b"y" * 20), max_line_bytes=10) == [
+			(1, None), (2, b"ok"), (3, None),
+		]
+
+
+class TestRepositoryCreateMany:
+	"""Тесты для пакетного создания пользователей в репозиториях."""
+
+	def test_create_many(self, repository):
+		"""Тест пакета с занятым email и повтором email внутри пакета."""
+		results = repository.create_many([
+			("Кэрол", "carol@example.com", 10),
+			("Алиса", "ALICE@example.com", 0),
+			("Дэйв", "dave@example.com", 20),
+			("Кэрол 2", "Carol@Example.com", 0),
+		])
+		
+		assert [user.id if user else None for user in results] == [3, None, 4, None]
+		assert repository.get_by_email("dave@example.com").balance == 20
+		assert len(repository.list()) == 4
+
+	def test_create_many_full(self, tmp_path):
+		"""Тест что пакет, не помещающийся в разделяемую память, не создается целиком."""
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=4, lock_path=str(tmp_path / "users.lock")
+		)
+		try:
+			with pytest.raises(RepositoryFullError):
+				repo.create_many([(f"u{i}", f"u{i}@example.com", 0) for i in range(3)])
+			assert len(repo.list()) == 2
+			assert len(repo.create_many([("u", "u@example.com", 0), ("a", "alice@example.com", 0)])) == 2
+		finally:
+			repo.close()
+			repo.unlink()
+
+	def test_create_many_replayed_from_wal(self, tmp_path):
+		"""Тест что пакет попадает в журнал предзаписи."""
+		path = str(tmp_path / "users.wal")
+		repo = InMemoryUserRepository(wal=WriteAheadLog(path))
+		repo.create_many([("Кэрол", "carol@example.com", 10), ("Дэйв", "dave@example.com", 20)])
+		repo.wal.close()
+		
+		restored = InMemoryUserRepository(wal=WriteAheadLog(path))
+		assert [user.email for user in restored.list()][2:] == ["carol@example.com", "dave@example.com"]
+		restored.wal.close()
+
+
+class TestImportUsers:
+	"""Тесты для импорта пользователей пакетами."""
+
+	@pytest.mark.asyncio
+	async def test_batches_and_errors(self, user_repository):
+		"""Тест пакетов и ограничения количества ошибок в итоге."""
+		batches = []
+
+		service = UserService(user_repository)
+
+		async def create_batch(users):
+			batches.append(len(users))
+			return service.create_users(users)
+
+		body = b"".join(
+			b'{"name": "u", "email": "user%d@example.com"}\n' % (i % 5) for i in range(12)
+		) + b"oops\n"
+		report = await import_users(_chunks(body), create_batch, batch_size=5, max_line_bytes=1024, max_errors=3)
+		
+		assert batches == [5, 5, 2]
+		assert (report.created, report.failed) == (5, 8)
+		assert [error["line"] for error in report.errors] == [6, 7, 8]
+		assert report.errors_truncated
+
+
+class TestBulkEndpoint:
+	"""Тесты для эндпоинта массового импорта."""
+
+	def test_bulk_import(self, client):
+		"""Тест импорта с ошибками отдельных строк."""
+		prefix = uuid.uuid4().hex[:8]
+		body = "\n".join([
+			f'{{"name": "Первый", "email": "{prefix}-1@example.com", "balance": 5}}',
+			'{"name": "Алиса", "email": "alice@example.com"}',
+			"не json",
+			f'{{"name": "", "email": "{prefix}-2@example.com"}}',
+			f'{{"name": "Второй", "email": "{prefix}-3@example.com"}}',
+		]).encode()
+		
+		response = client.post(
+			"/api/v1/users/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+		)
+		
+		assert response.status_code == 200
+		data = response.json()
+		assert (data["created"], data["failed"], data["errors_truncated"]) == (2, 3, False)
+		assert [error["line"] for error in data["errors"]] == [2, 3, 4]
+		assert data["errors"][0]["detail"] == "Email уже используется"
+		assert data["errors"][2]["detail"].startswith("name:")
@@ -0,0 +1,95 @@
+"""
+Тесты для колоночного репозитория пользователей.
+"""
+
+import pytest
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.core.exceptions import (
+	UserNotFoundError, SelfTransferError,
+	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError
+)
+
+
+@pytest.fixture
+def columnar_repository():
+	"""
+	Фикстура для колоночного репозитория (с Алисой и Бобом).
+	"""
+	return ColumnarUserRepository()
+
+
+class TestColumnarUserRepository:
+	"""Тесты для колоночного репозитория пользователей."""
+
+	def test_init_with_test_data(self, columnar_repository):
+		"""Тест инициализации с тестовыми данными."""
+		users = columnar_repository.list()
+		assert [(u.id, u.name, u.email, u.balance) for u in users] == [
+			(1, "Алиса", "alice@example.com", 100),
+			(2, "Боб", "bob@example.com", 250),
+		]
+
+	def test_create_and_lookup_many(self, columnar_repository):
+		"""Тест создания и поиска после многократного роста хеш-таблицы email."""
+		for i in range(1000):
+			columnar_repository.create(f"Пользователь{i}", f"User{i}@Example.com", i)
+		
+		for i in range(1000):
+			user = columnar_repository.get_by_email(f"user{i}@example.com")
+			assert user is not None
+			assert user.id == i + 3
+			assert user.name == f"Пользователь{i}"
+			assert user.email == f"User{i}@Example.com"
+			assert columnar_repository.get_by_id(user.id) == user
+		
+		assert columnar_repository.get_by_email("missing@example.com") is None
+		assert columnar_repository.get_by_id(0) is None
+		assert columnar_repository.get_by_id(1003) is None
+
+	def test_create_duplicate_email(self, columnar_repository):
+		"""Тест создания пользователя с существующим email в другом регистре."""
+		with pytest.raises(EmailAlreadyExistsError):
+			columnar_repository.create("Тест", "ALICE@example.com", 0)
+
+	def test_list_page(self, columnar_repository):
+		"""Тест постраничной выборки по курсору."""
+		for i in range(3):
+			columnar_repository.create(f"Тест{i}", f"page{i}@example.com", 0)
+		
+		assert [u.id for u in columnar_repository.list_page(limit=2)] == [1, 2]
+		assert [u.id for u in columnar_repository.list_page(limit=2, after_id=2)] == [3, 4]
+		assert [u.id for u in columnar_repository.list_page(limit=2, after_id=4)] == [5]
+		assert columnar_repository.list_page(limit=2, after_id=5) == []
+
+	def test_transfer_success(self, columnar_repository):
+		"""Тест успешного перевода."""
+		from_user, to_user = columnar_repository.transfer(1, 2, 50)
+		
+		assert from_user.balance == 50
+		assert to_user.balance == 300
+		assert columnar_repository.get_by_id(1).balance == 50
+		assert columnar_repository.get_by_id(2).balance == 300
+
+	def test_transfer_errors(self, columnar_repository):
+		"""Тест ошибок перевода без изменения балансов."""
+		with pytest.raises(UserNotFoundError):
+			columnar_repository.transfer(999, 2, 50)
+		with pytest.raises(SelfTransferError):
+			columnar_repository.transfer(1, 1, 50)
+		with pytest.raises(InsufficientFundsError):
+			columnar_repository.transfer(1, 2, 1000)
+		with pytest.raises(InvalidAmountError):
+			columnar_repository.transfer(1, 2, 0)
+		
+		assert columnar_repository.get_by_id(1).balance == 100
+		assert columnar_repository.get_by_id(2).balance == 250
+
+	def test_transfer_batch_rollback(self, columnar_repository):
+		"""Тест что при ошибке в пакете не применяется ни один перевод."""
+		assert columnar_repository.transfer_batch([(1, 2, 10), (2, 1, 5)]) == [(90, 260), (255, 95)]
+		
+		with pytest.raises(InsufficientFundsError):
+			columnar_repository.transfer_batch([(1, 2, 50), (1, 2, 50)])
+		
+		assert columnar_repository.get_by_id(1).balance == 95
+		assert columnar_repository.get_by_id(2).balance == 255
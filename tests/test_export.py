@@ -0,0 +1,118 @@
+"""
+Тесты для потоковой выгрузки пользователей.
+"""
+
+import csv
+import io
+import uuid
+
+import orjson
+import pytest
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.services.user_export import encode_users
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+class TestRepositoryExport:
+	"""Тесты для согласованного среза пользователей в репозиториях."""
+
+	def test_export_is_point_in_time(self, repository):
+		"""Тест что изменения после вызова export не попадают в выгрузку."""
+		repository.create("Кэрол", "carol@example.com", 10)
+		repository.transfer(1, 3, 30)
+		
+		users = repository.export()
+		repository.transfer(2, 1, 200)
+		repository.transfer(3, 2, 40)
+		repository.create("Дэйв", "dave@example.com", 5)
+		
+		assert [(user.id, user.balance) for user in users] == [(1, 70), (2, 250), (3, 40)]
+		assert [user.balance for user in repository.list()] == [270, 90, 0, 5]
+
+	def test_export_does_not_change_live_users(self, user_repository):
+		"""Тест что выгрузка не подменяет балансы пользователей в индексах."""
+		users = user_repository.export()
+		user_repository.transfer(1, 2, 10)
+		
+		exported = list(users)
+		assert exported[0].balance == 100
+		assert user_repository.get_by_id(1).balance == 90
+
+
+class TestEncodeUsers:
+	"""Тесты для кодирования выгрузки."""
+
+	def test_ndjson_chunks(self, user_repository):
+		"""Тест кусков NDJSON по chunk_rows пользователей."""
+		user_repository.create("Кэрол", "carol@example.com", 10)
+		
+		chunks = list(encode_users(user_repository.export(), "ndjson", chunk_rows=2))
+		
+		assert len(chunks) == 2
+		lines = b"".join(chunks).splitlines()
+		assert [orjson.loads(line)["email"] for line in lines] == [
+			"alice@example.com", "bob@example.com", "carol@example.com",
+		]
+
+	def test_csv_quoting(self, user_repository):
+		"""Тест CSV с заголовком и экранированием запятых и кавычек."""
+		user_repository.create('Кэрол, "К"', "carol@example.com", 10)
+		
+		body = b"".join(encode_users(user_repository.export(), "csv", chunk_rows=1000)).decode()
+		
+		rows = list(csv.reader(io.StringIO(body)))
+		assert rows[0] == ["id", "name", "email", "balance", "version"]
+		assert rows[3] == ["3", 'Кэрол, "К"', "carol@example.com", "10", "0"]
+
+
+class TestExportEndpoint:
+	"""Тесты для эндпоинта выгрузки."""
+
+	def test_export_ndjson(self, client):
+		"""Тест выгрузки NDJSON по умолчанию."""
+		response = client.get("/api/v1/users/export")
+		
+		assert response.status_code == 200
+		assert response.headers["content-type"] == "application/x-ndjson"
+		users = [orjson.loads(line) for line in response.content.splitlines()]
+		assert users[0]["email"] == "alice@example.com"
+		assert set(users[0]) == {"id", "name", "email", "balance", "version"}
+
+	def test_export_csv(self, client):
+		"""Тест выгрузки CSV."""
+		response = client.get("/api/v1/users/export", params={"format": "csv"})
+		
+		assert response.status_code == 200
+		assert response.headers["content-type"].startswith("text/csv")
+		assert 'filename="users.csv"' in response.headers["content-disposition"]
+		assert response.text.splitlines()[:2] == ["id,name,email,balance,version", "1,Алиса,alice@example.com,100,0"]
+
+	def test_export_unknown_format(self, client):
+		"""Тест неизвестного формата выгрузки."""
+		response = client.get("/api/v1/users/export", params={"format": "xml"})
+		
+		assert response.status_code == 422
@@ -0,0 +1,211 @@
+"""
+Тесты для идемпотентности запросов по Idempotency-Key.
+"""
+
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi import status
+from fastapi.responses import Response
+
+from app.core.exceptions import IdempotencyKeyReusedError, InsufficientFundsError
+from app.core.idempotency import REPLAYED_HEADER, IdempotencyCache
+
+
+def _response(body: bytes = b"{}") -> Response:
+	"""Создает ответ с заданным телом."""
+	return Response(content=body, media_type="application/json")
+
+
+class TestIdempotencyCache:
+	"""Тесты для кеша ответов идемпотентных запросов."""
+
+	def test_replay(self):
+		"""Тест что повтор получает сохраненный ответ без выполнения."""
+		cache = IdempotencyCache()
+		calls = []
+		
+		def run():
+			calls.append(1)
+			return _response(b'{"n": 1}')
+		
+		first = cache.execute("key", "params", run)
+		second = cache.execute("key", "params", run)
+		
+		assert len(calls) == 1
+		assert REPLAYED_HEADER.lower() not in first.headers
+		assert second.body == b'{"n": 1}'
+		assert second.headers[REPLAYED_HEADER] == "true"
+
+	def test_replay_headers(self):
+		"""Тест что повтор отдает заголовки ответа, кроме hop-by-hop и длины тела."""
+		cache = IdempotencyCache()
+		response = _response(b'{"n": 1}')
+		response.headers["ETag"] = '"3"'
+		response.headers["Connection"] = "close"
+		cache.execute("key", "params", lambda: response)
+		
+		replay = cache.execute("key", "params", _response)
+		
+		assert replay.headers["etag"] == '"3"'
+		assert replay.headers["content-type"] == "application/json"
+		assert replay.headers["content-length"] == "8"
+		assert "connection" not in replay.headers
+		assert [name for name, _ in replay.raw_headers].count(b"content-type") == 1
+
+	def test_reused_with_other_params(self):
+		"""Тест повторного использования ключа с другими параметрами."""
+		cache = IdempotencyCache()
+		cache.execute("key", "params", _response)
+		
+		with pytest.raises(IdempotencyKeyReusedError):
+			cache.execute("key", "other", _response)
+
+	def test_duplicate_waits_for_running_request(self):
+		"""Тест что дубликат ждет выполняющийся запрос, а не выполняется сам."""
+		cache = IdempotencyCache()
+		started = threading.Event()
+		release = threading.Event()
+		calls = []
+		
+		def run():
+			calls.append(1)
+			started.set()
+			release.wait()
+			return _response(b"first")
+		
+		results = []
+		first = threading.Thread(target=lambda: results.append(cache.execute("key", "params", run)))
+		first.start()
+		started.wait()
+		duplicate = threading.Thread(target=lambda: results.append(cache.execute("key", "params", run)))
+		duplicate.start()
+		time.sleep(0.05)
+		assert len(results) == 0
+		
+		release.set()
+		first.join()
+		duplicate.join()
+		assert len(calls) == 1
+		assert [r.body for r in results] == [b"first", b"first"]
+
+	def test_failure_releases_key(self):
+		"""Тест что после ошибки ключ освобождается и повтор выполняется заново."""
+		cache = IdempotencyCache()
+		
+		def fail():
+			raise InsufficientFundsError()
+		
+		with pytest.raises(InsufficientFundsError):
+			cache.execute("key", "params", fail)
+		
+		assert cache.execute("key", "params", lambda: _response(b"ok")).body == b"ok"
+		assert len(cache) == 1
+
+	def test_lru_eviction_by_count(self):
+		"""Тест вытеснения давно не использованных записей по количеству."""
+		cache = IdempotencyCache(max_entries=2)
+		cache.execute("a", 1, _response)
+		cache.execute("b", 1, _response)
+		cache.execute("a", 1, _response)
+		cache.execute("c", 1, _response)
+		
+		assert len(cache) == 2
+		calls = []
+		cache.execute("b", 1, lambda: calls.append(1) or _response())
+		cache.execute("c", 1, lambda: calls.append(1) or _response())
+		assert len(calls) == 1
+
+	def test_eviction_by_size(self):
+		"""Тест ограничения суммарного размера ответов."""
+		cache = IdempotencyCache(max_bytes=4096)
+		for i in range(10):
+			cache.execute(i, 1, lambda: _response(b"x" * 1000))
+		
+		assert cache.size_bytes <= 4096
+		assert 0 < len(cache) < 10
+		
+		cache.execute("big", 1, lambda: _response(b"x" * 10_000))
+		assert cache.size_bytes <= 4096
+
+	def test_ttl_expiry(self):
+		"""Тест истечения срока хранения ответа."""
+		cache = IdempotencyCache(ttl=0.01)
+		cache.execute("key", "params", _response)
+		time.sleep(0.02)
+		
+		calls = []
+		cache.execute("key", "other", lambda: calls.append(1) or _response())
+		assert calls == [1]
+
+
+class TestIdempotencyEndpoints:
+	"""Тесты для заголовка Idempotency-Key в эндпоинтах."""
+
+	def _create_user(self, client, balance):
+		"""Создает пользователя через API и возвращает его ID."""
+		response = client.post("/api/v1/users", json={
+			"name": "Идемпотентность",
+			"email": f"{uuid.uuid4().hex}@example.com",
+			"balance": balance
+		})
+		return response.json()["id"]
+
+	def test_transfer_retry_is_not_applied_twice(self, client):
+		"""Тест что повтор перевода с тем же ключом не списывает деньги второй раз."""
+		first = self._create_user(client, 100)
+		second = self._create_user(client, 0)
+		headers = {"Idempotency-Key": uuid.uuid4().hex}
+		transfer = {"from_user_id": first, "to_user_id": second, "amount": 30}
+		
+		response = client.post("/api/v1/transfer", json=transfer, headers=headers)
+		retry = client.post("/api/v1/transfer", json=transfer, headers=headers)
+		
+		assert response.status_code == retry.status_code == status.HTTP_200_OK
+		assert retry.json() == response.json()
+		assert response.json()["from_user_balance"] == 70
+		assert retry.headers[REPLAYED_HEADER] == "true"
+		assert retry.headers["ETag"] == response.headers["ETag"]
+		
+		other = client.post("/api/v1/transfer", json=transfer, headers={"Idempotency-Key": uuid.uuid4().hex})
+		assert other.json()["from_user_balance"] == 40
+
+	def test_key_reused_with_other_payload(self, client):
+		"""Тест повторного использования ключа для другого перевода."""
+		first = self._create_user(client, 100)
+		second = self._create_user(client, 0)
+		headers = {"Idempotency-Key": uuid.uuid4().hex}
+		
+		client.post("/api/v1/transfer", json={"from_user_id": first, "to_user_id": second, "amount": 1}, headers=headers)
+		response = client.post(
+			"/api/v1/transfer", json={"from_user_id": first, "to_user_id": second, "amount": 2}, headers=headers
+		)
+		
+		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+	def test_create_user_retry(self, client):
+		"""Тест что повтор создания пользователя возвращает того же пользователя."""
+		headers = {"Idempotency-Key": uuid.uuid4().hex}
+		payload = {"name": "Повтор", "email": f"{uuid.uuid4().hex}@example.com"}
+		
+		response = client.post("/api/v1/users", json=payload, headers=headers)
+		retry = client.post("/api/v1/users", json=payload, headers=headers)
+		
+		assert response.status_code == retry.status_code == status.HTTP_201_CREATED
+		assert retry.json() == response.json()
+
+	def test_batch_retry(self, client):
+		"""Тест повтора пакета переводов с тем же ключом."""
+		first = self._create_user(client, 100)
+		second = self._create_user(client, 0)
+		headers = {"Idempotency-Key": uuid.uuid4().hex}
+		batch = [{"from_user_id": first, "to_user_id": second, "amount": 10}]
+		
+		client.post("/api/v1/transfer/batch", json=batch, headers=headers)
+		retry = client.post("/api/v1/transfer/batch", json=batch, headers=headers)
+		
+		assert retry.json()["results"][0]["from_user_balance"] == 90
+		assert client.get(f"/api/v1/users/{first}/transfers").json()["items"][0]["amount"] == 10
+		assert len(client.get(f"/api/v1/users/{first}/transfers").json()["items"]) == 1
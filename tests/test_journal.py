@@ -0,0 +1,49 @@
+"""
+Тесты для журнала отмены изменений.
+"""
+
+import pytest
+from app.models.user import User
+from app.repositories.journal import UndoJournal
+
+
+class TestUndoJournal:
+	"""Тесты для журнала отмены изменений."""
+
+	def test_commit_keeps_changes(self):
+		"""Тест что при успешном выходе изменения сохраняются."""
+		user = User(id=1, name="Алиса", email="alice@example.com", balance=100)
+
+		with UndoJournal() as journal:
+			journal.set(user, "balance", 50)
+
+		assert user.balance == 50
+
+	def test_rollback_on_error(self):
+		"""Тест отката всех изменений при исключении."""
+		alice = User(id=1, name="Алиса", email="alice@example.com", balance=100)
+		bob = User(id=2, name="Боб", email="bob@example.com", balance=250)
+
+		with pytest.raises(RuntimeError):
+			with UndoJournal() as journal:
+				journal.set(alice, "balance", 50)
+				journal.set(bob, "balance", 300)
+				raise RuntimeError()
+
+		assert alice.balance == 100
+		assert bob.balance == 250
+
+	def test_rollback_in_reverse_order(self):
+		"""Тест что повторные изменения одного поля откатываются к исходному значению."""
+		user = User(id=1, name="Алиса", email="alice@example.com", balance=100)
+		index = {}
+
+		journal = UndoJournal()
+		journal.set(user, "balance", 90)
+		journal.set(user, "balance", 80)
+		index[user.id] = user
+		journal.on_rollback(index.pop, user.id)
+		journal.rollback()
+
+		assert user.balance == 100
+		assert index == {}
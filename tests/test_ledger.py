@@ -0,0 +1,95 @@
+"""
+Тесты для журнала переводов.
+"""
+
+import pytest
+from app.core.exceptions import InsufficientFundsError, UserNotFoundError
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.ledger import TransferLedger
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+class TestTransferLedger:
+	"""Тесты для журнала переводов."""
+
+	def test_ids_are_sequential(self):
+		"""Тест что номера записей выдаются подряд, начиная с 1."""
+		ledger = TransferLedger()
+		
+		assert ledger.append(1, 2, 10) == 1
+		assert ledger.extend([(2, 3, 5), (3, 1, 1)]) == 3
+		assert len(ledger) == 3
+		
+		transfer = ledger.get(2)
+		assert (transfer.id, transfer.from_user_id, transfer.to_user_id, transfer.amount) == (2, 2, 3, 5)
+
+	def test_page_backwards(self):
+		"""Тест чтения истории пользователя с конца по курсору."""
+		ledger = TransferLedger()
+		for i in range(10):
+			# Пользователь 1 участвует в каждой второй записи
+			ledger.append(1 if i % 2 == 0 else 2, 3, i)
+		
+		assert [t.id for t in ledger.page(1, limit=2)] == [9, 7]
+		assert [t.id for t in ledger.page(1, limit=2, before_id=7)] == [5, 3]
+		assert [t.id for t in ledger.page(1, limit=2, before_id=3)] == [1]
+		assert ledger.page(1, limit=2, before_id=1) == []
+		assert [t.id for t in ledger.page(3, limit=3)] == [10, 9, 8]
+		assert ledger.page(42, limit=10) == []
+
+	def test_continues_after_snapshot(self):
+		"""Тест что журнал, продолжающий переводы снимка, нумерует записи после них."""
+		ledger = TransferLedger(count=5, volume=100)
+		
+		assert ledger.append(1, 2, 10) == 6
+		assert ledger.extend([(2, 1, 5)]) == 7
+		assert (len(ledger), ledger.volume) == (7, 115)
+		assert ledger.get(7).amount == 5
+		assert [t.id for t in ledger.page(1, limit=10)] == [7, 6]
+		assert [t.id for t in ledger.page(1, limit=10, before_id=7)] == [6]
+		assert ledger.page(1, limit=10, before_id=6) == []
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	else:
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+
+
+class TestRepositoryTransferHistory:
+	"""Тесты для истории переводов в репозиториях."""
+
+	def test_transfers_are_recorded(self, repository):
+		"""Тест что переводы и пакеты попадают в историю обоих участников."""
+		repository.transfer(1, 2, 10)
+		repository.transfer_batch([(2, 1, 5), (1, 2, 1)])
+		
+		history = repository.list_transfers(1, limit=10)
+		assert [(t.from_user_id, t.to_user_id, t.amount) for t in history] == [(1, 2, 1), (2, 1, 5), (1, 2, 10)]
+		assert [t.id for t in history] == sorted((t.id for t in history), reverse=True)
+		assert [t.id for t in repository.list_transfers(2, limit=10)] == [t.id for t in history]
+		assert [t.id for t in repository.list_transfers(1, limit=1, before_id=history[0].id)] == [history[1].id]
+
+	def test_failed_transfers_are_not_recorded(self, repository):
+		"""Тест что отклоненные переводы и пакеты не попадают в историю."""
+		with pytest.raises(InsufficientFundsError):
+			repository.transfer(1, 2, 1000)
+		with pytest.raises(InsufficientFundsError):
+			repository.transfer_batch([(1, 2, 60), (1, 2, 60)])
+		
+		assert repository.list_transfers(1, limit=10) == []
+
+	def test_unknown_user(self, repository):
+		"""Тест истории несуществующего пользователя."""
+		with pytest.raises(UserNotFoundError):
+			repository.list_transfers(999, limit=10)
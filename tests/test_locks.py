@@ -0,0 +1,51 @@
+"""
+Тесты для блокировок счетов.
+"""
+
+import threading
+
+import pytest
+from app.repositories.locks import StripedLockManager
+
+
+class TestStripedLockManager:
+	"""Тесты для менеджера блокировок с полосами."""
+
+	def test_invalid_stripes(self):
+		"""Тест что количество полос должно быть положительным."""
+		with pytest.raises(ValueError):
+			StripedLockManager(0)
+
+	def test_same_stripe_acquired_once(self):
+		"""Тест что счета из одной полосы не приводят к повторному захвату."""
+		locks = StripedLockManager(4)
+
+		# 1 и 5 попадают в одну полосу - блокировка не должна зависнуть
+		with locks.acquire(1, 5):
+			pass
+
+	def test_locks_released_on_error(self):
+		"""Тест освобождения блокировок при исключении."""
+		locks = StripedLockManager(4)
+
+		with pytest.raises(RuntimeError):
+			with locks.acquire(1, 2):
+				raise RuntimeError()
+
+		with locks.acquire(1, 2):
+			pass
+
+	def test_unrelated_stripes_do_not_block(self):
+		"""Тест что счета из разных полос не блокируют друг друга."""
+		locks = StripedLockManager(4)
+		acquired = threading.Event()
+
+		def worker():
+			with locks.acquire(2, 3):
+				acquired.set()
+
+		with locks.acquire(1):
+			thread = threading.Thread(target=worker)
+			thread.start()
+			assert acquired.wait(timeout=5)
+		thread.join()
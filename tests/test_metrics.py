@@ -0,0 +1,100 @@
+"""
+Тесты для метрик и эндпоинта /metrics.
+"""
+
+import threading
+import time
+
+from app.core.metrics import Counter, Histogram, LOCK_WAIT
+from app.repositories.instrumented_user_repository import InstrumentedUserRepository
+from app.repositories.locks import StripedLockManager
+
+
+class TestMetrics:
+	"""Тесты для счетчиков и гистограмм."""
+
+	def test_counter_sums_thread_shards(self):
+		"""Тест что значения шардов разных потоков суммируются."""
+		counter = Counter("test_total", "Test counter.", ("kind",))
+
+		def worker():
+			for _ in range(1000):
+				counter.inc(("a",))
+
+		threads = [threading.Thread(target=worker) for _ in range(4)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		counter.inc(("b",), 2)
+		
+		assert counter.value(("a",)) == 4000
+		assert counter.render() == ['test_total{kind="a"} 4000', 'test_total{kind="b"} 2']
+
+	def test_histogram_render(self):
+		"""Тест текстового формата гистограммы: накопленные корзины, сумма и количество."""
+		histogram = Histogram("test_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0))
+		for value in (0.05, 0.1, 0.5, 2.0):
+			histogram.observe(value, ('/a"b',))
+		
+		assert histogram.count(('/a"b',)) == 4
+		assert histogram.render() == [
+			'test_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+			'test_seconds_bucket{route="/a\\"b",le="1"} 3',
+			'test_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+			'test_seconds_sum{route="/a\\"b"} 2.65',
+			'test_seconds_count{route="/a\\"b"} 4',
+		]
+
+	def test_lock_wait_only_when_contended(self):
+		"""Тест что ожидание учитывается только для занятой полосы."""
+		locks = StripedLockManager(4)
+		before = LOCK_WAIT.count(("thread",))
+		with locks.acquire(1, 2):
+			pass
+		assert LOCK_WAIT.count(("thread",)) == before
+
+		acquired = threading.Event()
+
+		def holder():
+			with locks.acquire(1):
+				acquired.set()
+				time.sleep(0.05)
+
+		thread = threading.Thread(target=holder)
+		thread.start()
+		acquired.wait()
+		with locks.acquire(1):
+			pass
+		thread.join()
+		
+		assert LOCK_WAIT.count(("thread",)) == before + 1
+
+	def test_instrumented_repository(self, user_repository):
+		"""Тест что обертка сохраняет поведение и атрибуты репозитория."""
+		repo = InstrumentedUserRepository(user_repository)
+		
+		assert repo.get_by_id(1).name == "Алиса"
+		assert repo.transfer(1, 2, 10)[0].balance == 90
+		assert repo.wal is None
+
+
+class TestMetricsEndpoint:
+	"""Тесты для эндпоинта /metrics."""
+
+	def test_metrics(self, client):
+		"""Тест задержек по шаблону маршрута и счетчиков ошибок."""
+		client.get("/api/v1/users/1/transfers")
+		client.post("/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 1, "amount": 1})
+		client.get("/missing")
+		
+		response = client.get("/metrics")
+		assert response.status_code == 200
+		assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+		text = response.text
+		assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/users/{user_id}/transfers",status="200"}' in text
+		assert 'route="/api/v1/transfer",status="400"' in text
+		assert 'route="unmatched",status="404"' in text
+		assert 'domain_errors_total{error="SelfTransferError"}' in text
+		assert 'repository_operation_duration_seconds_count{operation="list_transfers"}' in text
+		assert "# TYPE account_lock_wait_seconds histogram" in text
@@ -0,0 +1,116 @@
+"""
+Тесты для профилирования запросов.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import transfers, users
+from app.core.config import settings
+from app.core.middleware import ProfilingMiddleware
+from app.core.profiling import ProfileStore, RequestProfile
+from app.dependencies.user_dependencies import get_user_repository
+from app.main import app
+
+
+def _profiled_client(user_repository, store: ProfileStore, **options) -> TestClient:
+	"""Создает клиент приложения с профилированием поверх отдельного репозитория."""
+	profiled_app = FastAPI()
+	profiled_app.include_router(users.router, prefix="/api/v1/users")
+	profiled_app.include_router(transfers.router, prefix="/api/v1/transfer")
+	for exc_class, handler in app.exception_handlers.items():
+		profiled_app.add_exception_handler(exc_class, handler)
+	profiled_app.dependency_overrides[get_user_repository] = lambda: user_repository
+	profiled_app.add_middleware(ProfilingMiddleware, store=store, **options)
+	return TestClient(profiled_app)
+
+
+class TestProfilingMiddleware:
+	"""Тесты для middleware профилирования."""
+
+	def test_profile_by_debug_header(self, user_repository):
+		"""Тест профиля запроса с отладочным токеном: слои сервиса и репозитория."""
+		store = ProfileStore()
+		client = _profiled_client(user_repository, store, token="secret")
+		
+		response = client.post(
+			"/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 2, "amount": 10},
+			headers={"X-Debug-Profile": "secret"},
+		)
+		
+		assert response.status_code == 200
+		profile = store.get(int(response.headers["X-Profile-Id"]))
+		assert profile.method == "POST"
+		assert profile.path == "/api/v1/transfer"
+		assert profile.status_code == 200
+		# Синхронный эндпоинт выполнялся в пуле потоков, но попал в профиль
+		assert profile.phases["service"] > 0
+		assert profile.phases["repository"] > 0
+		assert profile.phases["dependencies_and_validation"] > 0
+		assert "function calls" in profile.report
+
+	def test_not_profiled_without_token(self, user_repository):
+		"""Тест что запросы без токена или с неверным токеном не профилируются."""
+		store = ProfileStore()
+		client = _profiled_client(user_repository, store, token="secret")
+		
+		response = client.get("/api/v1/users", headers={"X-Debug-Profile": "wrong"})
+		
+		assert response.status_code == 200
+		assert "X-Profile-Id" not in response.headers
+		assert store.list() == []
+
+	def test_sampling_and_ring(self, user_repository):
+		"""Тест выборки запросов и вытеснения старых профилей."""
+		store = ProfileStore(capacity=3)
+		client = _profiled_client(user_repository, store, sample_rate=1.0)
+		
+		for _ in range(5):
+			client.get("/api/v1/users")
+		
+		assert [profile.id for profile in store.list()] == [5, 4, 3]
+		assert store.get(1) is None
+
+
+class TestProfileStore:
+	"""Тесты для буфера профилей."""
+
+	def test_list_newest_first(self):
+		"""Тест порядка профилей и поиска по id."""
+		store = ProfileStore(capacity=2)
+		for _ in range(3):
+			store.add(RequestProfile(id=store.next_id(), method="GET", path="/", created_at=None))
+		
+		assert [profile.id for profile in store.list()] == [3, 2]
+		assert store.get(2).id == 2
+
+
+class TestDebugToken:
+	"""Тесты для доступа к отладочным эндпоинтам."""
+
+	@pytest.mark.asyncio
+	async def test_require_debug_token(self, monkeypatch):
+		"""Тест проверки отладочного токена."""
+		from app.core.exceptions import DebugAccessDeniedError
+		from app.dependencies.profiling_dependencies import require_debug_token
+		
+		monkeypatch.setattr(settings, "PROFILING_DEBUG_TOKEN", "secret")
+		await require_debug_token("secret")
+		with pytest.raises(DebugAccessDeniedError):
+			await require_debug_token("wrong")
+		with pytest.raises(DebugAccessDeniedError):
+			await require_debug_token(None)
+
+	@pytest.mark.asyncio
+	async def test_no_token_configured(self, monkeypatch):
+		"""Тест что без настроенного токена отладочные эндпоинты закрыты."""
+		from app.core.exceptions import DebugAccessDeniedError
+		from app.dependencies.profiling_dependencies import require_debug_token
+		
+		monkeypatch.setattr(settings, "PROFILING_DEBUG_TOKEN", None)
+		with pytest.raises(DebugAccessDeniedError):
+			await require_debug_token(None)
+		with pytest.raises(DebugAccessDeniedError):
+			await require_debug_token("")
+		assert TestClient(app).get("/debug/profiles").status_code == 404
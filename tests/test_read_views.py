@@ -0,0 +1,150 @@
+"""
+Тесты для согласованных представлений чтения (MVCC) в in-memory хранилищах.
+"""
+
+import gc
+import random
+import sys
+import threading
+
+import pytest
+
+from app.core.exceptions import InsufficientFundsError
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.read_views import ReadViews
+from app.repositories.snapshot import MappedSnapshot, SeedSnapshot
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+@pytest.fixture(params=["memory", "columnar"])
+def repository(request):
+	"""
+	Фикстура для in-memory репозиториев (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		return InMemoryUserRepository()
+	return ColumnarUserRepository()
+
+
+def _states(users) -> list[tuple[int, int, int]]:
+	"""Возвращает (id, баланс, версия) пользователей."""
+	return [(user.id, user.balance, user.version) for user in users]
+
+
+class TestReadViews:
+	"""Тесты для реестра закрепленных представлений."""
+
+	def test_preserve_first_state(self):
+		"""Тест что сохраняется только состояние до первого изменения после закрепления."""
+		views = ReadViews()
+		views.preserve(1, (10, 0))
+		first = views.pin()
+		views.preserve(1, (20, 1))
+		views.preserve(1, (30, 2))
+		second = views.pin()
+		views.preserve(1, (40, 3))
+
+		assert first == {1: (20, 1)}
+		assert second == {1: (40, 3)}
+
+	def test_release(self):
+		"""Тест что освобожденное представление больше не пополняется, а повторное освобождение безопасно."""
+		views = ReadViews()
+		view = views.pin()
+		views.release(view)
+		views.release(view)
+		views.preserve(1, (10, 0))
+
+		assert views.pinned == ()
+		assert view == {}
+
+
+class TestRepositoryReadViews:
+	"""Тесты для чтения из закрепленных представлений в репозиториях."""
+
+	def test_export_ignores_later_changes(self, repository):
+		"""Тест что выгрузка отдает состояние на момент вызова, а переводы во время обхода не ждут её."""
+		repository.transfer(1, 2, 10)
+		exported = repository.export()
+		first = next(exported)
+
+		# Выгрузка не держит блокировок: перевод в том же потоке не ждет её окончания
+		repository.transfer(2, 1, 50)
+		repository.transfer_batch([(1, 2, 5), (2, 1, 5)])
+		repository.apply_transfers([(2, 1, 1)])
+		repository.create("Кэрол", "carol@example.com", 10)
+
+		assert _states([first, *exported]) == [(1, 90, 1), (2, 260, 1)]
+		assert _states(repository.list()) == [(1, 141, 5), (2, 209, 5), (3, 10, 0)]
+
+	def test_nested_views(self, repository):
+		"""Тест что представления, закрепленные в разное время, видят каждое свое состояние."""
+		old = repository.export()
+		repository.transfer(1, 2, 10)
+		new = repository.export()
+		repository.transfer(1, 2, 10)
+
+		assert _states(new) == [(1, 90, 1), (2, 260, 1)]
+		assert _states(old) == [(1, 100, 0), (2, 250, 0)]
+		assert repository._read_views.pinned == ()
+
+	def test_rolled_back_batch(self, repository):
+		"""Тест что откат пакета во время выгрузки не меняет её."""
+		exported = repository.export()
+		with pytest.raises(InsufficientFundsError):
+			repository.transfer_batch([(1, 2, 50), (2, 1, 1000)])
+
+		assert _states(exported) == [(1, 100, 0), (2, 250, 0)]
+
+	def test_unstarted_export_released(self, repository):
+		"""Тест что выгрузка, которую не начали обходить, освобождает представление при сборке мусора."""
+		repository.export()
+		gc.collect()
+
+		assert repository._read_views.pinned == ()
+
+	def test_consistent_total_under_transfers(self, repository):
+		"""Тест что сумма балансов в списке сходится при параллельных переводах."""
+		for i in range(50):
+			repository.create(f"user{i}", f"user{i}@example.com", 100)
+		total = sum(user.balance for user in repository.list())
+		stop = threading.Event()
+
+		def transfers(seed: int) -> None:
+			rng = random.Random(seed)
+			while not stop.is_set():
+				from_id, to_id = rng.sample(range(1, 53), 2)
+				try:
+					repository.transfer(from_id, to_id, rng.randint(1, 30))
+				except InsufficientFundsError:
+					pass
+
+		interval = sys.getswitchinterval()
+		# Частое переключение потоков, чтобы чтение попадало между половинами перевода
+		sys.setswitchinterval(1e-6)
+		workers = [threading.Thread(target=transfers, args=(seed,)) for seed in range(4)]
+		for worker in workers:
+			worker.start()
+		try:
+			for _ in range(200):
+				assert sum(user.balance for user in repository.list()) == total
+		finally:
+			stop.set()
+			for worker in workers:
+				worker.join()
+			sys.setswitchinterval(interval)
+
+	def test_mapped_snapshot_rows(self, tmp_path):
+		"""Тест что пользователи снимка, загруженные после закрепления, выгружаются в прежнем состоянии."""
+		path = str(tmp_path / "users.snap")
+		InMemoryUserRepository(snapshot=SeedSnapshot([
+			(f"user{i}", f"user{i}@example.com", 100) for i in range(5)
+		])).checkpoint(path)
+		repo = InMemoryUserRepository(snapshot=MappedSnapshot(path))
+		repo.transfer(1, 2, 10)
+		exported = repo.export()
+		repo.transfer(2, 3, 50)
+		repo.transfer(4, 5, 1)
+
+		assert [user.balance for user in exported] == [90, 110, 100, 100, 100]
+		assert [user.balance for user in repo.list()] == [90, 60, 150, 99, 101]
@@ -2,6 +2,9 @@
 Тесты для репозитория пользователей.
 """
 
+import random
+import threading
+
 import pytest
 from app.repositories.user_repository import InMemoryUserRepository
 from app.core.exceptions import (
@@ -88,6 +91,29 @@ class TestUserRepository:
 		with pytest.raises(EmailAlreadyExistsError):
 			user_repository.create("Тест4", "bob@example.com", 200)
 
+	def test_create_user_duplicate_email_other_case(self, user_repository):
+		"""Тест что уникальность email проверяется без учета регистра."""
+		user_repository.create("Тест1", "Case@Example.com", 100)
+		
+		with pytest.raises(EmailAlreadyExistsError):
+			user_repository.create("Тест2", "case@EXAMPLE.COM", 200)
+
+	def test_list_page(self, user_repository):
+		"""Тест постраничной выборки по курсору."""
+		for i in range(5):
+			user_repository.create(f"Тест{i}", f"page{i}@example.com", 0)
+		
+		first = user_repository.list_page(limit=3)
+		assert [user.id for user in first] == [1, 2, 3]
+		
+		second = user_repository.list_page(limit=3, after_id=first[-1].id)
+		assert [user.id for user in second] == [4, 5, 6]
+		
+		last = user_repository.list_page(limit=3, after_id=second[-1].id)
+		assert [user.id for user in last] == [7]
+		
+		assert user_repository.list_page(limit=3, after_id=7) == []
+
 	def test_get_by_id_existing(self, user_repository):
 		"""Тест поиска существующего пользователя по ID."""
 		user = user_repository.get_by_id(1)
@@ -116,6 +142,14 @@ class TestUserRepository:
 		assert user is not None
 		assert user.id == 1
 
+	def test_get_by_email_casefold(self, user_repository):
+		"""Тест поиска по email с полным приведением регистра (casefold)."""
+		user = user_repository.create("Штраус", "strauß@example.com", 0)
+		
+		found = user_repository.get_by_email("STRAUSS@example.com")
+		assert found is not None
+		assert found.id == user.id
+
 	def test_transfer_success(self, user_repository):
 		"""Тест успешного перевода."""
 		# Получаем начальные балансы
@@ -225,6 +259,71 @@ class TestUserRepository:
 		assert total_before == total_after, "Общая сумма изменилась после перевода"
 
 
+	def test_concurrent_transfers_conserve_money(self, empty_user_repository):
+		"""Тест что параллельные переводы не теряют и не создают деньги."""
+		repo = empty_user_repository
+		for i in range(20):
+			repo.create(f"Тест{i}", f"concurrent{i}@example.com", 1000)
+		total_before = sum(user.balance for user in repo.list())
+
+		def worker(seed):
+			rng = random.Random(seed)
+			for _ in range(2000):
+				from_id, to_id = rng.sample(range(1, 21), 2)
+				try:
+					repo.transfer(from_id, to_id, rng.randint(1, 50))
+				except InsufficientFundsError:
+					pass
+
+		threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		users = repo.list()
+		assert sum(user.balance for user in users) == total_before
+		assert all(user.balance >= 0 for user in users)
+
+	def test_transfer_batch_success(self, user_repository):
+		"""Тест успешного пакета переводов с балансами после каждого шага."""
+		carol = user_repository.create("Кэрол", "carol@example.com", 0)
+		
+		balances = user_repository.transfer_batch([
+			(1, carol.id, 100),
+			(carol.id, 2, 30),  # Кэрол переводит деньги, полученные в этом же пакете
+		])
+		
+		assert balances == [(0, 100), (70, 280)]
+		assert user_repository.get_by_id(1).balance == 0
+		assert user_repository.get_by_id(2).balance == 280
+		assert user_repository.get_by_id(carol.id).balance == 70
+
+	def test_transfer_batch_rollback(self, user_repository):
+		"""Тест что при ошибке в пакете не применяется ни один перевод."""
+		with pytest.raises(InsufficientFundsError):
+			user_repository.transfer_batch([
+				(1, 2, 50),
+				(2, 1, 10_000),
+			])
+		
+		assert user_repository.get_by_id(1).balance == 100
+		assert user_repository.get_by_id(2).balance == 250
+
+	def test_transfer_batch_validation(self, user_repository):
+		"""Тест проверок пакета до применения переводов."""
+		with pytest.raises(UserNotFoundError):
+			user_repository.transfer_batch([(1, 2, 10), (1, 999, 10)])
+		
+		with pytest.raises(SelfTransferError):
+			user_repository.transfer_batch([(1, 2, 10), (2, 2, 10)])
+		
+		with pytest.raises(InvalidAmountError):
+			user_repository.transfer_batch([(1, 2, 10), (2, 1, 0)])
+		
+		assert user_repository.get_by_id(1).balance == 100
+		assert user_repository.get_by_id(2).balance == 250
+
 class TestEmptyUserRepository:
 	"""Тесты для пустого репозитория пользователей."""
 
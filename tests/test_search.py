@@ -0,0 +1,234 @@
+"""
+Тесты для префиксного поиска пользователей по имени и email.
+"""
+
+import random
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import async_users, users
+from app.dependencies.user_dependencies import get_async_user_repository, get_user_repository
+from app.main import app
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.prefix_index import PrefixIndex
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.snapshot import MappedSnapshot, SeedSnapshot
+from app.repositories.sorted_list import SortedList
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+
+
+NAMES = ["Анна", "анатолий", "Ann", "annette", "Bob", "bobby", "Борис", "Ann-Marie"]
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=50, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+def _expected(users, query: str) -> list[int]:
+	"""Ищет полным обходом - эталон для search(): по имени, иначе по email."""
+	prefix = query.casefold()
+	matches = []
+	for user in users:
+		for term in (user.name.casefold(), user.email.casefold()):
+			if term.startswith(prefix):
+				matches.append((term, user.id))
+				break
+	return [user_id for _, user_id in sorted(matches)]
+
+
+def _all_pages(repo, query: str, limit: int) -> list[int]:
+	"""Собирает все страницы поиска, передавая id последнего пользователя как курсор."""
+	found, after_id = [], None
+	while True:
+		page = repo.search(query, limit, after_id)
+		found.extend(user.id for user in page)
+		if len(page) < limit:
+			return found
+		after_id = page[-1].id
+
+
+def _populate(repo) -> None:
+	"""Создает пользователей с общими началами имен и email."""
+	repo.create_many([
+		(name, f"{NAMES[(i + 3) % len(NAMES)].lower()}{i}@example.com", i)
+		for i, name in enumerate(NAMES * 3)
+	])
+
+
+class TestPrefixIndex:
+	"""Тесты для индекса префиксного поиска."""
+
+	def test_random_pages(self, monkeypatch):
+		"""Тест постраничного поиска против полного обхода."""
+		# Маленькие подсписки, чтобы страницы проходили через несколько из них
+		monkeypatch.setattr(SortedList, "LOAD", 4)
+		rng = random.Random(3)
+		people = {}
+		for user_id in range(1, 200):
+			name = "".join(rng.choice("abAB") for _ in range(rng.randint(1, 5)))
+			email = "".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) + f"{user_id}@x.io"
+			people[user_id] = (name, email)
+		index = PrefixIndex((user_id, *people[user_id]) for user_id in range(1, 100))
+		for user_id in range(100, 200):
+			index.add(user_id, *people[user_id])
+
+		class Person:
+			def __init__(self, user_id):
+				self.id = user_id
+				self.name, self.email = people[user_id]
+
+		for query in ["a", "AB", "ba", "b", "aaaa", "1", "z"]:
+			found, after = [], None
+			while page := index.search(query, 7, after):
+				found.extend(page)
+				after = (page[-1], *people[page[-1]])
+			assert found == _expected([Person(user_id) for user_id in people], query)
+
+	def test_name_and_email_match_once(self):
+		"""Тест что пользователь с подходящими именем и email выдается один раз."""
+		index = PrefixIndex([(1, "Ann", "ann@example.com"), (2, "Bob", "ann.bob@example.com")])
+
+		assert index.search("ann", 10) == [1, 2]
+		assert index.search("ann", 10, after=(1, "Ann", "ann@example.com")) == [2]
+		assert len(index) == 4
+
+
+class TestRepositorySearch:
+	"""Тесты для префиксного поиска в репозиториях."""
+
+	def test_case_insensitive(self, repository):
+		"""Тест регистронезависимого поиска по имени и email."""
+		assert [user.name for user in repository.search("АЛИ", 10)] == ["Алиса"]
+		assert [user.name for user in repository.search("BOB@", 10)] == ["Боб"]
+		assert repository.search("carol", 10) == []
+
+	@pytest.mark.parametrize("search_first", [False, True])
+	@pytest.mark.parametrize("query", ["ан", "ANN", "bob", "b", "annette1"])
+	def test_pages(self, repository, search_first, query):
+		"""Тест всех страниц поиска против полного обхода (до и после построения индекса)."""
+		if search_first:
+			repository.search("a", 1)
+		_populate(repository)
+		repository.transfer(1, 2, 10)
+
+		assert _all_pages(repository, query, 3) == _expected(repository.list(), query)
+
+	def test_unknown_cursor(self, repository):
+		"""Тест что курсор несуществующего пользователя дает пустую страницу."""
+		assert repository.search("a", 10, after_id=99) == []
+
+
+class TestSearchSources:
+	"""Тесты для поиска поверх снимка, журнала предзаписи и существующей базы."""
+
+	def test_mapped_snapshot(self, tmp_path):
+		"""Тест поиска по пользователям отображенного снимка и созданным после него."""
+		path = str(tmp_path / "users.snap")
+		InMemoryUserRepository(snapshot=SeedSnapshot([
+			(NAMES[i % len(NAMES)], f"user{i}@example.com", i) for i in range(40)
+		])).checkpoint(path)
+		repo = InMemoryUserRepository(snapshot=MappedSnapshot(path))
+		repo.get_by_id(3)
+		repo.search("a", 1)
+		repo.create("Annabel", "annabel@example.com", 0)
+
+		assert _all_pages(repo, "ann", 4) == _expected(repo.list(), "ann")
+		assert _all_pages(repo, "user1", 4) == _expected(repo.list(), "user1")
+
+	def test_wal_replay(self, tmp_path):
+		"""Тест поиска по пользователям, восстановленным из журнала предзаписи."""
+		path = str(tmp_path / "users.wal")
+		repo = InMemoryUserRepository(wal=WriteAheadLog(path))
+		repo.create("Кэрол", "carol@example.com", 40)
+		repo.wal.close()
+
+		restored = InMemoryUserRepository(wal=WriteAheadLog(path))
+
+		assert [user.id for user in restored.search("кэ", 10)] == [3]
+		restored.wal.close()
+
+	def test_sqlite_existing_database(self, tmp_path):
+		"""Тест что база без колонки name_key получает ключи поиска при открытии."""
+		path = str(tmp_path / "users.sqlite3")
+		repo = SQLiteUserRepository(path, synchronous="OFF")
+		connection = repo._connection()
+		connection.execute("DROP INDEX users_name_key")
+		connection.execute("ALTER TABLE users DROP COLUMN name_key")
+		repo.close()
+
+		reopened = SQLiteUserRepository(path, synchronous="OFF")
+
+		assert [user.id for user in reopened.search("алис", 10)] == [1]
+		assert [user.id for user in reopened.search("б", 10)] == [2]
+		reopened.close()
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+class TestSearchEndpoint:
+	"""Тесты для эндпоинта поиска пользователей."""
+
+	def _client(self, user_repository, asynchronous: bool) -> TestClient:
+		"""Создает клиент приложения с эндпоинтами пользователей поверх отдельного репозитория."""
+		search_app = FastAPI()
+		if asynchronous:
+			search_app.include_router(async_users.router, prefix="/api/v1/users")
+			repo = AsyncInMemoryUserRepository(user_repository)
+
+			async def override():
+				return repo
+
+			search_app.dependency_overrides[get_async_user_repository] = override
+		else:
+			search_app.include_router(users.router, prefix="/api/v1/users")
+			search_app.dependency_overrides[get_user_repository] = lambda: user_repository
+		for exc_class, handler in app.exception_handlers.items():
+			search_app.add_exception_handler(exc_class, handler)
+		return TestClient(search_app)
+
+	def test_pages(self, user_repository, asynchronous):
+		"""Тест постраничного поиска с курсором next_cursor."""
+		_populate(user_repository)
+		client = self._client(user_repository, asynchronous)
+		found, params = [], {"q": "an", "limit": 2}
+		while True:
+			response = client.get("/api/v1/users/search", params=params)
+			assert response.status_code == 200
+			page = response.json()
+			found.extend(user["id"] for user in page["items"])
+			if page["next_cursor"] is None:
+				break
+			params["after_id"] = page["next_cursor"]
+
+		assert found == _expected(user_repository.list(), "an")
+
+	def test_invalid_query(self, user_repository, asynchronous):
+		"""Тест что пустой запрос и слишком большая страница отклоняются валидацией."""
+		client = self._client(user_repository, asynchronous)
+
+		assert client.get("/api/v1/users/search", params={"q": ""}).status_code == 422
+		assert client.get("/api/v1/users/search").status_code == 422
+		assert client.get("/api/v1/users/search", params={"q": "a", "limit": 1000}).status_code == 422
@@ -0,0 +1,144 @@
+"""
+Тесты для репозитория пользователей в разделяемой памяти.
+"""
+
+import multiprocessing
+import uuid
+
+import pytest
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.core.exceptions import (
+	UserNotFoundError, SelfTransferError, InsufficientFundsError,
+	InvalidAmountError, EmailAlreadyExistsError, RepositoryFullError
+)
+
+
+@pytest.fixture
+def segment(tmp_path):
+	"""
+	Фикстура для параметров отдельного сегмента разделяемой памяти.
+	"""
+	return {
+		"name": f"test-{uuid.uuid4().hex[:12]}",
+		"capacity": 100,
+		"ledger_capacity": 8,
+		"lock_stripes": 4,
+		"lock_path": str(tmp_path / "users.lock"),
+	}
+
+
+@pytest.fixture
+def shared_repository(segment):
+	"""
+	Фикстура для репозитория в разделяемой памяти (с Алисой и Бобом).
+	"""
+	repo = SharedMemoryUserRepository(**segment)
+	yield repo
+	repo.close()
+	repo.unlink()
+
+
+def _transfer_worker(segment: dict, from_user_id: int, to_user_id: int, count: int) -> None:
+	"""Выполняет переводы в отдельном процессе, подключаясь к сегменту по имени."""
+	repo = SharedMemoryUserRepository(**segment)
+	for _ in range(count):
+		try:
+			repo.transfer(from_user_id, to_user_id, 1)
+		except InsufficientFundsError:
+			pass
+	try:
+		repo.create(f"Воркер{from_user_id}", f"worker{from_user_id}@example.com", 0)
+	except EmailAlreadyExistsError:
+		pass
+	repo.close()
+
+
+class TestSharedMemoryUserRepository:
+	"""Тесты для репозитория пользователей в разделяемой памяти."""
+
+	def test_init_with_test_data(self, shared_repository):
+		"""Тест инициализации с тестовыми данными."""
+		users = shared_repository.list()
+		assert [(u.id, u.name, u.email, u.balance) for u in users] == [
+			(1, "Алиса", "alice@example.com", 100),
+			(2, "Боб", "bob@example.com", 250),
+		]
+
+	def test_create_and_lookup(self, shared_repository):
+		"""Тест создания и регистронезависимого поиска по email."""
+		user = shared_repository.create("Тест", "Test@Example.com", 10)
+		
+		assert user.id == 3
+		assert shared_repository.get_by_id(3) == user
+		assert shared_repository.get_by_email("test@example.COM") == user
+		assert shared_repository.get_by_email("missing@example.com") is None
+		assert shared_repository.get_by_id(4) is None
+		with pytest.raises(EmailAlreadyExistsError):
+			shared_repository.create("Тест", "ALICE@example.com", 0)
+		assert [u.id for u in shared_repository.list_page(limit=2, after_id=1)] == [2, 3]
+
+	def test_capacity(self, shared_repository):
+		"""Тест заполнения сегмента фиксированного размера."""
+		for i in range(98):
+			shared_repository.create(f"Тест{i}", f"test{i}@example.com", 0)
+		
+		with pytest.raises(RepositoryFullError):
+			shared_repository.create("Лишний", "extra@example.com", 0)
+
+	def test_transfer_errors(self, shared_repository):
+		"""Тест ошибок перевода без изменения балансов."""
+		with pytest.raises(UserNotFoundError):
+			shared_repository.transfer(999, 2, 50)
+		with pytest.raises(SelfTransferError):
+			shared_repository.transfer(1, 1, 50)
+		with pytest.raises(InsufficientFundsError):
+			shared_repository.transfer(1, 2, 1000)
+		with pytest.raises(InvalidAmountError):
+			shared_repository.transfer(1, 2, 0)
+		with pytest.raises(InsufficientFundsError):
+			shared_repository.transfer_batch([(1, 2, 60), (1, 2, 60)])
+		
+		assert shared_repository.get_by_id(1).balance == 100
+		assert shared_repository.get_by_id(2).balance == 250
+		assert shared_repository.list_transfers(1, limit=10) == []
+
+	def test_transfer_history(self, shared_repository):
+		"""Тест истории переводов по цепочке и вытеснения старых записей из кольца."""
+		shared_repository.create("Кэрол", "carol@example.com", 100)
+		for _ in range(5):
+			shared_repository.transfer(1, 2, 1)
+			shared_repository.transfer(3, 2, 1)
+		
+		assert [t.id for t in shared_repository.list_transfers(1, limit=3)] == [9, 7, 5]
+		assert [t.id for t in shared_repository.list_transfers(1, limit=3, before_id=5)] == [3]
+		assert [t.id for t in shared_repository.list_transfers(2, limit=3, before_id=6)] == [5, 4, 3]
+		# Кольцо на 8 записей: переводы 1 и 2 уже вытеснены
+		assert [t.id for t in shared_repository.list_transfers(2, limit=20)] == [10, 9, 8, 7, 6, 5, 4, 3]
+		with pytest.raises(UserNotFoundError):
+			shared_repository.list_transfers(999, limit=10)
+
+	def test_attach_with_other_parameters(self, shared_repository, segment):
+		"""Тест подключения к сегменту с другими параметрами разметки."""
+		with pytest.raises(ValueError):
+			SharedMemoryUserRepository(**{**segment, "lock_stripes": 8})
+
+	def test_processes_share_state(self, shared_repository, segment):
+		"""Тест что процессы видят одно состояние и переводы между ними сохраняют сумму."""
+		context = multiprocessing.get_context("fork")
+		processes = [
+			context.Process(target=_transfer_worker, args=(segment, from_user_id, to_user_id, 200))
+			for from_user_id, to_user_id in [(1, 2), (2, 1), (1, 2), (2, 1)]
+		]
+		for process in processes:
+			process.start()
+		for process in processes:
+			process.join()
+		
+		assert all(process.exitcode == 0 for process in processes)
+		users = shared_repository.list()
+		assert sum(u.balance for u in users) == 350
+		assert all(u.balance >= 0 for u in users)
+		assert shared_repository.get_by_email("worker1@example.com") is not None
+		assert shared_repository.get_by_email("worker2@example.com") is not None
+		# Создание в двух процессах с одинаковым email: второй получил ошибку
+		assert len(users) == 4
@@ -0,0 +1,165 @@
+"""
+Тесты для снимков состояния и контрольных точек.
+"""
+
+import os
+
+import pytest
+from app.core.exceptions import EmailAlreadyExistsError
+from app.models.user import User
+from app.repositories.snapshot import MappedSnapshot, SeedSnapshot, write_snapshot
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+	"""
+	Фикстура для пути к файлу снимка во временном каталоге.
+	"""
+	return str(tmp_path / "users.snapshot")
+
+
+class TestMappedSnapshot:
+	"""Тесты для снимка, отображенного в память."""
+
+	def test_roundtrip(self, snapshot_path):
+		"""Тест записи и чтения снимка."""
+		users = [User(id=i, name=f"Имя{i}", email=f"User{i}@Example.com", balance=i * 10) for i in range(1, 101, 2)]
+		write_snapshot(snapshot_path, iter(users), len(users), next_id=101, lsn=7)
+		
+		snapshot = MappedSnapshot(snapshot_path)
+		assert len(snapshot) == 50
+		assert snapshot.next_id == 101
+		assert snapshot.lsn == 7
+		
+		row = snapshot.row_of_id(51)
+		assert snapshot.user(row) == User(id=51, name="Имя51", email="User51@Example.com", balance=510)
+		assert snapshot.row_of_id(50) == -1
+		assert snapshot.find_email("user99@example.com") == snapshot.row_of_id(99)
+		assert snapshot.find_email("missing@example.com") == -1
+		assert snapshot.bisect_id(50) == row
+		snapshot.close()
+
+	def test_not_a_snapshot(self, snapshot_path):
+		"""Тест открытия файла, не являющегося снимком."""
+		with open(snapshot_path, "wb") as file:
+			file.write(b"\0" * 64)
+		
+		with pytest.raises(ValueError):
+			MappedSnapshot(snapshot_path)
+
+
+class TestCheckpoint:
+	"""Тесты для контрольных точек репозитория."""
+
+	def test_restore_from_snapshot_is_lazy(self, snapshot_path):
+		"""Тест восстановления из снимка с ленивой загрузкой пользователей."""
+		repo = InMemoryUserRepository()
+		carol = repo.create("Кэрол", "carol@example.com", 0)
+		repo.transfer(1, carol.id, 30)
+		repo.checkpoint(snapshot_path)
+		
+		restored = InMemoryUserRepository(snapshot=MappedSnapshot(snapshot_path))
+		# При старте пользователи снимка не загружаются в индексы
+		assert restored._users == {}
+		
+		assert [(u.id, u.balance) for u in restored.list()] == [(1, 70), (2, 250), (3, 30)]
+		assert restored.get_by_email("CAROL@example.com").id == carol.id
+		with pytest.raises(EmailAlreadyExistsError):
+			restored.create("Алиса", "Alice@example.com", 0)
+		
+		restored.transfer(3, 2, 10)
+		dave = restored.create("Дэйв", "dave@example.com", 5)
+		assert dave.id == 4
+		assert [(u.id, u.balance) for u in restored.list_page(limit=2, after_id=2)] == [(3, 20), (4, 5)]
+		assert [u.id for u in restored.list_page(limit=10)] == [1, 2, 3, 4]
+
+	def test_checkpoint_with_wal(self, snapshot_path, tmp_path):
+		"""Тест что после контрольной точки журнал сокращается и повторяется только хвост."""
+		wal_path = str(tmp_path / "users.wal")
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		for i in range(20):
+			repo.create(f"Тест{i}", f"test{i}@example.com", 100)
+		repo.checkpoint(snapshot_path)
+		size_after_checkpoint = os.path.getsize(wal_path)
+		repo.transfer(3, 4, 60)
+		wal.close()
+		
+		assert size_after_checkpoint == 0
+		
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal, snapshot=MappedSnapshot(snapshot_path))
+		assert len(restored.list()) == 22
+		assert restored.get_by_id(3).balance == 40
+		assert restored.get_by_id(4).balance == 160
+		assert restored.create("Новый", "new@example.com", 0).id == 23
+		restored_wal.close()
+
+	def test_writes_after_checkpoint_and_restart(self, snapshot_path, tmp_path):
+		"""Тест что записи после перезапуска с пустым журналом переживают следующий перезапуск."""
+		wal_path = str(tmp_path / "users.wal")
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		repo.create("Кэрол", "carol@example.com", 0)
+		repo.transfer(1, 2, 10)
+		repo.checkpoint(snapshot_path)
+		wal.close()
+
+		# Журнал после контрольной точки пуст, нумерация продолжается после снимка
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal, snapshot=MappedSnapshot(snapshot_path))
+		repo.transfer(1, 3, 30)
+		dave = repo.create("Дэйв", "dave@example.com", 5)
+		wal.close()
+
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal, snapshot=MappedSnapshot(snapshot_path))
+		assert [(u.id, u.balance) for u in restored.list()] == [(1, 60), (2, 260), (3, 30), (4, 5)]
+		assert restored.get_by_email("dave@example.com").id == dave.id
+		assert restored.create("Ева", "eve@example.com", 0).id == 5
+		restored_wal.close()
+
+	def test_transfer_ids_continue_after_restart(self, snapshot_path, tmp_path):
+		"""Тест что номера переводов после контрольной точки и перезапуска не начинаются с 1."""
+		wal_path = str(tmp_path / "users.wal")
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		repo.transfer(1, 2, 10)
+		repo.transfer(2, 1, 20)
+		repo.checkpoint(snapshot_path)
+		repo.transfer(1, 2, 5)
+		cursor = repo.list_transfers(1, limit=1)[0].id
+		wal.close()
+
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal, snapshot=MappedSnapshot(snapshot_path))
+		assert [t.id for t in restored.list_transfers(1, limit=10)] == [3]
+		assert restored.list_transfers(1, limit=10, before_id=cursor) == []
+		_, bob = restored.transfer(1, 2, 1)
+		assert [t.id for t in restored.list_transfers(2, limit=10)] == [4, 3]
+		assert bob.balance == 246
+		restored_wal.close()
+
+	def test_previous_format(self, snapshot_path):
+		"""Тест что снимок формата USNAP002 открывается без счетчиков переводов."""
+		write_snapshot(snapshot_path, iter([User(id=1, name="Алиса", email="alice@example.com", balance=5)]), 1, 2, 0)
+		with open(snapshot_path, "rb") as file:
+			data = file.read()
+		# Прежний заголовок - без двух последних полей (количество и сумма переводов)
+		with open(snapshot_path, "wb") as file:
+			file.write(b"USNAP002" + data[8:40] + data[56:])
+		
+		snapshot = MappedSnapshot(snapshot_path)
+		assert (snapshot.transfer_count, snapshot.transfer_volume) == (0, 0)
+		assert snapshot.user(0) == User(id=1, name="Алиса", email="alice@example.com", balance=5)
+		assert snapshot.find_email("alice@example.com") == 0
+		snapshot.close()
+
+	def test_empty_seed(self):
+		"""Тест репозитория, начинающегося с пустого снимка."""
+		repo = InMemoryUserRepository(snapshot=SeedSnapshot(()))
+		
+		assert repo.list() == []
+		assert repo.create("Первый", "first@example.com", 0).id == 1
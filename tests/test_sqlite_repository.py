@@ -0,0 +1,137 @@
+"""
+Тесты для репозитория пользователей в SQLite.
+"""
+
+import threading
+
+import pytest
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.core.exceptions import (
+	UserNotFoundError, SelfTransferError,
+	InsufficientFundsError, InvalidAmountError, EmailAlreadyExistsError
+)
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+	"""
+	Фикстура для пути к файлу базы во временном каталоге.
+	"""
+	return str(tmp_path / "users.sqlite3")
+
+
+@pytest.fixture
+def sqlite_repository(sqlite_path):
+	"""
+	Фикстура для репозитория в SQLite (с Алисой и Бобом).
+	"""
+	repo = SQLiteUserRepository(sqlite_path, synchronous="OFF")
+	yield repo
+	repo.close()
+
+
+class TestSQLiteUserRepository:
+	"""Тесты для репозитория пользователей в SQLite."""
+
+	def test_init_with_test_data(self, sqlite_repository):
+		"""Тест инициализации с тестовыми данными."""
+		users = sqlite_repository.list()
+		assert [(u.id, u.name, u.email, u.balance) for u in users] == [
+			(1, "Алиса", "alice@example.com", 100),
+			(2, "Боб", "bob@example.com", 250),
+		]
+
+	def test_create_and_lookup(self, sqlite_repository):
+		"""Тест создания и регистронезависимого поиска по email."""
+		user = sqlite_repository.create("Тест", "Test@Example.com", 10)
+		
+		assert user.id == 3
+		assert sqlite_repository.get_by_id(3) == user
+		assert sqlite_repository.get_by_email("test@example.COM") == user
+		assert sqlite_repository.get_by_email("missing@example.com") is None
+		assert sqlite_repository.get_by_id(999) is None
+
+	def test_create_duplicate_email(self, sqlite_repository):
+		"""Тест создания пользователя с существующим email в другом регистре."""
+		with pytest.raises(EmailAlreadyExistsError):
+			sqlite_repository.create("Тест", "ALICE@example.com", 0)
+		
+		assert sqlite_repository.create("Тест", "test@example.com", 0).id == 3
+
+	def test_list_page(self, sqlite_repository):
+		"""Тест постраничной выборки по курсору."""
+		for i in range(3):
+			sqlite_repository.create(f"Тест{i}", f"page{i}@example.com", 0)
+		
+		assert [u.id for u in sqlite_repository.list_page(limit=2)] == [1, 2]
+		assert [u.id for u in sqlite_repository.list_page(limit=2, after_id=2)] == [3, 4]
+		assert [u.id for u in sqlite_repository.list_page(limit=2, after_id=4)] == [5]
+		assert sqlite_repository.list_page(limit=2, after_id=5) == []
+
+	def test_transfer_success(self, sqlite_repository):
+		"""Тест успешного перевода."""
+		from_user, to_user = sqlite_repository.transfer(1, 2, 50)
+		
+		assert (from_user.id, from_user.balance) == (1, 50)
+		assert (to_user.id, to_user.balance) == (2, 300)
+		assert sqlite_repository.get_by_id(1).balance == 50
+		assert sqlite_repository.get_by_id(2).balance == 300
+
+	def test_transfer_errors(self, sqlite_repository):
+		"""Тест ошибок перевода без изменения балансов."""
+		with pytest.raises(UserNotFoundError):
+			sqlite_repository.transfer(999, 2, 50)
+		with pytest.raises(UserNotFoundError):
+			sqlite_repository.transfer(1, 999, 50)
+		with pytest.raises(UserNotFoundError):
+			sqlite_repository.transfer(999, 999, 50)
+		with pytest.raises(SelfTransferError):
+			sqlite_repository.transfer(1, 1, 50)
+		with pytest.raises(InsufficientFundsError):
+			sqlite_repository.transfer(1, 2, 1000)
+		with pytest.raises(InvalidAmountError):
+			sqlite_repository.transfer(1, 2, 0)
+		
+		assert sqlite_repository.get_by_id(1).balance == 100
+		assert sqlite_repository.get_by_id(2).balance == 250
+
+	def test_transfer_batch_rollback(self, sqlite_repository):
+		"""Тест что при ошибке в пакете не применяется ни один перевод."""
+		assert sqlite_repository.transfer_batch([(1, 2, 10), (2, 1, 5)]) == [(90, 260), (255, 95)]
+		
+		with pytest.raises(InsufficientFundsError):
+			sqlite_repository.transfer_batch([(1, 2, 50), (1, 2, 50)])
+		with pytest.raises(UserNotFoundError):
+			sqlite_repository.transfer_batch([(1, 2, 10), (2, 999, 10)])
+		
+		assert sqlite_repository.get_by_id(1).balance == 95
+		assert sqlite_repository.get_by_id(2).balance == 255
+
+	def test_reopen_keeps_data(self, sqlite_repository, sqlite_path):
+		"""Тест что данные сохраняются между открытиями базы, а тестовые пользователи не дублируются."""
+		sqlite_repository.create("Тест", "test@example.com", 10)
+		sqlite_repository.transfer(2, 3, 50)
+		sqlite_repository.close()
+		
+		reopened = SQLiteUserRepository(sqlite_path)
+		assert [(u.id, u.balance) for u in reopened.list()] == [(1, 100), (2, 200), (3, 60)]
+		reopened.close()
+
+	def test_concurrent_transfers_conserve_total(self, sqlite_repository):
+		"""Тест что параллельные переводы из разных потоков сохраняют сумму балансов."""
+		def worker(from_user_id: int, to_user_id: int) -> None:
+			for _ in range(50):
+				try:
+					sqlite_repository.transfer(from_user_id, to_user_id, 7)
+				except InsufficientFundsError:
+					pass
+		
+		threads = [threading.Thread(target=worker, args=pair) for pair in [(1, 2), (2, 1)] * 4]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		
+		users = sqlite_repository.list()
+		assert sum(u.balance for u in users) == 350
+		assert all(u.balance >= 0 for u in users)
@@ -0,0 +1,215 @@
+"""
+Тесты для агрегатов по пользователям и переводам.
+"""
+
+import random
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import async_stats, stats, transfers
+from app.core.exceptions import InsufficientFundsError
+from app.dependencies.user_dependencies import get_async_user_repository, get_user_repository
+from app.main import app
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.balance_index import BalanceIndex
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.snapshot import MappedSnapshot, SeedSnapshot
+from app.repositories.sorted_list import SortedList
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+def _scan(repo) -> tuple:
+	"""Считает агрегаты полным обходом пользователей - эталон для stats()."""
+	balances = [user.balance for user in repo.list()]
+	return len(balances), sum(balances), min(balances), max(balances)
+
+
+class TestBalanceIndex:
+	"""Тесты для упорядоченного индекса балансов."""
+
+	def test_empty(self):
+		"""Тест пустого индекса."""
+		index = BalanceIndex()
+
+		assert len(index) == 0
+		assert index.min() is None
+		assert index.max() is None
+
+	def test_random_moves(self, monkeypatch):
+		"""Тест случайных изменений против пересчета по словарю балансов."""
+		# Маленькие подсписки, чтобы проверить их деление и удаление
+		monkeypatch.setattr(SortedList, "LOAD", 4)
+		rng = random.Random(7)
+		balances = {user_id: rng.randint(-50, 50) for user_id in range(1, 60)}
+		index = BalanceIndex((balance, user_id) for user_id, balance in balances.items())
+		for user_id in range(60, 120):
+			balances[user_id] = rng.randint(-50, 50)
+			index.add(user_id, balances[user_id])
+		for _ in range(2000):
+			user_id = rng.choice(list(balances))
+			new_balance = rng.randint(-100, 100)
+			index.move(user_id, balances[user_id], new_balance)
+			balances[user_id] = new_balance
+			assert (index.min(), index.max()) == (min(balances.values()), max(balances.values()))
+		assert len(index) == len(balances)
+
+
+class TestRepositoryStats:
+	"""Тесты для агрегатов в репозиториях."""
+
+	def test_initial(self, repository):
+		"""Тест агрегатов тестовых пользователей."""
+		stats = repository.stats()
+
+		assert (stats.user_count, stats.total_balance) == (2, 350)
+		assert (stats.min_balance, stats.max_balance, stats.mean_balance) == (100, 250, 175.0)
+		assert (stats.transfer_count, stats.transfer_volume) == (0, 0)
+
+	@pytest.mark.parametrize("stats_first", [False, True])
+	def test_follow_changes(self, repository, stats_first):
+		"""Тест что агрегаты следуют за созданием и переводами (до и после первого stats())."""
+		if stats_first:
+			repository.stats()
+		repository.create("Кэрол", "carol@example.com", 10)
+		repository.create_many([("Дэйв", "dave@example.com", 500), ("Дубль", "carol@example.com", 1)])
+		repository.transfer(4, 1, 300)
+		repository.transfer_batch([(2, 3, 200), (3, 1, 5)])
+		repository.apply_transfers([(1, 4, 1000), (1, 2, 1), (1, 99, 1)])
+		with pytest.raises(InsufficientFundsError):
+			repository.transfer_batch([(3, 2, 1), (3, 2, 1000)])
+
+		stats = repository.stats()
+
+		assert (stats.user_count, stats.total_balance, stats.min_balance, stats.max_balance) == _scan(repository)
+		assert (stats.transfer_count, stats.transfer_volume) == (4, 506)
+
+
+class TestStatsSources:
+	"""Тесты для агрегатов поверх снимка, журнала предзаписи и существующей базы."""
+
+	def test_mapped_snapshot(self, tmp_path):
+		"""Тест агрегатов поверх отображенного снимка с измененными после него счетами."""
+		path = str(tmp_path / "users.snap")
+		InMemoryUserRepository(snapshot=SeedSnapshot([
+			(f"user{i}", f"user{i}@example.com", 10 * i) for i in range(50)
+		])).checkpoint(path)
+		repo = InMemoryUserRepository(snapshot=MappedSnapshot(path))
+		repo.transfer(50, 1, 490)
+		repo.create("Новый", "new@example.com", 7)
+
+		stats = repo.stats()
+
+		assert (stats.user_count, stats.total_balance, stats.min_balance, stats.max_balance) == _scan(repo)
+		assert stats.total_balance == sum(10 * i for i in range(50)) + 7
+
+	def test_wal_replay(self, tmp_path):
+		"""Тест агрегатов после повтора журнала предзаписи."""
+		path = str(tmp_path / "users.wal")
+		repo = InMemoryUserRepository(wal=WriteAheadLog(path))
+		repo.create("Кэрол", "carol@example.com", 40)
+		repo.transfer(2, 3, 250)
+		repo.wal.close()
+
+		restored = InMemoryUserRepository(wal=WriteAheadLog(path))
+		stats = restored.stats()
+
+		assert (stats.user_count, stats.total_balance, stats.min_balance, stats.max_balance) == (3, 390, 0, 290)
+		assert (stats.transfer_count, stats.transfer_volume) == (1, 250)
+		restored.wal.close()
+
+	def test_checkpoint_restart(self, tmp_path):
+		"""Тест что количество и сумма переводов переживают контрольную точку и перезапуск."""
+		wal_path = str(tmp_path / "users.wal")
+		snapshot_path = str(tmp_path / "users.snap")
+		repo = InMemoryUserRepository(wal=WriteAheadLog(wal_path))
+		repo.transfer(1, 2, 30)
+		repo.transfer(2, 1, 70)
+		repo.checkpoint(snapshot_path)
+		repo.transfer(1, 2, 5)
+		repo.wal.close()
+
+		restored = InMemoryUserRepository(wal=WriteAheadLog(wal_path), snapshot=MappedSnapshot(snapshot_path))
+		stats = restored.stats()
+
+		assert (stats.transfer_count, stats.transfer_volume) == (3, 105)
+		assert (stats.user_count, stats.total_balance) == (2, 350)
+		restored.wal.close()
+
+	def test_sqlite_existing_database(self, tmp_path):
+		"""Тест что агрегаты базы без таблицы stats считаются при открытии."""
+		path = str(tmp_path / "users.sqlite3")
+		repo = SQLiteUserRepository(path, synchronous="OFF")
+		repo.transfer(1, 2, 30)
+		connection = repo._connection()
+		for statement in ("DROP TRIGGER users_stats", "DROP TRIGGER transfers_stats", "DROP TABLE stats"):
+			connection.execute(statement)
+		repo.close()
+
+		reopened = SQLiteUserRepository(path, synchronous="OFF")
+		reopened.transfer(2, 1, 10)
+		stats = reopened.stats()
+
+		assert (stats.user_count, stats.total_balance, stats.min_balance, stats.max_balance) == (2, 350, 80, 270)
+		assert (stats.transfer_count, stats.transfer_volume) == (2, 40)
+		reopened.close()
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+class TestStatsEndpoint:
+	"""Тесты для эндпоинта агрегатов."""
+
+	def test_get_stats(self, user_repository, asynchronous):
+		"""Тест агрегатов после перевода через API."""
+		stats_app = FastAPI()
+		stats_app.include_router(transfers.router, prefix="/api/v1/transfer")
+		if asynchronous:
+			stats_app.include_router(async_stats.router, prefix="/api/v1/stats")
+			repo = AsyncInMemoryUserRepository(user_repository)
+
+			async def override():
+				return repo
+
+			stats_app.dependency_overrides[get_async_user_repository] = override
+		else:
+			stats_app.include_router(stats.router, prefix="/api/v1/stats")
+		stats_app.dependency_overrides[get_user_repository] = lambda: user_repository
+		for exc_class, handler in app.exception_handlers.items():
+			stats_app.add_exception_handler(exc_class, handler)
+		client = TestClient(stats_app)
+		client.post("/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 2, "amount": 60})
+
+		response = client.get("/api/v1/stats")
+
+		assert response.status_code == 200
+		assert response.json() == {
+			"user_count": 2, "total_balance": 350, "min_balance": 40, "max_balance": 310,
+			"mean_balance": 175.0, "transfer_count": 1, "transfer_volume": 60,
+		}
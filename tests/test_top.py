@@ -0,0 +1,145 @@
+"""
+Тесты для самых богатых пользователей (top).
+"""
+
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import async_users, users
+from app.dependencies.user_dependencies import get_async_user_repository, get_user_repository
+from app.main import app
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.balance_index import BalanceIndex
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.snapshot import MappedSnapshot, SeedSnapshot
+from app.repositories.sorted_list import SortedList
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+def _ranking(repo, n: int) -> list[tuple[int, int]]:
+	"""Сортирует всех пользователей - эталон для top()."""
+	ranked = sorted(repo.list(), key=lambda user: (-user.balance, user.id))
+	return [(user.id, user.balance) for user in ranked[:n]]
+
+
+class TestBalanceIndexTop:
+	"""Тесты для выборки самых богатых счетов из индекса балансов."""
+
+	def test_order_and_ties(self, monkeypatch):
+		"""Тест порядка по убыванию баланса и по возрастанию id при равных балансах."""
+		# Маленькие подсписки, чтобы выборка проходила через несколько из них
+		monkeypatch.setattr(SortedList, "LOAD", 2)
+		index = BalanceIndex([(5, 1), (5, 2), (7, 3), (1, 4), (9, 5), (5, 6)])
+
+		assert index.top(0) == []
+		assert index.top(4) == [5, 3, 1, 2]
+		assert index.top(100) == [5, 3, 1, 2, 6, 4]
+
+	def test_empty(self):
+		"""Тест пустого индекса."""
+		assert BalanceIndex().top(3) == []
+
+
+class TestRepositoryTop:
+	"""Тесты для самых богатых пользователей в репозиториях."""
+
+	def test_initial(self, repository):
+		"""Тест тестовых пользователей."""
+		assert [user.name for user in repository.top(10)] == ["Боб", "Алиса"]
+		assert [user.id for user in repository.top(1)] == [2]
+
+	@pytest.mark.parametrize("top_first", [False, True])
+	def test_follow_changes(self, repository, top_first):
+		"""Тест что выборка следует за созданием и переводами (до и после построения индекса)."""
+		if top_first:
+			repository.top(1)
+		repository.create("Кэрол", "carol@example.com", 250)
+		repository.create_many([("Дэйв", "dave@example.com", 40), ("Ева", "eve@example.com", 100)])
+		repository.transfer(2, 4, 150)
+		repository.transfer_batch([(3, 1, 60), (5, 4, 30)])
+		repository.apply_transfers([(1, 3, 10), (4, 2, 1000)])
+
+		top = repository.top(4)
+
+		assert [(user.id, user.balance) for user in top] == _ranking(repository, 4)
+		assert all(user.version == repository.get_by_id(user.id).version for user in top)
+
+	def test_mapped_snapshot(self, tmp_path):
+		"""Тест выборки поверх отображенного снимка с измененными после него счетами."""
+		path = str(tmp_path / "users.snap")
+		InMemoryUserRepository(snapshot=SeedSnapshot([
+			(f"user{i}", f"user{i}@example.com", i % 7) for i in range(100)
+		])).checkpoint(path)
+		repo = InMemoryUserRepository(snapshot=MappedSnapshot(path))
+		repo.transfer(2, 1, 1)
+		repo.transfer(49, 3, 6)
+
+		assert [(user.id, user.balance) for user in repo.top(10)] == _ranking(repo, 10)
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+class TestTopEndpoint:
+	"""Тесты для эндпоинта самых богатых пользователей."""
+
+	def _client(self, user_repository, asynchronous: bool) -> TestClient:
+		"""Создает клиент приложения с эндпоинтами пользователей поверх отдельного репозитория."""
+		top_app = FastAPI()
+		if asynchronous:
+			top_app.include_router(async_users.router, prefix="/api/v1/users")
+			repo = AsyncInMemoryUserRepository(user_repository)
+
+			async def override():
+				return repo
+
+			top_app.dependency_overrides[get_async_user_repository] = override
+		else:
+			top_app.include_router(users.router, prefix="/api/v1/users")
+			top_app.dependency_overrides[get_user_repository] = lambda: user_repository
+		for exc_class, handler in app.exception_handlers.items():
+			top_app.add_exception_handler(exc_class, handler)
+		return TestClient(top_app)
+
+	def test_get_top(self, user_repository, asynchronous):
+		"""Тест выдачи по убыванию баланса."""
+		user_repository.create("Кэрол", "carol@example.com", 500)
+		client = self._client(user_repository, asynchronous)
+
+		response = client.get("/api/v1/users/top", params={"n": 2})
+
+		assert response.status_code == 200
+		assert [(user["id"], user["balance"]) for user in response.json()] == [(3, 500), (2, 250)]
+		assert len(client.get("/api/v1/users/top").json()) == 3
+
+	def test_invalid_n(self, user_repository, asynchronous):
+		"""Тест что n вне допустимого диапазона отклоняется валидацией."""
+		client = self._client(user_repository, asynchronous)
+
+		assert client.get("/api/v1/users/top", params={"n": 0}).status_code == 422
+		assert client.get("/api/v1/users/top", params={"n": 10_000}).status_code == 422
@@ -0,0 +1,196 @@
+"""
+Тесты для пакетного выполнения переводов и очереди с потоком-писателем.
+"""
+
+import threading
+import uuid
+
+import pytest
+from app.core.exceptions import (
+	InsufficientFundsError, InvalidAmountError, SelfTransferError, UserNotFoundError
+)
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+from app.services.transfer_engine import TransferEngine
+from app.services.user_service import UserService
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+class RecordingRepository:
+	"""Репозиторий-обертка, запоминающая размеры пакетов apply_transfers."""
+
+	def __init__(self, repo) -> None:
+		self.repo = repo
+		self.batches: list = []
+		self.release = threading.Event()
+		self.release.set()
+
+	def apply_transfers(self, transfers):
+		self.release.wait()
+		self.batches.append(len(transfers))
+		return self.repo.apply_transfers(transfers)
+
+
+class TestApplyTransfers:
+	"""Тесты для выполнения независимых переводов одним пакетом."""
+
+	def test_each_transfer_succeeds_or_fails_alone(self, repository):
+		"""Тест что отказ одного перевода не отменяет остальные, а балансы проверяются по порядку."""
+		results = repository.apply_transfers([
+			(1, 2, 60),
+			(1, 2, 60),
+			(2, 1, 300),
+			(1, 99, 1),
+			(1, 1, 1),
+			(2, 1, 0),
+			(1, 2, 40),
+		])
+		
+		assert [(from_user.balance, to_user.balance) for from_user, to_user in (results[0], results[2])] == [
+			(40, 310), (10, 340),
+		]
+		assert [type(result) for result in results[1:2] + results[3:6]] == [
+			InsufficientFundsError, UserNotFoundError, SelfTransferError, InvalidAmountError,
+		]
+		assert results[6][0].balance == 300
+		assert [user.balance for user in repository.list()] == [300, 50]
+		assert [transfer.amount for transfer in repository.list_transfers(1, limit=10)] == [40, 300, 60]
+
+	def test_interrupted_batch_rolled_back(self, repository, monkeypatch):
+		"""Тест что исключение посреди пакета возвращает балансы и версии уже выполненных переводов."""
+		if isinstance(repository, SQLiteUserRepository):
+			pytest.skip("пакет SQLite откатывает транзакция базы")
+		copy = "_copy" if isinstance(repository, InMemoryUserRepository) else "_view"
+		calls = []
+		real_copy = getattr(repository, copy)
+		
+		def broken_copy(user):
+			calls.append(user)
+			if len(calls) > 2:
+				raise RuntimeError("copy failed")
+			return real_copy(user)
+		
+		monkeypatch.setattr(repository, copy, broken_copy)
+		with pytest.raises(RuntimeError):
+			repository.apply_transfers([(1, 2, 10), (2, 1, 20)])
+		monkeypatch.undo()
+		
+		assert [(user.balance, user.version) for user in repository.list()] == [(100, 0), (250, 0)]
+		assert repository.stats().total_balance == 350
+
+	def test_replayed_from_wal(self, tmp_path):
+		"""Тест что выполненные переводы пакета восстанавливаются из журнала."""
+		path = str(tmp_path / "users.wal")
+		repo = InMemoryUserRepository(wal=WriteAheadLog(path))
+		repo.apply_transfers([(1, 2, 30), (1, 2, 500), (2, 1, 5)])
+		repo.wal.close()
+		
+		restored = InMemoryUserRepository(wal=WriteAheadLog(path))
+		assert [user.balance for user in restored.list()] == [75, 275]
+		restored.wal.close()
+
+
+class TestTransferEngine:
+	"""Тесты для очереди переводов с потоком-писателем."""
+
+	def test_results_and_errors(self, user_repository):
+		"""Тест результата и исключения для переводов через очередь."""
+		engine = TransferEngine(user_repository)
+		try:
+			from_user, to_user = engine.transfer(1, 2, 30)
+			assert (from_user.balance, to_user.balance) == (70, 280)
+			with pytest.raises(InsufficientFundsError):
+				engine.transfer(1, 2, 1000)
+			with pytest.raises(UserNotFoundError):
+				engine.transfer(1, 99, 1)
+		finally:
+			engine.close()
+
+	def test_batches_while_writer_busy(self, user_repository):
+		"""Тест что переводы, поставленные пока писатель занят, уходят одним пакетом не больше max_batch."""
+		repo = RecordingRepository(user_repository)
+		repo.release.clear()
+		engine = TransferEngine(repo, max_batch=4)
+		futures = [engine.submit(1, 2, 1) for _ in range(7)]
+		repo.release.set()
+		
+		assert [future.result()[0].balance for future in futures] == list(range(99, 92, -1))
+		engine.close()
+		# Первый пакет мог забрать писатель до постановки остальных
+		assert sum(repo.batches) == 7 and max(repo.batches) <= 4 and len(repo.batches) <= 3
+
+	def test_close_applies_pending(self, user_repository):
+		"""Тест что остановка выполняет поставленные переводы и закрывает прием."""
+		engine = TransferEngine(user_repository, max_wait=10.0)
+		future = engine.submit(2, 1, 50)
+		engine.close()
+		
+		assert future.result()[1].balance == 150
+		with pytest.raises(RuntimeError):
+			engine.submit(2, 1, 50)
+
+	def test_concurrent_transfers_conserve_money(self, user_repository):
+		"""Тест что параллельные переводы через очередь сохраняют общую сумму."""
+		for i in range(8):
+			user_repository.create(f"user{i}", f"user{i}@example.com", 100)
+		engine = TransferEngine(user_repository, max_wait=0.0005)
+
+		def worker(offset: int) -> None:
+			for i in range(200):
+				try:
+					engine.transfer(1 + (i + offset) % 10, 1 + (i * 7 + offset + 1) % 10, 3)
+				except (InsufficientFundsError, SelfTransferError):
+					pass
+
+		threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		engine.close()
+		
+		assert sum(user.balance for user in user_repository.list()) == 1150
+
+	def test_wal_durability_waited_by_caller(self, tmp_path):
+		"""Тест что перевод с журналом предзаписи возвращается уже записанным на диск."""
+		repo = InMemoryUserRepository(wal=WriteAheadLog(str(tmp_path / "users.wal")))
+		engine = TransferEngine(repo)
+		engine.transfer(1, 2, 10)
+		engine.close()
+		
+		assert repo.wal._durable_lsn == repo.wal.last_lsn
+		repo.wal.close()
+
+	def test_service_uses_engine(self, user_repository):
+		"""Тест что сервис отправляет переводы в очередь, если она задана."""
+		repo = RecordingRepository(user_repository)
+		engine = TransferEngine(repo)
+		service = UserService(user_repository, transfer_engine=engine)
+		service.transfer(1, 2, 10)
+		engine.close()
+		
+		assert repo.batches == [1]
@@ -13,7 +13,7 @@ class TestTransferEndpoints:
 		"""Тест успешного перевода денег."""
 		# Получаем начальные балансы
 		users_response = client.get("/api/v1/users")
-		initial_users = users_response.json()
+		initial_users = users_response.json()["items"]
 		initial_balances = {user["id"]: user["balance"] for user in initial_users}
 		amount = 50
 		transfer_data = {
@@ -39,7 +39,7 @@ class TestTransferEndpoints:
 		
 		# Проверяем что балансы действительно изменились в системе
 		users_response = client.get("/api/v1/users")
-		final_users = users_response.json()
+		final_users = users_response.json()["items"]
 		final_balances = {user["id"]: user["balance"] for user in final_users}
 		
 		# Проверяем изменения балансов
@@ -120,6 +120,18 @@ class TestTransferEndpoints:
 		# Pydantic валидация возвращает 422 для некорректных данных
 		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
+	def test_transfer_amount_out_of_range(self, client):
+		"""Тест перевода с суммой, не помещающейся в int64."""
+		transfer_data = {
+			"from_user_id": 1,
+			"to_user_id": 2,
+			"amount": 2**63
+		}
+		
+		response = client.post("/api/v1/transfer", json=transfer_data)
+		
+		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
 	def test_transfer_missing_required_fields(self, client):
 		"""Тест перевода без обязательных полей."""
 		# Без from_user_id
@@ -171,7 +183,7 @@ class TestTransferEndpoints:
 		"""Тест отката транзакции при ошибке."""
 		# Получаем начальные балансы
 		users_response = client.get("/api/v1/users")
-		initial_users = users_response.json()
+		initial_users = users_response.json()["items"]
 		initial_balances = {user["id"]: user["balance"] for user in initial_users}
 		
 		# Пытаемся выполнить перевод с ошибкой
@@ -188,8 +200,128 @@ class TestTransferEndpoints:
 		
 		# Проверяем что балансы не изменились
 		users_response = client.get("/api/v1/users")
-		final_users = users_response.json()
+		final_users = users_response.json()["items"]
 		final_balances = {user["id"]: user["balance"] for user in final_users}
 		
 		# Балансы должны остаться неизменными
 		assert initial_balances == final_balances, "Транзакция не была откачена"
+
+
+class TestTransferBatchEndpoint:
+	"""Тесты для эндпоинта пакетных переводов."""
+
+	def _create_user(self, client, email, balance):
+		"""Создает пользователя через API и возвращает его ID."""
+		response = client.post("/api/v1/users", json={
+			"name": "Пакет",
+			"email": email,
+			"balance": balance
+		})
+		assert response.status_code == status.HTTP_201_CREATED
+		return response.json()["id"]
+
+	def test_transfer_batch_success(self, client):
+		"""Тест успешного пакета переводов."""
+		first = self._create_user(client, "batch1@example.com", 100)
+		second = self._create_user(client, "batch2@example.com", 0)
+		
+		response = client.post("/api/v1/transfer/batch", json=[
+			{"from_user_id": first, "to_user_id": second, "amount": 60},
+			{"from_user_id": second, "to_user_id": first, "amount": 10},
+		])
+		
+		assert response.status_code == status.HTTP_200_OK
+		results = response.json()["results"]
+		assert len(results) == 2
+		assert results[0]["from_user_balance"] == 40
+		assert results[0]["to_user_balance"] == 60
+		assert results[1]["from_user_balance"] == 50
+		assert results[1]["to_user_balance"] == 50
+
+	def test_transfer_batch_rollback(self, client):
+		"""Тест что пакет с ошибкой не применяется целиком."""
+		first = self._create_user(client, "batch3@example.com", 100)
+		second = self._create_user(client, "batch4@example.com", 0)
+		
+		response = client.post("/api/v1/transfer/batch", json=[
+			{"from_user_id": first, "to_user_id": second, "amount": 60},
+			{"from_user_id": first, "to_user_id": second, "amount": 60},
+		])
+		
+		assert response.status_code == status.HTTP_400_BAD_REQUEST
+		assert "Недостаточно средств" in response.json()["detail"]
+		
+		# Первый перевод тоже должен быть откачен
+		response = client.post("/api/v1/transfer", json={
+			"from_user_id": first,
+			"to_user_id": second,
+			"amount": 100
+		})
+		assert response.status_code == status.HTTP_200_OK
+
+	def test_transfer_batch_empty(self, client):
+		"""Тест что пустой пакет не принимается."""
+		response = client.post("/api/v1/transfer/batch", json=[])
+		
+		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+	def test_transfer_batch_invalid_item(self, client):
+		"""Тест валидации каждого перевода пакета."""
+		response = client.post("/api/v1/transfer/batch", json=[
+			{"from_user_id": 1, "to_user_id": 2, "amount": 10},
+			{"from_user_id": 1, "to_user_id": 2, "amount": -10},
+		])
+		
+		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestUserTransfersEndpoint:
+	"""Тесты для эндпоинта истории переводов пользователя."""
+
+	def _create_user(self, client, email, balance):
+		"""Создает пользователя через API и возвращает его ID."""
+		response = client.post("/api/v1/users", json={
+			"name": "История",
+			"email": email,
+			"balance": balance
+		})
+		assert response.status_code == status.HTTP_201_CREATED
+		return response.json()["id"]
+
+	def test_history_pages_backwards(self, client):
+		"""Тест постраничного чтения истории от новых переводов к старым."""
+		first = self._create_user(client, "history1@example.com", 100)
+		second = self._create_user(client, "history2@example.com", 100)
+		for amount in (1, 2, 3):
+			client.post("/api/v1/transfer", json={"from_user_id": first, "to_user_id": second, "amount": amount})
+		client.post("/api/v1/transfer/batch", json=[{"from_user_id": second, "to_user_id": first, "amount": 4}])
+		
+		response = client.get(f"/api/v1/users/{first}/transfers", params={"limit": 3})
+		
+		assert response.status_code == status.HTTP_200_OK
+		page = response.json()
+		assert [item["amount"] for item in page["items"]] == [4, 3, 2]
+		assert page["items"][0]["from_user_id"] == second
+		assert page["items"][0]["to_user_id"] == first
+		assert "created_at" in page["items"][0]
+		assert page["next_cursor"] == page["items"][-1]["id"]
+		
+		response = client.get(f"/api/v1/users/{first}/transfers", params={"limit": 3, "before_id": page["next_cursor"]})
+		page = response.json()
+		assert [item["amount"] for item in page["items"]] == [1]
+		assert page["next_cursor"] is None
+
+	def test_history_empty(self, client):
+		"""Тест истории пользователя без переводов."""
+		user_id = self._create_user(client, "history3@example.com", 0)
+		
+		response = client.get(f"/api/v1/users/{user_id}/transfers")
+		
+		assert response.status_code == status.HTTP_200_OK
+		assert response.json() == {"items": [], "next_cursor": None}
+
+	def test_history_user_not_found(self, client):
+		"""Тест истории несуществующего пользователя."""
+		response = client.get("/api/v1/users/999999/transfers")
+		
+		assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -86,12 +86,20 @@ class TestUsersEndpoints:
 		response = client.post("/api/v1/users", json={"name": "Тест7"})
 		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
+	def test_create_user_balance_out_of_range(self, client):
+		"""Тест создания пользователя с отрицательным или не помещающимся в int64 балансом."""
+		for balance in (-1, 2**63):
+			response = client.post(
+				"/api/v1/users", json={"name": "Тест8", "email": "test8@example.com", "balance": balance}
+			)
+			assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
 	def test_list_users_success(self, client):
 		"""Тест успешного получения списка пользователей."""
 		response = client.get("/api/v1/users")
 		
 		assert response.status_code == status.HTTP_200_OK
-		data = response.json()
+		data = response.json()["items"]
 		assert isinstance(data, list)
 		assert len(data) >= 2  # Минимум 2 тестовых пользователя (Алиса и Боб)
 		
@@ -108,7 +116,7 @@ class TestUsersEndpoints:
 		response = client.get("/api/v1/users")
 		
 		assert response.status_code == status.HTTP_200_OK
-		data = response.json()
+		data = response.json()["items"]
 		assert isinstance(data, list)
 		
 		# Проверяем что все пользователи имеют правильную структуру
@@ -124,7 +132,7 @@ class TestUsersEndpoints:
 		response = client.get("/api/v1/users")
 		
 		assert response.status_code == status.HTTP_200_OK
-		data = response.json()
+		data = response.json()["items"]
 		
 		# Проверяем что есть тестовые пользователи
 		names = [user["name"] for user in data]
@@ -134,3 +142,49 @@ class TestUsersEndpoints:
 		assert "Боб" in names
 		assert "alice@example.com" in emails
 		assert "bob@example.com" in emails
+
+	def test_list_users_pagination(self, client):
+		"""Тест постраничного обхода списка пользователей по курсору."""
+		for i in range(3):
+			client.post("/api/v1/users", json={"name": f"Стр{i}", "email": f"page{i}@example.com"})
+		
+		all_ids = []
+		after_id = None
+		while True:
+			params = {"limit": 2}
+			if after_id is not None:
+				params["after_id"] = after_id
+			response = client.get("/api/v1/users", params=params)
+			
+			assert response.status_code == status.HTTP_200_OK
+			data = response.json()
+			assert len(data["items"]) <= 2
+			all_ids.extend(user["id"] for user in data["items"])
+			after_id = data["next_cursor"]
+			if after_id is None:
+				break
+		
+		assert all_ids == sorted(all_ids)
+		assert len(all_ids) == len(set(all_ids))
+		assert len(all_ids) >= 5
+
+	def test_list_users_invalid_limit(self, client):
+		"""Тест ограничения размера страницы."""
+		response = client.get("/api/v1/users", params={"limit": 0})
+		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+		
+		response = client.get("/api/v1/users", params={"limit": 100_000})
+		assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+	def test_ids_out_of_range(self, client):
+		"""Тест что id и курсоры, не помещающиеся в int64, отклоняются с 422, а не 500."""
+		too_big = 2**63
+		for url, params in (
+			(f"/api/v1/users/{too_big}", {}),
+			(f"/api/v1/users/{too_big}/transfers", {}),
+			("/api/v1/users/1/transfers", {"before_id": too_big}),
+			("/api/v1/users", {"after_id": too_big}),
+			("/api/v1/users/search", {"q": "тест", "after_id": too_big}),
+		):
+			response = client.get(url, params=params)
+			assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
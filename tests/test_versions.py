@@ -0,0 +1,262 @@
+"""
+Тесты для версий пользователей и условных переводов (If-Match).
+"""
+
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import async_transfers, async_users, transfers, users
+from app.core.etag import parse_if_match
+from app.core.exceptions import InsufficientFundsError, UserNotFoundError, VersionConflictError
+from app.dependencies.user_dependencies import get_async_user_repository, get_user_repository
+from app.main import app
+from app.repositories.async_user_repository import AsyncInMemoryUserRepository
+from app.repositories.columnar_user_repository import ColumnarUserRepository
+from app.repositories.shared_memory_user_repository import SharedMemoryUserRepository
+from app.repositories.snapshot import MappedSnapshot
+from app.repositories.sqlite_user_repository import SQLiteUserRepository
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+from app.services.transfer_engine import TransferEngine
+from app.services.user_service import UserService
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite", "shared_memory"])
+def repository(request, tmp_path):
+	"""
+	Фикстура для репозиториев всех видов (с Алисой и Бобом).
+	"""
+	if request.param == "memory":
+		yield InMemoryUserRepository()
+	elif request.param == "columnar":
+		yield ColumnarUserRepository()
+	elif request.param == "sqlite":
+		repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"), synchronous="OFF")
+		yield repo
+		repo.close()
+	else:
+		repo = SharedMemoryUserRepository(
+			name=f"test-{uuid.uuid4().hex[:12]}", capacity=10, lock_path=str(tmp_path / "users.lock")
+		)
+		yield repo
+		repo.close()
+		repo.unlink()
+
+
+def _client(user_repository, asynchronous: bool = False) -> TestClient:
+	"""Создает клиент приложения с эндпоинтами пользователей и переводов поверх отдельного репозитория."""
+	versioned_app = FastAPI()
+	if asynchronous:
+		versioned_app.include_router(async_users.router, prefix="/api/v1/users")
+		versioned_app.include_router(async_transfers.router, prefix="/api/v1/transfer")
+		repo = AsyncInMemoryUserRepository(user_repository)
+
+		async def override():
+			return repo
+
+		versioned_app.dependency_overrides[get_async_user_repository] = override
+	else:
+		versioned_app.include_router(users.router, prefix="/api/v1/users")
+		versioned_app.include_router(transfers.router, prefix="/api/v1/transfer")
+		versioned_app.dependency_overrides[get_user_repository] = lambda: user_repository
+	for exc_class, handler in app.exception_handlers.items():
+		versioned_app.add_exception_handler(exc_class, handler)
+	return TestClient(versioned_app)
+
+
+class TestRepositoryVersions:
+	"""Тесты для версий пользователей в репозиториях."""
+
+	def test_new_user_version(self, repository):
+		"""Тест что новый пользователь создается с версией 0."""
+		carol = repository.create("Кэрол", "carol@example.com", 10)
+
+		assert carol.version == 0
+		assert repository.get_by_id(carol.id).version == 0
+
+	def test_transfer_bumps_versions(self, repository):
+		"""Тест что перевод увеличивает версии обоих пользователей."""
+		alice, bob = repository.transfer(1, 2, 10)
+
+		assert (alice.version, bob.version) == (1, 1)
+		repository.transfer(2, 1, 5)
+		assert [user.version for user in repository.list()] == [2, 2]
+		assert repository.get_by_email("bob@example.com").version == 2
+
+	def test_rejected_transfer_keeps_versions(self, repository):
+		"""Тест что отклоненный перевод не меняет версии."""
+		with pytest.raises(InsufficientFundsError):
+			repository.transfer(1, 2, 1000)
+
+		assert [user.version for user in repository.list()] == [0, 0]
+
+	def test_expected_version_matches(self, repository):
+		"""Тест условного перевода с актуальной версией."""
+		repository.transfer(1, 2, 10)
+
+		alice, bob = repository.transfer(1, 2, 10, expected_version=1)
+
+		assert (alice.balance, alice.version) == (80, 2)
+		assert (bob.balance, bob.version) == (270, 2)
+
+	def test_expected_version_conflict(self, repository):
+		"""Тест что перевод с устаревшей версией отклоняется без изменений."""
+		repository.transfer(2, 1, 10)
+
+		with pytest.raises(VersionConflictError):
+			repository.transfer(1, 2, 10, expected_version=0)
+
+		assert [(user.balance, user.version) for user in repository.list()] == [(110, 1), (240, 1)]
+
+	def test_conflict_checks_order(self, repository):
+		"""Тест что отсутствие получателя проверяется раньше версии, а версия - раньше баланса."""
+		with pytest.raises(UserNotFoundError):
+			repository.transfer(1, 99, 10, expected_version=5)
+		with pytest.raises(VersionConflictError):
+			repository.transfer(1, 2, 1000, expected_version=5)
+
+	def test_batches_bump_versions(self, repository):
+		"""Тест что пакетные переводы увеличивают версии по каждому переводу."""
+		repository.transfer_batch([(1, 2, 10), (2, 1, 5)])
+		results = repository.apply_transfers([(1, 2, 10), (1, 2, 1000)])
+
+		assert results[0][0].version == 3
+		assert isinstance(results[1], InsufficientFundsError)
+		assert [user.version for user in repository.list()] == [3, 3]
+
+	def test_export_versions(self, repository):
+		"""Тест что выгрузка отдает версии на момент вызова."""
+		repository.transfer(1, 2, 10)
+
+		exported = repository.export()
+		repository.transfer(1, 2, 10)
+
+		assert [user.version for user in exported] == [1, 1]
+
+
+class TestVersionPersistence:
+	"""Тесты для сохранения версий в журнале предзаписи и снимках."""
+
+	def test_wal_replay_restores_versions(self, tmp_path):
+		"""Тест что версии восстанавливаются повтором журнала."""
+		wal_path = str(tmp_path / "users.wal")
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		repo.transfer(1, 2, 10)
+		repo.transfer_batch([(2, 1, 5), (1, 2, 1)])
+		wal.close()
+
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal)
+		assert [user.version for user in restored.list()] == [3, 3]
+		with pytest.raises(VersionConflictError):
+			restored.transfer(1, 2, 1, expected_version=2)
+		restored_wal.close()
+
+	def test_checkpoint_keeps_versions(self, tmp_path):
+		"""Тест что версии переживают контрольную точку и отображенный снимок."""
+		snapshot_path = str(tmp_path / "users.snap")
+		repo = InMemoryUserRepository()
+		repo.transfer(1, 2, 10)
+		repo.checkpoint(snapshot_path)
+
+		restored = InMemoryUserRepository(snapshot=MappedSnapshot(snapshot_path))
+
+		assert [user.version for user in restored.list()] == [1, 1]
+		assert restored.transfer(1, 2, 10, expected_version=1)[0].version == 2
+
+	def test_sqlite_migrates_version_column(self, tmp_path):
+		"""Тест что база без колонки version получает ее при открытии."""
+		path = str(tmp_path / "users.sqlite3")
+		repo = SQLiteUserRepository(path, synchronous="OFF")
+		connection = repo._connection()
+		connection.execute("ALTER TABLE users DROP COLUMN version")
+		repo.close()
+
+		reopened = SQLiteUserRepository(path, synchronous="OFF")
+
+		assert [user.version for user in reopened.list()] == [0, 0]
+		assert reopened.transfer(1, 2, 10, expected_version=0)[0].version == 1
+		reopened.close()
+
+
+class TestVersionedService:
+	"""Тесты для условных переводов в сервисе."""
+
+	def test_conditional_transfer_bypasses_engine(self, user_repository):
+		"""Тест что перевод с версией выполняется напрямую, а без версии - через очередь."""
+		engine = TransferEngine(user_repository)
+		service = UserService(user_repository, transfer_engine=engine)
+
+		service.transfer(1, 2, 10)
+		with pytest.raises(VersionConflictError):
+			service.transfer(1, 2, 10, expected_version=0)
+		alice, _ = service.transfer(1, 2, 10, expected_version=1)
+		engine.close()
+
+		assert (alice.balance, alice.version) == (80, 2)
+
+	def test_get_user(self, user_service):
+		"""Тест получения пользователя по ID."""
+		assert user_service.get_user(2).email == "bob@example.com"
+		with pytest.raises(UserNotFoundError):
+			user_service.get_user(99)
+
+
+class TestIfMatch:
+	"""Тесты для разбора заголовка If-Match."""
+
+	@pytest.mark.parametrize("value, version", [(None, None), ('"3"', 3), ('W/"12"', 12), ("7", 7)])
+	def test_parse(self, value, version):
+		"""Тест сильного, слабого и бескавычечного ETag."""
+		assert parse_if_match(value) == version
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+class TestVersionEndpoints:
+	"""Тесты для ETag и If-Match в эндпоинтах."""
+
+	def test_get_user_etag(self, user_repository, asynchronous):
+		"""Тест что пользователь отдается с версией в ETag."""
+		client = _client(user_repository, asynchronous)
+		client.post("/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 2, "amount": 10})
+
+		response = client.get("/api/v1/users/1")
+
+		assert response.status_code == 200
+		assert response.json()["version"] == 1
+		assert response.headers["etag"] == '"1"'
+		assert client.get("/api/v1/users/99").status_code == 404
+
+	def test_transfer_if_match(self, user_repository, asynchronous):
+		"""Тест условного перевода: актуальная версия выполняется, устаревшая получает 409."""
+		client = _client(user_repository, asynchronous)
+		etag = client.get("/api/v1/users/1").headers["etag"]
+		transfer = {"from_user_id": 1, "to_user_id": 2, "amount": 10}
+
+		response = client.post("/api/v1/transfer", json=transfer, headers={"If-Match": etag})
+
+		assert response.status_code == 200
+		assert response.json()["from_user_version"] == 1
+		assert response.json()["to_user_version"] == 1
+		assert response.headers["etag"] == '"1"'
+
+		stale = client.post("/api/v1/transfer", json=transfer, headers={"If-Match": etag})
+
+		assert stale.status_code == 409
+		assert user_repository.get_by_id(1).balance == 90
+
+	def test_invalid_if_match(self, user_repository, asynchronous):
+		"""Тест что некорректный If-Match отклоняется валидацией."""
+		client = _client(user_repository, asynchronous)
+
+		response = client.post(
+			"/api/v1/transfer", json={"from_user_id": 1, "to_user_id": 2, "amount": 10},
+			headers={"If-Match": "abc"},
+		)
+
+		assert response.status_code == 422
+		assert user_repository.get_by_id(1).version == 0
@@ -0,0 +1,163 @@
+"""
+Тесты для журнала предзаписи и восстановления репозитория.
+"""
+
+import os
+import threading
+
+import pytest
+from app.core.exceptions import InsufficientFundsError, WriteAheadLogError
+from app.repositories import wal as wal_module
+from app.repositories.user_repository import InMemoryUserRepository
+from app.repositories.wal import WriteAheadLog
+
+
+@pytest.fixture
+def wal_path(tmp_path):
+	"""
+	Фикстура для пути к файлу журнала во временном каталоге.
+	"""
+	return str(tmp_path / "users.wal")
+
+
+class TestWriteAheadLog:
+	"""Тесты для журнала предзаписи."""
+
+	def test_replay_restores_state(self, wal_path):
+		"""Тест восстановления пользователей и балансов после перезапуска."""
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		carol = repo.create("Кэрол", "carol@example.com", 10)
+		repo.transfer(1, carol.id, 40)
+		repo.transfer_batch([(2, 1, 100), (carol.id, 2, 50)])
+		with pytest.raises(InsufficientFundsError):
+			repo.transfer(carol.id, 1, 1000)
+		wal.close()
+		
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal)
+		
+		assert [(u.id, u.email, u.balance) for u in restored.list()] == [
+			(1, "alice@example.com", 160),
+			(2, "bob@example.com", 200),
+			(3, "carol@example.com", 0),
+		]
+		# Новые записи продолжают нумерацию и индексы
+		assert restored.create("Дэйв", "dave@example.com", 0).id == 4
+		assert restored.get_by_email("CAROL@example.com").id == 3
+		restored_wal.close()
+
+	def test_replay_restores_transfer_history(self, wal_path):
+		"""Тест что история переводов и её номера восстанавливаются после перезапуска."""
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		repo.transfer(1, 2, 10)
+		repo.transfer_batch([(2, 1, 20), (1, 2, 30)])
+		repo.apply_transfers([(2, 1, 40)])
+		history = repo.list_transfers(1, limit=10)
+		wal.close()
+		
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal)
+		
+		assert [(t.id, t.from_user_id, t.to_user_id, t.amount) for t in restored.list_transfers(1, limit=10)] == [
+			(t.id, t.from_user_id, t.to_user_id, t.amount) for t in history
+		]
+		# Курсор, выданный до перезапуска, указывает на те же переводы
+		assert [t.id for t in restored.list_transfers(1, limit=2, before_id=3)] == [2, 1]
+		assert restored.transfer(1, 2, 1)[0].balance == 119
+		assert restored.list_transfers(2, limit=1)[0].id == 5
+		restored_wal.close()
+
+	def test_torn_tail_is_truncated(self, wal_path):
+		"""Тест что недописанная последняя запись отбрасывается."""
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		repo.transfer(1, 2, 10)
+		repo.transfer(1, 2, 20)
+		wal.close()
+		
+		with open(wal_path, "r+b") as file:
+			file.seek(-3, 2)
+			file.truncate()
+		
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal)
+		assert restored.get_by_id(1).balance == 90
+		
+		# После отрезанного хвоста журнал снова пригоден для записи
+		restored.transfer(1, 2, 5)
+		restored_wal.close()
+		
+		final_wal = WriteAheadLog(wal_path)
+		assert InMemoryUserRepository(wal=final_wal).get_by_id(1).balance == 85
+		final_wal.close()
+
+	def test_group_commit_shares_fsync(self, wal_path, monkeypatch):
+		"""Тест что конкурентные писатели делят fsync между собой."""
+		fsyncs = []
+		real_fsync = wal_module.os.fsync
+		monkeypatch.setattr(wal_module.os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+		
+		wal = WriteAheadLog(wal_path, batch_window=0.01, max_batch=1000)
+		repo = InMemoryUserRepository(wal=wal)
+		for i in range(16):
+			repo.create(f"Тест{i}", f"group{i}@example.com", 100)
+		fsyncs.clear()
+		
+		def worker(user_id):
+			for _ in range(10):
+				repo.transfer(user_id, 1, 1)
+		
+		threads = [threading.Thread(target=worker, args=(user_id,)) for user_id in range(3, 19)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		wal.close()
+		
+		assert 0 < len(fsyncs) < 160
+
+	def test_io_error_fails_writes(self, wal_path, monkeypatch):
+		"""Тест что после ошибки записи изменения отклоняются, а после перезапуска откатываются."""
+		wal = WriteAheadLog(wal_path)
+		repo = InMemoryUserRepository(wal=wal)
+		repo.transfer(1, 2, 5)
+		
+		def broken_fsync(fd):
+			raise OSError("disk failure")
+		
+		monkeypatch.setattr(wal_module.os, "fsync", broken_fsync)
+		with pytest.raises(WriteAheadLogError):
+			repo.transfer(1, 2, 10)
+		
+		# Журнал в состоянии отказа: перевод не попал на диск, и репозиторий
+		# не отдает его ни читателям, ни повторной попытке
+		with pytest.raises(WriteAheadLogError):
+			repo.transfer(1, 2, 10)
+		with pytest.raises(WriteAheadLogError):
+			repo.get_by_id(1)
+		with pytest.raises(WriteAheadLogError):
+			repo.list()
+		monkeypatch.undo()
+		
+		restored_wal = WriteAheadLog(wal_path)
+		restored = InMemoryUserRepository(wal=restored_wal)
+		assert [(u.id, u.balance) for u in restored.list()] == [(1, 95), (2, 255)]
+		restored_wal.close()
+
+	def test_checkpoint_after_io_error(self, wal_path, tmp_path, monkeypatch):
+		"""Тест что после ошибки записи контрольная точка не сохраняет незафиксированные изменения."""
+		snapshot_path = str(tmp_path / "users.snapshot")
+		repo = InMemoryUserRepository(wal=WriteAheadLog(wal_path))
+		
+		def broken_fsync(fd):
+			raise OSError("disk failure")
+		
+		monkeypatch.setattr(wal_module.os, "fsync", broken_fsync)
+		with pytest.raises(WriteAheadLogError):
+			repo.transfer(1, 2, 10)
+		
+		with pytest.raises(WriteAheadLogError):
+			repo.checkpoint(snapshot_path)
+		assert not os.path.exists(snapshot_path)